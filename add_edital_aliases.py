@@ -0,0 +1,33 @@
+"""
+Migração: criar a tabela edital_aliases e indexar as chaves de identidade
+dos editais já cadastrados (dedup entre plataformas). Também substitui as
+chaves num:/proc: do formato antigo (sem unidade e modalidade).
+Rodar uma vez (é idempotente): python add_edital_aliases.py
+"""
+import os
+import sys
+
+# Adicionar o diretório do projeto ao path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from sgl.app import create_app
+from sgl.models.database import db, EditalAlias
+from sgl.services.identidade_edital import indexar_editais_existentes, remover_chaves_legadas
+
+app = create_app(iniciar_scheduler=False)
+
+with app.app_context():
+    EditalAlias.__table__.create(db.engine, checkfirst=True)
+    print("✅ Tabela edital_aliases pronta.")
+
+    removidas = remover_chaves_legadas()
+    if removidas:
+        print(f"✅ {removidas} chaves num:/proc: do formato antigo removidas.")
+
+    stats = indexar_editais_existentes()
+    print(f"✅ {stats['editais']} editais indexados, {stats['chaves_novas']} chaves novas.")
+
+    if stats['duplicados']:
+        print(f"\n⚠️  {stats['duplicados']} editais já duplicavam outro (o mais antigo ficou com a chave):")
+        for par in stats['exemplos_duplicados']:
+            print(f"   edital {par['edital_id']} → original {par['original_id']}")
@@ -0,0 +1,33 @@
+"""
+Migração: colunas minhash / grupo_similar_id em editais, tabela
+edital_lsh_bandas e assinatura MinHash dos editais já cadastrados
+(detecção de quase duplicados). Rodar uma vez (é idempotente):
+python add_edital_minhash.py
+"""
+import os
+import sys
+
+# Adicionar o diretório do projeto ao path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from sgl.app import create_app
+from sgl.models.database import db, EditalLshBanda
+from sgl.services.similaridade_edital import indexar_similaridade_existentes
+
+app = create_app(iniciar_scheduler=False)
+
+with app.app_context():
+    from sqlalchemy import text
+
+    db.session.execute(text("ALTER TABLE editais ADD COLUMN IF NOT EXISTS minhash BYTEA"))
+    db.session.execute(text("ALTER TABLE editais ADD COLUMN IF NOT EXISTS grupo_similar_id INTEGER"))
+    db.session.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_editais_grupo_similar_id ON editais(grupo_similar_id)"
+    ))
+    db.session.commit()
+    EditalLshBanda.__table__.create(db.engine, checkfirst=True)
+    print("✅ Colunas minhash/grupo_similar_id e tabela edital_lsh_bandas prontas.")
+
+    stats = indexar_similaridade_existentes()
+    print(f"✅ {stats['editais']} editais indexados, {stats['agrupados']} em grupos de quase duplicados, "
+          f"{stats['sem_texto']} sem objeto suficiente.")
@@ -0,0 +1,37 @@
+"""
+Migração: índices dos carimbos de versão dos ETags (utils/etag.py).
+max(updated_at)/max(data_triagem) passam a ler só a ponta do índice em vez
+de varrer as tabelas; os count(*) viram index-only scan nos índices
+estreitos. db.create_all() não cria índices em tabelas que já existem.
+Rodar uma vez (é idempotente):
+python add_indices_etag.py
+"""
+import os
+import sys
+
+# Adicionar o diretório do projeto ao path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from sgl.app import create_app
+from sgl.models.database import db
+
+INDICES = [
+    ('ix_editais_updated_at', 'editais', 'updated_at'),
+    ('ix_triagens_data_triagem', 'triagens', 'data_triagem'),
+    ('ix_processos_updated_at', 'processos', 'updated_at'),
+    ('ix_fornecedores_updated_at', 'fornecedores', 'updated_at'),
+]
+
+app = create_app(iniciar_scheduler=False)
+
+with app.app_context():
+    from sqlalchemy import text
+
+    for nome, tabela, coluna in INDICES:
+        db.session.execute(text(f"CREATE INDEX IF NOT EXISTS {nome} ON {tabela}({coluna})"))
+    db.session.commit()
+    for _, tabela, _ in INDICES:
+        # Atualiza estatísticas e o visibility map (index-only scan nos count(*))
+        db.session.execute(text(f"ANALYZE {tabela}"))
+    db.session.commit()
+    print(f"✅ {len(INDICES)} índices dos carimbos de ETag prontos.")
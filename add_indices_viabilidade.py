@@ -0,0 +1,34 @@
+"""
+Migração: índices da análise de viabilidade set-based
+(services/viabilidade_service.py) — itens por processo e melhor cotação
+por item (DISTINCT ON item_edital_id ORDER BY preco_unitario).
+db.create_all() não cria índices em tabelas que já existem.
+Rodar uma vez (é idempotente):
+python add_indices_viabilidade.py
+"""
+import os
+import sys
+
+# Adicionar o diretório do projeto ao path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from sgl.app import create_app
+from sgl.models.database import db
+
+app = create_app(iniciar_scheduler=False)
+
+with app.app_context():
+    from sqlalchemy import text
+
+    db.session.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_itens_edital_processo_id ON itens_edital(processo_id)"
+    ))
+    db.session.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_cotacoes_fornecedor_item_preco "
+        "ON cotacoes_fornecedor(item_edital_id, preco_unitario)"
+    ))
+    db.session.commit()
+    db.session.execute(text("ANALYZE itens_edital"))
+    db.session.execute(text("ANALYZE cotacoes_fornecedor"))
+    db.session.commit()
+    print("✅ Índices ix_itens_edital_processo_id e ix_cotacoes_fornecedor_item_preco prontos.")
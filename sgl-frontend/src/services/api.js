@@ -30,6 +30,41 @@ export const getDashboardStats = () => api.get('/dashboard/stats')
 export const getEditais = (params) => api.get('/editais', { params })
 export const getEdital = (id) => api.get('/editais/' + id)
 export const captarEditais = (data) => api.post('/editais/captar', data)
+export const getExecucaoCaptacao = (id) => api.get('/captacao/execucoes/' + id)
+// EventSource não envia headers: cada conexão usa um token curto, só de eventos (?token=).
+// Quando o servidor recusa a reconexão (token vencido), reabre com um token novo a partir do último id.
+export const streamEventos = (path) => {
+  const ouvintes = []
+  let fonte = null
+  let ultimoId = 0
+  let fechado = false
+  const abrir = async () => {
+    let token
+    try {
+      token = (await api.post('/auth/token-eventos')).data.token
+    } catch (e) {
+      return
+    }
+    if (fechado) return
+    fonte = new EventSource(API_URL + path + '?token=' + encodeURIComponent(token) + '&ultimo_id=' + ultimoId)
+    ouvintes.forEach(([tipo, fn]) => fonte.addEventListener(tipo, fn))
+    fonte.onerror = () => {
+      if (!fechado && fonte.readyState === EventSource.CLOSED) setTimeout(abrir, 3000)
+    }
+  }
+  abrir()
+  return {
+    addEventListener: (tipo, fn) => {
+      const ouvinte = (e) => { ultimoId = Number(e.lastEventId) || ultimoId; fn(e) }
+      ouvintes.push([tipo, ouvinte])
+      if (fonte) fonte.addEventListener(tipo, ouvinte)
+    },
+    close: () => { fechado = true; if (fonte) fonte.close() }
+  }
+}
+export const eventosCaptacao = (id) => streamEventos('/captacao/execucoes/' + id + '/eventos')
+export const eventosEdital = (id) => streamEventos('/editais/' + id + '/eventos')
+export const eventosFiltros = () => streamEventos('/filtros/eventos')
 export const captarPNCP = (data) => api.post('/editais/captar-pncp', data)
 export const captarBBMNET = (data) => api.post('/editais/captar-bbmnet', data)
 export const captarLicitar = (data) => api.post('/editais/captar-licitar', data)
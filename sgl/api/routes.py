@@ -1,10 +1,9 @@
 """
 SGL - Rotas da API REST
 """
-import os
 from datetime import datetime, timezone
-from sqlalchemy import func
-from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import func, text
+from flask import Blueprint, Response, request, jsonify, current_app
 from flask_jwt_extended import (
     create_access_token, create_refresh_token,
     jwt_required, get_jwt_identity
@@ -13,9 +12,16 @@ from flask_jwt_extended import (
 from ..models.database import (
     db, Usuario, Empresa, Edital, EditalArquivo,
     ItemEditalExtraido, Triagem, FiltroProspeccao,
-    Processo, Fornecedor, ItemEdital, CotacaoFornecedor
+    Processo, Fornecedor, ItemEdital, CotacaoFornecedor, LogAtividade, RelatorioPerfil
 )
 from ..services.captacao_service import CaptacaoService
+from ..utils.serializacao import (
+    json_response, resolver_campos, linhas_para_dicts,
+    colunas_edital, colunas_triagem,
+)
+from ..utils.etag import etag_versionado
+from ..utils.eventos import EVENTOS_TOKEN_TTL_SEG, criar_token_eventos, token_eventos_requerido
+from ..utils.perfilamento import admin_requerido
 
 api_bp = Blueprint('api', __name__)
 
@@ -51,6 +57,16 @@ def login():
     })
 
 
+@api_bp.route('/auth/token-eventos', methods=['POST'])
+@jwt_required()
+def token_eventos():
+    """Token curto para os streams SSE (EventSource não envia o header Authorization)."""
+    return jsonify({
+        'token': criar_token_eventos(get_jwt_identity()),
+        'expira_em_seg': EVENTOS_TOKEN_TTL_SEG,
+    })
+
+
 @api_bp.route('/auth/register', methods=['POST'])
 def register():
     """Registro de novo usuário (somente admin)"""
@@ -79,6 +95,7 @@ def register():
 
 @api_bp.route('/editais', methods=['GET'])
 @jwt_required()
+@etag_versionado('editais')
 def listar_editais():
     """Lista editais com filtros completos e paginação"""
     from datetime import datetime
@@ -193,12 +210,21 @@ def listar_editais():
     else:
         query = query.order_by(coluna.desc().nullslast())
 
-    paginacao = query.paginate(page=pagina, per_page=min(por_pagina, 100), error_out=False)
-    return jsonify({
-        'editais': [e.to_dict() for e in paginacao.items],
-        'total': paginacao.total,
-        'paginas': paginacao.pages,
-        'pagina_atual': paginacao.page,
+    # Paginação sobre tuplas (sem instanciar Edital) + sparse fieldset (?fields=)
+    colunas = colunas_edital()
+    campos = resolver_campos(colunas, request.args.get('fields'))
+    pagina = max(pagina or 1, 1)
+    por_pagina = max(min(por_pagina or 20, 100), 1)
+
+    total = query.order_by(None).with_entities(func.count(Edital.id)).scalar()
+    linhas = query.with_entities(*[colunas[c] for c in campos]) \
+        .limit(por_pagina).offset((pagina - 1) * por_pagina).all()
+
+    return json_response({
+        'editais': linhas_para_dicts(linhas, campos),
+        'total': total,
+        'paginas': (total + por_pagina - 1) // por_pagina,
+        'pagina_atual': pagina,
     })
 
 
@@ -218,75 +244,94 @@ def obter_edital(edital_id):
     if itens:
         data['itens_extraidos'] = [i.to_dict() for i in itens]
 
+    # Filtros de prospecção que casaram (e com quais palavras)
+    from ..services.percolador_filtros import matches_por_edital
+    data['filtros'] = matches_por_edital([edital_id]).get(edital_id, [])
+
     return jsonify(data)
 
 
+@api_bp.route('/editais/<int:edital_id>/similares', methods=['GET'])
+@jwt_required()
+def listar_editais_similares(edital_id):
+    """Editais quase duplicados (mesmo grupo MinHash/LSH do objeto)"""
+    from ..services.similaridade_edital import similares
+    Edital.query.get_or_404(edital_id)
+    return json_response({'edital_id': edital_id, 'similares': [dict(s) for s in similares(edital_id)]})
+
+
 @api_bp.route('/editais/captar', methods=['POST'])
 @jwt_required()
 def executar_captacao():
     """
-    Executa captação manual de editais via PNCP + BBMNET + Licitar + ComprasGov.
-    Corpo: { periodo_dias, data_inicial, data_final, ufs, modalidades, modalidades_bbmnet, modalidades_comprasgov, incluir_legado_comprasgov }
+    Dispara a captação de editais via PNCP + BBMNET + Licitar + ComprasGov, em paralelo
+    e em background. Responde 202 com o id da execução; o progresso por fonte e o
+    resultado final ficam em GET /captacao/execucoes/<id>.
+    Corpo: { periodo_dias, data_inicial, data_final, ufs, modalidades, modalidades_bbmnet, modalidades_comprasgov, incluir_legado_comprasgov, fontes }
     """
     data = request.get_json() or {}
 
-    service = CaptacaoService(current_app.config)
-    resultado_pncp = service.executar_captacao(
-        periodo_dias=data.get('periodo_dias'),
-        data_inicial=data.get('data_inicial'),
-        data_final=data.get('data_final'),
-        ufs=data.get('ufs'),
-        modalidades=data.get('modalidades'),
-        filtros_ids=data.get('filtros_ids')
-    )
-    periodo = data.get('periodo_dias') or int(os.environ.get('CAPTACAO_PERIODO_DIAS_DEFAULT', 7))
-    ufs_busca = data.get('ufs') or os.environ.get('PNCP_UFS_DEFAULT', 'RJ,SP,MG,ES').split(',')
-
-    # --- BBMNET ---
-    resultado_bbmnet = {}
+    from ..services.captacao_orquestrador import iniciar_execucao
     try:
-        from ..services.bbmnet_integration import executar_captacao_bbmnet as captar_bbmnet
-        resultado_bbmnet = captar_bbmnet(
-            app_config=current_app.config,
-            periodo_dias=periodo,
-            ufs=ufs_busca,
-            modalidade_ids=data.get('modalidades_bbmnet'),
+        execucao = iniciar_execucao(
+            current_app._get_current_object(), data,
+            usuario_id=int(get_jwt_identity()), fontes=data.get('fontes'),
         )
-    except Exception as e:
-        resultado_bbmnet = {'erro': str(e)}
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+
+    status_url = f'/api/captacao/execucoes/{execucao.id}'
+    resposta = jsonify({
+        'execucao_id': execucao.id,
+        'status': execucao.status,
+        'fontes': list(execucao.fontes),
+        'status_url': status_url,
+    })
+    resposta.headers['Location'] = status_url
+    return resposta, 202
 
-    # --- LICITAR DIGITAL ---
-    resultado_licitar = {}
-    try:
-        from ..services.licitardigital_integration import executar_captacao_licitardigital as captar_licitar
-        resultado_licitar = captar_licitar(app_config=current_app.config, periodo_dias=periodo)
-    except Exception as e:
-        resultado_licitar = {'erro': str(e)}
 
-    # --- COMPRAS.GOV.BR ---
-    resultado_comprasgov = {}
+@api_bp.route('/captacao/execucoes/<int:execucao_id>', methods=['GET'])
+@jwt_required()
+def status_execucao_captacao(execucao_id):
+    """Progresso por fonte (páginas, encontrados, novos, duplicados, erros) e resultado final."""
+    from ..services.captacao_orquestrador import obter_execucao
+    execucao = obter_execucao(execucao_id)
+    if execucao is None:
+        return jsonify({'erro': 'Execução não encontrada'}), 404
+    return jsonify(execucao), 200
+
+
+def _ultimo_evento_id():
+    """Last-Event-ID (reconexão automática do EventSource) ou ?ultimo_id=."""
+    valor = request.headers.get('Last-Event-ID') or request.args.get('ultimo_id')
     try:
-        from ..services.comprasgov_integration import executar_captacao_comprasgov
-        resultado_comprasgov = executar_captacao_comprasgov(
-            app_config=current_app.config,
-            periodo_dias=periodo,
-            ufs=ufs_busca,
-            modalidade_ids=data.get('modalidades_comprasgov'),
-            incluir_legado=data.get('incluir_legado_comprasgov', False),
-        )
-    except Exception as e:
-        resultado_comprasgov = {'erro': str(e)}
-
-    resultado_pncp['bbmnet'] = resultado_bbmnet
-    resultado_pncp['licitardigital'] = resultado_licitar
-    resultado_pncp['comprasgov'] = resultado_comprasgov
-    resultado_pncp['total_geral'] = (
-        resultado_pncp.get('novos_salvos', 0)
-        + resultado_bbmnet.get('novos_salvos', 0)
-        + resultado_licitar.get('novos_salvos', 0)
-        + resultado_comprasgov.get('novos_salvos', 0)
-    )
-    return jsonify(resultado_pncp)
+        return int(valor or 0)
+    except ValueError:
+        return 0
+
+
+@api_bp.route('/captacao/execucoes/<int:execucao_id>/eventos', methods=['GET'])
+@token_eventos_requerido
+def eventos_execucao_captacao(execucao_id):
+    """
+    Stream SSE da execução: iniciada, fonte_iniciada, pagina, edital_inserido,
+    progresso, fonte_concluida e concluida (encerra o stream).
+    EventSource não envia headers: token curto via ?token= (POST /auth/token-eventos).
+    """
+    from ..services.captacao_orquestrador import obter_execucao
+    from ..utils.eventos import canal_captacao, resposta_sse
+
+    execucao = obter_execucao(execucao_id)
+    if execucao is None:
+        return jsonify({'erro': 'Execução não encontrada'}), 404
+    canal = canal_captacao(execucao_id)
+    if execucao['status'] == 'concluida':
+        # Já terminou (talvez em outro worker): entrega o resultado e encerra
+        return resposta_sse(canal, eventos=[{
+            'tipo': 'concluida', 'dados': {'resultado': execucao.get('resultado')},
+        }])
+    return resposta_sse(canal, _ultimo_evento_id(), tipos_finais=('concluida',))
 
 
 # CAPTACAO PNCP (manual - separado)
@@ -370,25 +415,17 @@ def importar_editais_licitar():
         return jsonify({'erro': 'Nenhum edital enviado'}), 400
 
     stats = {'novos_salvos': 0, 'duplicados': 0, 'erros': 0}
+    from ..services.identidade_edital import IndiceIdentidades
+    from ..services import similaridade_edital
+    from ..services import percolador_filtros
+    indice = IndiceIdentidades(editais_list, fonte='licitardigital')
 
     for edital_data in editais_list:
         try:
             hash_scraper = edital_data.get('hash_scraper')
-            if hash_scraper:
-                existente = Edital.query.filter_by(hash_scraper=hash_scraper).first()
-                if existente:
-                    stats['duplicados'] += 1
-                    continue
-
-            orgao = edital_data.get('orgao_razao_social')
-            processo = edital_data.get('numero_processo')
-            if orgao and processo:
-                existente = Edital.query.filter_by(
-                    orgao_razao_social=orgao, numero_processo=processo,
-                    plataforma_origem='licitardigital').first()
-                if existente:
-                    stats['duplicados'] += 1
-                    continue
+            if indice.duplicado(edital_data):
+                stats['duplicados'] += 1
+                continue
 
             def _parse_dt(s):
                 if not s:
@@ -423,6 +460,12 @@ def importar_editais_licitar():
             )
             db.session.add(edital)
             db.session.flush()
+            if not indice.registrar_novo(edital.id, edital_data):
+                db.session.rollback()
+                stats['duplicados'] += 1
+                continue
+            similaridade_edital.registrar_seguro(edital)  # grupo de quase duplicados
+            percolador_filtros.registrar_matches(edital)  # filtros de prospecção que casaram
             triagem = Triagem(edital_id=edital.id, decisao='pendente', prioridade='media')
             db.session.add(triagem)
             db.session.commit()
@@ -458,9 +501,9 @@ def limpar_rejeitados():
 @api_bp.route('/scheduler/status', methods=['GET'])
 @jwt_required()
 def scheduler_status():
-    """Retorna status do agendador de captação automática."""
+    """Retorna status do agendador de captação automática e do líder que executa os jobs."""
     try:
-        from ..scheduler import scheduler
+        from ..scheduler import scheduler, status_lideranca
         jobs = []
         for job in scheduler.get_jobs():
             jobs.append({
@@ -468,8 +511,11 @@ def scheduler_status():
                 'nome': job.name,
                 'proximo_disparo': str(job.next_run_time) if job.next_run_time else None,
             })
+        lideranca = status_lideranca()
         return jsonify({
             'ativo': scheduler.running,
+            'executando_jobs': lideranca['este_processo']['executando_jobs'],
+            'lideranca': lideranca,
             'jobs': jobs,
         })
     except Exception as e:
@@ -526,23 +572,41 @@ def resumir_edital(edital_id):
 
 @api_bp.route('/triagem', methods=['GET'])
 @jwt_required()
+@etag_versionado('triagem')
 def listar_triagem():
     """Lista editais pendentes de triagem"""
     status = request.args.get('status', 'pendente')
 
-    query = db.session.query(Edital, Triagem).join(
+    colunas_ed = colunas_edital()
+    campos_ed = resolver_campos(colunas_ed, request.args.get('fields'))
+    colunas_tri = colunas_triagem()
+    campos_tri = list(colunas_tri)
+
+    query = db.session.query(
+        *[colunas_ed[c] for c in campos_ed],
+        *[colunas_tri[c] for c in campos_tri],
+    ).join(
         Triagem, Edital.id == Triagem.edital_id
+    ).outerjoin(
+        Usuario, Usuario.id == Triagem.usuario_triador_id
     ).filter(Triagem.decisao == status)
 
     query = query.order_by(Triagem.prioridade.desc(), Edital.data_publicacao.desc())
 
+    n = len(campos_ed)
     resultados = []
-    for edital, triagem in query.all():
-        item = edital.to_dict()
-        item['triagem'] = triagem.to_dict()
+    for linha in query.all():
+        item = dict(zip(campos_ed, linha[:n]))
+        item['triagem'] = dict(zip(campos_tri, linha[n:]))
         resultados.append(item)
 
-    return jsonify({'editais': resultados, 'total': len(resultados)})
+    # Por que cada edital apareceu: filtros que casaram (uma consulta para a lista)
+    from ..services.percolador_filtros import matches_por_edital
+    matches = matches_por_edital([r['triagem']['edital_id'] for r in resultados])
+    for item in resultados:
+        item['filtros'] = matches.get(item['triagem']['edital_id'], [])
+
+    return json_response({'editais': resultados, 'total': len(resultados)})
 
 
 @api_bp.route('/triagem/<int:edital_id>', methods=['PUT'])
@@ -604,40 +668,63 @@ def triagem_bulk():
     if decisao not in ('aprovado', 'rejeitado'):
         return jsonify({'error': 'Decisão inválida (aprovado ou rejeitado)'}), 400
 
-    stats = {'processados': 0, 'erros': 0}
-
-    for eid in edital_ids:
-        try:
-            triagem = Triagem.query.filter_by(edital_id=eid).first()
-            if not triagem:
-                stats['erros'] += 1
-                continue
-
-            triagem.decisao = decisao
-            triagem.prioridade = prioridade
-            triagem.motivo_rejeicao = motivo_rejeicao if decisao == 'rejeitado' else None
-            triagem.observacoes = observacao
-            triagem.usuario_triador_id = usuario_id
-            triagem.data_triagem = datetime.now(timezone.utc)
-
-            edital = Edital.query.get(eid)
-            if edital:
-                edital.status = decisao
-
-            stats['processados'] += 1
-        except Exception as e:
-            current_app.logger.error('Erro triagem bulk edital %s: %s', eid, e)
-            stats['erros'] += 1
+    try:
+        ids = sorted({int(eid) for eid in edital_ids})
+    except (ValueError, TypeError):
+        return jsonify({'error': 'edital_ids deve conter apenas inteiros'}), 400
+
+    agora = datetime.now(timezone.utc)
+
+    # Set-based: 1 UPDATE em triagens + 1 UPDATE em editais + 1 INSERT em lote no log
+    processados = db.session.execute(text("""
+        UPDATE triagens
+           SET decisao = :decisao,
+               prioridade = :prioridade,
+               motivo_rejeicao = :motivo,
+               observacoes = :observacao,
+               usuario_triador_id = :usuario_id,
+               data_triagem = :agora
+         WHERE edital_id = ANY(:ids)
+     RETURNING edital_id
+    """), {
+        'decisao': decisao,
+        'prioridade': prioridade,
+        'motivo': motivo_rejeicao if decisao == 'rejeitado' else None,
+        'observacao': observacao,
+        'usuario_id': usuario_id,
+        'agora': agora,
+        'ids': ids,
+    }).scalars().all()
+
+    if processados:
+        db.session.execute(text("""
+            UPDATE editais
+               SET status = :decisao, updated_at = :agora
+             WHERE id = ANY(:ids)
+        """), {'decisao': decisao, 'agora': agora, 'ids': processados})
+
+        db.session.execute(db.insert(LogAtividade), [
+            {
+                'usuario_id': usuario_id,
+                'acao': f'triagem_bulk_{decisao}',
+                'entidade': 'edital',
+                'entidade_id': eid,
+                'detalhes': {'decisao': decisao, 'prioridade': prioridade},
+                'ip_address': request.remote_addr,
+                'created_at': agora,
+            }
+            for eid in processados
+        ])
 
     db.session.commit()
 
+    stats = {'processados': len(processados), 'erros': len(ids) - len(processados)}
+
     # Auto-download para editais aprovados em massa (encadeia: download → AI → planilha)
-    if decisao == 'aprovado':
+    if decisao == 'aprovado' and processados:
         try:
-            from ..services.documento_downloader import disparar_download_async
-            app_ref = current_app._get_current_object()
-            for eid in edital_ids:
-                disparar_download_async(eid, app_ref)
+            from ..services.documento_downloader import disparar_download_lote_async
+            disparar_download_lote_async(processados, current_app._get_current_object())
         except Exception as e:
             current_app.logger.warning('Erro disparar download bulk: %s', e)
 
@@ -696,6 +783,80 @@ def gerar_planilha_edital(edital_id):
         return jsonify({'error': str(e)}), 500
 
 
+@api_bp.route('/editais/<int:edital_id>/eventos', methods=['GET'])
+@token_eventos_requerido
+def eventos_edital(edital_id):
+    """
+    Stream SSE dos pipelines do edital: download_iniciado, arquivo_baixado,
+    download_concluido, itens_extraidos, planilha_enviada, pipeline_concluido...
+    EventSource não envia headers: token curto via ?token= (POST /auth/token-eventos).
+    """
+    if not db.session.get(Edital, edital_id):
+        return jsonify({'error': 'Edital não encontrado'}), 404
+    from ..utils.eventos import canal_edital, resposta_sse
+    return resposta_sse(canal_edital(edital_id), _ultimo_evento_id())
+
+
+@api_bp.route('/editais/gerar-planilhas-lote', methods=['POST'])
+@jwt_required()
+def gerar_planilhas_lote():
+    """
+    Gera e envia ao Dropbox as planilhas de vários editais em um job.
+
+    Body: {"edital_ids": [1, 2, ...]} ou {"dias": 7}, e "tipo": "cotacao"
+    (padrão) ou "reajustada". Com "dias": editais aprovados na triagem nos
+    últimos N dias (cotação) ou com resultado de disputa registrado nos
+    últimos N dias (reajustada, só itens VENCIDOS). O resultado por edital
+    vai para o log de atividades ('planilhas_lote').
+    """
+    data = request.get_json() or {}
+    edital_ids = data.get('edital_ids')
+    tipo = data.get('tipo', 'cotacao')
+    if tipo not in ('cotacao', 'reajustada'):
+        return jsonify({'error': 'tipo deve ser "cotacao" ou "reajustada"'}), 400
+
+    if not edital_ids:
+        from datetime import timedelta
+        try:
+            dias = int(data.get('dias', 7))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'dias deve ser um número inteiro'}), 400
+        if dias < 1:
+            return jsonify({'error': 'dias deve ser maior que zero'}), 400
+        limite = datetime.now(timezone.utc) - timedelta(days=dias)
+        if tipo == 'reajustada':
+            edital_ids = [eid for (eid,) in db.session.query(ItemEditalExtraido.edital_id).filter(
+                ItemEditalExtraido.status_disputa == 'VENCIDO',
+                ItemEditalExtraido.data_disputa >= limite,
+            ).distinct().order_by(ItemEditalExtraido.edital_id)]
+        else:
+            edital_ids = [eid for (eid,) in db.session.query(Triagem.edital_id).filter(
+                Triagem.decisao == 'aprovado',
+                Triagem.data_triagem >= limite,
+            ).order_by(Triagem.edital_id)]
+
+    try:
+        edital_ids = [int(eid) for eid in edital_ids]
+    except (TypeError, ValueError):
+        return jsonify({'error': 'edital_ids deve ser uma lista de IDs'}), 400
+    if not edital_ids:
+        return jsonify({'error': 'Nenhum edital no período'}), 400
+
+    try:
+        from ..services.planilha_cotacao_service import disparar_planilhas_lote_async
+        disparar_planilhas_lote_async(edital_ids, current_app._get_current_object(), tipo=tipo)
+        nome = 'reajustadas' if tipo == 'reajustada' else 'de cotação'
+        return jsonify({
+            'sucesso': True,
+            'tipo': tipo,
+            'total': len(edital_ids),
+            'edital_ids': edital_ids,
+            'mensagem': f'Planilhas {nome} sendo geradas para {len(edital_ids)} editais.'
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @api_bp.route('/dropbox/status', methods=['GET'])
 @jwt_required()
 def dropbox_status():
@@ -738,9 +899,27 @@ def criar_filtro():
 
     db.session.add(filtro)
     db.session.commit()
+
+    # Triagem pendente passa a refletir o novo filtro (em background)
+    from ..services import percolador_filtros
+    percolador_filtros.invalidar()
+    percolador_filtros.repercolar_em_background(current_app._get_current_object())
     return jsonify(filtro.to_dict()), 201
 
 
+@api_bp.route('/filtros/eventos', methods=['GET'])
+@token_eventos_requerido
+def eventos_filtros():
+    """
+    Stream SSE de alertas: um evento 'edital_filtro' por edital novo (de
+    qualquer fonte) que casa com um filtro ativo, com as palavras encontradas.
+    EventSource não envia headers: token curto via ?token= (POST /auth/token-eventos).
+    """
+    from ..services.percolador_filtros import CANAL_FILTROS
+    from ..utils.eventos import resposta_sse
+    return resposta_sse(CANAL_FILTROS, _ultimo_evento_id())
+
+
 # ============================================================
 # FORNECEDORES
 # ============================================================
@@ -819,10 +998,16 @@ def listar_processos():
     if cotador_id:
         query = query.filter(Processo.cotador_id == cotador_id)
 
-    query = query.order_by(Processo.prioridade.desc(), Processo.data_limite.asc().nullslast())
+    query = query.options(db.joinedload(Processo.cotador)) \
+        .order_by(Processo.prioridade.desc(), Processo.data_limite.asc().nullslast())
     processos = query.all()
 
-    return jsonify([p.to_dict() for p in processos])
+    # Total de itens de todos os processos em 1 query (to_dict faria um COUNT por processo)
+    totais = dict(db.session.query(ItemEdital.processo_id, func.count(ItemEdital.id)).filter(
+        ItemEdital.processo_id.in_([p.id for p in processos])
+    ).group_by(ItemEdital.processo_id).all()) if processos else {}
+
+    return jsonify([p.to_dict(total_itens=totais.get(p.id, 0)) for p in processos])
 
 
 @api_bp.route('/processos', methods=['POST'])
@@ -872,30 +1057,35 @@ def importar_itens_ai(processo_id):
     processo = Processo.query.get_or_404(processo_id)
     edital = processo.edital
 
-    itens_extraidos = edital.itens_extraidos.filter_by(revisado=True).all()
-    if not itens_extraidos:
-        itens_extraidos = edital.itens_extraidos.all()
+    # INSERT ... SELECT: copia os itens revisados (ou todos, se nenhum foi revisado)
+    # direto no banco, sem instanciar um ItemEdital por item
+    resultado = db.session.execute(text("""
+        INSERT INTO itens_edital (
+            processo_id, numero_item, descricao, codigo_referencia, quantidade,
+            unidade_compra, preco_unitario_maximo, preco_total_maximo, grupo_lote,
+            status, created_at
+        )
+        SELECT :processo_id, x.numero_item, x.descricao, x.codigo_referencia,
+               COALESCE(x.quantidade, 0), COALESCE(NULLIF(x.unidade_compra, ''), 'UN'),
+               x.preco_unitario_maximo, x.preco_total_maximo, x.grupo_lote,
+               'pendente', :agora
+          FROM itens_edital_extraidos x
+         WHERE x.edital_id = :edital_id
+           AND (x.revisado IS TRUE OR NOT EXISTS (
+                   SELECT 1 FROM itens_edital_extraidos r
+                    WHERE r.edital_id = :edital_id AND r.revisado IS TRUE))
+         ORDER BY x.numero_item, x.id
+    """), {
+        'processo_id': processo_id,
+        'edital_id': edital.id,
+        'agora': datetime.now(timezone.utc),
+    })
+    importados = resultado.rowcount
 
-    if not itens_extraidos:
+    if not importados:
+        db.session.rollback()
         return jsonify({'error': 'Nenhum item extraído encontrado. Execute a extração AI primeiro.'}), 400
 
-    importados = 0
-    for item_ai in itens_extraidos:
-        item = ItemEdital(
-            processo_id=processo_id,
-            numero_item=item_ai.numero_item,
-            descricao=item_ai.descricao,
-            codigo_referencia=item_ai.codigo_referencia,
-            quantidade=item_ai.quantidade or 0,
-            unidade_compra=item_ai.unidade_compra or 'UN',
-            preco_unitario_maximo=item_ai.preco_unitario_maximo,
-            preco_total_maximo=item_ai.preco_total_maximo,
-            grupo_lote=item_ai.grupo_lote,
-            status='pendente'
-        )
-        db.session.add(item)
-        importados += 1
-
     processo.status = 'em_cotacao'
     db.session.commit()
 
@@ -916,43 +1106,9 @@ def analisar_viabilidade(processo_id):
     processo = Processo.query.get_or_404(processo_id)
     margem = float(processo.margem_minima or 15)
 
-    itens = processo.itens.all()
-    resultados = {'aprovados': 0, 'reprovados': 0, 'sem_cotacao': 0, 'total': len(itens)}
-
-    for item in itens:
-        cotacoes = item.cotacoes.all()
-
-        if not cotacoes:
-            item.status = 'sem_cotacao'
-            resultados['sem_cotacao'] += 1
-            continue
-
-        melhor = min(cotacoes, key=lambda c: float(c.preco_unitario))
-        custo = float(melhor.preco_unitario)
-        preco_venda = custo * (1 + margem / 100)
-        preco_max = float(item.preco_unitario_maximo or 0)
-
-        item.melhor_custo = custo
-        item.preco_venda = preco_venda
-        item.fornecedor_selecionado_id = melhor.fornecedor_id
-
-        if preco_max > 0:
-            item.margem_real = ((preco_max / custo) - 1) * 100
-
-            if preco_venda <= preco_max:
-                item.status = 'aprovado'
-                resultados['aprovados'] += 1
-            else:
-                item.status = 'reprovado'
-                resultados['reprovados'] += 1
-        else:
-            item.status = 'pendente'
-
-    valor_total = sum(
-        float(i.preco_venda or 0) * float(i.quantidade or 0)
-        for i in itens if i.status == 'aprovado'
-    )
-    resultados['valor_total_estimado'] = valor_total
+    # Set-based: melhor cotação por item (DISTINCT ON) + UPDATE em lote + agregado, 1 statement
+    from ..services.viabilidade_service import analisar_viabilidade_processo
+    resultados = analisar_viabilidade_processo(processo_id, margem)
 
     processo.status = 'em_analise'
     db.session.commit()
@@ -966,6 +1122,7 @@ def analisar_viabilidade(processo_id):
 
 @api_bp.route('/dashboard/stats', methods=['GET'])
 @jwt_required()
+@etag_versionado('dashboard')
 def dashboard_stats():
     """Estatísticas gerais para o dashboard"""
     total_editais = Edital.query.count()
@@ -978,33 +1135,32 @@ def dashboard_stats():
         Processo.status.in_(['aguardando', 'em_cotacao', 'cotado', 'em_analise', 'pronto', 'em_disputa'])
     ).count()
     total_fornecedores = Fornecedor.query.filter_by(ativo=True).count()
-    recentes = Edital.query.order_by(Edital.id.desc()).limit(10).all()
+    recentes = db.session.query(
+        Edital.id, Edital.orgao_razao_social, Edital.objeto_resumo, Edital.uf,
+        Edital.valor_estimado, Edital.status, Edital.plataforma_origem, Edital.data_publicacao,
+    ).order_by(Edital.id.desc()).limit(10).all()
     editais_recentes = [{
-        'id': e.id,
-        'orgao_razao_social': e.orgao_razao_social,
-        'objeto_resumo': e.objeto_resumo,
-        'uf': e.uf,
-        'valor_estimado': str(e.valor_estimado) if e.valor_estimado else None,
-        'status': e.status,
-        'plataforma_origem': e.plataforma_origem,
-        'data_publicacao': e.data_publicacao.isoformat() if e.data_publicacao else None,
-    } for e in recentes]
-
-    # Ultima captacao por plataforma
-    ultimas_captacoes = {}
-    for plat in ['pncp', 'bbmnet', 'licitardigital', 'comprasgov']:
-        ultimo = Edital.query.filter_by(plataforma_origem=plat).order_by(Edital.id.desc()).first()
-        if ultimo and ultimo.created_at:
-            ultimas_captacoes[plat] = ultimo.created_at.isoformat()
-        else:
-            ultimas_captacoes[plat] = None
-
-    # Contar por plataforma
-    por_plataforma = {}
-    for plat in ['pncp', 'bbmnet', 'licitardigital', 'comprasgov']:
-        por_plataforma[plat] = Edital.query.filter_by(plataforma_origem=plat).count()
-
-    return jsonify({
+        'id': r.id,
+        'orgao_razao_social': r.orgao_razao_social,
+        'objeto_resumo': r.objeto_resumo,
+        'uf': r.uf,
+        'valor_estimado': str(r.valor_estimado) if r.valor_estimado else None,
+        'status': r.status,
+        'plataforma_origem': r.plataforma_origem,
+        'data_publicacao': r.data_publicacao,
+    } for r in recentes]
+
+    # Contagem e última captação por plataforma (1 query agregada)
+    plataformas = ['pncp', 'bbmnet', 'licitardigital', 'comprasgov']
+    por_plataforma = {plat: 0 for plat in plataformas}
+    ultimas_captacoes = {plat: None for plat in plataformas}
+    for plat, qtd, ultima in db.session.query(
+        Edital.plataforma_origem, func.count(Edital.id), func.max(Edital.created_at),
+    ).filter(Edital.plataforma_origem.in_(plataformas)).group_by(Edital.plataforma_origem):
+        por_plataforma[plat] = qtd
+        ultimas_captacoes[plat] = ultima
+
+    return json_response({
         'editais_captados': total_editais,
         'pendentes_triagem': editais_pendentes,
         'aprovados': editais_aprovados,
@@ -1017,3 +1173,54 @@ def dashboard_stats():
         'ultimas_captacoes': ultimas_captacoes,
         'por_plataforma': por_plataforma,
     })
+
+
+# ============================================================
+# PERFILAMENTO SOB DEMANDA (admin) — ver utils/perfilamento.py
+# ============================================================
+
+@api_bp.route('/admin/perfis', methods=['GET'])
+@jwt_required()
+@admin_requerido
+def listar_perfis():
+    """Relatórios de perfilamento, mais recentes primeiro (?origem=request|job, ?alvo=)"""
+    query = RelatorioPerfil.query
+    if request.args.get('origem'):
+        query = query.filter_by(origem=request.args['origem'])
+    if request.args.get('alvo'):
+        query = query.filter(RelatorioPerfil.alvo.ilike(f"%{request.args['alvo']}%"))
+    limite = min(request.args.get('limite', 50, type=int), 200)
+    relatorios = query.order_by(RelatorioPerfil.id.desc()).limit(limite).all()
+    return jsonify([r.to_dict() for r in relatorios])
+
+
+@api_bp.route('/admin/perfis/<int:relatorio_id>', methods=['GET'])
+@jwt_required()
+@admin_requerido
+def obter_perfil(relatorio_id):
+    """Resumo do relatório com os statements SQL agrupados"""
+    relatorio = RelatorioPerfil.query.get_or_404(relatorio_id)
+    return jsonify(relatorio.to_dict(com_sql=True))
+
+
+@api_bp.route('/admin/perfis/<int:relatorio_id>/download', methods=['GET'])
+@jwt_required()
+@admin_requerido
+def baixar_perfil(relatorio_id):
+    """Perfil de CPU (HTML do pyinstrument ou texto do cProfile)"""
+    relatorio = RelatorioPerfil.query.get_or_404(relatorio_id)
+    extensao, mimetype = ('html', 'text/html') if relatorio.formato == 'html' else ('txt', 'text/plain')
+    return Response(relatorio.relatorio or '', mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename=perfil-{relatorio.id}.{extensao}',
+    })
+
+
+@api_bp.route('/admin/perfis/jobs/<job_id>', methods=['POST'])
+@jwt_required()
+@admin_requerido
+def perfilar_job(job_id):
+    """Antecipa um job do APScheduler para agora, perfilado (relatório em /admin/perfis)"""
+    from ..scheduler import perfilar_job as agendar_perfilado
+
+    status, corpo = agendar_perfilado(job_id)
+    return jsonify(corpo), status
@@ -34,7 +34,7 @@ def registrar_resultado_disputa(edital_id):
         ]
     }
     """
-    from ..models.database import db, Edital, ItemEditalExtraido
+    from ..models.database import db, Edital
 
     edital = Edital.query.get(edital_id)
     if not edital:
@@ -46,60 +46,39 @@ def registrar_resultado_disputa(edital_id):
     if not itens_input:
         return jsonify({'error': 'Nenhum item enviado'}), 400
 
-    STATUS_VALIDOS = ('VENCIDO', 'NAO_VENCIDO', 'DESERTO', 'FRACASSADO')
-    stats = {'atualizados': 0, 'erros': 0, 'vencidos': 0}
+    from ..services.disputa_service import (
+        STATUS_VALIDOS, registrar_resultados_lote, status_edital_por_resultado,
+    )
 
+    # Validação em memória; a gravação é 1 UPDATE ... FROM (VALUES ...) + agregado
+    resultados = []
     for item_data in itens_input:
         try:
-            item_id = item_data.get('item_id')
-            status = item_data.get('status_disputa', '').upper().replace(' ', '_').replace('Ã', 'A')
-
+            status = (item_data.get('status_disputa') or '').upper().replace(' ', '_').replace('Ã', 'A')
             if status not in STATUS_VALIDOS:
-                stats['erros'] += 1
-                continue
-
-            item = ItemEditalExtraido.query.filter_by(
-                id=item_id, edital_id=edital_id
-            ).first()
-
-            if not item:
-                stats['erros'] += 1
                 continue
-
-            item.status_disputa = status
-            item.data_disputa = datetime.now(timezone.utc)
-            item.obs_disputa = item_data.get('obs_disputa')
-
-            if status == 'VENCIDO':
-                preco = item_data.get('preco_final')
-                if preco is not None:
-                    item.preco_final = float(preco)
-                    qtd = float(item.quantidade) if item.quantidade else 0
-                    item.preco_total_final = float(preco) * qtd
-                stats['vencidos'] += 1
-
-            stats['atualizados'] += 1
-
-        except Exception as e:
+            preco = item_data.get('preco_final')
+            resultados.append({
+                'chave': int(item_data.get('item_id')),
+                'status_disputa': status,
+                'preco_final': float(preco) if preco is not None else None,
+                'obs_disputa': item_data.get('obs_disputa'),
+            })
+        except (ValueError, TypeError) as e:
             current_app.logger.error('Erro registrar disputa item %s: %s', item_data, e)
-            stats['erros'] += 1
 
-    db.session.commit()
+    lote = registrar_resultados_lote(edital_id, resultados, por='id')
+    stats = {
+        'atualizados': lote['atualizados'],
+        'erros': len(itens_input) - lote['atualizados'],
+        'vencidos': lote['vencidos'],
+    }
+    total_vencidos = lote['total_vencidos']
 
     # Atualizar status do edital
-    total_vencidos = ItemEditalExtraido.query.filter_by(
-        edital_id=edital_id, status_disputa='VENCIDO'
-    ).count()
-    total_disputados = ItemEditalExtraido.query.filter(
-        ItemEditalExtraido.edital_id == edital_id,
-        ItemEditalExtraido.status_disputa.isnot(None),
-    ).count()
-
-    if total_vencidos > 0:
-        edital.status = 'ganho_parcial' if total_vencidos < total_disputados else 'ganho_total'
-    elif total_disputados > 0:
-        edital.status = 'perdido'
-
+    edital.status = status_edital_por_resultado(
+        total_vencidos, lote['total_disputados'], edital.status,
+    )
     db.session.commit()
 
     return jsonify({
@@ -136,125 +115,52 @@ def upload_resultado_disputa(edital_id):
     if not arquivo.filename.endswith('.xlsx'):
         return jsonify({'error': 'Formato inválido. Envie um arquivo .xlsx'}), 400
 
-    try:
-        import openpyxl
-
-        wb = openpyxl.load_workbook(arquivo, data_only=True)
+    from ..services.disputa_service import ler_resultados_planilha, registrar_resultados_lote
 
-        # Encontrar a aba "Cotação"
-        if 'Cotação' in wb.sheetnames:
-            ws = wb['Cotação']
-        elif 'Cotacao' in wb.sheetnames:
-            ws = wb['Cotacao']
-        else:
-            # Tentar segunda aba
-            ws = wb.worksheets[1] if len(wb.worksheets) > 1 else wb.worksheets[0]
-
-        # Detectar colunas pelo cabeçalho (row 1)
-        col_item = None
-        col_status_disputa = None
-        col_preco_final = None
-        col_obs_disputa = None
-
-        for col in range(1, ws.max_column + 1):
-            hdr = str(ws.cell(row=1, column=col).value or '').upper().replace('\n', ' ')
-            if 'ITEM' == hdr.strip():
-                col_item = col
-            elif 'STATUS' in hdr and 'DISPUTA' in hdr:
-                col_status_disputa = col
-            elif 'PREÇO' in hdr and 'FINAL' in hdr and 'TOTAL' not in hdr:
-                col_preco_final = col
-            elif 'OBS' in hdr and 'DISPUTA' in hdr:
-                col_obs_disputa = col
-
-        if not col_status_disputa:
-            return jsonify({
-                'error': 'Coluna "STATUS DISPUTA" não encontrada na planilha. '
-                         'Verifique se é a planilha de cotação correta.'
-            }), 400
-
-        # Buscar itens do edital indexados por numero_item
-        itens_db = {
-            i.numero_item: i
-            for i in ItemEditalExtraido.query.filter_by(edital_id=edital_id).all()
-            if i.numero_item
-        }
-
-        STATUS_MAP = {
-            'VENCIDO': 'VENCIDO',
-            'NÃO VENCIDO': 'NAO_VENCIDO',
-            'NAO VENCIDO': 'NAO_VENCIDO',
-            'NÃO_VENCIDO': 'NAO_VENCIDO',
-            'NAO_VENCIDO': 'NAO_VENCIDO',
-            'DESERTO': 'DESERTO',
-            'FRACASSADO': 'FRACASSADO',
+    try:
+        try:
+            linhas = ler_resultados_planilha(arquivo)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # numero_item existentes no edital (1 query de uma coluna)
+        numeros = {
+            n for (n,) in db.session.query(ItemEditalExtraido.numero_item)
+            .filter(ItemEditalExtraido.edital_id == edital_id)
+            if n
         }
 
-        stats = {'lidos': 0, 'atualizados': 0, 'vencidos': 0, 'sem_match': 0}
-
-        for row in range(2, ws.max_row + 1):
-            status_val = ws.cell(row=row, column=col_status_disputa).value
-            if not status_val:
-                continue
-
-            status_str = str(status_val).strip().upper()
-            status_norm = STATUS_MAP.get(status_str)
-            if not status_norm:
-                continue
-
-            stats['lidos'] += 1
-
+        stats = {'lidos': len(linhas), 'atualizados': 0, 'vencidos': 0, 'sem_match': 0}
+        resultados = []
+        for linha in linhas:
             # Encontrar o item correspondente
-            num_item = ws.cell(row=row, column=col_item).value if col_item else None
-            item_db = None
-
-            if num_item is not None:
+            chave = None
+            if linha['numero_item'] is not None:
                 try:
-                    item_db = itens_db.get(int(num_item))
+                    chave = int(linha['numero_item'])
                 except (ValueError, TypeError):
                     pass
+            if chave not in numeros:
+                # Fallback: buscar pela posição (row - 2 = index)
+                chave = linha['linha'] - 1 if linha['linha'] - 1 in numeros else None
 
-            # Fallback: buscar pela posição (row - 2 = index)
-            if not item_db:
-                idx = row - 2
-                for it in itens_db.values():
-                    if it.numero_item == idx + 1:
-                        item_db = it
-                        break
-
-            if not item_db:
+            if chave is None:
                 stats['sem_match'] += 1
                 continue
 
-            item_db.status_disputa = status_norm
-            item_db.data_disputa = datetime.now(timezone.utc)
-
-            if col_preco_final:
-                preco = ws.cell(row=row, column=col_preco_final).value
-                if preco is not None:
-                    try:
-                        item_db.preco_final = float(preco)
-                        qtd = float(item_db.quantidade) if item_db.quantidade else 0
-                        item_db.preco_total_final = float(preco) * qtd
-                    except (ValueError, TypeError):
-                        pass
-
-            if col_obs_disputa:
-                obs = ws.cell(row=row, column=col_obs_disputa).value
-                if obs:
-                    item_db.obs_disputa = str(obs)
-
+            resultados.append({**linha, 'chave': chave})
             stats['atualizados'] += 1
-            if status_norm == 'VENCIDO':
+            if linha['status_disputa'] == 'VENCIDO':
                 stats['vencidos'] += 1
 
-        db.session.commit()
+        # Gravação em lote: 1 UPDATE ... FROM (VALUES ...) + contagens do edital
+        lote = registrar_resultados_lote(
+            edital_id, resultados, por='numero_item',
+            preco_apenas_vencidos=False, manter_obs_existente=True,
+        )
+        total_vencidos = lote['total_vencidos']
 
         # Atualizar status do edital
-        total_vencidos = ItemEditalExtraido.query.filter_by(
-            edital_id=edital_id, status_disputa='VENCIDO'
-        ).count()
-
         if total_vencidos > 0:
             edital.status = 'ganho_parcial'
         db.session.commit()
@@ -12,8 +12,13 @@ from .models.database import db
 from .config.settings import config_map
 
 
-def create_app(config_name=None):
-    """Factory para criação da aplicação Flask."""
+def create_app(config_name=None, iniciar_scheduler=True):
+    """
+    Factory para criação da aplicação Flask.
+
+    Args:
+        iniciar_scheduler: False nos workers Celery (jobs agendados só no processo web)
+    """
     if config_name is None:
         config_name = os.environ.get('FLASK_ENV', 'development')
 
@@ -22,15 +27,26 @@ def create_app(config_name=None):
 
     # Extensões
     db.init_app(app)
-    CORS(app, resources={r"/api/*": {"origins": "*"}})
+    CORS(app, resources={r"/api/*": {"origins": "*"}},
+         expose_headers=['X-DB-Queries', 'X-DB-Time', 'X-SGL-Perfil-Id'])
     JWTManager(app)
     Migrate(app, db)
 
+    # Compressão gzip/Brotli das respostas JSON
+    _init_compressao(app)
+
+    # Perfilamento sob demanda (admin: header X-SGL-Perfil / ?_perfil=1)
+    _init_perfilamento(app)
+
+    # Statements SQL por request (X-DB-Queries / X-DB-Time) e log de consultas lentas
+    _init_consultas_sql(app)
+
     # Celery (mantém compatibilidade, mas não é mais obrigatório)
     _init_celery(app)
 
     # APScheduler — captação automática sem Redis
-    _init_scheduler(app)
+    if iniciar_scheduler:
+        _init_scheduler(app)
 
     # Registrar blueprints (rotas da API)
     from .api.routes import api_bp
@@ -47,6 +63,25 @@ def create_app(config_name=None):
     def health():
         return {'status': 'ok', 'service': 'SGL - Sistema de Gestão de Licitações'}
 
+    @app.route('/metrics')
+    def metrics():
+        """
+        Métricas no formato Prometheus (sgl/utils/metricas.py). Exige
+        `Authorization: Bearer <METRICAS_TOKEN>`; sem token configurado, só
+        responde em desenvolvimento (METRICAS_PUBLICAS) — nos demais, 404.
+        """
+        import hmac
+        from flask import abort, request, Response
+        from .utils import metricas
+
+        token = app.config.get('METRICAS_TOKEN')
+        if token:
+            if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode()):
+                return {'erro': 'Não autorizado'}, 401
+        elif not app.config.get('METRICAS_PUBLICAS'):
+            abort(404)
+        return Response(metricas.exposicao(), content_type=metricas.CONTENT_TYPE)
+
     # ── SSO: Integração com SIG ───────────────────────────────────────────
     @app.route('/api/auth/sso-sig', methods=['POST', 'OPTIONS'])
     def auth_sso_sig():
@@ -163,6 +198,24 @@ def create_app(config_name=None):
     return app
 
 
+def _init_compressao(app):
+    """Registra middleware de compressão (gzip/Brotli) das respostas."""
+    from .utils.compressao import init_compressao
+    init_compressao(app)
+
+
+def _init_perfilamento(app):
+    """Registra os hooks de perfilamento sob demanda dos requests."""
+    from .utils.perfilamento import init_perfilamento
+    init_perfilamento(app)
+
+
+def _init_consultas_sql(app):
+    """Registra a contagem de statements SQL por request e o log de consultas lentas."""
+    from .utils.consultas_sql import init_consultas_sql
+    init_consultas_sql(app)
+
+
 def _init_scheduler(app):
     """Inicializa APScheduler para captação automática."""
     try:
@@ -175,17 +228,11 @@ def _init_scheduler(app):
 def _init_celery(app):
     """Conecta o Celery ao contexto do Flask (mantém compatibilidade)."""
     try:
-        from .celery_app import celery
+        from .celery_app import celery, vincular_app_flask
 
         celery.conf.update(app.config)
-
-        class ContextTask(celery.Task):
-            """Garante que tasks rodem dentro do contexto Flask."""
-            def __call__(self, *args, **kwargs):
-                with app.app_context():
-                    return self.run(*args, **kwargs)
-
-        celery.Task = ContextTask
+        # Tasks executadas neste processo (ex.: apply/eager) usam este app
+        vincular_app_flask(app)
         app.extensions['celery'] = celery
 
     except Exception as e:
@@ -0,0 +1 @@
+# SGL Benchmarks — scripts executáveis via `python -m sgl.benchmarks.<nome>`
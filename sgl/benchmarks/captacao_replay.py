@@ -0,0 +1,225 @@
+"""
+SGL - Benchmark de captação ponta a ponta com respostas gravadas
+
+Roda a captação de cada fonte (as mesmas funções do orquestrador — PNCP,
+BBMNET, Licitar Digital, Compras.gov.br — e o ScraperService com
+BLL/BNC/Licitanet) contra respostas gravadas em cassetes/<fonte>.json.zst,
+servidas por um servidor HTTP local (benchmarks/cassetes.py) com latência
+e 429 configuráveis. Mede registros/s e statements SQL por registro do
+caminho completo: paginação do cliente, identidade, similaridade,
+percolador, triagem e commit por edital.
+
+Cada execução roda em uma transação que sofre rollback no final (os
+commits dos serviços viram savepoints), então as repetições encontram o
+banco igual. Credenciais falsas são usadas na reprodução quando as
+variáveis de ambiente não estão definidas.
+
+Os cassetes são gravados das plataformas com --gravar (precisa de rede
+e, para BBMNET e Licitar Digital, das credenciais reais); os parâmetros
+da gravação ficam no cassete. Sem cassetes, --sintetico N gera um cassete
+do PNCP com N contratações.
+
+Uso:
+    python -m sgl.benchmarks.captacao_replay --database-url postgresql://.../sgl_bench --sintetico 500
+    python -m sgl.benchmarks.captacao_replay --latencia-ms 0 50 200 --taxa-429 0.05
+    python -m sgl.benchmarks.captacao_replay --gravar --fontes pncp scrapers --periodo-dias 2
+"""
+import json
+import logging
+import os
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from ..models.database import db
+from ..services import captacao_orquestrador, scraper_service
+from . import cassetes
+from ._comum import (
+    criar_app_benchmark, parser_base, ContadorSQL, TransacaoDescartavel, cronometro, imprimir_tabela,
+)
+
+DIR_CASSETES = os.path.join(os.path.dirname(__file__), 'cassetes')
+
+_CREDENCIAIS_FALSAS = {
+    'BBMNET_USERNAME': 'cassete', 'BBMNET_PASSWORD': 'cassete',
+    'LICITAR_PARTNER_CLIENT_ID': 'cassete', 'LICITAR_PARTNER_CLIENT_SECRET': 'cassete',
+}
+
+
+def _fonte_orquestrador(nome):
+    def executar(app, p):
+        return captacao_orquestrador.FONTES[nome](app, captacao_orquestrador._normalizar_parametros(p))
+    return executar
+
+
+def _fonte_scrapers(app, p):
+    return scraper_service.ScraperService(p.get('plataformas')).executar_scraping(
+        termo=p.get('termo'), uf=p.get('uf'), max_paginas=p.get('max_paginas', 2))
+
+
+FONTES = OrderedDict(
+    [(nome, _fonte_orquestrador(nome)) for nome in captacao_orquestrador.FONTES]
+    + [('scrapers', _fonte_scrapers)]
+)
+
+
+def _caminho(fonte):
+    return os.path.join(DIR_CASSETES, f'{fonte}.json.zst')
+
+
+def _encontrados(stats):
+    return stats.get('total_encontrados', stats.get('total', 0))
+
+
+# ============================================================
+# CASSETE SINTÉTICO (PNCP)
+# ============================================================
+
+def _contratacao_sintetica(i, uf, modalidade, data):
+    cnpj = f'{10000000 + i:08d}000100'
+    return {
+        'numeroControlePNCP': f'{cnpj}-1-{i + 1:06d}/{data.year}',
+        'orgaoEntidade': {'cnpj': cnpj, 'razaoSocial': f'PREFEITURA MUNICIPAL BENCH {i}'},
+        'unidadeOrgao': {'ufSigla': uf, 'nomeUnidade': f'Secretaria de Administração {i}',
+                         'codigoUnidade': str(1000 + i), 'municipioNome': f'Município {i % 97}'},
+        'objetoCompra': f'Contratação de empresa para prestação de serviços de limpeza predial '
+                        f'e conservação, lote {i}, com fornecimento de materiais',
+        'informacaoComplementar': '',
+        'valorTotalEstimado': 10000 + (i * 7919) % 900000,
+        'modalidadeId': modalidade,
+        'modalidadeNome': 'Pregão - Eletrônico',
+        'situacaoCompraNome': 'Divulgada no PNCP',
+        'anoCompra': data.year,
+        'sequencialCompra': i + 1,
+        'numeroCompra': f'{i + 1}/{data.year}',
+        'processo': f'PROC-{i + 1}/{data.year}',
+        'srp': i % 3 == 0,
+        'dataPublicacaoPncp': data.strftime('%Y-%m-%dT09:00:00'),
+        'dataAberturaProposta': (data + timedelta(days=8)).strftime('%Y-%m-%dT09:00:00'),
+        'dataEncerramentoProposta': (data + timedelta(days=10)).strftime('%Y-%m-%dT09:00:00'),
+        'linkSistemaOrigem': f'https://compras.exemplo.gov.br/{i}',
+    }
+
+
+def _cassete_pncp_sintetico(n, parametros, tamanho_pagina=50):
+    """Interações de /contratacoes/publicacao com n contratações por (UF, modalidade)."""
+    from ..services.pncp_client import PNCPClient
+
+    hoje = datetime.now()
+    data_inicial = (hoje - timedelta(days=parametros['periodo_dias'])).strftime('%Y%m%d')
+    data_final = hoje.strftime('%Y%m%d')
+    interacoes = []
+    i = 0
+    for uf in parametros['ufs']:
+        for modalidade in parametros['modalidades']:
+            registros = [_contratacao_sintetica(i + k, uf, modalidade, hoje) for k in range(n)]
+            i += n
+            paginas = max(1, -(-n // tamanho_pagina))
+            for pagina in range(1, paginas + 1):
+                dados = registros[(pagina - 1) * tamanho_pagina:pagina * tamanho_pagina]
+                query = (f'dataInicial={data_inicial}&dataFinal={data_final}&pagina={pagina}'
+                         f'&tamanhoPagina={tamanho_pagina}&codigoModalidadeContratacao={modalidade}&uf={uf}')
+                corpo = {'data': dados, 'totalRegistros': n, 'totalPaginas': paginas,
+                         'numeroPagina': pagina, 'paginasRestantes': paginas - pagina, 'empty': False}
+                interacoes.append(cassetes.montar_interacao(
+                    'GET', f'{PNCPClient.BASE_URL}/contratacoes/publicacao?{query}', None,
+                    200, {'content-type': 'application/json'},
+                    json.dumps(corpo).encode('utf-8')))
+    return interacoes
+
+
+# ============================================================
+# EXECUÇÃO
+# ============================================================
+
+def _executar(app, fonte, parametros):
+    """Uma captação em transação descartável. Retorna (stats, segundos, statements)."""
+    with TransacaoDescartavel(), ContadorSQL(db.engine) as contador, cronometro() as t:
+        stats = FONTES[fonte](app, parametros)
+    return stats, t['segundos'], contador.statements
+
+
+def _gravar(app, fontes, parametros):
+    os.makedirs(DIR_CASSETES, exist_ok=True)
+    for fonte in fontes:
+        meta = {'fonte': fonte, 'parametros': parametros,
+                'gravado_em': datetime.now().isoformat(timespec='seconds')}
+        with cassetes.gravar(_caminho(fonte), meta) as interacoes:
+            stats, segundos, _ = _executar(app, fonte, parametros)
+        print(f'{fonte}: {len(interacoes)} respostas, {_encontrados(stats)} registros, {segundos:.1f}s')
+
+
+def main():
+    parser = parser_base('Benchmark de captação ponta a ponta com respostas HTTP gravadas')
+    parser.add_argument('--fontes', nargs='+', choices=list(FONTES), default=None,
+                        help='default: as que têm cassete (ou pncp com --sintetico)')
+    parser.add_argument('--latencia-ms', type=int, nargs='+', default=[0],
+                        help='latência por request do servidor local')
+    parser.add_argument('--taxa-429', type=float, default=0.0,
+                        help='fração de requests respondidos com 429 (Retry-After: 0)')
+    parser.add_argument('--sintetico', type=int, default=None, metavar='N',
+                        help='usa um cassete PNCP gerado com N contratações por UF/modalidade')
+    parser.add_argument('--gravar', action='store_true', help='grava os cassetes a partir das plataformas')
+    parser.add_argument('--periodo-dias', type=int, default=1)
+    parser.add_argument('--ufs', nargs='+', default=['SP'])
+    parser.add_argument('--modalidades', type=int, nargs='+', default=[8])
+    parser.add_argument('--intervalo-por-host', type=float, default=None,
+                        help='sobrescreve o intervalo entre requests dos scrapers')
+    args = parser.parse_args()
+
+    if args.intervalo_por_host is not None:
+        scraper_service.INTERVALO_POR_HOST = args.intervalo_por_host
+    parametros = {'periodo_dias': args.periodo_dias, 'ufs': args.ufs, 'modalidades': args.modalidades}
+
+    app = criar_app_benchmark(args.database_url)
+    with app.app_context():
+        if args.gravar:
+            _gravar(app, args.fontes or list(FONTES), parametros)
+            return
+
+        cenarios = []  # (fonte, interações, parâmetros)
+        if args.sintetico:
+            cenarios.append(('pncp', _cassete_pncp_sintetico(args.sintetico, parametros), parametros))
+        for fonte in args.fontes or list(FONTES):
+            if args.sintetico and fonte == 'pncp':
+                continue
+            if not os.path.exists(_caminho(fonte)):
+                if args.fontes:
+                    print(f'{fonte}: sem cassete em {_caminho(fonte)} (grave com --gravar)')
+                continue
+            cassete = cassetes.carregar(_caminho(fonte))
+            cenarios.append((fonte, cassete['interacoes'], cassete['meta'].get('parametros') or parametros))
+        if not cenarios:
+            print(f'Nenhum cassete em {DIR_CASSETES}: use --gravar ou --sintetico N')
+            return
+
+        for nome, valor in _CREDENCIAIS_FALSAS.items():
+            os.environ.setdefault(nome, valor)
+        logging.getLogger('sgl').setLevel(logging.WARNING)
+
+        linhas = []
+        for fonte, interacoes, p in cenarios:
+            for latencia in args.latencia_ms:
+                melhor = None
+                for _ in range(args.repeticoes):
+                    with cassetes.reproduzir(interacoes, latencia, args.taxa_429) as servidor:
+                        stats, segundos, statements = _executar(app, fonte, p)
+                    if melhor is None or segundos < melhor[1]:
+                        melhor = (stats, segundos, statements, servidor.stats())
+                stats, segundos, statements, http = melhor
+                registros = _encontrados(stats)
+                linhas.append((
+                    fonte, f'{latencia} ms', f'{args.taxa_429:.0%}', http['servidas'], http['injetados_429'],
+                    registros, stats.get('novos_salvos', 0), f'{segundos:.2f} s',
+                    f'{registros / segundos:.0f}' if segundos else '-',
+                    f'{statements / registros:.1f}' if registros else '-',
+                ))
+
+    imprimir_tabela(
+        ('fonte', 'latência', '429', 'respostas', '429 injetados', 'registros', 'novos',
+         'tempo', 'registros/s', 'statements/registro'),
+        linhas,
+    )
+
+
+if __name__ == '__main__':
+    main()
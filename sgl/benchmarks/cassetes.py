@@ -0,0 +1,309 @@
+"""
+SGL - Gravação e reprodução de respostas HTTP (cassetes)
+
+Os clientes de captação falam HTTP por dois caminhos: requests
+(PNCPClient, ComprasGovClient, BBMNETScraper, LicitarPartnerClient) e
+httpx (scrapers BLL/BNC/Licitanet). Os dois são interceptados no
+transporte — HTTPAdapter.send e AsyncHTTPTransport.handle_async_request —,
+então sessões, retry do urllib3, redirects e limites por host dos
+clientes continuam valendo.
+
+  - gravar(caminho): faz os requests de verdade e guarda cada resposta
+    (método, URL, status, content-type/location/retry-after e corpo) em um
+    cassete JSON comprimido com zstd. Headers do request não são gravados,
+    e access_token/refresh_token/id_token em corpos JSON são trocados por
+    um valor fixo.
+  - reproduzir(caminho, latencia_ms, taxa_429): todo request vai para um
+    servidor HTTP local (127.0.0.1) que responde a partir do cassete,
+    com latência fixa por request e uma fração de respostas 429
+    (Retry-After: 0) sorteada de forma reprodutível.
+
+Casamento na reprodução: dentre as respostas gravadas para o mesmo método,
+host e caminho, a que tem mais parâmetros de query (e corpo) iguais e, no
+empate, a primeira ainda não usada — datas do período mudam de um dia
+para o outro, página/UF/modalidade não. Sem candidata: 404.
+"""
+import base64
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit
+
+import httpx
+import zstandard
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+_HEADERS_GRAVADOS = ('content-type', 'location', 'retry-after')
+_CAMPOS_TOKEN = ('access_token', 'refresh_token', 'id_token')
+_CAMPOS_SENSIVEIS = (b'password', b'client_secret', b'refresh_token')
+_TOKEN_FALSO = 'token-cassete'
+
+
+# ============================================================
+# ARQUIVO
+# ============================================================
+
+def salvar(caminho, interacoes, meta=None):
+    dados = json.dumps({'meta': meta or {}, 'interacoes': interacoes}, ensure_ascii=False)
+    with open(caminho, 'wb') as f:
+        f.write(zstandard.ZstdCompressor(level=10).compress(dados.encode('utf-8')))
+
+
+def carregar(caminho):
+    with open(caminho, 'rb') as f:
+        return json.loads(zstandard.ZstdDecompressor().decompressobj().decompress(f.read()))
+
+
+def _hash_corpo(corpo):
+    """Hash do corpo do request para o casamento; vazio para corpos com credenciais."""
+    if not corpo:
+        return ''
+    if isinstance(corpo, str):
+        corpo = corpo.encode('utf-8')
+    if any(campo in corpo for campo in _CAMPOS_SENSIVEIS):
+        return ''
+    return hashlib.sha1(corpo).hexdigest()
+
+
+def _sem_tokens(corpo, content_type):
+    if 'json' not in (content_type or ''):
+        return corpo
+    try:
+        dados = json.loads(corpo)
+    except ValueError:
+        return corpo
+    if not isinstance(dados, dict) or not any(c in dados for c in _CAMPOS_TOKEN):
+        return corpo
+    for campo in _CAMPOS_TOKEN:
+        if campo in dados:
+            dados[campo] = _TOKEN_FALSO
+    return json.dumps(dados).encode('utf-8')
+
+
+def montar_interacao(metodo, url, corpo_request, status, headers, corpo):
+    headers = {k: headers[k] for k in _HEADERS_GRAVADOS if headers.get(k)}
+    if 'location' in headers:
+        headers['location'] = urljoin(url, headers['location'])  # reprodução só entende URL absoluta
+    corpo = _sem_tokens(corpo, headers.get('content-type'))
+    interacao = {'metodo': metodo, 'url': url, 'corpo_hash': _hash_corpo(corpo_request),
+                 'status': status, 'headers': headers}
+    try:
+        interacao['corpo'] = corpo.decode('utf-8')
+    except UnicodeDecodeError:
+        interacao['corpo_b64'] = base64.b64encode(corpo).decode('ascii')
+    return interacao
+
+
+# ============================================================
+# INTERCEPTAÇÃO (requests + httpx)
+# ============================================================
+
+@contextmanager
+def _interceptar(ao_enviar_sync, ao_enviar_async):
+    """Troca HTTPAdapter.send e AsyncHTTPTransport.handle_async_request enquanto ativo."""
+    send_original = HTTPAdapter.send
+    handle_original = httpx.AsyncHTTPTransport.handle_async_request
+
+    def send(adapter, request, **kwargs):
+        return ao_enviar_sync(lambda req: send_original(adapter, req, **kwargs), request)
+
+    async def handle(transport, request):
+        return await ao_enviar_async(lambda req: handle_original(transport, req), request)
+
+    HTTPAdapter.send = send
+    httpx.AsyncHTTPTransport.handle_async_request = handle
+    try:
+        yield
+    finally:
+        HTTPAdapter.send = send_original
+        httpx.AsyncHTTPTransport.handle_async_request = handle_original
+
+
+@contextmanager
+def gravar(caminho, meta=None):
+    """Faz os requests de verdade e grava as respostas em `caminho` ao sair."""
+    interacoes = []
+    lock = threading.Lock()
+
+    def registrar(interacao):
+        with lock:
+            interacoes.append(interacao)
+
+    def ao_enviar_sync(enviar, request):
+        resp = enviar(request)
+        registrar(montar_interacao(request.method, request.url, request.body,
+                             resp.status_code, resp.headers, resp.content))
+        return resp
+
+    async def ao_enviar_async(enviar, request):
+        corpo_request = await request.aread()
+        resp = await enviar(request)
+        corpo = await resp.aread()
+        registrar(montar_interacao(request.method, str(request.url), corpo_request,
+                             resp.status_code, resp.headers, corpo))
+        return resp
+
+    with _interceptar(ao_enviar_sync, ao_enviar_async):
+        try:
+            yield interacoes
+        finally:
+            salvar(caminho, interacoes, meta)
+            logger.info(f"Cassete {caminho}: {len(interacoes)} respostas gravadas")
+
+
+# ============================================================
+# REPRODUÇÃO
+# ============================================================
+
+def _params(url):
+    return set(parse_qsl(urlsplit(url).query, keep_blank_values=True))
+
+
+class _Acervo:
+    """Respostas gravadas indexadas por (método, host, caminho)."""
+
+    def __init__(self, interacoes):
+        self._por_rota = {}
+        for interacao in interacoes:
+            partes = urlsplit(interacao['url'])
+            chave = (interacao['metodo'], partes.netloc, partes.path)
+            self._por_rota.setdefault(chave, []).append(
+                [interacao, _params(interacao['url']), False])
+        self._lock = threading.Lock()
+        self.servidas = 0
+        self.sem_resposta = 0
+
+    def buscar(self, metodo, url, corpo_hash):
+        partes = urlsplit(url)
+        candidatas = self._por_rota.get((metodo, partes.netloc, partes.path))
+        if not candidatas:
+            with self._lock:
+                self.sem_resposta += 1
+            return None
+        params = _params(url)
+        with self._lock:
+            melhor = max(candidatas, key=lambda c: (
+                len(params & c[1]) + (c[0]['corpo_hash'] == corpo_hash), not c[2]))
+            melhor[2] = True
+            self.servidas += 1
+        return melhor[0]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _responder(self):
+        servidor = self.server
+        tamanho = int(self.headers.get('Content-Length') or 0)
+        corpo_request = self.rfile.read(tamanho) if tamanho else b''
+        # caminho = /<esquema>/<host>/<caminho original>?<query>
+        _, esquema, resto = self.path.split('/', 2)
+        url = f'{esquema}://{resto}'
+
+        if servidor.latencia:
+            time.sleep(servidor.latencia)
+        with servidor.lock:
+            injetar_429 = servidor.sorteio.random() < servidor.taxa_429
+            servidor.injetados_429 += injetar_429
+        if injetar_429:
+            return self._enviar(429, {'retry-after': '0', 'content-type': 'text/plain'}, b'')
+
+        interacao = servidor.acervo.buscar(self.command, url, _hash_corpo(corpo_request))
+        if interacao is None:
+            logger.warning(f"Cassete sem resposta para {self.command} {url}")
+            return self._enviar(404, {'content-type': 'text/plain'}, b'sem resposta no cassete')
+        if 'corpo_b64' in interacao:
+            corpo = base64.b64decode(interacao['corpo_b64'])
+        else:
+            corpo = interacao['corpo'].encode('utf-8')
+        self._enviar(interacao['status'], interacao['headers'], corpo)
+
+    def _enviar(self, status, headers, corpo):
+        self.send_response(status)
+        for nome, valor in headers.items():
+            self.send_header(nome, valor)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(corpo)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = _responder
+
+    def log_message(self, *args):
+        pass
+
+
+class ServidorCassete(ThreadingHTTPServer):
+    """Servidor HTTP local que responde a partir de um cassete."""
+    daemon_threads = True
+
+    def __init__(self, interacoes, latencia_ms=0, taxa_429=0.0, semente=42):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.acervo = _Acervo(interacoes)
+        self.latencia = latencia_ms / 1000
+        self.taxa_429 = taxa_429
+        self.sorteio = random.Random(semente)
+        self.lock = threading.Lock()
+        self.injetados_429 = 0
+
+    @property
+    def base(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def redirecionar(self, url):
+        """URL original → URL no servidor local (/<esquema>/<host>/<caminho>?<query>)."""
+        partes = urlsplit(url)
+        query = urlencode(sorted(parse_qsl(partes.query, keep_blank_values=True)))
+        return f"{self.base}/{partes.scheme}/{partes.netloc}{partes.path or '/'}{'?' + query if query else ''}"
+
+    def stats(self):
+        return {'servidas': self.acervo.servidas, 'sem_resposta': self.acervo.sem_resposta,
+                'injetados_429': self.injetados_429}
+
+
+@contextmanager
+def reproduzir(caminho_ou_interacoes, latencia_ms=0, taxa_429=0.0, semente=42):
+    """
+    Responde todos os requests (requests e httpx) a partir do cassete.
+
+    Yields:
+        ServidorCassete (stats() com respostas servidas, sem resposta e 429 injetados)
+    """
+    interacoes = caminho_ou_interacoes
+    if isinstance(interacoes, str):
+        interacoes = carregar(interacoes)['interacoes']
+    servidor = ServidorCassete(interacoes, latencia_ms, taxa_429, semente)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+
+    def ao_enviar_sync(enviar, request):
+        original = request.url
+        request.url = servidor.redirecionar(original)
+        try:
+            resp = enviar(request)
+        finally:
+            request.url = original
+        resp.url = original
+        return resp
+
+    async def ao_enviar_async(enviar, request):
+        original = request.url
+        request.url = httpx.URL(servidor.redirecionar(str(original)))
+        try:
+            return await enviar(request)
+        finally:
+            request.url = original
+
+    try:
+        with _interceptar(ao_enviar_sync, ao_enviar_async):
+            yield servidor
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
@@ -0,0 +1,108 @@
+"""
+SGL - Benchmark da latência de início das tasks Celery
+
+Compara o padrão antigo (create_app() + app_context() a cada execução,
+um engine / pool de conexões novo por task) com o app Flask por processo
+do worker (celery_app.FlaskTask). Mede o tempo entre chamar a task e a
+task concluir um SELECT 1 — o overhead que toda task paga antes do
+trabalho útil — e quantas conexões novas ao PostgreSQL foram abertas.
+
+As tasks rodam via .apply() no próprio processo (mesmo caminho de
+execução do worker, sem broker), então o número reflete só o custo do
+lado do worker. O create_app() do cenário antigo roda sem o APScheduler;
+em produção ele ainda tentava subir o scheduler, ou seja, é um limite
+inferior do custo antigo.
+
+Uso:
+    python -m sgl.benchmarks.celery_tasks --database-url postgresql://.../sgl_bench
+    python -m sgl.benchmarks.celery_tasks --tasks 200
+"""
+import os
+import statistics
+
+from sqlalchemy import event, text
+from sqlalchemy.pool import Pool
+
+from ._comum import parser_base, cronometro, imprimir_tabela
+
+
+class _ContadorConexoes:
+    """Conta conexões DBAPI novas (de qualquer pool) enquanto ativo."""
+
+    def __init__(self):
+        self.conexoes = 0
+
+    def _contar(self, *args):
+        self.conexoes += 1
+
+    def __enter__(self):
+        event.listen(Pool, 'connect', self._contar)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(Pool, 'connect', self._contar)
+        return False
+
+
+def _select_1():
+    from ..models.database import db
+    db.session.execute(text('SELECT 1')).scalar()
+
+
+def _task_antiga():
+    """Como as tasks faziam: app novo a cada execução."""
+    from ..app import create_app
+    from ..models.database import db
+
+    app = create_app(iniciar_scheduler=False)
+    with app.app_context():
+        _select_1()
+        db.engine.dispose()  # o engine do app descartado não é reaproveitado
+
+
+def _medir(executar, n_tasks):
+    """Retorna (mediana_ms, p95_ms, total_s, conexoes_novas)."""
+    tempos = []
+    with _ContadorConexoes() as contador, cronometro() as total:
+        for _ in range(n_tasks):
+            with cronometro() as t:
+                executar()
+            tempos.append(t['segundos'] * 1000)
+    tempos.sort()
+    p95 = tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))]
+    return statistics.median(tempos), p95, total['segundos'], contador.conexoes
+
+
+def main():
+    parser = parser_base('Benchmark da latência de início das tasks Celery (app por task x por worker)')
+    parser.add_argument('--tasks', type=int, default=100, help='execuções por cenário')
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+
+    from ..celery_app import celery, obter_app_flask
+
+    @celery.task(name='sgl.benchmarks.celery_tasks.ping')
+    def ping():
+        _select_1()
+
+    def _task_worker():
+        ping.apply().get()
+
+    celery.loader.import_default_modules()  # configuração carregada antes do app, como no worker
+    obter_app_flask()  # o que o sinal worker_process_init faz ao subir o processo
+    _task_worker()     # aquece o pool (a primeira conexão é paga uma vez por processo)
+
+    linhas = []
+    for nome, executar in (('create_app por task', _task_antiga),
+                           ('app por worker', _task_worker)):
+        mediana, p95, total, conexoes = _medir(executar, args.tasks)
+        linhas.append((nome, args.tasks, f'{mediana:.2f} ms', f'{p95:.2f} ms',
+                       f'{total:.2f} s', conexoes))
+
+    imprimir_tabela(('cenário', 'tasks', 'mediana', 'p95', 'total', 'conexões novas'), linhas)
+
+
+if __name__ == '__main__':
+    main()
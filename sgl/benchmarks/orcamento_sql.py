@@ -0,0 +1,168 @@
+"""
+SGL - Orçamento de statements SQL por endpoint da API
+
+Faz os requests principais do frontend (listagens, detalhe, triagem em
+massa, viabilidade, dashboard) pelo test client do Flask, com o app
+completo, contra uma base populada com --editais editais (triagem
+pendente, matches de filtro, processos com itens e cotações), e compara
+o header X-DB-Queries de cada resposta (utils/consultas_sql.py) com o
+orçamento do endpoint. Um N+1 faz o número crescer com o volume e
+estourar o orçamento; rode com tamanhos diferentes para conferir que a
+contagem não depende do volume. Sai com código 1 se algum endpoint passar
+do orçamento — serve de checagem antes de um deploy.
+
+Tudo roda em uma transação que sofre rollback no final; os commits dos
+endpoints viram SAVEPOINT/RELEASE, que entram na contagem (2 statements
+por commit a mais do que em produção — os orçamentos já consideram).
+
+Uso:
+    python -m sgl.benchmarks.orcamento_sql --database-url postgresql://.../sgl_bench
+    python -m sgl.benchmarks.orcamento_sql --editais 50 500
+"""
+import os
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+
+from ._comum import parser_base, TransacaoDescartavel, cronometro, imprimir_tabela
+
+# (método, caminho, corpo, orçamento) — {edital} e {processo} vêm da base populada.
+# GETs antes dos POSTs (a triagem em massa muda o status dos editais).
+ENDPOINTS = [
+    ('GET', '/api/editais', None, 3),
+    ('GET', '/api/editais?status=captado&uf=SP&busca=limpeza', None, 3),
+    ('GET', '/api/editais/{edital}', None, 5),
+    ('GET', '/api/triagem', None, 3),
+    ('GET', '/api/processos', None, 2),
+    ('GET', '/api/fornecedores', None, 1),
+    ('GET', '/api/filtros', None, 1),
+    ('GET', '/api/dashboard/stats', None, 11),
+    ('POST', '/api/processos/{processo}/analisar-viabilidade', None, 4),
+    ('POST', '/api/triagem/bulk', {'decisao': 'rejeitado', 'motivo_rejeicao': 'benchmark'}, 5),
+]
+
+UFS = ['SP', 'RJ', 'MG', 'PR', 'BA']
+
+
+def _popular(n_editais, itens_por_processo=50, n_fornecedores=20):
+    """Base do benchmark via INSERT em lote. Retorna (usuario_id, edital_id, processo_id, edital_ids)."""
+    from ..models.database import (
+        db, Usuario, Edital, Triagem, FiltroProspeccao, EditalFiltroMatch,
+        Processo, Fornecedor, ItemEdital, CotacaoFornecedor,
+    )
+
+    rnd = random.Random(42)
+    marca = datetime.now().strftime('%Y%m%d%H%M%S%f')
+    usuario = Usuario(nome='Benchmark', email=f'orcamento-{marca}@bench.local', senha_hash='-', perfil='admin')
+    filtro = FiltroProspeccao(nome='Benchmark limpeza', palavras_chave=['limpeza'], regioes_uf=UFS)
+    db.session.add_all([usuario, filtro])
+    db.session.flush()
+
+    hoje = datetime.now(timezone.utc)
+    edital_ids = db.session.execute(
+        db.insert(Edital).returning(Edital.id, sort_by_parameter_order=True),
+        [{
+            'numero_controle_pncp': f'bench-{marca}-{i}',
+            'orgao_razao_social': f'PREFEITURA MUNICIPAL BENCH {i}',
+            'uf': UFS[i % len(UFS)],
+            'municipio': f'Município {i % 37}',
+            'objeto_resumo': f'Serviços de limpeza e conservação predial, lote {i}',
+            'modalidade_nome': 'Pregão - Eletrônico',
+            'valor_estimado': rnd.randint(10_000, 900_000),
+            'data_publicacao': hoje - timedelta(hours=i),
+            'plataforma_origem': 'pncp',
+            'status': 'captado',
+        } for i in range(n_editais)],
+    ).scalars().all()
+    db.session.execute(db.insert(Triagem), [
+        {'edital_id': eid, 'decisao': 'pendente', 'prioridade': 'media'} for eid in edital_ids])
+    db.session.execute(db.insert(EditalFiltroMatch), [
+        {'edital_id': eid, 'filtro_id': filtro.id, 'palavras': ['limpeza']} for eid in edital_ids[::2]])
+
+    fornecedores = db.session.execute(
+        db.insert(Fornecedor).returning(Fornecedor.id),
+        [{'razao_social': f'Fornecedor bench {i}', 'cnpj': f'b{marca[-12:]}{i:03d}'[:18], 'ativo': True}
+         for i in range(n_fornecedores)],
+    ).scalars().all()
+
+    # Um processo a cada 10 editais, com itens e 3 cotações por item
+    processo_ids = db.session.execute(
+        db.insert(Processo).returning(Processo.id, sort_by_parameter_order=True),
+        [{'edital_id': eid, 'cotador_id': usuario.id, 'status': 'em_cotacao', 'margem_minima': 15}
+         for eid in edital_ids[::10]],
+    ).scalars().all()
+    referencias = [round(rnd.uniform(5, 100), 2) for _ in range(len(processo_ids) * itens_por_processo)]
+    itens = db.session.execute(
+        db.insert(ItemEdital).returning(ItemEdital.id, sort_by_parameter_order=True),
+        [{
+            'processo_id': pid, 'numero_item': n + 1, 'descricao': f'Item {n + 1}',
+            'quantidade': rnd.randint(1, 200), 'unidade_compra': 'UN',
+            'preco_unitario_maximo': referencias[p * itens_por_processo + n], 'status': 'pendente',
+        } for p, pid in enumerate(processo_ids) for n in range(itens_por_processo)],
+    ).scalars().all()
+    db.session.execute(db.insert(CotacaoFornecedor), [
+        {'item_edital_id': item_id, 'fornecedor_id': rnd.choice(fornecedores),
+         'preco_unitario': round(referencias[idx] * rnd.uniform(0.5, 1.4), 4)}
+        for idx, item_id in enumerate(itens) for _ in range(3)])
+    db.session.commit()
+    return usuario.id, edital_ids[0], processo_ids[0], edital_ids
+
+
+def _medir(app, n_editais, repeticoes):
+    from flask_jwt_extended import create_access_token
+
+    cliente = app.test_client()
+    usuario_id, edital_id, processo_id, edital_ids = _popular(n_editais)
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(usuario_id))}'}
+    linhas, excedidos = [], []
+    for metodo, caminho, corpo, orcamento in ENDPOINTS:
+        url = caminho.format(edital=edital_id, processo=processo_id)
+        if corpo is not None and 'decisao' in corpo:
+            corpo = {**corpo, 'edital_ids': edital_ids}
+        melhor = None
+        for _ in range(repeticoes if metodo == 'GET' else 1):
+            with cronometro() as t:
+                resp = cliente.open(url, method=metodo, json=corpo, headers=headers)
+            if melhor is None or t['segundos'] < melhor[1]:
+                melhor = (resp, t['segundos'])
+        resp, segundos = melhor
+        statements = int(resp.headers.get('X-DB-Queries', -1))
+        ok = resp.status_code < 400 and 0 <= statements <= orcamento
+        if not ok:
+            excedidos.append(f'{metodo} {caminho}')
+        linhas.append((n_editais, f'{metodo} {caminho}', resp.status_code, statements, orcamento,
+                       f"{float(resp.headers.get('X-DB-Time', 0)):.1f} ms", f'{segundos * 1000:.1f} ms',
+                       'ok' if ok else 'EXCEDIDO'))
+    return linhas, excedidos
+
+
+def main():
+    parser = parser_base('Orçamento de statements SQL por endpoint da API (X-DB-Queries)')
+    parser.add_argument('--editais', type=int, nargs='+', default=[50, 500],
+                        help='tamanhos da base populada (um processo a cada 10 editais)')
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    os.environ.setdefault('FLASK_ENV', 'production')  # sem SQLALCHEMY_ECHO
+
+    from ..app import create_app
+
+    app = create_app(iniciar_scheduler=False)
+    linhas, excedidos = [], []
+    with app.app_context():
+        app.test_client().get('/health')  # create_all do primeiro request fora da contagem
+        for n in args.editais:
+            with TransacaoDescartavel():
+                resultado, falhas = _medir(app, n, args.repeticoes)
+            linhas.extend(resultado)
+            excedidos.extend(f'{f} ({n} editais)' for f in falhas)
+
+    imprimir_tabela(('editais', 'endpoint', 'status', 'statements', 'orçamento', 'banco', 'tempo', ''), linhas)
+    if excedidos:
+        print(f'\nFora do orçamento: {", ".join(excedidos)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
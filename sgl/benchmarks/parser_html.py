@@ -0,0 +1,85 @@
+"""
+SGL - Benchmark dos backends de parsing HTML dos scrapers
+
+Para cada página de fixtures/ (busca pública do BLL, BNC e Licitanet) e
+cada backend instalado (services/scrapers/parser_html.py), mede o tempo
+de _parse_pagina_html do scraper — parse do documento, seletores,
+texto e regex de cada linha — e confere se todos os backends extraem
+os mesmos editais que o bs4.
+
+As fixtures são regravadas a partir das plataformas com --gravar (usa o
+cliente HTTP dos scrapers). Não usa o banco.
+
+Uso:
+    python -m sgl.benchmarks.parser_html
+    python -m sgl.benchmarks.parser_html --repeticoes 20
+    python -m sgl.benchmarks.parser_html --gravar
+"""
+import os
+
+from ..services.scrapers import SCRAPERS, ClienteHTTPAsync, executar_sync
+from ..services.scrapers.parser_html import disponiveis
+from ._comum import parser_base, cronometro, imprimir_tabela
+
+DIR_FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+# fixture → (plataforma, caminho da página, parâmetros) — os mesmos de _buscar_via_html
+FIXTURES = {
+    'bll_busca.html': ('bll', '/Process/ProcessSearchPublic', {'param1': 1}),
+    'bnc_busca.html': ('bnc', '/Process/ProcessSearchPublic', {'param1': 1}),
+    'licitanet_processos.html': ('licitanet', '/processos', {}),
+}
+
+
+async def _gravar():
+    async with ClienteHTTPAsync(intervalo_por_host=1.0) as cliente:
+        for arquivo, (plataforma, caminho, params) in FIXTURES.items():
+            scraper = SCRAPERS[plataforma]
+            resp = await cliente.get(f'{scraper.BASE_URL}{caminho}', params=params,
+                                     headers=scraper.HEADERS, plataforma=plataforma)
+            with open(os.path.join(DIR_FIXTURES, arquivo), 'w', encoding='utf-8') as f:
+                f.write(resp.text)
+            print(f'{arquivo}: {len(resp.text) / 1024:.0f} KB')
+
+
+def main():
+    parser = parser_base('Benchmark dos backends de parsing HTML (selectolax, lxml, bs4)')
+    parser.add_argument('--gravar', action='store_true',
+                        help='regrava as fixtures a partir das plataformas')
+    args = parser.parse_args()
+
+    if args.gravar:
+        executar_sync(_gravar())
+        return
+
+    backends = disponiveis()
+    linhas = []
+    for arquivo, (plataforma, _, _) in FIXTURES.items():
+        with open(os.path.join(DIR_FIXTURES, arquivo), encoding='utf-8') as f:
+            html = f.read()
+
+        referencia = None
+        tempos = {}
+        for backend in reversed(backends):  # bs4 primeiro: é a referência
+            scraper = SCRAPERS[plataforma](parser_html=backend)
+            melhor = float('inf')
+            for _ in range(args.repeticoes):
+                with cronometro() as t:
+                    editais = scraper._parse_pagina_html(html)
+                melhor = min(melhor, t['segundos'])
+            extraidos = [e.to_dict() for e in editais]
+            if referencia is None:
+                referencia = extraidos
+            tempos[backend] = melhor
+            linhas.append((arquivo, f'{len(html) / 1024:.0f} KB', backend, len(extraidos),
+                           f'{melhor * 1000:.1f} ms', f"{tempos['bs4'] / melhor:.1f}x",
+                           'sim' if extraidos == referencia else 'NÃO'))
+
+    imprimir_tabela(
+        ('página', 'tamanho', 'backend', 'editais', 'por página', 'vs bs4', 'igual ao bs4'),
+        linhas,
+    )
+
+
+if __name__ == '__main__':
+    main()
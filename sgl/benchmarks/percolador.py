@@ -0,0 +1,105 @@
+"""
+SGL - Benchmark do percolador de filtros de prospecção
+
+Compara, para N objetos sintéticos e F filtros ativos, o custo por edital
+de descobrir todos os filtros que casam:
+  - laço ingênuo: cada filtro, cada palavra-chave, busca no objeto
+    normalizado;
+  - services/percolador_filtros.Percolador: autômato Aho-Corasick, custo
+    proporcional ao tamanho do objeto.
+
+Só CPU — não usa o banco (os filtros são instâncias transientes).
+
+Uso:
+    python -m sgl.benchmarks.percolador
+    python -m sgl.benchmarks.percolador --filtros 50 200 1000 --editais 10000
+"""
+import random
+
+from ..models.database import FiltroProspeccao
+from ..services.percolador_filtros import Percolador
+from ..utils import texto as texto_util
+from ._comum import parser_base, cronometro, imprimir_tabela
+from .similaridade import _VOCABULARIO, _objetos
+
+_UFS = ['SP', 'RJ', 'MG', 'PR', 'SC', 'RS', 'BA', 'GO', 'DF', 'PE']
+# Palavras-chave de filtros reais raramente casam: a maioria vem de um
+# vocabulário bem maior que o dos objetos sintéticos
+_TERMOS_RAROS = [f'termo{i}' for i in range(5000)]
+
+
+def _palavra(rnd):
+    return rnd.choice(_VOCABULARIO) if rnd.random() < 0.1 else rnd.choice(_TERMOS_RAROS)
+
+
+def _filtros(n, rnd):
+    filtros = []
+    for i in range(n):
+        palavras = [_palavra(rnd) for _ in range(rnd.randint(1, 5))]
+        # parte das palavras-chave é frase de duas palavras
+        palavras += [f'{rnd.choice(_VOCABULARIO)} {_palavra(rnd)}' for _ in range(rnd.randint(0, 2))]
+        filtros.append(FiltroProspeccao(
+            id=i + 1, nome=f'filtro {i + 1}', ativo=True,
+            palavras_chave=palavras,
+            palavras_exclusao=[rnd.choice(_VOCABULARIO)] if rnd.random() < 0.3 else [],
+            regioes_uf=rnd.sample(_UFS, rnd.randint(1, 4)) if rnd.random() < 0.5 else [],
+            valor_minimo=None, valor_maximo=None,
+        ))
+    return filtros
+
+
+def _contem(texto, palavra):
+    frase = ' '.join(texto_util.palavras(palavra))
+    return bool(frase) and frase in texto
+
+
+def _laco_ingenuo(filtros, objeto, uf):
+    texto = ' '.join(texto_util.palavras(objeto))
+    casados = {}
+    for f in filtros:
+        if f.regioes_uf and uf and uf not in f.regioes_uf:
+            continue
+        if any(_contem(texto, e) for e in f.palavras_exclusao or []):
+            continue
+        encontradas = [p for p in f.palavras_chave or [] if _contem(texto, p)]
+        if encontradas or not f.palavras_chave:
+            casados[f.id] = encontradas
+    return casados
+
+
+def main():
+    parser = parser_base('Benchmark do percolador de filtros (autômato x laço por filtro)')
+    parser.add_argument('--filtros', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--editais', type=int, default=10000)
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    editais = [(objeto, rnd.choice(_UFS)) for objeto, _ in _objetos(args.editais, 0, rnd)]
+    n = len(editais)
+    linhas = []
+    for n_filtros in args.filtros:
+        filtros = _filtros(n_filtros, random.Random(n_filtros))
+        percolador = Percolador(filtros)
+
+        t_ingenuo = t_perc = float('inf')
+        for _ in range(args.repeticoes):
+            with cronometro() as t:
+                esperado = [_laco_ingenuo(filtros, objeto, uf) for objeto, uf in editais]
+            t_ingenuo = min(t_ingenuo, t['segundos'])
+            with cronometro() as t:
+                obtido = [percolador.percolar(objeto, uf) for objeto, uf in editais]
+            t_perc = min(t_perc, t['segundos'])
+
+        iguais = sum(1 for a, b in zip(esperado, obtido) if a.keys() == b.keys())
+        matches = sum(len(m) for m in obtido)
+        linhas.append((n_filtros, n, f'{t_ingenuo / n * 1e6:.1f} µs', f'{t_perc / n * 1e6:.1f} µs',
+                       f'{t_ingenuo / t_perc:.1f}x', f'{matches / n:.1f}', f'{iguais}/{n}'))
+
+    imprimir_tabela(
+        ('filtros', 'editais', 'laço por filtro', 'percolador', 'ganho', 'matches/edital', 'mesmo resultado'),
+        linhas,
+    )
+
+
+if __name__ == '__main__':
+    main()
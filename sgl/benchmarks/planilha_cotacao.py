@@ -0,0 +1,88 @@
+"""
+SGL - Benchmark da geração da planilha de cotação
+
+Mede tempo e pico de memória (tracemalloc) da geração completa pelo
+openpyxl (write-only) e da geração pelo template em cache
+(montar_planilha_cotacao) para editais com muitos itens. Não usa banco:
+os itens são sintéticos.
+
+Uso:
+    python -m sgl.benchmarks.planilha_cotacao
+    python -m sgl.benchmarks.planilha_cotacao --itens 100 1000 5000 --repeticoes 3
+"""
+import gc
+import random
+import tracemalloc
+
+from ..services.planilha_cotacao_service import (
+    montar_planilha_cotacao, _montar_planilha_openpyxl,
+)
+from ._comum import parser_base, cronometro, imprimir_tabela
+
+
+def _itens_sinteticos(n_itens):
+    rnd = random.Random(42)
+    return [{
+        'numero_item': i + 1,
+        'descricao': f'Item {i + 1} — ' + ' '.join(rnd.choice(('papel', 'sabão', 'detergente',
+                                                                  'luva', 'saco', 'vassoura'))
+                                                        for _ in range(12)),
+        'codigo_referencia': str(rnd.randint(100000, 999999)),
+        'quantidade': float(rnd.randint(1, 500)),
+        'unidade_compra': 'UN',
+        'preco_unitario_maximo': round(rnd.uniform(1, 200), 2),
+        'grupo_lote': f'LOTE {i // 50 + 1}',
+    } for i in range(n_itens)]
+
+
+_EDITAL = {
+    'orgao_razao_social': 'Prefeitura Municipal (benchmark)',
+    'uf': 'SP', 'municipio': 'São Paulo', 'modalidade_nome': 'Pregão Eletrônico',
+    'objeto_resumo': 'Aquisição de materiais de limpeza', 'status': 'aprovado',
+}
+
+
+def _medir(funcao, itens, repeticoes):
+    """Retorna (melhor_s, pico_memoria_bytes, tamanho_arquivo)."""
+    melhor, tamanho = None, 0
+    for _ in range(repeticoes):
+        gc.collect()
+        with cronometro() as t:
+            tamanho = len(funcao(_EDITAL, itens))
+        if melhor is None or t['segundos'] < melhor:
+            melhor = t['segundos']
+
+    # Pico de memória em execução separada (tracemalloc distorce o tempo)
+    gc.collect()
+    tracemalloc.start()
+    funcao(_EDITAL, itens)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return melhor, pico, tamanho
+
+
+def main():
+    parser = parser_base('Benchmark da geração da planilha de cotação (openpyxl x template)')
+    parser.add_argument('--itens', type=int, nargs='+', default=[100, 1000, 5000])
+    args = parser.parse_args()
+
+    montar_planilha_cotacao(_EDITAL, [])  # monta o template fora da medição
+    linhas = []
+    for n_itens in args.itens:
+        itens = _itens_sinteticos(n_itens)
+        for nome, funcao in (('openpyxl', _montar_planilha_openpyxl),
+                             ('template', montar_planilha_cotacao)):
+            segundos, pico, tamanho = _medir(funcao, itens, args.repeticoes)
+            linhas.append((
+                n_itens, nome,
+                f'{segundos * 1000:.0f} ms',
+                f'{segundos * 1e6 / max(n_itens, 1):.0f} µs',
+                f'{pico / 2 ** 20:.1f} MiB',
+                f'{tamanho / 1024:.0f} KiB',
+            ))
+
+    imprimir_tabela(('itens', 'geração', 'tempo', 'por item', 'pico memória', 'arquivo'), linhas)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+SGL - Benchmark do custo de inserção com MinHash/LSH
+
+Insere N editais sintéticos (um flush por edital, como na captação) sem e
+com services/similaridade_edital.registrar(), e mostra o custo extra por
+inserção e por 10 mil editais. Parte dos objetos é gerada como variante
+quase idêntica de outro (retificação: uma ou duas palavras trocadas) para
+conferir quantos pares plantados o LSH agrupa. Tudo roda dentro de uma
+transação que sofre rollback no final.
+
+Uso:
+    python -m sgl.benchmarks.similaridade --database-url postgresql://.../sgl_bench
+    python -m sgl.benchmarks.similaridade --editais 10000 --variantes 0.1
+"""
+import random
+
+from ..models.database import db, Edital
+from ..services import similaridade_edital
+from ._comum import criar_app_benchmark, parser_base, ContadorSQL, cronometro, imprimir_tabela
+
+_VOCABULARIO = (
+    'aquisicao contratacao servicos material limpeza higiene escritorio manutencao predial '
+    'preventiva corretiva equipamentos informatica medicamentos hospitalares alimentacao escolar '
+    'generos alimenticios combustivel veiculos locacao fornecimento continuado registro precos '
+    'eventual futura secretaria municipal saude educacao obras pavimentacao asfaltica reforma '
+    'unidade basica ar condicionado mobiliario papel toner impressoras seguranca vigilancia '
+    'desarmada portaria recepcao copeiragem jardinagem coleta residuos solidos transporte escolar'
+).split()
+
+
+def _objetos(n, fracao_variantes, rnd):
+    """Lista de (objeto, indice_do_original ou None)."""
+    objetos = []
+    for i in range(n):
+        if objetos and rnd.random() < fracao_variantes:
+            origem = rnd.randrange(len(objetos))
+            palavras = objetos[origem][0].split()
+            for _ in range(rnd.randint(1, 2)):
+                palavras[rnd.randrange(len(palavras))] = rnd.choice(_VOCABULARIO)
+            objetos.append((' '.join(palavras), origem))
+        else:
+            palavras = [rnd.choice(_VOCABULARIO) for _ in range(rnd.randint(20, 60))]
+            objetos.append((' '.join(palavras), None))
+    return objetos
+
+
+def _inserir(objetos, com_similaridade):
+    """Insere os editais um a um; retorna (segundos, statements, ids)."""
+    ids = []
+    with ContadorSQL(db.engine) as contador, cronometro() as t:
+        for objeto, _ in objetos:
+            edital = Edital(objeto_resumo=objeto[:500], objeto_completo=objeto, status='captado')
+            db.session.add(edital)
+            db.session.flush()
+            if com_similaridade:
+                similaridade_edital.registrar(edital)
+            ids.append(edital.id)
+    return t['segundos'], contador.statements, ids
+
+
+def main():
+    parser = parser_base('Benchmark do custo de inserção com MinHash/LSH (quase duplicados)')
+    parser.add_argument('--editais', type=int, default=10000)
+    parser.add_argument('--variantes', type=float, default=0.1,
+                        help='fração de objetos gerados como variante de outro')
+    args = parser.parse_args()
+
+    objetos = _objetos(args.editais, args.variantes, random.Random(42))
+    app = criar_app_benchmark(args.database_url)
+    with app.app_context():
+        db.create_all()
+        try:
+            with cronometro() as t_assinatura:
+                for objeto, _ in objetos:
+                    similaridade_edital.assinatura(objeto)
+
+            t_base, q_base, _ = _inserir(objetos, com_similaridade=False)
+            db.session.rollback()
+            t_lsh, q_lsh, ids = _inserir(objetos, com_similaridade=True)
+
+            grupos = dict(db.session.execute(
+                db.select(Edital.id, Edital.grupo_similar_id).where(Edital.id.in_(ids))
+            ).all())
+            plantados = [(i, origem) for i, (_, origem) in enumerate(objetos) if origem is not None]
+            detectados = sum(1 for i, _ in plantados if grupos.get(ids[i]) is not None)
+            agrupados = sum(1 for g in grupos.values() if g is not None)
+        finally:
+            db.session.rollback()
+
+    n = args.editais
+    extra = t_lsh - t_base
+    imprimir_tabela(
+        ('cenário', 'editais', 'tempo', 'por edital', 'por 10 mil', 'statements'),
+        [
+            ('sem MinHash/LSH', n, f'{t_base:.2f} s', f'{t_base / n * 1000:.2f} ms',
+             f'{t_base / n * 10000:.1f} s', q_base),
+            ('com MinHash/LSH', n, f'{t_lsh:.2f} s', f'{t_lsh / n * 1000:.2f} ms',
+             f'{t_lsh / n * 10000:.1f} s', q_lsh),
+            ('custo extra', n, f'{extra:.2f} s', f'{extra / n * 1000:.2f} ms',
+             f'{extra / n * 10000:.1f} s', q_lsh - q_base),
+            ('só assinatura (CPU)', n, f"{t_assinatura['segundos']:.2f} s",
+             f"{t_assinatura['segundos'] / n * 1000:.2f} ms",
+             f"{t_assinatura['segundos'] / n * 10000:.1f} s", 0),
+        ],
+    )
+    print(f'\nVariantes plantadas: {len(plantados)}, agrupadas: {detectados}; '
+          f'editais com grupo: {agrupados}')
+
+
+if __name__ == '__main__':
+    main()
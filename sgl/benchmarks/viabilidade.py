@@ -0,0 +1,146 @@
+"""
+SGL - Benchmark da análise de viabilidade
+
+Compara a versão item a item (ORM, 1 + N queries) com a versão set-based
+(services/viabilidade_service.py, 1 statement) para processos grandes.
+Tudo roda dentro de uma transação que sofre rollback no final.
+
+Uso:
+    python -m sgl.benchmarks.viabilidade --database-url postgresql://.../sgl_bench
+    python -m sgl.benchmarks.viabilidade --itens 100 800 5000 --cotacoes 10
+"""
+import random
+
+from sqlalchemy import text
+
+from ..models.database import (
+    db, Edital, Processo, Fornecedor, ItemEdital, CotacaoFornecedor,
+)
+from ..services.viabilidade_service import analisar_viabilidade_processo
+from ._comum import criar_app_benchmark, parser_base, ContadorSQL, cronometro, imprimir_tabela
+
+
+def _popular(n_itens, n_cotacoes, n_fornecedores=20):
+    """Cria edital + processo + itens + cotações via INSERT em lote. Retorna processo_id."""
+    edital = Edital(objeto_resumo='Benchmark viabilidade', status='em_cotacao')
+    db.session.add(edital)
+    db.session.flush()
+    processo = Processo(edital_id=edital.id, margem_minima=15, status='em_cotacao')
+    db.session.add(processo)
+
+    fornecedores = [
+        Fornecedor(razao_social=f'Fornecedor bench {i}', cnpj=f'bench-{edital.id}-{i}')
+        for i in range(n_fornecedores)
+    ]
+    db.session.add_all(fornecedores)
+    db.session.flush()
+    ids_fornecedores = [f.id for f in fornecedores]
+
+    # Preço de referência por item; máximo ausente em 10% dos itens, sem cotação em ~6%
+    rnd = random.Random(42)
+    referencias = [round(rnd.uniform(5, 100), 2) for _ in range(n_itens)]
+    itens = db.session.execute(
+        db.insert(ItemEdital).returning(ItemEdital.id, sort_by_parameter_order=True),
+        [{
+            'processo_id': processo.id,
+            'numero_item': i + 1,
+            'descricao': f'Item {i + 1}',
+            'quantidade': rnd.randint(1, 500),
+            'unidade_compra': 'UN',
+            'preco_unitario_maximo': referencias[i] if i % 10 else None,
+            'status': 'pendente',
+        } for i in range(n_itens)],
+    ).scalars().all()
+
+    cotacoes = [{
+        'item_edital_id': item_id,
+        'fornecedor_id': rnd.choice(ids_fornecedores),
+        'preco_unitario': round(referencias[idx] * rnd.uniform(0.5, 1.4), 4),
+    } for idx, item_id in enumerate(itens) if idx % 17 for _ in range(n_cotacoes)]
+    if cotacoes:
+        db.session.execute(db.insert(CotacaoFornecedor), cotacoes)
+    db.session.flush()
+
+    # Estatísticas do planner para as linhas recém-inseridas (como em produção)
+    db.session.execute(text('ANALYZE itens_edital'))
+    db.session.execute(text('ANALYZE cotacoes_fornecedor'))
+    return processo.id
+
+
+def _analise_orm_item_a_item(processo_id, margem):
+    """Versão anterior (referência): processo.itens.all() + item.cotacoes.all() por item."""
+    processo = db.session.get(Processo, processo_id)
+    itens = processo.itens.all()
+    resultados = {'aprovados': 0, 'reprovados': 0, 'sem_cotacao': 0, 'total': len(itens)}
+    for item in itens:
+        cotacoes = item.cotacoes.all()
+        if not cotacoes:
+            item.status = 'sem_cotacao'
+            resultados['sem_cotacao'] += 1
+            continue
+        melhor = min(cotacoes, key=lambda c: float(c.preco_unitario))
+        custo = float(melhor.preco_unitario)
+        preco_venda = custo * (1 + margem / 100)
+        preco_max = float(item.preco_unitario_maximo or 0)
+        item.melhor_custo = custo
+        item.preco_venda = preco_venda
+        item.fornecedor_selecionado_id = melhor.fornecedor_id
+        if preco_max > 0:
+            item.margem_real = ((preco_max / custo) - 1) * 100
+            if preco_venda <= preco_max:
+                item.status = 'aprovado'
+                resultados['aprovados'] += 1
+            else:
+                item.status = 'reprovado'
+                resultados['reprovados'] += 1
+        else:
+            item.status = 'pendente'
+    db.session.flush()
+    return resultados
+
+
+def _medir(funcao, processo_id, repeticoes):
+    """Executa `funcao` N vezes (cada uma revertida via savepoint) e retorna (melhor_s, statements)."""
+    melhor, statements = None, 0
+    for _ in range(repeticoes):
+        savepoint = db.session.begin_nested()
+        db.session.expire_all()
+        with ContadorSQL(db.engine) as contador, cronometro() as t:
+            funcao(processo_id, 15.0)
+        savepoint.rollback()
+        if melhor is None or t['segundos'] < melhor:
+            melhor, statements = t['segundos'], contador.statements
+    return melhor, statements
+
+
+def main():
+    parser = parser_base('Benchmark da análise de viabilidade (ORM item a item x set-based)')
+    parser.add_argument('--itens', type=int, nargs='+', default=[100, 800, 5000])
+    parser.add_argument('--cotacoes', type=int, default=10, help='cotações por item')
+    args = parser.parse_args()
+
+    app = criar_app_benchmark(args.database_url)
+    linhas = []
+    with app.app_context():
+        for n_itens in args.itens:
+            try:
+                processo_id = _popular(n_itens, args.cotacoes)
+                t_orm, q_orm = _medir(_analise_orm_item_a_item, processo_id, args.repeticoes)
+                t_set, q_set = _medir(analisar_viabilidade_processo, processo_id, args.repeticoes)
+                linhas.append((
+                    n_itens, n_itens * args.cotacoes,
+                    f'{t_orm * 1000:.1f} ms', q_orm,
+                    f'{t_set * 1000:.1f} ms', q_set,
+                    f'{t_orm / t_set:.1f}x' if t_set else '-',
+                ))
+            finally:
+                db.session.rollback()
+
+    imprimir_tabela(
+        ('itens', 'cotações', 'ORM item a item', 'queries', 'set-based', 'queries', 'ganho'),
+        linhas,
+    )
+
+
+if __name__ == '__main__':
+    main()
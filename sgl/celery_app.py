@@ -5,9 +5,91 @@ load_dotenv()
 """
 SGL - Configuração do Celery
 Broker: Redis (localhost:6379/1)
+
+App Flask por processo: cada processo do worker cria o app (e o engine /
+pool de conexões do SQLAlchemy) uma única vez, no sinal
+`worker_process_init`, e todas as tasks rodam dentro do contexto desse app
+(FlaskTask). As tasks não chamam mais create_app() por execução.
 """
-from celery import Celery
+import logging
+import threading
+
+from celery import Celery, Task
 from celery.schedules import crontab
+from celery.signals import worker_process_init, worker_process_shutdown
+from flask import has_app_context
+
+logger = logging.getLogger(__name__)
+
+_app_flask = None
+_app_flask_lock = threading.Lock()
+
+
+def vincular_app_flask(app):
+    """Registra `app` como o app Flask das tasks neste processo (se ainda não houver um)."""
+    global _app_flask
+    with _app_flask_lock:
+        if _app_flask is None:
+            _app_flask = app
+    return _app_flask
+
+
+def obter_app_flask():
+    """
+    App Flask do processo atual, criado na primeira chamada e reutilizado
+    por todas as tasks seguintes (um engine / pool de conexões por processo).
+    """
+    if _app_flask is None:
+        from sgl.app import create_app
+        # Worker não agenda jobs: o APScheduler roda só no processo web
+        vincular_app_flask(create_app(iniciar_scheduler=False))
+    return _app_flask
+
+
+class FlaskTask(Task):
+    """
+    Executa a task no contexto do app Flask do processo (reaproveita um contexto já ativo).
+
+    kwarg perfilar=True: roda a task perfilada (sgl/utils/perfilamento.py).
+    Statements SQL e tempo de banco de cada task vão para o log (sgl/utils/consultas_sql.py).
+    """
+
+    def __call__(self, *args, **kwargs):
+        perfilar = kwargs.pop('perfilar', False)
+        if has_app_context():
+            return self._executar(perfilar, args, kwargs)
+        with obter_app_flask().app_context():
+            return self._executar(perfilar, args, kwargs)
+
+    def _executar(self, perfilar, args, kwargs):
+        from .utils.consultas_sql import contagem_job
+
+        with contagem_job(self.name):
+            if not perfilar:
+                return self.run(*args, **kwargs)
+            from .utils.perfilamento import perfilar as sessao_perfil
+            with sessao_perfil('job', self.name):
+                return self.run(*args, **kwargs)
+
+
+@worker_process_init.connect
+def _iniciar_app_worker(**kwargs):
+    """Cria o app no processo filho (prefork) antes da primeira task."""
+    app = obter_app_flask()
+    from .models.database import db
+    with app.app_context():
+        # Conexões herdadas do processo pai (fork) não podem ser reutilizadas
+        db.engine.dispose(close=False)
+    logger.info("App Flask do worker inicializado (pid %d)", os.getpid())
+
+
+@worker_process_shutdown.connect
+def _encerrar_app_worker(**kwargs):
+    if _app_flask is None:
+        return
+    from .models.database import db
+    with _app_flask.app_context():
+        db.engine.dispose()
 
 
 def make_celery(app=None):
@@ -22,6 +104,7 @@ def make_celery(app=None):
         'sgl',
         broker=broker,
         backend=backend,
+        task_cls=FlaskTask,
         include=['sgl.tasks.captacao_tasks', 'sgl.tasks.scraper_tasks']
     )
 
@@ -98,17 +181,10 @@ def make_celery(app=None):
         },
     )
 
-    # Integrar com Flask (se app fornecido)
+    # Integrar com Flask (se app fornecido): as tasks passam a usar esse app
     if app:
         celery.conf.update(app.config)
-
-        class ContextTask(celery.Task):
-            """Garante que tasks rodem dentro do contexto do Flask."""
-            def __call__(self, *args, **kwargs):
-                with app.app_context():
-                    return self.run(*args, **kwargs)
-
-        celery.Task = ContextTask
+        vincular_app_flask(app)
 
     return celery
 
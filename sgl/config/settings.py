@@ -65,6 +65,15 @@ class Config:
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME', '')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD', '')
     
+    # Compressão HTTP (gzip/Brotli) — ver sgl/utils/compressao.py
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))  # bytes
+    COMPRESS_LEVEL = 6
+    COMPRESS_BR_QUALITY = 5
+    
+    # Métricas Prometheus (GET /metrics) — ver sgl/utils/metricas.py
+    METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN', '')  # se definido, exige Bearer
+    METRICAS_PUBLICAS = False  # sem token: 404 (só o desenvolvimento expõe sem token)
+    
     # Paginação padrão
     DEFAULT_PAGE_SIZE = 20
     MAX_PAGE_SIZE = 100
@@ -74,6 +83,7 @@ class DevelopmentConfig(Config):
     """Configuração de desenvolvimento"""
     DEBUG = True
     SQLALCHEMY_ECHO = True
+    METRICAS_PUBLICAS = True
 
 
 class ProductionConfig(Config):
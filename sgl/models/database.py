@@ -131,7 +131,8 @@ class Edital(db.Model):
     
     # Objeto
     objeto_resumo = db.Column(db.String(500))
-    objeto_completo = db.Column(db.Text)
+    # Textos longos: deferidos — carregados só nos caminhos de AI/resumo (undefer_group('textos'))
+    objeto_completo = db.deferred(db.Column(db.Text), group='textos')
     
     # Classificação
     modalidade_id = db.Column(db.Integer)  # 8=Pregão, 2=Concorrência, etc.
@@ -151,6 +152,10 @@ class Edital(db.Model):
     # Origem
     plataforma_origem = db.Column(db.String(50))  # pncp, bll, bnc, licitanet, etc.
     hash_scraper = db.Column(db.String(64), index=True)  # Hash para dedup scrapers
+    # Quase duplicados (services/similaridade_edital.py): assinatura MinHash do objeto
+    # e id do primeiro edital do grupo de objetos quase idênticos
+    minhash = db.deferred(db.Column(db.LargeBinary))
+    grupo_similar_id = db.Column(db.Integer, index=True)
     url_original = db.Column(db.Text)
     link_sistema_origem = db.Column(db.Text)
     
@@ -160,11 +165,11 @@ class Edital(db.Model):
     
     # Metadados
     situacao_pncp = db.Column(db.String(100))
-    informacao_complementar = db.Column(db.Text)
+    informacao_complementar = db.deferred(db.Column(db.Text), group='textos')
     
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc),
-                           onupdate=lambda: datetime.now(timezone.utc))
+                           onupdate=lambda: datetime.now(timezone.utc), index=True)
     
     # Relacionamentos
     arquivos = db.relationship('EditalArquivo', backref='edital', lazy='dynamic',
@@ -172,6 +177,8 @@ class Edital(db.Model):
     triagem = db.relationship('Triagem', backref='edital', uselist=False)
     itens_extraidos = db.relationship('ItemEditalExtraido', backref='edital', lazy='dynamic',
                                       cascade='all, delete-orphan')
+    aliases = db.relationship('EditalAlias', backref='edital', lazy='dynamic',
+                              cascade='all, delete-orphan', passive_deletes=True)
     
     def to_dict(self, include_arquivos=False):
         data = {
@@ -196,6 +203,7 @@ class Edital(db.Model):
             'url_original': self.url_original,
             'link_sistema_origem': self.link_sistema_origem,
             'status': self.status,
+            'grupo_similar_id': self.grupo_similar_id,
             'created_at': self.created_at.isoformat() if self.created_at else None,
         }
         if include_arquivos:
@@ -203,6 +211,44 @@ class Edital(db.Model):
         return data
 
 
+class EditalAlias(db.Model):
+    """Chaves de identidade de um edital entre plataformas (ver services/identidade_edital.py)"""
+    __tablename__ = 'edital_aliases'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    chave = db.Column(db.String(120), nullable=False, unique=True)  # pncp:<cnpj>:<ano>:<seq>, num:..., hash:...
+    edital_id = db.Column(db.Integer, db.ForeignKey('editais.id', ondelete='CASCADE'),
+                          nullable=False, index=True)
+    tipo = db.Column(db.String(20), nullable=False)  # canonica, numero, processo, fonte
+    fonte = db.Column(db.String(50))  # plataforma que trouxe a chave
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class EditalLshBanda(db.Model):
+    """Bandas LSH da assinatura MinHash de um edital (ver services/similaridade_edital.py)"""
+    __tablename__ = 'edital_lsh_bandas'
+    
+    hash = db.Column(db.BigInteger, primary_key=True)  # hash da banda (número da banda incluído)
+    edital_id = db.Column(db.Integer, db.ForeignKey('editais.id', ondelete='CASCADE'),
+                          primary_key=True, index=True)
+
+
+class EditalFiltroMatch(db.Model):
+    """Filtro de prospecção que casou com um edital na captação (ver services/percolador_filtros.py)"""
+    __tablename__ = 'edital_filtro_match'
+    __table_args__ = (
+        db.UniqueConstraint('edital_id', 'filtro_id', name='uq_edital_filtro_match'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    edital_id = db.Column(db.Integer, db.ForeignKey('editais.id', ondelete='CASCADE'),
+                          nullable=False, index=True)
+    filtro_id = db.Column(db.Integer, db.ForeignKey('filtros_prospeccao.id', ondelete='CASCADE'),
+                          nullable=False, index=True)
+    palavras = db.Column(db.ARRAY(db.String), default=[])  # palavras-chave encontradas no objeto
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+
 class EditalArquivo(db.Model):
     """Arquivos associados a um edital (PDF, anexos, etc.)"""
     __tablename__ = 'edital_arquivos'
@@ -215,9 +261,12 @@ class EditalArquivo(db.Model):
     url_original = db.Column(db.Text)
     tamanho_bytes = db.Column(db.BigInteger)
     mime_type = db.Column(db.String(100))
-    texto_extraido = db.Column(db.Text)  # Texto extraído do PDF
+    texto_extraido = db.deferred(db.Column(db.Text))  # Legado — texto novo vai para edital_arquivo_textos
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     
+    paginas_texto = db.relationship('EditalArquivoTexto', backref='arquivo', lazy='dynamic',
+                                    cascade='all, delete-orphan')
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -229,6 +278,22 @@ class EditalArquivo(db.Model):
         }
 
 
+class EditalArquivoTexto(db.Model):
+    """Texto extraído de um arquivo, uma linha por página, comprimido (ver services/texto_store.py)"""
+    __tablename__ = 'edital_arquivo_textos'
+    __table_args__ = (
+        db.UniqueConstraint('arquivo_id', 'pagina', name='uq_edital_arquivo_textos_pagina'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    arquivo_id = db.Column(db.Integer, db.ForeignKey('edital_arquivos.id', ondelete='CASCADE'),
+                           nullable=False, index=True)
+    pagina = db.Column(db.Integer, nullable=False)  # base 1, numeração original do PDF
+    codec = db.Column(db.String(10), nullable=False, default='zstd')  # zstd, zlib
+    tamanho_original = db.Column(db.Integer)  # bytes UTF-8 antes da compressão
+    conteudo = db.Column(db.LargeBinary, nullable=False)
+
+
 class ItemEditalExtraido(db.Model):
     """Itens extraídos automaticamente do edital via AI/OCR"""
     __tablename__ = 'itens_edital_extraidos'
@@ -294,7 +359,7 @@ class Triagem(db.Model):
     motivo_rejeicao = db.Column(db.String(200))
     observacoes = db.Column(db.Text)
     prioridade = db.Column(db.String(10), default='media')  # alta, media, baixa
-    data_triagem = db.Column(db.DateTime)
+    data_triagem = db.Column(db.DateTime, index=True)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     
     usuario_triador = db.relationship('Usuario', backref='triagens')
@@ -338,7 +403,7 @@ class Processo(db.Model):
     
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc),
-                           onupdate=lambda: datetime.now(timezone.utc))
+                           onupdate=lambda: datetime.now(timezone.utc), index=True)
     
     edital = db.relationship('Edital', backref='processos')
     empresa = db.relationship('Empresa', backref='processos')
@@ -348,7 +413,7 @@ class Processo(db.Model):
     historico = db.relationship('ProcessoHistorico', backref='processo', lazy='dynamic',
                                 cascade='all, delete-orphan')
     
-    def to_dict(self):
+    def to_dict(self, total_itens=None):
         return {
             'id': self.id,
             'edital_id': self.edital_id,
@@ -359,7 +424,7 @@ class Processo(db.Model):
             'margem_minima': float(self.margem_minima) if self.margem_minima else None,
             'data_limite': self.data_limite.isoformat() if self.data_limite else None,
             'prioridade': self.prioridade,
-            'total_itens': self.itens.count(),
+            'total_itens': self.itens.count() if total_itens is None else total_itens,
         }
 
 
@@ -392,7 +457,7 @@ class Fornecedor(db.Model):
     ativo = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc),
-                           onupdate=lambda: datetime.now(timezone.utc))
+                           onupdate=lambda: datetime.now(timezone.utc), index=True)
     
     def to_dict(self):
         return {
@@ -413,7 +478,7 @@ class ItemEdital(db.Model):
     __tablename__ = 'itens_edital'
     
     id = db.Column(db.Integer, primary_key=True)
-    processo_id = db.Column(db.Integer, db.ForeignKey('processos.id'), nullable=False)
+    processo_id = db.Column(db.Integer, db.ForeignKey('processos.id'), nullable=False, index=True)
     numero_item = db.Column(db.Integer)
     descricao = db.Column(db.Text, nullable=False)
     codigo_referencia = db.Column(db.String(50))
@@ -461,6 +526,10 @@ class ItemEdital(db.Model):
 class CotacaoFornecedor(db.Model):
     """Cotação de um fornecedor para um item do edital"""
     __tablename__ = 'cotacoes_fornecedor'
+    __table_args__ = (
+        # Melhor cotação por item (DISTINCT ON ... ORDER BY preco_unitario) — viabilidade_service
+        db.Index('ix_cotacoes_fornecedor_item_preco', 'item_edital_id', 'preco_unitario'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     item_edital_id = db.Column(db.Integer, db.ForeignKey('itens_edital.id'), nullable=False)
@@ -599,3 +668,38 @@ class LogAtividade(db.Model):
     detalhes = db.Column(db.JSON)
     ip_address = db.Column(db.String(45))
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class RelatorioPerfil(db.Model):
+    """Relatório de uma execução perfilada sob demanda (ver utils/perfilamento.py)"""
+    __tablename__ = 'relatorios_perfil'
+
+    id = db.Column(db.Integer, primary_key=True)
+    origem = db.Column(db.String(20), nullable=False)  # request, job
+    alvo = db.Column(db.String(300), nullable=False)  # 'GET /api/editais', id do job, nome da task
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'))
+    perfilador = db.Column(db.String(20))  # pyinstrument, cprofile (vazio: outro profiler ativo)
+    formato = db.Column(db.String(10))  # html, text
+    duracao_ms = db.Column(db.Float)
+    sql_total = db.Column(db.Integer)
+    sql_ms = db.Column(db.Float)
+    sql = db.Column(db.JSON)  # [{sql, chamadas, ms_total, ms_max}] por tempo total
+    relatorio = db.deferred(db.Column(db.Text))
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+
+    def to_dict(self, com_sql=False):
+        dados = {
+            'id': self.id,
+            'origem': self.origem,
+            'alvo': self.alvo,
+            'usuario_id': self.usuario_id,
+            'perfilador': self.perfilador,
+            'formato': self.formato,
+            'duracao_ms': self.duracao_ms,
+            'sql_total': self.sql_total,
+            'sql_ms': self.sql_ms,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
+        if com_sql:
+            dados['sql'] = self.sql or []
+        return dados
@@ -1,15 +1,40 @@
 """
 SGL - Agendador de tarefas (substitui Celery Beat + Worker)
 Usa APScheduler para rodar dentro do próprio Flask — sem Redis.
+
+Eleição de líder: todo processo (ex.: cada worker do gunicorn) registra os
+jobs e sobe o scheduler PAUSADO; só o processo que detém o advisory lock
+do PostgreSQL (SCHEDULER_LOCK_KEY) executa os jobs. O lock é de sessão, em
+uma conexão dedicada: se o processo líder morrer, o PostgreSQL libera o
+lock e outro processo assume na próxima tentativa (failover automático).
+O líder faz heartbeat nessa conexão; se ela cair, pausa os jobs e volta a
+concorrer. Ao assumir, o próximo disparo de cada job é recalculado a partir
+de agora: os horários vencidos enquanto o processo estava pausado já foram
+executados pelo líder anterior (com misfire_grace_time + coalesce, o resume
+direto rodaria de novo tudo o que venceu na última hora).
 """
 import logging
-from datetime import datetime
+import os
+import socket
+import threading
+from datetime import datetime, timezone
 
+from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED, EVENT_JOB_SUBMITTED
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from sqlalchemy import text
+
+from .utils.consultas_sql import job_contabilizado
+from .utils.perfilamento import perfilavel
 
 logger = logging.getLogger(__name__)
 
+# Chave do advisory lock (bigint) e intervalo de heartbeat / nova tentativa
+SCHEDULER_LOCK_KEY = int(os.environ.get('SCHEDULER_LOCK_KEY', 0x53474C01))
+SCHEDULER_HEARTBEAT_SEGUNDOS = int(os.environ.get('SCHEDULER_HEARTBEAT_SEGUNDOS', 15))
+# Perfilamento sob demanda não antecipa job que já vai disparar dentro desse prazo
+PERFILAR_ANTECEDENCIA_SEGUNDOS = 60
+
 scheduler = BackgroundScheduler(
     timezone='America/Sao_Paulo',
     job_defaults={
@@ -25,12 +50,14 @@ def init_scheduler(app):
     Inicializa o scheduler dentro do contexto do Flask.
     Chamado uma única vez na criação do app.
     """
-    # Evitar dupla inicialização (gunicorn com múltiplos workers)
-    import os
+    # Evitar dupla inicialização (reloader do modo debug)
     if os.environ.get('WERKZEUG_RUN_MAIN') == 'true' or not app.debug:
         _registrar_jobs(app)
-        scheduler.start()
-        logger.info("=== APScheduler iniciado com sucesso ===")
+        scheduler.add_listener(_ao_evento_job, EVENT_JOB_SUBMITTED | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
+        # Gunicorn com múltiplos workers: só o líder executa os jobs
+        scheduler.start(paused=True)
+        _iniciar_eleicao(app)
+        logger.info("=== APScheduler iniciado (aguardando eleição de líder) ===")
     else:
         logger.info("APScheduler: aguardando reloader (debug mode)")
 
@@ -125,10 +152,251 @@ def _registrar_jobs(app):
     logger.info(f"Jobs registrados: {[j.id for j in scheduler.get_jobs()]}")
 
 
+# ==============================================================
+# ELEIÇÃO DE LÍDER (advisory lock do PostgreSQL)
+# ==============================================================
+
+class EleicaoLider:
+    """
+    Mantém a candidatura deste processo à liderança do scheduler.
+
+    Uma thread daemon tenta `pg_try_advisory_lock` a cada `intervalo`
+    segundos enquanto não é líder; sendo líder, faz heartbeat (SELECT 1)
+    na mesma conexão. Callbacks `ao_assumir` / `ao_perder` ligam e
+    desligam a execução dos jobs.
+    """
+
+    def __init__(self, engine, chave=SCHEDULER_LOCK_KEY, intervalo=SCHEDULER_HEARTBEAT_SEGUNDOS,
+                 ao_assumir=None, ao_perder=None):
+        self.engine = engine
+        self.chave = chave
+        self.intervalo = intervalo
+        self.ao_assumir = ao_assumir
+        self.ao_perder = ao_perder
+        self.identidade = f"{socket.gethostname()}:{os.getpid()}"
+        self.lider = False
+        self.lider_desde = None
+        self.ultimo_heartbeat = None
+        self._conexao = None
+        self._parar = threading.Event()
+        self._thread = None
+
+    def iniciar(self):
+        self._thread = threading.Thread(target=self._loop, name='sgl-eleicao-lider', daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self):
+        """Libera a liderança (se houver) e encerra a thread."""
+        self._parar.set()
+        if self._thread:
+            self._thread.join(timeout=self.intervalo + 5)
+        self._perder('encerramento')
+
+    def _loop(self):
+        while not self._parar.is_set():
+            try:
+                if self.lider:
+                    self._heartbeat()
+                else:
+                    self._tentar_assumir()
+            except Exception as e:
+                logger.warning("Eleição de líder (%s): %s", self.identidade, e)
+                self._perder(str(e))
+            self._parar.wait(self.intervalo)
+
+    def _conectar(self):
+        if self._conexao is None:
+            # Fora do pool: fechar a conexão fecha a sessão e libera o lock
+            self._conexao = self.engine.connect()
+            self._conexao.detach()
+        return self._conexao
+
+    def _tentar_assumir(self):
+        conexao = self._conectar()
+        obtido = conexao.execute(
+            text('SELECT pg_try_advisory_lock(:chave)'), {'chave': self.chave},
+        ).scalar()
+        if obtido:
+            # Identifica o líder para os demais processos (pg_stat_activity)
+            conexao.execute(text("SELECT set_config('application_name', :nome, false)"),
+                            {'nome': f'sgl-scheduler {self.identidade}'})
+        conexao.commit()
+        if not obtido:
+            return
+
+        self.lider = True
+        self.lider_desde = self.ultimo_heartbeat = datetime.now(timezone.utc)
+        logger.info("Scheduler: %s assumiu a liderança", self.identidade)
+        if self.ao_assumir:
+            self.ao_assumir()
+
+    def _heartbeat(self):
+        self._conexao.execute(text('SELECT 1'))
+        self._conexao.commit()
+        self.ultimo_heartbeat = datetime.now(timezone.utc)
+
+    def _perder(self, motivo):
+        era_lider = self.lider
+        self.lider = False
+        self.lider_desde = None
+        if era_lider:
+            logger.warning("Scheduler: %s deixou a liderança (%s)", self.identidade, motivo)
+            if self.ao_perder:
+                self.ao_perder()
+        if self._conexao is not None:
+            try:
+                self._conexao.close()
+            except Exception:
+                pass
+            self._conexao = None
+
+
+_eleicao = None
+
+
+def _iniciar_eleicao(app):
+    """Liga a eleição de líder (ou assume direto fora do PostgreSQL, ex.: SQLite em dev)."""
+    global _eleicao
+    from .models.database import db
+
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'postgresql':
+        logger.info("Scheduler: banco %s sem advisory lock — processo único", engine.dialect.name)
+        scheduler.resume()
+        return
+
+    _eleicao = EleicaoLider(engine, ao_assumir=_assumir_jobs, ao_perder=scheduler.pause).iniciar()
+
+
+def _assumir_jobs():
+    """Recalcula o próximo disparo dos jobs a partir de agora e liga a execução."""
+    agora = datetime.now(scheduler.timezone)
+    for job in scheduler.get_jobs():
+        if job.next_run_time is None:
+            continue  # job pausado individualmente
+        proximo = job.trigger.get_next_fire_time(None, agora)
+        if proximo is not None:  # trigger de data única: mantém o disparo pendente
+            job.modify(next_run_time=proximo)
+    scheduler.resume()
+
+
+def _lider_atual(engine):
+    """Processo que detém o lock, segundo o próprio PostgreSQL."""
+    # pg_try_advisory_lock(bigint): classid = 32 bits altos, objid = 32 bits baixos
+    with engine.connect() as conexao:
+        linha = conexao.execute(text("""
+            SELECT a.application_name, a.client_addr, a.backend_start, a.pid
+              FROM pg_locks l
+              JOIN pg_stat_activity a ON a.pid = l.pid
+             WHERE l.locktype = 'advisory' AND l.granted AND l.objsubid = 1
+               AND l.classid = :alto AND l.objid = :baixo
+        """), {'alto': SCHEDULER_LOCK_KEY >> 32, 'baixo': SCHEDULER_LOCK_KEY & 0xFFFFFFFF}).first()
+    if not linha:
+        return None
+    nome = linha.application_name or ''
+    return {
+        'processo': nome.removeprefix('sgl-scheduler ') or None,
+        'endereco': str(linha.client_addr) if linha.client_addr else None,
+        'conectado_desde': linha.backend_start.isoformat() if linha.backend_start else None,
+        'pid_postgres': linha.pid,
+    }
+
+
+def status_lideranca():
+    """Status da eleição: líder atual (visto pelo banco) e situação deste processo."""
+    if _eleicao is None:
+        return {
+            'modo': 'processo_unico' if scheduler.running else 'desligado',
+            'lider': None,
+            'este_processo': {'lider': scheduler.running, 'executando_jobs': _executando_jobs()},
+        }
+
+    try:
+        lider = _lider_atual(_eleicao.engine)
+    except Exception as e:
+        lider = {'erro': str(e)}
+    return {
+        'modo': 'advisory_lock',
+        'chave': SCHEDULER_LOCK_KEY,
+        'heartbeat_segundos': _eleicao.intervalo,
+        'lider': lider,
+        'este_processo': {
+            'processo': _eleicao.identidade,
+            'lider': _eleicao.lider,
+            'lider_desde': _eleicao.lider_desde.isoformat() if _eleicao.lider_desde else None,
+            'ultimo_heartbeat': (_eleicao.ultimo_heartbeat.isoformat()
+                                 if _eleicao.ultimo_heartbeat else None),
+            'executando_jobs': _executando_jobs(),
+        },
+    }
+
+
+# ============================================================
+# PERFILAMENTO SOB DEMANDA
+# ============================================================
+
+_jobs_rodando = set()
+_jobs_rodando_lock = threading.Lock()
+
+
+def _ao_evento_job(evento):
+    """Acompanha os jobs em execução e tira o `perfilar` dos kwargs depois da rodada perfilada."""
+    with _jobs_rodando_lock:
+        if evento.code == EVENT_JOB_SUBMITTED:
+            _jobs_rodando.add(evento.job_id)
+            return
+        _jobs_rodando.discard(evento.job_id)
+    job = scheduler.get_job(evento.job_id)
+    if job is not None and 'perfilar' in job.kwargs:
+        job.modify(kwargs={k: v for k, v in job.kwargs.items() if k != 'perfilar'})
+
+
+def perfilar_job(job_id):
+    """
+    Antecipa o próximo disparo do job para agora, com perfilar nos kwargs,
+    pelo próprio scheduler (respeita liderança e max_instances).
+
+    Returns:
+        tuple (int, dict): (status HTTP, corpo da resposta)
+    """
+    job = scheduler.get_job(job_id)
+    if job is None:
+        return 404, {'error': f'Job {job_id} não encontrado'}
+    if not _executando_jobs():
+        lider = None
+        if _eleicao is not None:
+            try:
+                lider = _lider_atual(_eleicao.engine)
+            except Exception as e:
+                lider = {'erro': str(e)}
+        return 409, {'error': 'Este processo não executa os jobs; peça ao líder', 'lider': lider}
+    with _jobs_rodando_lock:
+        rodando = job_id in _jobs_rodando
+    if rodando or 'perfilar' in job.kwargs:
+        return 409, {'error': f'Job {job_id} já está em execução'}
+    if job.next_run_time is None:
+        return 409, {'error': f'Job {job_id} está pausado'}
+    agora = datetime.now(scheduler.timezone)
+    if (job.next_run_time - agora).total_seconds() < PERFILAR_ANTECEDENCIA_SEGUNDOS:
+        return 409, {'error': f'Job {job_id} dispara em breve',
+                     'proximo_disparo': job.next_run_time.isoformat()}
+    job.modify(next_run_time=agora, kwargs={**job.kwargs, 'perfilar': job_id})
+    return 202, {'job': job_id, 'status': 'agendado'}
+
+
+def _executando_jobs():
+    from apscheduler.schedulers.base import STATE_RUNNING
+    return scheduler.state == STATE_RUNNING
+
+
 # ==============================================================
 # FUNÇÕES DOS JOBS
 # ==============================================================
 
+@perfilavel
+@job_contabilizado
 def _job_captacao_automatica(app, periodo_dias=3):
     """
     Executa captação automática PNCP dentro do contexto Flask.
@@ -191,6 +459,8 @@ def _job_captacao_automatica(app, periodo_dias=3):
             return {'erro': str(e)}
 
 
+@perfilavel
+@job_contabilizado
 def _job_captacao_bbmnet(app, periodo_dias=3):
     """
     Executa captação automática BBMNET dentro do contexto Flask.
@@ -242,6 +512,8 @@ def _job_captacao_bbmnet(app, periodo_dias=3):
             return {'erro': str(e)}
 
 
+@perfilavel
+@job_contabilizado
 def _job_captacao_licitardigital(app, periodo_dias=3):
     """
     Executa captação automática Licitar Digital (API Partner) dentro do contexto Flask.
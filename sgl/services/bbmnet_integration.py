@@ -7,10 +7,16 @@ import os
 from datetime import datetime, timezone
 
 from ..models.database import db, Edital, Triagem
+from .identidade_edital import IndiceIdentidades
+from . import similaridade_edital
+from . import percolador_filtros
+from ..utils import metricas
+from ..utils.progresso import iterar_registros
 
 logger = logging.getLogger(__name__)
 
 
+@metricas.execucao_medida('captacao', fonte='bbmnet')
 def executar_captacao_bbmnet(app_config: dict, periodo_dias: int = 7, ufs: list = None, modalidade_ids: list = None) -> dict:
     """
     Executa captação completa BBMNET → SGL.
@@ -68,9 +74,10 @@ def executar_captacao_bbmnet(app_config: dict, periodo_dias: int = 7, ufs: list
         stats['detalhes_uf'] = resultado.get('stats', {}).get('por_uf', {})
         
         # Salvar cada edital no banco
-        for edital_data in editais_sgl:
+        indice = IndiceIdentidades(editais_sgl, fonte='bbmnet')
+        for edital_data in iterar_registros(editais_sgl, stats):
             try:
-                resultado_save = _salvar_edital_bbmnet(edital_data)
+                resultado_save = _salvar_edital_bbmnet(edital_data, indice)
                 stats[resultado_save] = stats.get(resultado_save, 0) + 1
             except Exception as e:
                 db.session.rollback()
@@ -91,33 +98,20 @@ def executar_captacao_bbmnet(app_config: dict, periodo_dias: int = 7, ufs: list
     return stats
 
 
-def _salvar_edital_bbmnet(edital_data: dict) -> str:
+def _salvar_edital_bbmnet(edital_data: dict, indice: IndiceIdentidades = None) -> str:
     """
     Salva um edital do BBMNET no banco SGL.
-    Deduplicação via hash_scraper.
+    Deduplicação pelas chaves de identidade (hash da fonte, CNPJ + número/processo),
+    inclusive contra editais de outras plataformas.
     
     Returns:
         'novos_salvos', 'duplicados' ou 'erros'
     """
     hash_scraper = edital_data.get('hash_scraper')
     
-    # Verificar duplicidade por hash
-    if hash_scraper:
-        existente = Edital.query.filter_by(hash_scraper=hash_scraper).first()
-        if existente:
-            return 'duplicados'
-    
-    # Verificar duplicidade por CNPJ + número processo (safety net)
-    cnpj = edital_data.get('orgao_cnpj')
-    processo = edital_data.get('numero_processo')
-    if cnpj and processo:
-        existente = Edital.query.filter_by(
-            orgao_cnpj=cnpj,
-            numero_processo=processo,
-            plataforma_origem='bbmnet',
-        ).first()
-        if existente:
-            return 'duplicados'
+    indice = indice or IndiceIdentidades(fonte='bbmnet')
+    if indice.duplicado(edital_data):
+        return 'duplicados'
     
     # Criar edital
     edital = Edital(
@@ -152,6 +146,11 @@ def _salvar_edital_bbmnet(edital_data: dict) -> str:
     
     db.session.add(edital)
     db.session.flush()
+    if not indice.registrar_novo(edital.id, edital_data):
+        db.session.rollback()  # inserido em paralelo por outra captação
+        return 'duplicados'
+    similaridade_edital.registrar_seguro(edital)  # grupo de quase duplicados
+    percolador_filtros.registrar_matches(edital)  # filtros de prospecção que casaram
     
     # Criar triagem pendente
     triagem = Triagem(
@@ -14,6 +14,8 @@ from urllib.parse import urlencode, urlparse, parse_qs
 
 import requests
 
+from ..utils.progresso import notificar
+
 logger = logging.getLogger(__name__)
 
 # ============================================================
@@ -326,6 +328,7 @@ class BBMNETScraper:
             editais = resultado.get('editais', [])
             if not editais:
                 break
+            notificar('pagina', registros=len(editais), uf=uf)
             for edital in editais:
                 status = edital.get('editalStatus', {})
                 status_name = status.get('name', '') if isinstance(status, dict) else ''
@@ -0,0 +1,327 @@
+"""
+SGL - Orquestrador de captação (todas as plataformas em paralelo)
+
+POST /editais/captar cria uma execução e responde 202 na hora. Cada fonte
+(PNCP, BBMNET, Licitar Digital, Compras.gov.br) roda em sua própria thread,
+com app context (e sessão) próprio — o tempo total passa a ser o da fonte
+mais lenta, não a soma, e nenhum worker do gunicorn fica preso.
+
+O progresso por fonte (páginas, encontrados, novos, duplicados, erros)
+chega via utils.progresso e fica em memória. Um snapshot é gravado em
+LogAtividade (acao='captacao_execucao') a cada poucos segundos, então
+qualquer worker responde ao polling (GET /captacao/execucoes/<id>). O id da
+execução é o id desse LogAtividade.
+
+Os mesmos marcos são publicados no barramento de eventos (canal
+captacao:<id>) para o stream SSE GET /captacao/execucoes/<id>/eventos.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from functools import partial
+
+from sqlalchemy import update
+
+from ..models.database import db, LogAtividade
+from ..utils.eventos import canal_captacao, publicar
+from ..utils.progresso import acompanhar, CONTADORES_REGISTRO
+
+logger = logging.getLogger(__name__)
+
+# Sem o limite de ~120s do request HTTP, as buscas paginadas podem ir mais longe
+CAPTACAO_TEMPO_MAXIMO_SEG = int(os.environ.get('CAPTACAO_TEMPO_MAXIMO_SEG', 600))
+CAPTACAO_PERSISTIR_SEG = 2        # intervalo entre snapshots no banco
+CAPTACAO_EVENTO_PROGRESSO_SEG = 1   # 'progresso' por fonte no máximo 1x/s (demais eventos sempre)
+_MAX_EXECUCOES_MEMORIA = 50
+
+
+# ============================================================
+# FONTES
+# ============================================================
+
+def _fonte_pncp(app, p):
+    from .captacao_service import CaptacaoService
+    return CaptacaoService(app.config).executar_captacao(
+        periodo_dias=p.get('periodo_dias'),
+        data_inicial=p.get('data_inicial'),
+        data_final=p.get('data_final'),
+        ufs=p.get('ufs'),
+        modalidades=p.get('modalidades'),
+        filtros_ids=p.get('filtros_ids'),
+    )
+
+
+def _fonte_bbmnet(app, p):
+    from .bbmnet_integration import executar_captacao_bbmnet
+    return executar_captacao_bbmnet(
+        app_config=app.config,
+        periodo_dias=p['periodo'],
+        ufs=p['ufs_busca'],
+        modalidade_ids=p.get('modalidades_bbmnet'),
+    )
+
+
+def _fonte_licitardigital(app, p):
+    from .licitardigital_integration import executar_captacao_licitardigital
+    return executar_captacao_licitardigital(
+        app_config=app.config,
+        periodo_dias=p['periodo'],
+        tempo_maximo_seg=CAPTACAO_TEMPO_MAXIMO_SEG,
+    )
+
+
+def _fonte_comprasgov(app, p):
+    from .comprasgov_integration import executar_captacao_comprasgov
+    return executar_captacao_comprasgov(
+        app_config=app.config,
+        periodo_dias=p['periodo'],
+        ufs=p['ufs_busca'],
+        modalidade_ids=p.get('modalidades_comprasgov'),
+        incluir_legado=p.get('incluir_legado_comprasgov', False),
+        tempo_maximo_seg=CAPTACAO_TEMPO_MAXIMO_SEG,
+    )
+
+
+FONTES = OrderedDict([
+    ('pncp', _fonte_pncp),
+    ('bbmnet', _fonte_bbmnet),
+    ('licitardigital', _fonte_licitardigital),
+    ('comprasgov', _fonte_comprasgov),
+])
+
+
+def _normalizar_parametros(data):
+    """Parâmetros do corpo do POST /editais/captar + defaults por fonte (mesmos da rota antiga)."""
+    p = dict(data or {})
+    p['periodo'] = p.get('periodo_dias') or int(os.environ.get('CAPTACAO_PERIODO_DIAS_DEFAULT', 7))
+    p['ufs_busca'] = p.get('ufs') or os.environ.get('PNCP_UFS_DEFAULT', 'RJ,SP,MG,ES').split(',')
+    return p
+
+
+# ============================================================
+# EXECUÇÃO
+# ============================================================
+
+def _agora():
+    return datetime.now(timezone.utc)
+
+
+class ExecucaoCaptacao:
+    """Estado de uma execução (thread-safe); `snapshot()` é o que a API devolve."""
+
+    def __init__(self, execucao_id, fontes, parametros):
+        self.id = execucao_id
+        self.parametros = parametros
+        self.status = 'em_andamento'
+        self.iniciado_em = _agora()
+        self.finalizado_em = None
+        self.resultado = None
+        self.fontes = {nome: {
+            'status': 'aguardando',
+            'paginas': 0,
+            'encontrados': 0,
+            'processados': 0,
+            **{k: 0 for k in CONTADORES_REGISTRO},
+            'iniciado_em': None,
+            'duracao_seg': None,
+        } for nome in fontes}
+        self._lock = threading.Lock()
+        self._ultimo_progresso = {}
+
+    @property
+    def canal(self):
+        return canal_captacao(self.id)
+
+    def _contagens(self, nome):
+        fonte = self.fontes[nome]
+        return {'fonte': nome, **{k: fonte[k] for k in
+                                  ('paginas', 'encontrados', 'processados', *CONTADORES_REGISTRO)}}
+
+    def iniciar_fonte(self, nome):
+        with self._lock:
+            self.fontes[nome]['status'] = 'executando'
+            self.fontes[nome]['iniciado_em'] = _agora()
+        publicar(self.canal, 'fonte_iniciada', fonte=nome)
+
+    def registrar_evento(self, nome, evento, dados):
+        """Callback de utils.progresso para a thread da fonte `nome`."""
+        tipo = None
+        with self._lock:
+            fonte = self.fontes[nome]
+            if evento == 'pagina':
+                fonte['paginas'] += 1
+                fonte['encontrados'] += dados.get('registros', 0)
+                tipo = 'pagina'
+            elif evento == 'registros':
+                # PNCP processa várias buscas (UF x modalidade): acumula os processados
+                fonte['processados'] += 1
+                novos_antes = fonte['novos_salvos']
+                for chave in CONTADORES_REGISTRO:
+                    fonte[chave] = dados.get(chave, fonte[chave])
+                agora = time.monotonic()
+                if fonte['novos_salvos'] > novos_antes:
+                    tipo = 'edital_inserido'
+                elif agora - self._ultimo_progresso.get(nome, 0) >= CAPTACAO_EVENTO_PROGRESSO_SEG:
+                    tipo = 'progresso'
+                if tipo:
+                    self._ultimo_progresso[nome] = agora
+            contagens = self._contagens(nome) if tipo else None
+        if tipo:
+            publicar(self.canal, tipo, **contagens)
+
+    def concluir_fonte(self, nome, stats, erro=None):
+        with self._lock:
+            fonte = self.fontes[nome]
+            fonte['status'] = 'erro' if erro else 'concluida'
+            fonte['duracao_seg'] = round((_agora() - fonte['iniciado_em']).total_seconds(), 1)
+            if erro:
+                # O que já foi gravado antes da falha continua contando
+                stats = {**{k: fonte[k] for k in CONTADORES_REGISTRO}, **stats}
+                fonte['erro'] = erro
+            fonte['resultado'] = stats
+            for chave in CONTADORES_REGISTRO:
+                if isinstance(stats.get(chave), int):
+                    fonte[chave] = stats[chave]
+            contagens = self._contagens(nome)
+        publicar(self.canal, 'fonte_concluida', status='erro' if erro else 'concluida',
+                 erro=erro, duracao_seg=fonte['duracao_seg'], **contagens)
+
+    def finalizar(self):
+        with self._lock:
+            self.resultado = _montar_resultado(
+                {nome: f.get('resultado') or {} for nome, f in self.fontes.items()})
+            self.finalizado_em = _agora()
+            self.status = 'concluida'
+        publicar(self.canal, 'concluida', resultado=self.resultado)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'id': self.id,
+                'status': self.status,
+                'iniciado_em': self.iniciado_em.isoformat(),
+                'finalizado_em': self.finalizado_em.isoformat() if self.finalizado_em else None,
+                'duracao_seg': round(((self.finalizado_em or _agora()) - self.iniciado_em)
+                                     .total_seconds(), 1),
+                'atualizado_em': _agora().isoformat(),
+                'fontes': {
+                    nome: {
+                        k: (v.isoformat() if isinstance(v, datetime) else v)
+                        for k, v in fonte.items() if k != 'resultado'
+                    } for nome, fonte in self.fontes.items()
+                },
+                'novos_salvos': sum(f['novos_salvos'] for f in self.fontes.values()),
+                'resultado': self.resultado,
+            }
+
+
+def _montar_resultado(resultados):
+    """Mesmo formato da resposta síncrona antiga: stats do PNCP + uma chave por plataforma."""
+    resultado = dict(resultados.get('pncp') or {})
+    for nome in FONTES:
+        if nome != 'pncp' and nome in resultados:
+            resultado[nome] = resultados[nome]
+    resultado['total_geral'] = sum(
+        (r or {}).get('novos_salvos', 0) or 0 for r in resultados.values()
+    )
+    return resultado
+
+
+_execucoes = OrderedDict()
+_execucoes_lock = threading.Lock()
+
+
+def iniciar_execucao(app, data, usuario_id=None, fontes=None):
+    """
+    Cria a execução, grava o registro inicial e dispara as fontes em background.
+
+    Args:
+        data: corpo do POST (periodo_dias, ufs, modalidades, ...)
+        fontes: subconjunto de FONTES (None = todas)
+
+    Returns:
+        ExecucaoCaptacao
+
+    Raises:
+        ValueError: fonte desconhecida
+    """
+    fontes = list(fontes or FONTES)
+    desconhecidas = [f for f in fontes if f not in FONTES]
+    if desconhecidas:
+        raise ValueError(f'Fontes desconhecidas: {", ".join(desconhecidas)}')
+
+    parametros = _normalizar_parametros(data)
+    with app.app_context():
+        log = LogAtividade(usuario_id=usuario_id, acao='captacao_execucao', entidade='captacao')
+        db.session.add(log)
+        db.session.flush()
+        execucao = ExecucaoCaptacao(log.id, fontes, parametros)
+        log.entidade_id = log.id
+        log.detalhes = execucao.snapshot()
+        db.session.commit()
+
+    with _execucoes_lock:
+        _execucoes[execucao.id] = execucao
+        while len(_execucoes) > _MAX_EXECUCOES_MEMORIA:
+            _execucoes.popitem(last=False)
+
+    publicar(execucao.canal, 'iniciada', fontes=fontes)
+    threading.Thread(target=_executar, args=(app, execucao), daemon=True,
+                     name=f'captacao-{execucao.id}').start()
+    logger.info("Captação %d disparada: fontes=%s", execucao.id, fontes)
+    return execucao
+
+
+def _executar(app, execucao):
+    with ThreadPoolExecutor(max_workers=len(execucao.fontes), thread_name_prefix='captacao-fonte') as pool:
+        pendentes = {pool.submit(_executar_fonte, app, execucao, nome) for nome in execucao.fontes}
+        while pendentes:
+            _, pendentes = wait(pendentes, timeout=CAPTACAO_PERSISTIR_SEG)
+            if pendentes:
+                _persistir(app, execucao)
+
+    execucao.finalizar()
+    _persistir(app, execucao)
+    logger.info("Captação %d concluída: %s", execucao.id, execucao.resultado.get('total_geral'))
+
+
+def _executar_fonte(app, execucao, nome):
+    execucao.iniciar_fonte(nome)
+    try:
+        with app.app_context(), acompanhar(partial(execucao.registrar_evento, nome)):
+            stats = FONTES[nome](app, execucao.parametros)
+        execucao.concluir_fonte(nome, stats or {})
+    except Exception as e:
+        logger.error("Captação %d, fonte %s: %s", execucao.id, nome, e, exc_info=True)
+        execucao.concluir_fonte(nome, {'erro': str(e)}, erro=str(e))
+
+
+def _persistir(app, execucao):
+    """Grava o snapshot atual no LogAtividade da execução."""
+    try:
+        with app.app_context():
+            db.session.execute(
+                update(LogAtividade)
+                .where(LogAtividade.id == execucao.id)
+                .values(detalhes=execucao.snapshot())
+            )
+            db.session.commit()
+    except Exception as e:
+        logger.warning("Captação %d: erro ao gravar progresso: %s", execucao.id, e)
+
+
+def obter_execucao(execucao_id):
+    """Snapshot da execução (memória deste processo ou, se rodando em outro worker, do banco)."""
+    with _execucoes_lock:
+        execucao = _execucoes.get(execucao_id)
+    if execucao is not None:
+        return execucao.snapshot()
+
+    log = db.session.get(LogAtividade, execucao_id)
+    if log is None or log.acao != 'captacao_execucao':
+        return None
+    return {**(log.detalhes or {}), 'id': log.id}
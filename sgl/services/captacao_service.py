@@ -15,9 +15,19 @@ from ..models.database import (
 )
 from .pncp_client import PNCPClient, formatar_data_pncp
 from .edital_interpreter import EditalInterpreter, PDFTextExtractor
+from . import texto_store
+from .identidade_edital import IndiceIdentidades, identidade_pncp
+from . import similaridade_edital
+from . import percolador_filtros
+from ..utils import metricas
+from ..utils.progresso import iterar_registros
 
 logger = logging.getLogger(__name__)
 
+# Limites de texto enviados à AI (mesmos cortes aplicados no EditalInterpreter)
+MAX_CHARS_EXTRACAO_AI = 30000
+MAX_CHARS_RESUMO_AI = 25000
+
 
 class CaptacaoService:
     """
@@ -48,6 +58,7 @@ class CaptacaoService:
     # CAPTAÇÃO PRINCIPAL
     # =========================================================
     
+    @metricas.execucao_medida('captacao', fonte='pncp')
     def executar_captacao(
         self,
         data_inicial: Optional[str] = None,
@@ -109,8 +120,9 @@ class CaptacaoService:
             env_mod = os.environ.get('PNCP_MODALIDADES_DEFAULT', '4,6,7,8,12')
             modalidades = [int(m.strip()) for m in env_mod.split(',') if m.strip()]
         
-        # Carregar filtros de prospecção ativos
+        # Carregar filtros de prospecção ativos (mesma regra de casamento do percolador)
         filtros = self._carregar_filtros(filtros_ids)
+        percolador = percolador_filtros.Percolador(filtros) if filtros else None
         
         # Para cada combinação UF + modalidade
         ufs_busca = ufs or [None]  # None = todas as UFs
@@ -137,8 +149,10 @@ class CaptacaoService:
                     uf_stats['encontrados'] += len(contratacoes)
                     stats['total_encontrados'] += len(contratacoes)
                     
-                    for contratacao in contratacoes:
-                        resultado = self._processar_contratacao(contratacao, filtros, stats)
+                    indice = IndiceIdentidades(map(identidade_pncp, contratacoes), fonte='pncp')
+                    for contratacao in iterar_registros(contratacoes, stats):
+                        resultado = self._processar_contratacao(contratacao, percolador, stats, indice)
+                        metricas.incrementar('captacao_contratacoes', fonte='pncp', resultado=resultado)
                         uf_stats[resultado] += 1
                         stats[resultado] += 1
                         
@@ -167,9 +181,13 @@ class CaptacaoService:
         
         return stats
     
-    def _processar_contratacao(self, contratacao: dict, filtros: list, stats: dict) -> str:
+    @metricas.cronometrado('captacao_contratacao', fonte='pncp')
+    def _processar_contratacao(self, contratacao: dict, percolador, stats: dict,
+                               indice: IndiceIdentidades = None) -> str:
         """
         Processa uma contratação individual do PNCP.
+        A duplicidade (inclusive com editais de outras plataformas) é checada
+        no índice de identidades da página (services/identidade_edital.py).
         
         Returns:
             String indicando resultado: 'novos_salvos', 'duplicados', 'filtrados', 'erros'
@@ -181,13 +199,16 @@ class CaptacaoService:
                 return 'erros'
             
             # 2. Verificar duplicidade
-            existente = Edital.query.filter_by(numero_controle_pncp=numero_pncp).first()
-            if existente:
+            indice = indice or IndiceIdentidades(fonte='pncp')
+            identidade = identidade_pncp(contratacao)
+            with metricas.cronometro('captacao_dedup', fonte='pncp'):
+                duplicado = indice.duplicado(identidade)
+            if duplicado:
                 return 'duplicados'
             
             # 3. Aplicar filtros
-            if filtros:
-                passa, motivo = self._contratacao_passa_filtros(contratacao, filtros)
+            if percolador:
+                passa, motivo = self._contratacao_passa_filtros(contratacao, percolador)
                 if not passa:
                     # Logging detalhado do motivo da exclusão
                     orgao = contratacao.get('unidadeOrgao', {}).get('nomeUnidade', 'N/A')
@@ -199,19 +220,26 @@ class CaptacaoService:
                     return 'filtrados'
             
             # 4. Criar edital no banco
-            edital = self._criar_edital(contratacao)
-            db.session.add(edital)
-            db.session.flush()  # Para ter o ID
-            
-            # 5. Criar triagem pendente
-            triagem = Triagem(
-                edital_id=edital.id,
-                decisao='pendente',
-                prioridade=self._calcular_prioridade(contratacao)
-            )
-            db.session.add(triagem)
+            with metricas.cronometro('captacao_persistencia', fonte='pncp'):
+                edital = self._criar_edital(contratacao)
+                db.session.add(edital)
+                db.session.flush()  # Para ter o ID
+                if not indice.registrar_novo(edital.id, identidade):
+                    db.session.rollback()  # inserido em paralelo por outra captação
+                    return 'duplicados'
+                similaridade_edital.registrar_seguro(edital)  # grupo de quase duplicados
+                percolador_filtros.registrar_matches(edital)  # filtros de prospecção que casaram
+                
+                # 5. Criar triagem pendente
+                triagem = Triagem(
+                    edital_id=edital.id,
+                    decisao='pendente',
+                    prioridade=self._calcular_prioridade(contratacao)
+                )
+                db.session.add(triagem)
             
-            db.session.commit()
+            with metricas.cronometro('captacao_commit', fonte='pncp'):
+                db.session.commit()
             
             logger.info(
                 f"  ✓ Novo edital: {numero_pncp} | "
@@ -263,16 +291,15 @@ class CaptacaoService:
             return {'erro': 'Claude API não configurada e API PNCP não retornou itens'}
 
         # Buscar arquivo principal do edital
-        arquivo_edital = edital.arquivos.filter_by(tipo='edital').first()
-        if not arquivo_edital:
-            arquivo_edital = edital.arquivos.first()
+        arquivo_edital = self._arquivo_principal(edital, fallback_qualquer=True)
+
+        texto = self._texto_arquivo(arquivo_edital, max_chars=MAX_CHARS_EXTRACAO_AI) if arquivo_edital else ''
 
-        if not arquivo_edital or not arquivo_edital.texto_extraido:
+        if not texto:
             if arquivo_edital and arquivo_edital.url_cloudinary:
                 texto = self._baixar_e_extrair_texto(arquivo_edital.url_cloudinary)
                 if texto:
-                    arquivo_edital.texto_extraido = texto
-                    db.session.commit()
+                    texto_store.salvar_paginas(arquivo_edital.id, [texto], commit=True)
                 else:
                     return {'erro': 'Não foi possível extrair texto do PDF'}
             else:
@@ -287,7 +314,7 @@ class CaptacaoService:
                 resultado = self.interpreter.extrair_itens(texto_obj)
                 return self._salvar_itens_ai(edital, resultado)
 
-        resultado = self.interpreter.extrair_itens(arquivo_edital.texto_extraido)
+        resultado = self.interpreter.extrair_itens(texto)
         return self._salvar_itens_ai(edital, resultado)
 
     def _buscar_itens_pncp_api(self, edital) -> dict:
@@ -424,7 +451,7 @@ class CaptacaoService:
         if not self.interpreter:
             return {'erro': 'Claude API não configurada'}
         
-        edital = Edital.query.get(edital_id)
+        edital = Edital.query.options(db.undefer_group('textos')).get(edital_id)
         if not edital:
             return {'erro': 'Edital não encontrado'}
         
@@ -443,9 +470,9 @@ class CaptacaoService:
             return {'erro': 'Edital não encontrado'}
         
         texto = None
-        arquivo = edital.arquivos.filter_by(tipo='edital').first()
-        if arquivo and arquivo.texto_extraido:
-            texto = arquivo.texto_extraido
+        arquivo = self._arquivo_principal(edital)
+        if arquivo:
+            texto = self._texto_arquivo(arquivo, max_chars=MAX_CHARS_RESUMO_AI)
         if not texto:
             texto = edital.objeto_completo or edital.objeto_resumo or ''
         if not texto:
@@ -497,60 +524,22 @@ class CaptacaoService:
             status='captado',
         )
     
-    def _contratacao_passa_filtros(self, contratacao: dict, filtros: list) -> tuple:
+    @metricas.cronometrado('captacao_filtros', fonte='pncp')
+    def _contratacao_passa_filtros(self, contratacao: dict, percolador) -> tuple:
         """
-        Verifica se uma contratação passa em pelo menos um filtro.
+        Verifica se uma contratação passa em pelo menos um filtro, pelo
+        Percolador dos filtros (palavra-chave como substring do objeto normalizado).
         
         Returns:
             tuple (bool, str): (passou, motivo_exclusao)
         """
-        if not filtros:
+        if not percolador:
             return True, ''
         
-        objeto = (contratacao.get('objetoCompra') or '').lower()
         uf = contratacao.get('unidadeOrgao', {}).get('ufSigla') or contratacao.get('uf', '')
-        valor = contratacao.get('valorTotalEstimado')
-        
-        ultimo_motivo = 'nenhum_filtro_aplicavel'
-        
-        for filtro in filtros:
-            passa = True
-            motivo = ''
-            
-            # Palavras-chave (pelo menos uma deve estar no objeto)
-            if filtro.palavras_chave:
-                if not any(kw.lower() in objeto for kw in filtro.palavras_chave):
-                    passa = False
-                    motivo = f'palavras_chave ({filtro.nome})'
-            
-            # Palavras de exclusão
-            if passa and filtro.palavras_exclusao:
-                if any(exc.lower() in objeto for exc in filtro.palavras_exclusao):
-                    palavra_encontrada = next(exc for exc in filtro.palavras_exclusao if exc.lower() in objeto)
-                    passa = False
-                    motivo = f'palavra_exclusao: "{palavra_encontrada}" ({filtro.nome})'
-            
-            # Região
-            if passa and filtro.regioes_uf:
-                if uf and uf.upper() not in [u.upper() for u in filtro.regioes_uf]:
-                    passa = False
-                    motivo = f'uf: {uf} não em {filtro.regioes_uf} ({filtro.nome})'
-            
-            # Faixa de valor
-            if passa and valor is not None:
-                if filtro.valor_minimo and valor < float(filtro.valor_minimo):
-                    passa = False
-                    motivo = f'valor: {valor} < mín {filtro.valor_minimo} ({filtro.nome})'
-                if filtro.valor_maximo and valor > float(filtro.valor_maximo):
-                    passa = False
-                    motivo = f'valor: {valor} > máx {filtro.valor_maximo} ({filtro.nome})'
-            
-            if passa:
-                return True, ''
-            
-            ultimo_motivo = motivo
-        
-        return False, ultimo_motivo
+        matches, motivo = percolador.avaliar(contratacao.get('objetoCompra'), uf,
+                                             contratacao.get('valorTotalEstimado'))
+        return bool(matches), motivo
     
     def _calcular_prioridade(self, contratacao: dict) -> str:
         """Calcula prioridade com base no valor e prazo."""
@@ -598,6 +587,26 @@ class CaptacaoService:
         except Exception as e:
             logger.warning(f"Erro ao processar arquivos do edital {edital.id}: {e}")
     
+    @staticmethod
+    def _arquivo_principal(edital: Edital, fallback_qualquer: bool = False) -> Optional[EditalArquivo]:
+        """Arquivo principal do edital (tipo 'edital'), ou o primeiro arquivo se fallback_qualquer."""
+        arquivo = edital.arquivos.filter_by(tipo='edital').first()
+        if not arquivo and fallback_qualquer:
+            arquivo = edital.arquivos.first()
+        return arquivo
+
+    @staticmethod
+    def _texto_arquivo(arquivo: EditalArquivo, max_chars: Optional[int] = None) -> str:
+        """
+        Texto do arquivo a partir do armazenamento por página (comprimido),
+        lendo só as páginas necessárias para `max_chars`. Cai para a coluna
+        legada texto_extraido em arquivos gravados antes do texto_store.
+        """
+        texto = texto_store.carregar_texto(arquivo.id, max_chars=max_chars)
+        if not texto:
+            texto = arquivo.texto_extraido or ''
+        return texto
+
     def _carregar_filtros(self, filtros_ids: list = None) -> list:
         """Carrega filtros de prospecção ativos."""
         query = FiltroProspeccao.query.filter_by(ativo=True)
@@ -24,6 +24,8 @@ from datetime import datetime, timedelta
 
 import requests
 
+from ..utils.progresso import notificar
+
 logger = logging.getLogger(__name__)
 
 BASE_URL = "https://dadosabertos.compras.gov.br"
@@ -299,6 +301,7 @@ class ComprasGovClient:
                             "ComprasGov: UF=%s MOD=%d pag=%d → %d reg (total=%d)",
                             uf, mod_id, pagina, len(registros), total_reg,
                         )
+                    notificar('pagina', registros=len(registros), uf=uf, modalidade=mod_id)
 
                     if paginas_rest <= 0 or not registros:
                         break
@@ -340,6 +343,7 @@ class ComprasGovClient:
                     "ComprasGov Legado: pag=%d → %d registros",
                     pagina, len(registros),
                 )
+            notificar('pagina', registros=len(registros), legado=True)
 
             if paginas_rest <= 0 or not registros:
                 break
@@ -390,6 +394,7 @@ def converter_contratacao_14133_para_sgl(contratacao):
         "numero_processo": contratacao.get("processo", numero_display),
         "orgao_cnpj": cnpj,
         "orgao_razao_social": contratacao.get("orgaoEntidadeRazaoSocial", ""),
+        "unidade_codigo": uasg,
         "unidade_nome": contratacao.get("unidadeOrgaoNomeUnidade", ""),
         "uf": uf,
         "municipio": municipio,
@@ -432,6 +437,7 @@ def converter_licitacao_legado_para_sgl(licitacao):
         "numero_processo": num_processo,
         "orgao_cnpj": None,
         "orgao_razao_social": "",
+        "unidade_codigo": uasg,
         "unidade_nome": "",
         "uf": "",
         "municipio": "",
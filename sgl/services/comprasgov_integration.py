@@ -16,20 +16,27 @@ from .comprasgov_client import (
     converter_contratacao_14133_para_sgl,
     converter_licitacao_legado_para_sgl,
 )
+from ..utils import metricas
+from ..utils.progresso import iterar_registros
 
 logger = logging.getLogger(__name__)
 
 
+@metricas.execucao_medida('captacao', fonte='comprasgov')
 def executar_captacao_comprasgov(
     app_config=None,
     periodo_dias=None,
     ufs=None,
     modalidade_ids=None,
     incluir_legado=False,
+    tempo_maximo_seg=90,
 ):
     """
     Executa captação completa do Compras.gov.br e persiste no banco.
 
+    tempo_maximo_seg: orçamento da busca paginada (90s cabe no timeout do
+    gunicorn; execuções em background podem usar mais).
+
     Returns:
         dict com {total_encontrados, novos_salvos, duplicados, erros, plataforma}
     """
@@ -75,6 +82,7 @@ def executar_captacao_comprasgov(
             data_fim=data_fim_str,
             modalidades=modalidade_ids,
             ufs=ufs,
+            tempo_maximo_seg=tempo_maximo_seg,
         )
 
         editais_convertidos = []
@@ -128,32 +136,22 @@ def executar_captacao_comprasgov(
             return stats
 
         # ========== SALVAR NO BANCO ==========
-        from .. import db
-        from ..models import Edital, Triagem
+        from ..models.database import db, Edital, Triagem
+        from .identidade_edital import IndiceIdentidades
+        from . import similaridade_edital
+        from . import percolador_filtros
+
+        # Dedup pelas chaves de identidade (uma consulta para o lote inteiro);
+        # contratações 14.133 trazem o número de controle PNCP e casam com a captação PNCP
+        indice = IndiceIdentidades(editais_unicos, fonte="comprasgov")
 
-        for edital_sgl in editais_unicos:
+        for edital_sgl in iterar_registros(editais_unicos, stats):
             try:
                 hash_scraper = edital_sgl.get("hash_scraper")
 
-                # Dedup por hash_scraper
-                if hash_scraper:
-                    existente = Edital.query.filter_by(hash_scraper=hash_scraper).first()
-                    if existente:
-                        stats["duplicados"] += 1
-                        continue
-
-                # Dedup por processo + orgao + plataforma
-                orgao = edital_sgl.get("orgao_razao_social")
-                processo = edital_sgl.get("numero_processo")
-                if orgao and processo:
-                    existente = Edital.query.filter_by(
-                        orgao_razao_social=orgao,
-                        numero_processo=processo,
-                        plataforma_origem="comprasgov",
-                    ).first()
-                    if existente:
-                        stats["duplicados"] += 1
-                        continue
+                if indice.duplicado(edital_sgl):
+                    stats["duplicados"] += 1
+                    continue
 
                 # Parse datas
                 def _parse_dt(s):
@@ -171,6 +169,7 @@ def executar_captacao_comprasgov(
                     numero_processo=edital_sgl.get("numero_processo"),
                     orgao_cnpj=edital_sgl.get("orgao_cnpj"),
                     orgao_razao_social=edital_sgl.get("orgao_razao_social"),
+                    unidade_codigo=edital_sgl.get("unidade_codigo") or None,
                     unidade_nome=edital_sgl.get("unidade_nome"),
                     uf=edital_sgl.get("uf"),
                     municipio=edital_sgl.get("municipio"),
@@ -190,6 +189,12 @@ def executar_captacao_comprasgov(
                 )
                 db.session.add(edital)
                 db.session.flush()
+                if not indice.registrar_novo(edital.id, edital_sgl):
+                    db.session.rollback()  # inserido em paralelo por outra captação
+                    stats["duplicados"] += 1
+                    continue
+                similaridade_edital.registrar_seguro(edital)  # grupo de quase duplicados
+                percolador_filtros.registrar_matches(edital)  # filtros de prospecção que casaram
 
                 # Criar triagem automática
                 triagem = Triagem(
@@ -0,0 +1,219 @@
+"""
+SGL - Registro de Resultados da Disputa (em lote)
+
+Grava o resultado da disputa de muitos itens de um edital em um único
+statement: UPDATE ... FROM (VALUES ...) sobre itens_edital_extraidos, com
+as contagens usadas para o status do edital calculadas no mesmo
+round-trip (sobre o RETURNING + itens não tocados).
+
+Usado pelo lançamento manual (registrar-disputa) e pelo upload da
+planilha preenchida (upload-resultado-disputa), cuja leitura é feita em
+modo read-only do openpyxl (streaming, memória constante).
+"""
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import (
+    Integer, Numeric, String, Text, and_, case, cast, column, func, select,
+    union_all, update, values,
+)
+
+from ..models.database import db, ItemEditalExtraido
+
+logger = logging.getLogger(__name__)
+
+STATUS_VALIDOS = ('VENCIDO', 'NAO_VENCIDO', 'DESERTO', 'FRACASSADO')
+
+# Valores do dropdown da planilha → status_disputa
+STATUS_PLANILHA = {
+    'VENCIDO': 'VENCIDO',
+    'NÃO VENCIDO': 'NAO_VENCIDO',
+    'NAO VENCIDO': 'NAO_VENCIDO',
+    'NÃO_VENCIDO': 'NAO_VENCIDO',
+    'NAO_VENCIDO': 'NAO_VENCIDO',
+    'DESERTO': 'DESERTO',
+    'FRACASSADO': 'FRACASSADO',
+}
+
+
+def registrar_resultados_lote(edital_id, resultados, por='id',
+                              preco_apenas_vencidos=True, manter_obs_existente=False):
+    """
+    Atualiza status_disputa / preco_final / obs_disputa de vários itens.
+    Não faz commit.
+
+    Args:
+        edital_id: ID do Edital (itens de outros editais são ignorados)
+        resultados: lista de dicts {chave, status_disputa, preco_final, obs_disputa}
+                    — `chave` é o id do item (por='id') ou o numero_item (por='numero_item').
+                    status_disputa já normalizado (STATUS_VALIDOS).
+        por: 'id' ou 'numero_item'
+        preco_apenas_vencidos: aplica preco_final só a itens VENCIDO (lançamento manual)
+        manter_obs_existente: obs_disputa vazia não sobrescreve a existente (planilha)
+
+    Returns:
+        dict com atualizados, vencidos (deste lote), total_vencidos e
+        total_disputados (do edital inteiro, após o update)
+    """
+    # Última ocorrência vence em caso de chave duplicada
+    por_chave = {r['chave']: r for r in resultados}
+    if not por_chave:
+        return {'atualizados': 0, 'vencidos': 0, 'total_vencidos': 0, 'total_disputados': 0}
+
+    T = ItemEditalExtraido
+    v = values(
+        column('chave', Integer), column('status', String), column('preco', String),
+        column('obs', Text),
+        name='v',
+    ).data([
+        (
+            int(chave),
+            r['status_disputa'],
+            str(r['preco_final']) if r.get('preco_final') is not None else None,
+            r.get('obs_disputa'),
+        )
+        for chave, r in por_chave.items()
+    ])
+
+    chave_item = T.id if por == 'id' else T.numero_item
+    preco = cast(v.c.preco, Numeric(15, 4))
+    aplica_preco = v.c.preco.isnot(None)
+    if preco_apenas_vencidos:
+        aplica_preco = and_(v.c.status == 'VENCIDO', aplica_preco)
+    obs = func.coalesce(v.c.obs, T.obs_disputa) if manter_obs_existente else v.c.obs
+
+    atualizados = (
+        update(T)
+        .where(chave_item == v.c.chave, T.edital_id == edital_id)
+        .values(
+            status_disputa=cast(v.c.status, String(20)),
+            data_disputa=datetime.now(timezone.utc),
+            obs_disputa=obs,
+            preco_final=case((aplica_preco, preco), else_=T.preco_final),
+            preco_total_final=case(
+                (aplica_preco, preco * func.coalesce(T.quantidade, 0)),
+                else_=T.preco_total_final,
+            ),
+        )
+        .returning(T.id, T.status_disputa)
+        .cte('atualizados')
+    )
+
+    # Estado final do edital = itens não tocados + itens atualizados (snapshot do statement)
+    nao_tocados = select(T.status_disputa.label('status')).where(
+        T.edital_id == edital_id, T.id.not_in(select(atualizados.c.id)),
+    )
+    todos = union_all(nao_tocados, select(atualizados.c.status_disputa)).subquery('todos')
+
+    linha = db.session.execute(select(
+        select(func.count()).select_from(atualizados).scalar_subquery().label('atualizados'),
+        select(func.count()).select_from(atualizados)
+        .where(atualizados.c.status_disputa == 'VENCIDO').scalar_subquery().label('vencidos'),
+        func.count().filter(todos.c.status == 'VENCIDO').label('total_vencidos'),
+        func.count().filter(todos.c.status.isnot(None)).label('total_disputados'),
+    ).select_from(todos)).one()
+
+    return {
+        'atualizados': linha.atualizados,
+        'vencidos': linha.vencidos,
+        'total_vencidos': linha.total_vencidos,
+        'total_disputados': linha.total_disputados,
+    }
+
+
+def status_edital_por_resultado(total_vencidos, total_disputados, status_atual):
+    """Status do edital a partir das contagens da disputa."""
+    if total_vencidos > 0:
+        return 'ganho_parcial' if total_vencidos < total_disputados else 'ganho_total'
+    if total_disputados > 0:
+        return 'perdido'
+    return status_atual
+
+
+# ============================================================
+# LEITURA DA PLANILHA PREENCHIDA
+# ============================================================
+
+def _colunas_cabecalho(cabecalho):
+    """Detecta as colunas (índice base 0) pelo texto do cabeçalho."""
+    cols = {'item': None, 'status': None, 'preco': None, 'obs': None}
+    for idx, valor in enumerate(cabecalho):
+        hdr = str(valor or '').upper().replace('\n', ' ')
+        if 'ITEM' == hdr.strip():
+            cols['item'] = idx
+        elif 'STATUS' in hdr and 'DISPUTA' in hdr:
+            cols['status'] = idx
+        elif 'PREÇO' in hdr and 'FINAL' in hdr and 'TOTAL' not in hdr:
+            cols['preco'] = idx
+        elif 'OBS' in hdr and 'DISPUTA' in hdr:
+            cols['obs'] = idx
+    return cols
+
+
+def ler_resultados_planilha(arquivo):
+    """
+    Lê os resultados da disputa da aba "Cotação" em modo read-only.
+
+    Cabeçalho detectado só na linha 1; demais linhas lidas com
+    iter_rows(values_only=True), sem montar células em memória.
+
+    Args:
+        arquivo: caminho ou file-like do .xlsx
+
+    Returns:
+        lista de dicts {linha, numero_item, status_disputa, preco_final, obs_disputa}
+        apenas para linhas com status de disputa válido
+
+    Raises:
+        ValueError: coluna STATUS DISPUTA não encontrada
+    """
+    import openpyxl
+
+    wb = openpyxl.load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        if 'Cotação' in wb.sheetnames:
+            ws = wb['Cotação']
+        elif 'Cotacao' in wb.sheetnames:
+            ws = wb['Cotacao']
+        else:
+            # Tentar segunda aba
+            ws = wb.worksheets[1] if len(wb.worksheets) > 1 else wb.worksheets[0]
+
+        linhas = ws.iter_rows(values_only=True)
+        cols = _colunas_cabecalho(next(linhas, ()))
+        if cols['status'] is None:
+            raise ValueError(
+                'Coluna "STATUS DISPUTA" não encontrada na planilha. '
+                'Verifique se é a planilha de cotação correta.'
+            )
+
+        def _valor(valores, idx):
+            return valores[idx] if idx is not None and idx < len(valores) else None
+
+        resultados = []
+        for numero_linha, valores in enumerate(linhas, start=2):
+            status_val = _valor(valores, cols['status'])
+            if not status_val:
+                continue
+            status_norm = STATUS_PLANILHA.get(str(status_val).strip().upper())
+            if not status_norm:
+                continue
+
+            preco = _valor(valores, cols['preco'])
+            if preco is not None:
+                try:
+                    preco = float(preco)
+                except (ValueError, TypeError):
+                    preco = None
+            obs = _valor(valores, cols['obs'])
+
+            resultados.append({
+                'linha': numero_linha,
+                'numero_item': _valor(valores, cols['item']),
+                'status_disputa': status_norm,
+                'preco_final': preco,
+                'obs_disputa': str(obs) if obs else None,
+            })
+        return resultados
+    finally:
+        wb.close()
@@ -9,8 +9,12 @@ Fluxo:
   2. Baixa arquivos via API da plataforma
   3. Extrai texto do PDF (para uso pela IA)
   4. Upload para Dropbox em pasta organizada
-  5. Salva referencias na tabela edital_arquivos (com texto_extraido)
+  5. Salva referencias na tabela edital_arquivos (texto por página, comprimido,
+     em edital_arquivo_textos — ver texto_store.py)
   6. Encadeia: extração AI de itens + geração planilha cotação
+
+Cada etapa publica eventos no canal edital:<id> (utils/eventos.py), para o
+stream SSE GET /editais/<id>/eventos.
 """
 import logging
 import os
@@ -18,72 +22,75 @@ import re
 import time
 import traceback
 from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
 from threading import Thread
 
 import requests
 
+from ..utils import metricas
+from ..utils.eventos import canal_edital, publicar
+
 logger = logging.getLogger(__name__)
 
 PNCP_API_BASE = "https://pncp.gov.br/pncp-api/v1"
 DOWNLOAD_TIMEOUT = 30
+DOWNLOAD_LOTE_WORKERS = int(os.environ.get("DOWNLOAD_LOTE_WORKERS", 4))
 
 
 # ============================================================
 # EXTRACAO DE TEXTO DO PDF
 # ============================================================
 
-def _extrair_texto_pdf(pdf_bytes):
+@metricas.cronometrado('pdf_extracao_texto', origem='downloader')
+def _extrair_paginas_pdf(pdf_bytes):
     """
-    Extrai texto de bytes de um PDF.
+    Extrai o texto de bytes de um PDF, uma string por página (na ordem do PDF).
     Tenta pdfplumber primeiro, depois PyMuPDF como fallback.
     """
     if not pdf_bytes or len(pdf_bytes) < 100:
-        return ''
+        return []
 
     if not pdf_bytes[:5] == b'%PDF-':
         logger.warning("Arquivo nao e PDF (header: %s)", pdf_bytes[:20])
-        return ''
-
-    texto = ''
+        return []
 
     # Tentar pdfplumber
     try:
         import pdfplumber
         import io
         with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-            paginas = []
-            for page in pdf.pages:
-                t = page.extract_text()
-                if t:
-                    paginas.append(t)
-            texto = '\n\n'.join(paginas)
-            if texto.strip():
-                logger.info("pdfplumber extraiu %d chars de %d paginas", len(texto), len(pdf.pages))
-                return texto.strip()
+            paginas = [(page.extract_text() or '').strip() for page in pdf.pages]
+            if any(paginas):
+                logger.info(
+                    "pdfplumber extraiu %d chars de %d paginas",
+                    sum(len(p) for p in paginas), len(paginas),
+                )
+                return paginas
     except Exception as e:
         logger.warning("pdfplumber falhou: %s", e)
 
     # Fallback: PyMuPDF (fitz)
     try:
         import fitz
-        import io
         doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        paginas = []
-        for page in doc:
-            t = page.get_text()
-            if t:
-                paginas.append(t)
-        total_pages = doc.page_count
+        paginas = [(page.get_text() or '').strip() for page in doc]
         doc.close()
-        texto = '\n\n'.join(paginas)
-        if texto.strip():
-            logger.info("PyMuPDF extraiu %d chars de %d paginas", len(texto), total_pages)
-            return texto.strip()
+        if any(paginas):
+            logger.info(
+                "PyMuPDF extraiu %d chars de %d paginas",
+                sum(len(p) for p in paginas), len(paginas),
+            )
+            return paginas
     except Exception as e:
         logger.warning("PyMuPDF falhou: %s", e)
 
     logger.warning("Nenhum extrator conseguiu obter texto do PDF (%d bytes)", len(pdf_bytes))
-    return ''
+    return []
+
+
+def _extrair_texto_pdf(pdf_bytes):
+    """Extrai o texto completo de bytes de um PDF (páginas unidas)."""
+    return '\n\n'.join(p for p in _extrair_paginas_pdf(pdf_bytes) if p)
 
 
 # ============================================================
@@ -187,10 +194,10 @@ def _baixar_documentos_pncp(edital):
             elif "edital" in titulo_lower or "aviso" in titulo_lower:
                 tipo = "edital"
 
-            # EXTRAIR TEXTO DO PDF
-            texto = ''
+            # EXTRAIR TEXTO DO PDF (por página)
+            paginas = []
             if (ct and 'pdf' in ct.lower()) or nome_arquivo.lower().endswith('.pdf'):
-                texto = _extrair_texto_pdf(content)
+                paginas = _extrair_paginas_pdf(content)
 
             documentos.append({
                 "nome": nome_arquivo,
@@ -199,7 +206,7 @@ def _baixar_documentos_pncp(edital):
                 "url_original": url_download,
                 "tipo": tipo,
                 "titulo_api": titulo,
-                "texto_extraido": texto,
+                "paginas_texto": paginas,
             })
 
         time.sleep(0.3)
@@ -223,9 +230,9 @@ def _baixar_documentos_bbmnet(edital):
             content, ct, fname = _download_file(url)
             if content and len(content) > 1000:
                 nome = fname or f"edital_bbmnet_{edital.id}.pdf"
-                texto = ''
+                paginas = []
                 if nome.lower().endswith('.pdf') or (ct and 'pdf' in ct.lower()):
-                    texto = _extrair_texto_pdf(content)
+                    paginas = _extrair_paginas_pdf(content)
 
                 documentos.append({
                     "nome": nome,
@@ -233,7 +240,7 @@ def _baixar_documentos_bbmnet(edital):
                     "content_type": ct,
                     "url_original": url,
                     "tipo": "edital",
-                    "texto_extraido": texto,
+                    "paginas_texto": paginas,
                 })
                 break
 
@@ -294,9 +301,9 @@ def _baixar_documentos_licitardigital(edital):
             content, ct, fname = _download_file(url_download)
             if content:
                 final_name = fname or nome
-                texto = ''
+                paginas = []
                 if final_name.lower().endswith('.pdf') or (ct and 'pdf' in ct.lower()):
-                    texto = _extrair_texto_pdf(content)
+                    paginas = _extrair_paginas_pdf(content)
 
                 documentos.append({
                     "nome": final_name,
@@ -304,7 +311,7 @@ def _baixar_documentos_licitardigital(edital):
                     "content_type": ct or "application/pdf",
                     "url_original": url_download,
                     "tipo": "edital" if len(documentos) == 0 else "anexo",
-                    "texto_extraido": texto,
+                    "paginas_texto": paginas,
                 })
             time.sleep(0.3)
 
@@ -318,7 +325,7 @@ def _baixar_documentos_licitardigital(edital):
 
 def baixar_e_enviar_dropbox(edital_id, app=None):
     """Pipeline completo: baixa documentos, extrai texto, envia para Dropbox, salva no banco."""
-    from . import dropbox_service
+    from . import dropbox_service, texto_store
 
     if app is None:
         from flask import current_app
@@ -347,9 +354,12 @@ def baixar_e_enviar_dropbox(edital_id, app=None):
         else:
             documentos = _baixar_documentos_pncp(edital)
 
+        canal = canal_edital(edital.id)
         if not documentos:
             logger.warning("Nenhum documento encontrado para edital %d", edital.id)
+            publicar(canal, 'download_concluido', documentos=0, salvos=0)
             return
+        publicar(canal, 'download_iniciado', documentos=len(documentos), plataforma=plataforma)
 
         pasta_dropbox = dropbox_service.gerar_pasta_edital(edital)
         dropbox_service.criar_pasta(pasta_dropbox)
@@ -367,18 +377,18 @@ def baixar_e_enviar_dropbox(edital_id, app=None):
                 if not resultado:
                     continue
 
-                texto = doc.get("texto_extraido", "")
+                paginas = doc.get("paginas_texto") or []
 
-                existente = EditalArquivo.query.filter_by(
+                arquivo = EditalArquivo.query.filter_by(
                     edital_id=edital.id,
                     nome_arquivo=doc["nome"],
                 ).first()
 
-                if existente:
-                    existente.url_cloudinary = resultado.get("shared_link") or resultado["dropbox_path"]
-                    existente.tamanho_bytes = resultado["tamanho"]
-                    if texto and not existente.texto_extraido:
-                        existente.texto_extraido = texto
+                if arquivo:
+                    arquivo.url_cloudinary = resultado.get("shared_link") or resultado["dropbox_path"]
+                    arquivo.tamanho_bytes = resultado["tamanho"]
+                    if paginas and texto_store.contar_paginas(arquivo.id) > 0:
+                        paginas = []  # texto já armazenado
                 else:
                     arquivo = EditalArquivo(
                         edital_id=edital.id,
@@ -388,17 +398,22 @@ def baixar_e_enviar_dropbox(edital_id, app=None):
                         url_original=doc.get("url_original"),
                         tamanho_bytes=resultado["tamanho"],
                         mime_type=doc.get("content_type", "application/pdf"),
-                        texto_extraido=texto,
                     )
                     db.session.add(arquivo)
+                    db.session.flush()  # Para ter o ID
+
+                if paginas:
+                    texto_store.salvar_paginas(arquivo.id, paginas)
 
                 db.session.commit()
                 salvos += 1
+                publicar(canal, 'arquivo_baixado', nome=doc["nome"], tamanho=resultado["tamanho"],
+                         paginas=len(doc.get("paginas_texto") or []))
 
-                if texto:
+                if paginas:
                     logger.info(
-                        "Texto extraido: edital=%d arquivo='%s' (%d chars)",
-                        edital.id, doc["nome"], len(texto),
+                        "Texto extraido: edital=%d arquivo='%s' (%d paginas, %d chars)",
+                        edital.id, doc["nome"], len(paginas), sum(len(p) for p in paginas),
                     )
 
             except Exception as e:
@@ -407,11 +422,13 @@ def baixar_e_enviar_dropbox(edital_id, app=None):
                     "Erro salvar arquivo '%s' edital %d: %s",
                     doc.get("nome"), edital.id, e,
                 )
+                publicar(canal, 'arquivo_erro', nome=doc.get("nome"), erro=str(e))
 
         logger.info(
             "Download concluido: edital=%d, %d/%d documentos salvos no Dropbox",
             edital.id, salvos, len(documentos),
         )
+        publicar(canal, 'download_concluido', documentos=len(documentos), salvos=salvos)
 
         # ========== ENCADEAR: EXTRAÇÃO AI + PLANILHA ==========
         # FIX: imports corrigidos (from .), app.config ao invés de current_app,
@@ -424,11 +441,13 @@ def baixar_e_enviar_dropbox(edital_id, app=None):
 
             qtd_itens = resultado_ai.get('itens_salvos', 0)
             logger.info("AI extraiu %d itens do edital %d", qtd_itens, edital_id)
+            publicar(canal, 'itens_extraidos', itens=qtd_itens)
         except Exception as e:
             logger.error(
                 "Erro extrair itens AI edital %d: %s\n%s",
                 edital_id, e, traceback.format_exc(),
             )
+            publicar(canal, 'itens_erro', erro=str(e))
 
         # Gerar planilha de cotação (agora com itens preenchidos)
         try:
@@ -441,6 +460,8 @@ def baixar_e_enviar_dropbox(edital_id, app=None):
                 edital_id, e, traceback.format_exc(),
             )
 
+        publicar(canal, 'pipeline_concluido')
+
 
 def disparar_download_async(edital_id, app):
     """Dispara download em background thread."""
@@ -452,3 +473,28 @@ def disparar_download_async(edital_id, app):
     thread.start()
     logger.info("Download assincrono disparado para edital %d", edital_id)
     return thread
+
+
+def _processar_lote_downloads(edital_ids, app, max_workers=DOWNLOAD_LOTE_WORKERS):
+    """Executa o pipeline de download para um lote de editais com concorrência limitada."""
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="download-lote") as pool:
+        futuros = {pool.submit(baixar_e_enviar_dropbox, eid, app): eid for eid in edital_ids}
+        for futuro, eid in futuros.items():
+            try:
+                futuro.result()
+            except Exception as e:
+                logger.error("Erro no download em lote edital %d: %s", eid, e)
+    logger.info("Download em lote concluido: %d editais", len(edital_ids))
+
+
+def disparar_download_lote_async(edital_ids, app):
+    """Dispara um único job em background para um lote de editais (triagem em massa)."""
+    edital_ids = list(edital_ids)
+    thread = Thread(
+        target=_processar_lote_downloads,
+        args=(edital_ids, app),
+        daemon=True,
+    )
+    thread.start()
+    logger.info("Download em lote disparado para %d editais", len(edital_ids))
+    return thread
@@ -19,6 +19,8 @@ import dropbox
 from dropbox.exceptions import ApiError
 from dropbox.files import WriteMode
 
+from ..utils import metricas
+
 logger = logging.getLogger(__name__)
 
 # Pasta raiz no Dropbox
@@ -65,6 +67,7 @@ def gerar_pasta_edital(edital):
     return pasta
 
 
+@metricas.cronometrado('dropbox_upload')
 def upload_arquivo(conteudo_bytes, dropbox_path, nome_arquivo=None):
     """
     Faz upload de arquivo para o Dropbox.
@@ -86,6 +89,7 @@ def upload_arquivo(conteudo_bytes, dropbox_path, nome_arquivo=None):
             mute=True,
         )
 
+        metricas.incrementar('dropbox_upload_bytes', len(conteudo_bytes))
         logger.info(
             "Dropbox upload OK: %s (%d bytes)",
             nome_arquivo or dropbox_path, len(conteudo_bytes),
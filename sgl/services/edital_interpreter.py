@@ -16,6 +16,8 @@ from typing import Optional
 
 import anthropic
 
+from ..utils import metricas
+
 logger = logging.getLogger(__name__)
 
 
@@ -35,6 +37,7 @@ class EditalInterpreter:
     # EXTRAÇÃO DE ITENS DO EDITAL
     # =========================================================
     
+    @metricas.cronometrado('edital_interpreter', operacao='extrair_itens')
     def extrair_itens(self, texto_edital: str, contexto: str = '') -> dict:
         """
         Extrai todos os itens de um edital convertido em texto.
@@ -140,6 +143,7 @@ TEXTO DO EDITAL:
     # CLASSIFICAÇÃO E TRIAGEM AUTOMÁTICA
     # =========================================================
     
+    @metricas.cronometrado('edital_interpreter', operacao='classificar_relevancia')
     def classificar_relevancia(
         self, 
         objeto_licitacao: str, 
@@ -202,6 +206,7 @@ Responda EXCLUSIVAMENTE com JSON válido:
     # RESUMO E ANÁLISE DO EDITAL
     # =========================================================
     
+    @metricas.cronometrado('edital_interpreter', operacao='resumir_edital')
     def resumir_edital(self, texto_edital: str) -> dict:
         """
         Gera um resumo executivo do edital com informações-chave.
@@ -255,6 +260,7 @@ TEXTO DO EDITAL:
     # MATCHING DE PRODUTOS COM FORNECEDORES
     # =========================================================
     
+    @metricas.cronometrado('edital_interpreter', operacao='sugerir_fornecedores')
     def sugerir_fornecedores(
         self,
         itens_edital: list[dict],
@@ -453,6 +459,7 @@ class PDFTextExtractor:
             return ''
     
     @classmethod
+    @metricas.cronometrado('pdf_extracao_texto', origem='interpreter')
     def extrair_texto_auto(cls, caminho_pdf: str) -> tuple[str, str]:
         """
         Tenta extrair texto automaticamente, primeiro digital, depois OCR.
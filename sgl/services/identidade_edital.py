@@ -0,0 +1,445 @@
+"""
+SGL - Identidade canônica de editais entre plataformas
+
+A mesma licitação chega por PNCP (numero_controle_pncp), ComprasGov
+(md5 de cnpj:uasg:numero:ano), BBMNET (md5 do uniqueId) e Licitar Digital,
+cada uma com a sua chave. Aqui cada registro vira um conjunto de chaves
+normalizadas, gravadas na tabela edital_aliases (chave única → edital):
+
+  pncp:<cnpj>:<ano>:<sequencial>   canônica quando CNPJ + ano + sequencial são conhecidos
+                                   (campos do PNCP ou número de controle na URL)
+  num:<cnpj>:<unid>:<mod>:<n>/<ano>   número da compra/pregão normalizado
+  proc:<cnpj>:<unid>:<mod>:<n>/<ano>  número do processo normalizado
+  org:<órgão>:<processo>           nome do órgão (hash) + processo, para fontes sem CNPJ
+  hash:<hash_scraper>              chave da própria fonte
+
+<unid> é o código da unidade/UASG ('-' quando a fonte não informa) e <mod>
+a família da modalidade (pregao, dispensa...): o mesmo órgão repete o
+número da compra em unidades e modalidades diferentes.
+
+A primeira chave disponível nessa ordem é a canônica. A checagem de
+duplicidade é um lookup no índice único de edital_aliases.chave — em lote:
+uma consulta carrega as chaves já conhecidas de todos os registros da
+página (IndiceIdentidades). As chaves num:/proc:/org: são só fallback:
+quando o registro e o edital encontrado têm ambos a chave pncp:, vale só
+a comparação das chaves pncp: (duas compras distintas do PNCP nunca são
+fundidas por número). Um registro repetido vindo de outra fonte é
+vinculado ao edital existente: as chaves novas passam a apontar para ele e
+os identificadores que faltavam (ex.: número de controle PNCP de um edital
+captado pelo BBMNET) são completados.
+
+Editais anteriores a esta tabela: indexar_editais_existentes()
+(script add_edital_aliases.py na raiz, que também troca as chaves num:/proc:
+do formato antigo, sem unidade e modalidade — remover_chaves_legadas()).
+"""
+import hashlib
+import logging
+import re
+import unicodedata
+
+from sqlalchemy import or_, select, update, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from ..models.database import db, Edital, EditalAlias
+
+logger = logging.getLogger(__name__)
+
+_RE_NUMERO_CONTROLE = re.compile(r'(\d{14})-\d+-(\d+)/(\d{4})')
+_RE_NUMERO_ANO = re.compile(r'(\d[\d.\-]*)\s*/\s*(\d{4})')
+_LOTE_CONSULTA = 5000  # chaves por consulta IN
+_PREFIXOS_FALLBACK = ('num:', 'proc:', 'org:')  # ignoradas quando os dois lados têm pncp:
+
+# Família da modalidade pelo nome (primeira que aparecer no texto sem acento)
+_MODALIDADES = (
+    ('pregao', 'pregao'), ('concorrencia', 'concorrencia'), ('dispensa', 'dispensa'),
+    ('inexigib', 'inexigibilidade'), ('leilao', 'leilao'), ('concurso', 'concurso'),
+    ('credenciamento', 'credenciamento'), ('dialogo', 'dialogo'), ('tomada', 'tomada'),
+    ('convite', 'convite'), ('manifestacao', 'manifestacao'),
+)
+
+
+# ============================================================
+# NORMALIZAÇÃO
+# ============================================================
+
+def _inteiro(valor):
+    try:
+        return int(valor) if valor not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _ano_valido(ano):
+    return ano if ano and 1990 <= ano <= 2100 else None
+
+
+def normalizar_cnpj(valor):
+    """CNPJ só com dígitos (14), ou None."""
+    digitos = re.sub(r'\D', '', str(valor or ''))
+    return digitos if len(digitos) == 14 else None
+
+
+def normalizar_numero(valor, ano=None):
+    """
+    Número de compra/processo no formato '<numero sem zeros à esquerda>/<ano>'.
+
+    'PE 012/2025' → '12/2025'; '90012' com ano=2025 → '90012/2025';
+    '23069.000123/2025-11' → '23069000123/2025'. Sem ano no texto nem no
+    argumento não há como distinguir exercícios → None.
+    """
+    texto = str(valor or '').strip()
+    if not texto:
+        return None
+    encontrados = _RE_NUMERO_ANO.findall(texto)
+    if encontrados:
+        numero, ano_txt = encontrados[-1]
+        ano = _ano_valido(int(ano_txt))
+    else:
+        numero = texto
+        ano = _ano_valido(_inteiro(ano))
+    digitos = re.sub(r'\D', '', numero)
+    if not digitos or not ano or len(digitos) > 20:
+        return None
+    return f'{int(digitos)}/{ano}'
+
+
+def _sem_acento(valor):
+    texto = unicodedata.normalize('NFKD', str(valor or ''))
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def normalizar_modalidade(valor):
+    """'Pregão - Eletrônico' → 'pregao'; desconhecida → '-'."""
+    texto = _sem_acento(valor).lower()
+    for trecho, familia in _MODALIDADES:
+        if trecho in texto:
+            return familia
+    return '-'
+
+
+def normalizar_unidade(valor):
+    """Código da unidade/UASG só com dígitos e sem zeros à esquerda; '-' se ausente."""
+    digitos = re.sub(r'\D', '', str(valor or ''))
+    return str(int(digitos)) if digitos and len(digitos) <= 12 else '-'
+
+
+def _chave_orgao(orgao, processo):
+    """org:<hash do nome do órgão>:<processo> — equivalente ao antigo processo + órgão."""
+    nome = re.sub(r'[^A-Z0-9]+', ' ', _sem_acento(orgao).upper()).strip()
+    numero = re.sub(r'[^A-Z0-9]', '', _sem_acento(processo).upper())
+    if not nome or not numero or len(numero) > 40:
+        return None
+    return f"org:{hashlib.sha1(nome.encode()).hexdigest()[:16]}:{numero}"
+
+
+def _numero_controle(dados):
+    """(cnpj, ano, sequencial) do número de controle PNCP, no campo próprio ou em uma URL."""
+    for campo in ('numero_controle_pncp', 'url_original', 'link_pncp'):
+        m = _RE_NUMERO_CONTROLE.search(str(dados.get(campo) or ''))
+        if m:
+            return m.group(1), int(m.group(3)), int(m.group(2))
+    return None
+
+
+def chaves_identidade(dados):
+    """
+    Chaves de identidade de um registro (dict no formato SGL ou linha de
+    Edital). Lista de (chave, tipo); a primeira é a canônica.
+    """
+    cnpj = normalizar_cnpj(dados.get('orgao_cnpj'))
+    ano = _ano_valido(_inteiro(dados.get('ano_compra')))
+    sequencial = _inteiro(dados.get('sequencial_compra'))
+
+    controle = _numero_controle(dados)
+    if controle:
+        cnpj_controle, ano, sequencial = controle
+        cnpj = cnpj or cnpj_controle
+
+    chaves = []
+    if controle:
+        chaves.append((f'pncp:{cnpj_controle}:{ano}:{sequencial}', 'canonica'))
+    elif cnpj and ano and sequencial:
+        chaves.append((f'pncp:{cnpj}:{ano}:{sequencial}', 'canonica'))
+
+    if cnpj:
+        escopo = f"{cnpj}:{normalizar_unidade(dados.get('unidade_codigo'))}:" \
+                 f"{normalizar_modalidade(dados.get('modalidade_nome'))}"
+        numero = normalizar_numero(dados.get('numero_pregao'), ano)
+        if numero:
+            chaves.append((f'num:{escopo}:{numero}', 'numero'))
+        processo = normalizar_numero(dados.get('numero_processo'), ano)
+        if processo:
+            chaves.append((f'proc:{escopo}:{processo}', 'processo'))
+    orgao = _chave_orgao(dados.get('orgao_razao_social'), dados.get('numero_processo'))
+    if orgao:
+        chaves.append((orgao, 'orgao'))
+
+    if dados.get('hash_scraper'):
+        chaves.append((f"hash:{dados['hash_scraper']}", 'fonte'))
+    elif dados.get('numero_controle_pncp') and not controle:
+        chaves.append((f"ncp:{dados['numero_controle_pncp']}", 'fonte'))
+
+    vistas = set()
+    unicas = []
+    for chave, tipo in chaves:
+        if chave not in vistas:
+            vistas.add(chave)
+            unicas.append((chave[:120], tipo))
+    if unicas:
+        unicas[0] = (unicas[0][0], 'canonica')
+    return unicas
+
+
+def chave_canonica(dados):
+    chaves = chaves_identidade(dados)
+    return chaves[0][0] if chaves else None
+
+
+def _chave_pncp(chaves):
+    """Chave pncp: da lista de chaves_identidade (sempre a primeira), ou None."""
+    return chaves[0][0] if chaves and chaves[0][0].startswith('pncp:') else None
+
+
+def identidade_pncp(contratacao):
+    """Campos de identidade de uma contratação no formato da API do PNCP."""
+    orgao = contratacao.get('orgaoEntidade') or {}
+    unidade = contratacao.get('unidadeOrgao') or {}
+    return {
+        'numero_controle_pncp': contratacao.get('numeroControlePNCP'),
+        'orgao_cnpj': orgao.get('cnpj'),
+        'orgao_razao_social': orgao.get('razaoSocial'),
+        'unidade_codigo': unidade.get('codigoUnidade'),
+        'modalidade_nome': contratacao.get('modalidadeNome'),
+        'ano_compra': contratacao.get('anoCompra'),
+        'sequencial_compra': contratacao.get('sequencialCompra'),
+        'numero_pregao': contratacao.get('numeroCompra'),
+        'numero_processo': contratacao.get('processo'),
+    }
+
+
+# ============================================================
+# ÍNDICE
+# ============================================================
+
+def _inserir_aliases(valores):
+    """INSERT ... ON CONFLICT (chave) DO NOTHING; retorna as chaves inseridas."""
+    if not valores:
+        return set()
+    stmt = (
+        pg_insert(EditalAlias)
+        .values(valores)
+        .on_conflict_do_nothing(index_elements=['chave'])
+        .returning(EditalAlias.chave)
+    )
+    return set(db.session.execute(stmt).scalars())
+
+
+class IndiceIdentidades:
+    """
+    Índice chave → edital_id de um lote de registros.
+
+    O construtor carrega em uma consulta todas as chaves do lote que já
+    existem (e, em uma segunda, a chave pncp: dos editais encontrados);
+    `existente()` passa a ser um lookup em memória. As chaves de registros
+    fora do lote são consultadas sob demanda.
+    """
+
+    def __init__(self, registros=(), fonte=None):
+        self.fonte = fonte
+        self._mapa = {}
+        self._pncp = {}            # edital_id → chave pncp: do edital (None se não tem)
+        self._consultadas = set()
+        self._carregar({c for r in registros for c, _ in chaves_identidade(r)})
+
+    def _carregar(self, chaves):
+        chaves = [c for c in chaves if c not in self._consultadas]
+        for i in range(0, len(chaves), _LOTE_CONSULTA):
+            bloco = chaves[i:i + _LOTE_CONSULTA]
+            linhas = db.session.execute(
+                select(EditalAlias.chave, EditalAlias.edital_id).where(EditalAlias.chave.in_(bloco))
+            ).all()
+            self._mapa.update((chave, edital_id) for chave, edital_id in linhas)
+            self._consultadas.update(bloco)
+            self._carregar_pncp({edital_id for _, edital_id in linhas})
+
+    def _carregar_pncp(self, edital_ids):
+        ids = [i for i in edital_ids if i not in self._pncp]
+        if not ids:
+            return
+        self._pncp.update(dict.fromkeys(ids))
+        self._pncp.update(db.session.execute(
+            select(EditalAlias.edital_id, EditalAlias.chave)
+            .where(EditalAlias.edital_id.in_(ids), EditalAlias.chave.like('pncp:%'))
+        ).all())
+
+    def _dono(self, chave, pncp):
+        """Edital dono da chave, se ela identifica o registro (regra do pncp: acima)."""
+        edital_id = self._mapa.get(chave)
+        if edital_id is None:
+            return None
+        if pncp and chave.startswith(_PREFIXOS_FALLBACK) and self._pncp.get(edital_id):
+            return None  # os dois lados têm pncp: e ela não bateu: compras distintas
+        return edital_id
+
+    def existente(self, dados):
+        """id do edital que já tem alguma das chaves do registro, ou None."""
+        chaves = chaves_identidade(dados)
+        self._carregar([c for c, _ in chaves])
+        pncp = _chave_pncp(chaves)
+        for chave, _ in chaves:
+            edital_id = self._dono(chave, pncp)
+            if edital_id is not None:
+                return edital_id
+        return None
+
+    def duplicado(self, dados):
+        """
+        True se o registro já está cadastrado; nesse caso vincula as chaves
+        novas ao edital existente e grava (commit).
+        """
+        existente_id = self.existente(dados)
+        if existente_id is None:
+            return False
+        if self.vincular(existente_id, dados):
+            db.session.commit()
+        return True
+
+    def _valores(self, edital_id, chaves):
+        return [{'chave': c, 'tipo': t, 'edital_id': edital_id, 'fonte': self.fonte} for c, t in chaves]
+
+    def registrar_novo(self, edital_id, dados):
+        """
+        Grava as chaves de um edital recém-criado (na transação corrente).
+
+        Retorna False se uma chave que identifica o registro já pertencia a
+        outro edital — outra captação inseriu a mesma licitação em paralelo;
+        o chamador deve desfazer a transação e contar como duplicado. Chave
+        de fallback de outra compra do PNCP fica com o dono e não impede.
+        """
+        chaves = chaves_identidade(dados)
+        inseridas = _inserir_aliases(self._valores(edital_id, chaves))
+        ocupadas = [c for c, _ in chaves if c not in inseridas]
+        if ocupadas:
+            self._consultadas.difference_update(ocupadas)
+            self._carregar(ocupadas)
+            pncp = _chave_pncp(chaves)
+            if any(self._dono(c, pncp) not in (None, edital_id) for c in ocupadas):
+                self._consultadas.difference_update(c for c, _ in chaves)  # recarrega na próxima checagem
+                return False
+        self._mapa.update((c, edital_id) for c in inseridas)
+        self._pncp[edital_id] = _chave_pncp(chaves)
+        return True
+
+    def vincular(self, edital_id, dados):
+        """
+        Vincula um registro repetido ao edital existente: grava as chaves
+        que ainda não existiam e completa identificadores vazios do edital.
+        """
+        self._carregar([c for c, _ in chaves_identidade(dados)])
+        novas = [(c, t) for c, t in chaves_identidade(dados) if c not in self._mapa]
+        if not novas:
+            return 0  # repetido já vinculado: nada a gravar
+        inseridas = _inserir_aliases(self._valores(edital_id, novas))
+        self._mapa.update((c, edital_id) for c in inseridas)
+        pncp = _chave_pncp(chaves_identidade(dados))
+        if pncp in inseridas:
+            self._pncp[edital_id] = pncp
+        if inseridas:
+            _completar_identificadores(edital_id, dados)
+        return len(inseridas)
+
+
+def _completar_identificadores(edital_id, dados):
+    """UPDATE ... SET coluna = COALESCE(coluna, valor), updated_at = now() dos identificadores conhecidos."""
+    campos = {}
+    controle = _numero_controle(dados)
+    if controle and dados.get('numero_controle_pncp'):
+        campos['numero_controle_pncp'] = dados['numero_controle_pncp']
+    if controle:
+        campos['ano_compra'], campos['sequencial_compra'] = controle[1], controle[2]
+    cnpj = dados.get('orgao_cnpj')
+    if cnpj and len(str(cnpj)) <= 18:
+        campos['orgao_cnpj'] = cnpj
+    if not campos:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(
+                update(Edital)
+                .where(Edital.id == edital_id)
+                # Só quando falta algum: updated_at muda o ETag do edital
+                .where(or_(*(getattr(Edital, k).is_(None) for k in campos)))
+                .values({**{k: func.coalesce(getattr(Edital, k), v) for k, v in campos.items()},
+                         'updated_at': func.now()})
+                .execution_options(synchronize_session=False)
+            )
+    except Exception as e:  # ex.: número de controle já usado por outro edital
+        logger.warning("Não foi possível completar identificadores do edital %s: %s", edital_id, e)
+
+
+# ============================================================
+# EDITAIS EXISTENTES
+# ============================================================
+
+def remover_chaves_legadas():
+    """Apaga as chaves num:/proc: do formato <cnpj>:<numero>/<ano> (sem unidade e modalidade)."""
+    removidas = db.session.execute(
+        EditalAlias.__table__.delete().where(
+            EditalAlias.chave.like('num:%') | EditalAlias.chave.like('proc:%'),
+            func.array_length(func.string_to_array(EditalAlias.chave, ':'), 1) == 3,
+        )
+    ).rowcount
+    db.session.commit()
+    return removidas
+
+
+def indexar_editais_existentes(lote=2000):
+    """
+    Grava as chaves de identidade dos editais já cadastrados (idempotente).
+
+    Percorre os editais por id — o mais antigo fica com a chave quando há
+    repetidos — e devolve quantos editais já duplicavam outro.
+    """
+    colunas = (Edital.id, Edital.numero_controle_pncp, Edital.orgao_cnpj, Edital.orgao_razao_social,
+               Edital.unidade_codigo, Edital.modalidade_nome, Edital.ano_compra,
+               Edital.sequencial_compra, Edital.numero_pregao, Edital.numero_processo,
+               Edital.hash_scraper, Edital.url_original, Edital.plataforma_origem)
+    stats = {'editais': 0, 'chaves_novas': 0, 'duplicados': 0, 'exemplos_duplicados': []}
+    ultimo_id = 0
+
+    while True:
+        linhas = db.session.execute(
+            select(*colunas).where(Edital.id > ultimo_id).order_by(Edital.id).limit(lote)
+        ).mappings().all()
+        if not linhas:
+            break
+        ultimo_id = linhas[-1]['id']
+
+        valores, canonicas, vistas = [], {}, set()
+        for linha in linhas:
+            chaves = chaves_identidade(linha)
+            if chaves:
+                canonicas[linha['id']] = chaves[0][0]
+            for chave, tipo in chaves:
+                if chave not in vistas:
+                    vistas.add(chave)
+                    valores.append({'chave': chave, 'tipo': tipo, 'edital_id': linha['id'],
+                                    'fonte': linha['plataforma_origem']})
+
+        stats['chaves_novas'] += len(_inserir_aliases(valores))
+        donos = dict(db.session.execute(
+            select(EditalAlias.chave, EditalAlias.edital_id)
+            .where(EditalAlias.chave.in_(list(canonicas.values())))
+        ).all())
+        for edital_id, chave in canonicas.items():
+            if donos.get(chave) not in (None, edital_id):
+                stats['duplicados'] += 1
+                if len(stats['exemplos_duplicados']) < 50:
+                    stats['exemplos_duplicados'].append({'edital_id': edital_id, 'original_id': donos[chave]})
+
+        db.session.commit()
+        stats['editais'] += len(linhas)
+
+    logger.info("Identidades indexadas: %d editais, %d chaves novas, %d duplicados",
+                stats['editais'], stats['chaves_novas'], stats['duplicados'])
+    return stats
@@ -21,16 +21,22 @@ from datetime import datetime
 
 from flask import current_app
 
+from ..utils import metricas
+from ..utils.progresso import iterar_registros
+
 logger = logging.getLogger(__name__)
 
 
-def executar_captacao_licitardigital(app_config=None, periodo_dias=7):
+@metricas.execucao_medida('captacao', fonte='licitardigital')
+def executar_captacao_licitardigital(app_config=None, periodo_dias=7, tempo_maximo_seg=120):
     """
     Executa captação de editais do Licitar Digital via API Partner e salva no banco SGL.
 
     Args:
         app_config: configuração Flask (opcional)
         periodo_dias: quantos dias para trás buscar
+        tempo_maximo_seg: orçamento da busca paginada (120s cabe no timeout
+                          do gunicorn; execuções em background podem usar mais)
 
     Returns:
         dict com estatísticas: {total, novos_salvos, duplicados, erros, plataforma, modo}
@@ -72,7 +78,7 @@ def executar_captacao_licitardigital(app_config=None, periodo_dias=7):
         processos_raw = client.buscar_todos(
             dias_recentes=periodo_dias,
             max_paginas=10,
-            tempo_maximo_seg=120,
+            tempo_maximo_seg=tempo_maximo_seg,
         )
     except Exception as exc:
         logger.error("Licitar Partner busca falhou: %s", exc)
@@ -91,33 +97,28 @@ def executar_captacao_licitardigital(app_config=None, periodo_dias=7):
     stats["total"] = len(processos_raw)
 
     # Salvar no banco
-    from .. import db
-    from ..models import Edital, Triagem
+    from ..models.database import db, Edital, Triagem
+    from .identidade_edital import IndiceIdentidades
+    from . import similaridade_edital
+    from . import percolador_filtros
+
+    def _converter(proc_raw):
+        try:
+            return LicitarPartnerClient.converter_para_sgl(proc_raw)
+        except Exception:
+            return None  # o erro é contado no loop abaixo
+
+    # Dedup pelas chaves de identidade (uma consulta para a página inteira)
+    indice = IndiceIdentidades(filter(None, map(_converter, processos_raw)), fonte="licitardigital")
 
-    for proc_raw in processos_raw:
+    for proc_raw in iterar_registros(processos_raw, stats):
         try:
             edital_sgl = LicitarPartnerClient.converter_para_sgl(proc_raw)
             hash_scraper = edital_sgl.get("hash_scraper")
 
-            # Dedup por hash_scraper
-            if hash_scraper:
-                existente = Edital.query.filter_by(hash_scraper=hash_scraper).first()
-                if existente:
-                    stats["duplicados"] += 1
-                    continue
-
-            # Dedup por processo + orgao + plataforma
-            orgao = edital_sgl.get("orgao_razao_social")
-            processo = edital_sgl.get("numero_processo")
-            if orgao and processo:
-                existente = Edital.query.filter_by(
-                    orgao_razao_social=orgao,
-                    numero_processo=processo,
-                    plataforma_origem="licitardigital",
-                ).first()
-                if existente:
-                    stats["duplicados"] += 1
-                    continue
+            if indice.duplicado(edital_sgl):
+                stats["duplicados"] += 1
+                continue
 
             # Parse datas
             def _parse_dt(s):
@@ -153,6 +154,12 @@ def executar_captacao_licitardigital(app_config=None, periodo_dias=7):
             )
             db.session.add(edital)
             db.session.flush()
+            if not indice.registrar_novo(edital.id, edital_sgl):
+                db.session.rollback()  # inserido em paralelo por outra captação
+                stats["duplicados"] += 1
+                continue
+            similaridade_edital.registrar_seguro(edital)  # grupo de quase duplicados
+            percolador_filtros.registrar_matches(edital)  # filtros de prospecção que casaram
 
             # Criar triagem automática
             triagem = Triagem(
@@ -26,6 +26,8 @@ from datetime import datetime, timedelta, timezone
 
 import requests
 
+from ..utils.progresso import notificar
+
 logger = logging.getLogger(__name__)
 
 
@@ -452,6 +454,7 @@ class LicitarPartnerClient:
 
             todos.extend(data)
             pagina += 1
+            notificar('pagina', registros=len(data))
 
             # Verificar paginação
             pagination = resp.get("pagination", {})
@@ -0,0 +1,360 @@
+"""
+SGL - Percolador dos filtros de prospecção
+
+Os filtros (FiltroProspeccao) só eram aplicados dentro da captação PNCP;
+BBMNET, Licitar Digital, ComprasGov e os scrapers gravam sem filtro e
+ninguém ficava sabendo quando "X" aparecia. Aqui a consulta é invertida:
+em vez de testar cada edital contra cada filtro, as palavras-chave de
+todos os filtros ativos ficam em um autômato Aho-Corasick
+
+    frase normalizada → [(filtro, palavra original)]
+
+e cada edital novo, de qualquer fonte, é percolado em uma passada pelo
+texto do próprio objeto (custo proporcional ao tamanho do objeto, não ao
+número de filtros). Os filtros que casaram vão para edital_filtro_match, com as
+palavras encontradas — a triagem mostra por que o edital apareceu — e um
+evento 'edital_filtro' é publicado no canal SSE 'filtros'.
+
+Semântica: palavras-chave e exclusões casam como substring — a mesma
+regra `palavra in objeto` da captação PNCP original ('limpeza' casa com
+'limpezas', 'higien' com 'higienização') — só que sobre o texto
+normalizado por utils/texto.py (sem acento, minúsculas, palavras
+separadas por um espaço, sem stopwords) dos dois lados: 'pano de chão'
+casa com 'PANO DE CHAO'. UF e faixa de valor: dado ausente não exclui. Filtro sem
+palavras-chave casa com todo edital que passar em UF/valor/exclusões. A
+captação PNCP filtra as contratações com o mesmo Percolador (avaliar()),
+então a regra de casamento é uma só.
+
+O índice é reconstruído quando os filtros ativos mudam: invalidar() no
+próprio processo e, nos demais (workers, Celery), conferência de um
+carimbo dos filtros a cada PERCOLADOR_VERIFICAR_SEG. A repercolação da
+triagem pendente após criar um filtro roda em background
+(repercolar_em_background).
+"""
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+
+from sqlalchemy import select, delete, text, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from ..models.database import db, Edital, EditalFiltroMatch, FiltroProspeccao, Triagem
+from ..utils import texto as texto_util
+from ..utils.eventos import publicar
+
+logger = logging.getLogger(__name__)
+
+PERCOLADOR_VERIFICAR_SEG = 30
+CANAL_FILTROS = 'filtros'
+
+# Muda sempre que um filtro ativo é criado, alterado, desativado ou removido
+_SQL_CARIMBO = text("""
+    SELECT md5(coalesce(string_agg(f::text, '|' ORDER BY f.id), ''))
+    FROM filtros_prospeccao f
+    WHERE f.ativo
+""")
+
+
+# ============================================================
+# ÍNDICE INVERTIDO
+# ============================================================
+
+def _texto(texto):
+    """Texto normalizado com as palavras separadas por um espaço (lado do objeto e das frases)."""
+    return ' '.join(texto_util.palavras(texto))
+
+
+class _Filtro:
+    __slots__ = ('id', 'nome', 'ufs', 'valor_minimo', 'valor_maximo')
+
+    def __init__(self, filtro):
+        self.id = filtro.id
+        self.nome = filtro.nome
+        self.ufs = frozenset(u.upper() for u in (filtro.regioes_uf or []) if u)
+        self.valor_minimo = float(filtro.valor_minimo) if filtro.valor_minimo else None
+        self.valor_maximo = float(filtro.valor_maximo) if filtro.valor_maximo else None
+
+    def motivo(self, uf, valor):
+        """Motivo da recusa por UF/valor ('' se aceita)."""
+        if self.ufs and uf and uf.upper() not in self.ufs:
+            return f'uf: {uf} não em {sorted(self.ufs)} ({self.nome})'
+        if valor is not None:
+            if self.valor_minimo is not None and valor < self.valor_minimo:
+                return f'valor: {valor} < mín {self.valor_minimo} ({self.nome})'
+            if self.valor_maximo is not None and valor > self.valor_maximo:
+                return f'valor: {valor} > máx {self.valor_maximo} ({self.nome})'
+        return ''
+
+    def aceita(self, uf, valor):
+        return not self.motivo(uf, valor)
+
+
+class _Automato:
+    """Aho-Corasick: todas as frases contidas (como substring) em um texto, em uma passada."""
+
+    def __init__(self):
+        self._filhos = [{}]
+        self._falha = [0]
+        self._saidas = [[]]   # (filtro_id, original) das frases que terminam no nó
+
+    def __bool__(self):
+        return len(self._filhos) > 1
+
+    def adicionar(self, frase, valor):
+        no = 0
+        for letra in frase:
+            proximo = self._filhos[no].get(letra)
+            if proximo is None:
+                proximo = len(self._filhos)
+                self._filhos[no][letra] = proximo
+                self._filhos.append({})
+                self._falha.append(0)
+                self._saidas.append([])
+            no = proximo
+        self._saidas[no].append(valor)
+
+    def compilar(self):
+        """Links de falha (BFS); cada nó herda as saídas do seu sufixo."""
+        fila = deque(self._filhos[0].values())
+        while fila:
+            no = fila.popleft()
+            for letra, filho in self._filhos[no].items():
+                fila.append(filho)
+                falha = self._falha[no]
+                while falha and letra not in self._filhos[falha]:
+                    falha = self._falha[falha]
+                self._falha[filho] = self._filhos[falha].get(letra, 0)
+                self._saidas[filho] = self._saidas[filho] + self._saidas[self._falha[filho]]
+        return self
+
+    def buscar(self, texto):
+        """{filtro_id: [palavras originais]} das frases contidas em `texto`."""
+        achados = {}
+        filhos, falha, saidas = self._filhos, self._falha, self._saidas
+        no = 0
+        for letra in texto:
+            while no and letra not in filhos[no]:
+                no = falha[no]
+            no = filhos[no].get(letra, 0)
+            for filtro_id, original in saidas[no]:
+                palavras = achados.setdefault(filtro_id, [])
+                if original not in palavras:
+                    palavras.append(original)
+        return achados
+
+
+class Percolador:
+    """Autômatos das palavras-chave e exclusões de um conjunto de filtros."""
+
+    def __init__(self, filtros):
+        self.filtros = {}
+        self._palavras = _Automato()
+        self._exclusoes = _Automato()
+        self._sem_palavras = []
+        for filtro in filtros:
+            self.filtros[filtro.id] = _Filtro(filtro)
+            if not self._indexar(self._palavras, filtro.id, filtro.palavras_chave):
+                self._sem_palavras.append(filtro.id)
+            self._indexar(self._exclusoes, filtro.id, filtro.palavras_exclusao)
+        self._palavras.compilar()
+        self._exclusoes.compilar()
+
+    @staticmethod
+    def _indexar(automato, filtro_id, palavras):
+        indexadas = 0
+        for original in palavras or []:
+            frase = _texto(original)
+            if frase:
+                automato.adicionar(frase, (filtro_id, original))
+                indexadas += 1
+        return indexadas
+
+    def percolar(self, objeto, uf=None, valor=None):
+        """Filtros que casam com o edital: {filtro_id: [palavras-chave encontradas]}."""
+        texto = _texto(objeto)
+        candidatos = self._palavras.buscar(texto)
+        for filtro_id in self._sem_palavras:
+            candidatos.setdefault(filtro_id, [])
+        if not candidatos:
+            return {}
+        excluidos = self._exclusoes.buscar(texto) if self._exclusoes else {}
+        valor = float(valor) if valor is not None else None
+        return {
+            filtro_id: palavras for filtro_id, palavras in candidatos.items()
+            if filtro_id not in excluidos and self.filtros[filtro_id].aceita(uf, valor)
+        }
+
+    def avaliar(self, objeto, uf=None, valor=None):
+        """
+        (matches, motivo): matches como em percolar(); sem nenhum match, o
+        motivo pelo qual o último filtro recusou (estatística da captação).
+        """
+        matches = self.percolar(objeto, uf, valor)
+        if matches or not self.filtros:
+            return matches, ''
+        texto = _texto(objeto)
+        candidatos = self._palavras.buscar(texto)
+        excluidos = self._exclusoes.buscar(texto)
+        valor = float(valor) if valor is not None else None
+        motivo = ''
+        for filtro_id, filtro in self.filtros.items():
+            if filtro_id not in candidatos and filtro_id not in self._sem_palavras:
+                motivo = f'palavras_chave ({filtro.nome})'
+            elif filtro_id in excluidos:
+                motivo = f'palavra_exclusao: "{excluidos[filtro_id][0]}" ({filtro.nome})'
+            else:
+                motivo = filtro.motivo(uf, valor)
+        return {}, motivo
+
+
+# ============================================================
+# ÍNDICE DO PROCESSO
+# ============================================================
+
+_percolador = None
+_carimbo = None
+_verificado_em = 0.0
+_lock = threading.Lock()
+
+# Repercolação em background: uma thread por vez; pedidos durante a
+# execução viram mais uma rodada no fim
+_repercolar_lock = threading.Lock()
+_repercolando = False
+_repercolar_de_novo = False
+
+
+def obter_percolador(forcar=False):
+    """Percolador dos filtros ativos, reconstruído quando o carimbo dos filtros muda."""
+    global _percolador, _carimbo, _verificado_em
+    if not forcar and _percolador is not None \
+            and time.monotonic() - _verificado_em < PERCOLADOR_VERIFICAR_SEG:
+        return _percolador
+    with _lock:
+        carimbo = db.session.execute(_SQL_CARIMBO).scalar()
+        if _percolador is None or carimbo != _carimbo:
+            filtros = FiltroProspeccao.query.filter_by(ativo=True).all()
+            _percolador, _carimbo = Percolador(filtros), carimbo
+            logger.info("Percolador de filtros reconstruído: %d filtros ativos", len(filtros))
+        _verificado_em = time.monotonic()
+    return _percolador
+
+
+def invalidar():
+    """Força a conferência dos filtros na próxima percolação (após criar/alterar filtro)."""
+    global _verificado_em
+    _verificado_em = 0.0
+
+
+# ============================================================
+# MATCHES
+# ============================================================
+
+def registrar_matches(edital):
+    """
+    Percola um edital recém-inserido (após o flush) e grava os matches na
+    transação corrente. Nunca derruba a captação: erro vira warning.
+
+    Returns:
+        {filtro_id: [palavras]}
+    """
+    try:
+        percolador = obter_percolador()
+        matches = percolador.percolar(edital.objeto_completo or edital.objeto_resumo,
+                                      edital.uf, edital.valor_estimado)
+        if not matches:
+            return {}
+        with db.session.begin_nested():
+            db.session.execute(
+                pg_insert(EditalFiltroMatch).on_conflict_do_nothing(),
+                [{'edital_id': edital.id, 'filtro_id': f, 'palavras': p} for f, p in matches.items()],
+            )
+    except Exception as e:
+        logger.warning("Erro ao percolar filtros do edital %s: %s", edital.id, e)
+        return {}
+
+    for filtro_id, palavras in matches.items():
+        publicar(CANAL_FILTROS, 'edital_filtro', edital_id=edital.id, filtro_id=filtro_id,
+                 filtro=percolador.filtros[filtro_id].nome, palavras=palavras,
+                 objeto_resumo=edital.objeto_resumo, uf=edital.uf,
+                 plataforma_origem=edital.plataforma_origem)
+    return matches
+
+
+def repercolar_pendentes(lote=1000):
+    """
+    Recalcula os matches dos editais com triagem pendente — após mudança
+    nos filtros, para a triagem refletir os filtros atuais.
+    """
+    percolador = obter_percolador(forcar=True)
+    pendentes = select(Triagem.edital_id).where(Triagem.decisao == 'pendente')
+    db.session.execute(delete(EditalFiltroMatch).where(EditalFiltroMatch.edital_id.in_(pendentes)))
+
+    linhas = db.session.execute(
+        select(Edital.id, func.coalesce(Edital.objeto_completo, Edital.objeto_resumo),
+               Edital.uf, Edital.valor_estimado)
+        .where(Edital.id.in_(pendentes))
+        .execution_options(yield_per=lote)
+    )
+    stats = {'editais': 0, 'matches': 0}
+    valores = []
+    for edital_id, objeto, uf, valor in linhas:
+        stats['editais'] += 1
+        for filtro_id, palavras in percolador.percolar(objeto, uf, valor).items():
+            valores.append({'edital_id': edital_id, 'filtro_id': filtro_id, 'palavras': palavras})
+    if valores:
+        db.session.execute(pg_insert(EditalFiltroMatch).on_conflict_do_nothing(), valores)
+    stats['matches'] = len(valores)
+    db.session.commit()
+    logger.info("Filtros repercolados: %d editais pendentes, %d matches", stats['editais'], stats['matches'])
+    return stats
+
+
+def repercolar_em_background(app):
+    """
+    Dispara repercolar_pendentes() em uma thread daemon (o request que
+    criou o filtro não espera). Retorna False se já havia uma repercolação
+    rodando — ela faz mais uma rodada ao terminar, com os filtros atuais.
+    """
+    global _repercolando, _repercolar_de_novo
+    with _repercolar_lock:
+        if _repercolando:
+            _repercolar_de_novo = True
+            return False
+        _repercolando = True
+    threading.Thread(target=_repercolar, args=(app,), daemon=True,
+                     name='percolador-repercolar').start()
+    return True
+
+
+def _repercolar(app):
+    global _repercolando, _repercolar_de_novo
+    with app.app_context():
+        while True:
+            try:
+                repercolar_pendentes()
+            except Exception as e:
+                db.session.rollback()
+                logger.warning("Erro ao repercolar filtros: %s", e)
+            with _repercolar_lock:
+                if not _repercolar_de_novo:
+                    _repercolando = False
+                    return
+                _repercolar_de_novo = False
+
+
+def matches_por_edital(edital_ids):
+    """{edital_id: [{filtro_id, filtro, palavras}]} — uma consulta para a página inteira."""
+    if not edital_ids:
+        return {}
+    linhas = db.session.execute(
+        select(EditalFiltroMatch.edital_id, FiltroProspeccao.id, FiltroProspeccao.nome,
+               EditalFiltroMatch.palavras)
+        .join(FiltroProspeccao, FiltroProspeccao.id == EditalFiltroMatch.filtro_id)
+        .where(EditalFiltroMatch.edital_id.in_(list(edital_ids)))
+        .order_by(EditalFiltroMatch.edital_id, FiltroProspeccao.nome)
+    ).all()
+    resultado = defaultdict(list)
+    for edital_id, filtro_id, nome, palavras in linhas:
+        resultado[edital_id].append({'filtro_id': filtro_id, 'filtro': nome, 'palavras': palavras or []})
+    return resultado
@@ -0,0 +1,77 @@
+"""
+SGL - Planejador de scraping
+
+O scraping automático rodava filtro × palavra-chave × UF e, para cada
+combinação, todas as plataformas de novo — palavras-chave repetidas entre
+filtros ("limpeza" em três filtros) viravam a mesma busca três vezes.
+
+O planejador monta, a partir de todos os filtros ativos, o conjunto de
+consultas (plataforma, termo, uf) sem repetição (termo normalizado: caixa
+e espaços) e, para plataformas cuja busca aceita OR (SEPARADOR_OR no
+scraper), junta até MAX_TERMOS_OR termos da mesma UF em uma consulta só.
+O plano é executado uma vez por ScraperService.executar_plano, com um
+cliente HTTP compartilhado.
+"""
+import logging
+from collections import namedtuple
+
+from .scrapers import SCRAPERS
+
+logger = logging.getLogger(__name__)
+
+MAX_UFS_POR_FILTRO = 3   # como no laço original: só as 3 primeiras UFs de cada filtro
+MAX_TERMOS_OR = 5
+
+Consulta = namedtuple('Consulta', 'plataforma termo uf')
+
+
+def normalizar_termo(termo):
+    """Termo de busca sem diferença de caixa/espaços; vazio → None (busca geral)."""
+    termo = ' '.join((termo or '').split()).lower()
+    return termo or None
+
+
+def planejar(filtros, plataformas=None):
+    """
+    Consultas deduplicadas para os filtros.
+
+    Returns:
+        (list[Consulta], dict com consultas_solicitadas/executadas/economizadas)
+    """
+    plataformas = [p for p in (plataformas or SCRAPERS) if p in SCRAPERS]
+    solicitadas = 0
+    pares = []  # (termo, uf) na ordem em que aparecem
+    vistos = set()
+    for filtro in filtros:
+        ufs = (filtro.regioes_uf or [None])[:MAX_UFS_POR_FILTRO]
+        for termo in (filtro.palavras_chave or [None]):
+            for uf in ufs:
+                solicitadas += len(plataformas)
+                par = (normalizar_termo(termo), uf.upper() if uf else None)
+                if par not in vistos:
+                    vistos.add(par)
+                    pares.append(par)
+
+    plano = []
+    for plataforma in plataformas:
+        separador = SCRAPERS[plataforma].SEPARADOR_OR
+        if not separador:
+            plano.extend(Consulta(plataforma, termo, uf) for termo, uf in pares)
+            continue
+        por_uf = {}
+        for termo, uf in pares:
+            if termo is None:
+                plano.append(Consulta(plataforma, None, uf))
+            else:
+                por_uf.setdefault(uf, []).append(termo)
+        for uf, termos in por_uf.items():
+            for i in range(0, len(termos), MAX_TERMOS_OR):
+                plano.append(Consulta(plataforma, separador.join(termos[i:i + MAX_TERMOS_OR]), uf))
+
+    stats = {
+        'consultas_solicitadas': solicitadas,
+        'consultas_executadas': len(plano),
+        'consultas_economizadas': solicitadas - len(plano),
+    }
+    logger.info(f"Plano de scraping: {stats}")
+    return plano, stats
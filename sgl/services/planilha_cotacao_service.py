@@ -12,15 +12,28 @@ Layout revisado com feedback dos vendedores:
 """
 import io
 import logging
+import multiprocessing
 import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
+from decimal import Decimal
+from functools import lru_cache
 from threading import Thread
+from types import SimpleNamespace
+from xml.sax.saxutils import escape
 
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, Protection
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, Protection, NamedStyle
 from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.datavalidation import DataValidation
 
+from ..utils import metricas
+from ..utils.eventos import canal_edital, publicar
+
 logger = logging.getLogger(__name__)
 
 # ============================================================
@@ -31,7 +44,6 @@ _label_font = Font(name='Arial', bold=True, size=10, color='1F4E79')
 _value_font = Font(name='Arial', size=10)
 _hdr_font = Font(name='Arial', bold=True, color='FFFFFF', size=9)
 _dat_font = Font(name='Arial', size=9)
-_bld_font = Font(name='Arial', size=9, bold=True)
 _ac = Alignment(horizontal='center', vertical='center', wrap_text=True)
 _thin = Border(
     left=Side('thin', color='D9D9D9'), right=Side('thin', color='D9D9D9'),
@@ -62,6 +74,11 @@ CS = 20                           # fornecedores começam na coluna 20 (T)
 CE = CS + NUM_FORNECEDORES * CPF  # estoque começa após fornecedores
 CD = CE + 4                       # disputa começa após estoque
 
+# Geração em lote
+PLANILHA_LOTE_WORKERS = int(os.environ.get("PLANILHA_LOTE_WORKERS", min(4, os.cpu_count() or 1)))
+PLANILHA_UPLOAD_WORKERS = int(os.environ.get("PLANILHA_UPLOAD_WORKERS", 4))
+PLANILHA_LOTE_MIN_PROCESSOS = 8   # abaixo disso o custo de subir processos não compensa
+
 
 def _fmt_date(dt):
     if not dt:
@@ -81,19 +98,82 @@ def _fmt_currency(val):
 
 
 # ============================================================
-# ABA: DADOS DO EDITAL
+# ESTILOS NOMEADOS (linhas de itens)
 # ============================================================
-def _criar_aba_dados_edital(wb, edital_dict):
-    ws = wb.active
-    ws.title = "Dados do Edital"
-    ws.merge_cells('A1:D1')
-    ws['A1'] = 'DADOS DO EDITAL'
-    ws['A1'].font = _title_font
-    ws['A1'].alignment = Alignment(horizontal='center')
-    ws.column_dimensions['A'].width = 28
-    ws.column_dimensions['B'].width = 60
+# Cada célula das linhas de itens recebe um estilo nomeado já registrado
+# no workbook — uma atribuição por célula em vez de 4-5 objetos de estilo.
+_NUM_MOEDA = '#,##0.00'
+_NUM_PCT = '0.0'
+_al_dado = Alignment(vertical='center', wrap_text=False)
+_al_dado_texto = Alignment(vertical='center', wrap_text=True)
+_total_font = Font(name='Arial', bold=True, size=11)
+
+_ESTILOS_COTACAO = {
+    'sgl_dado':          dict(font=_dat_font, alignment=_al_dado, protection=_UNLOCKED),
+    'sgl_dado_texto':    dict(font=_dat_font, alignment=_al_dado_texto, protection=_UNLOCKED),
+    'sgl_dado_moeda':    dict(font=_dat_font, alignment=_al_dado, protection=_UNLOCKED,
+                              number_format=_NUM_MOEDA),
+    'sgl_formula':       dict(font=_dat_font, alignment=_al_dado, protection=_LOCKED,
+                              fill=_fill_formula),
+    'sgl_formula_moeda': dict(font=_dat_font, alignment=_al_dado, protection=_LOCKED,
+                              fill=_fill_formula, number_format=_NUM_MOEDA),
+    'sgl_formula_pct':   dict(font=_dat_font, alignment=_al_dado, protection=_LOCKED,
+                              fill=_fill_formula, number_format=_NUM_PCT),
+    'sgl_vencedor':      dict(font=_dat_font, alignment=_al_dado, protection=_LOCKED,
+                              fill=_fill_marca_v),
+    'sgl_proposta':      dict(font=_dat_font, alignment=_al_dado, protection=_LOCKED,
+                              fill=_fill_prop_auto),
+}
+
+
+def _registrar_estilos(wb):
+    """Registra os estilos nomeados da aba Cotação no workbook."""
+    for nome, attrs in _ESTILOS_COTACAO.items():
+        wb.add_named_style(NamedStyle(name=nome, border=_thin, **attrs))
+
+
+def _celula(ws, value=None, font=None, fill=None, alignment=None, border=None,
+            protection=None, number_format=None):
+    """WriteOnlyCell com atributos de estilo avulsos (cabeçalhos e abas pequenas)."""
+    c = WriteOnlyCell(ws, value=value)
+    if font:
+        c.font = font
+    if fill:
+        c.fill = fill
+    if alignment:
+        c.alignment = alignment
+    if border:
+        c.border = border
+    if protection:
+        c.protection = protection
+    if number_format:
+        c.number_format = number_format
+    return c
+
+
+def _proteger(ws, insert_rows=None):
+    ws.protection.sheet = True
+    ws.protection.password = SENHA_PROTECAO
+    ws.protection.enable()
+    ws.protection.autoFilter = False
+    ws.protection.sort = False
+    ws.protection.formatColumns = False
+    ws.protection.formatRows = False
+    if insert_rows is not None:
+        ws.protection.insertRows = insert_rows
 
-    campos = [
+
+def _total_linhas(n_itens):
+    """Linhas de itens da aba Cotação (itens + 5 em branco, mínimo 50, sem teto)."""
+    return max(n_itens + 5, 50)
+
+
+# ============================================================
+# ABA: DADOS DO EDITAL
+# ============================================================
+def _campos_dados_edital(edital_dict):
+    """Pares (rótulo, valor) da aba Dados do Edital."""
+    return [
         ('Órgão', edital_dict.get('orgao_razao_social', '')),
         ('CNPJ', edital_dict.get('orgao_cnpj', '')),
         ('UF / Município', f"{edital_dict.get('uf', '')} / {edital_dict.get('municipio', '')}"),
@@ -112,322 +192,301 @@ def _criar_aba_dados_edital(wb, edital_dict):
         ('Objeto', edital_dict.get('objeto_resumo') or edital_dict.get('objeto_completo', '')),
     ]
 
-    for i, (lbl, val) in enumerate(campos, 3):
-        ws.cell(row=i, column=1, value=lbl).font = _label_font
-        ws.cell(row=i, column=1).border = _thin
-        ws.cell(row=i, column=1).protection = _UNLOCKED
-        c = ws.cell(row=i, column=2, value=val)
-        c.font = _value_font
-        c.border = _thin
-        c.protection = _UNLOCKED
-        if lbl == 'Objeto':
-            c.alignment = Alignment(wrap_text=True, vertical='top')
+
+def _criar_aba_dados_edital(wb, edital_dict, ultima_linha=500, campos=None):
+    """
+    Args:
+        ultima_linha: última linha de itens da aba Cotação (alcance das fórmulas de resumo)
+        campos: pares (rótulo, valor) já montados — default: _campos_dados_edital(edital_dict)
+    """
+    ws = wb.create_sheet("Dados do Edital")
+    ws.column_dimensions['A'].width = 28
+    ws.column_dimensions['B'].width = 60
+
+    ws.merged_cells.add('A1:D1')
+    ws.append([_celula(ws, 'DADOS DO EDITAL', font=_title_font,
+                       alignment=Alignment(horizontal='center'))])
+    ws.append([])
+
+    if campos is None:
+        campos = _campos_dados_edital(edital_dict)
+    for lbl, val in campos:
+        ws.append([
+            _celula(ws, lbl, font=_label_font, border=_thin, protection=_UNLOCKED),
+            _celula(ws, val, font=_value_font, border=_thin, protection=_UNLOCKED,
+                    alignment=Alignment(wrap_text=True, vertical='top') if lbl == 'Objeto' else None),
+        ])
+
+    linha_atual = 3 + len(campos)
+
+    def _bloco_resumo(linha_titulo, titulo, formulas):
+        nonlocal linha_atual
+        for _ in range(linha_titulo - linha_atual):
+            ws.append([])
+        linha_atual = linha_titulo + 2 + len(formulas)
+        ws.merged_cells.add(f'A{linha_titulo}:D{linha_titulo}')
+        ws.append([_celula(ws, titulo, font=_title_font, protection=_LOCKED,
+                           alignment=Alignment(horizontal='center'))])
+        ws.append([])
+        for lbl, f in formulas:
+            ws.append([
+                _celula(ws, lbl, font=_label_font, border=_thin, fill=_fill_resumo,
+                        protection=_LOCKED),
+                _celula(ws, f, font=_total_font, number_format=_NUM_MOEDA, border=_thin,
+                        fill=_fill_formula, protection=_LOCKED),
+            ])
 
     # --- RESUMO COTAÇÃO ---
+    # Alcance mínimo de 500 linhas: cobre linhas inseridas manualmente pelo usuário
+    n = max(ultima_linha, 500)
     r = len(campos) + 5
-    ws.merge_cells(f'A{r}:D{r}')
-    ws[f'A{r}'] = 'RESUMO DA COTAÇÃO (automático)'
-    ws[f'A{r}'].font = _title_font
-    ws[f'A{r}'].alignment = Alignment(horizontal='center')
-    ws[f'A{r}'].protection = _LOCKED
-
-    for i, (lbl, f) in enumerate([
-        ('Total de Itens', "=COUNTA('Cotação'!C2:C500)"),
-        ('Valor Total Máximo (edital)', "=SUM('Cotação'!I2:I500)"),
-        ('Valor Total Proposta (c/ margem)', "=SUM('Cotação'!M2:M500)"),
-        ('Itens Viáveis', "=COUNTIF('Cotação'!A2:A500,\"VIÁVEL\")"),
-        ('Itens Inviáveis', "=COUNTIF('Cotação'!A2:A500,\"INVIÁVEL\")"),
-    ], r + 2):
-        cl = ws.cell(row=i, column=1, value=lbl)
-        cl.font = _label_font
-        cl.border = _thin
-        cl.fill = _fill_resumo
-        cl.protection = _LOCKED
-        cv = ws.cell(row=i, column=2, value=f)
-        cv.font = Font(name='Arial', bold=True, size=11)
-        cv.number_format = '#,##0.00'
-        cv.border = _thin
-        cv.fill = _fill_formula
-        cv.protection = _LOCKED
+    _bloco_resumo(r, 'RESUMO DA COTAÇÃO (automático)', [
+        ('Total de Itens', f"=COUNTA('Cotação'!C2:C{n})"),
+        ('Valor Total Máximo (edital)', f"=SUM('Cotação'!I2:I{n})"),
+        ('Valor Total Proposta (c/ margem)', f"=SUM('Cotação'!M2:M{n})"),
+        ('Itens Viáveis', f"=COUNTIF('Cotação'!A2:A{n},\"VIÁVEL\")"),
+        ('Itens Inviáveis', f"=COUNTIF('Cotação'!A2:A{n},\"INVIÁVEL\")"),
+    ])
 
     # --- RESUMO DISPUTA ---
     sd_col = get_column_letter(CD)
     tf_col = get_column_letter(CD + 2)
 
     rd = r + 9
-    ws.merge_cells(f'A{rd}:D{rd}')
-    ws[f'A{rd}'] = 'RESUMO DA DISPUTA (automático)'
-    ws[f'A{rd}'].font = _title_font
-    ws[f'A{rd}'].alignment = Alignment(horizontal='center')
-    ws[f'A{rd}'].protection = _LOCKED
-
-    for i, (lbl, f) in enumerate([
+    _bloco_resumo(rd, 'RESUMO DA DISPUTA (automático)', [
         ('Itens Vencidos',
-         f"=COUNTIF('Cotação'!{sd_col}2:{sd_col}500,\"VENCIDO\")"),
+         f"=COUNTIF('Cotação'!{sd_col}2:{sd_col}{n},\"VENCIDO\")"),
         ('Itens Não Vencidos',
-         f"=COUNTIF('Cotação'!{sd_col}2:{sd_col}500,\"NÃO VENCIDO\")"),
+         f"=COUNTIF('Cotação'!{sd_col}2:{sd_col}{n},\"NÃO VENCIDO\")"),
         ('Itens Desertos/Fracassados',
-         f"=COUNTIF('Cotação'!{sd_col}2:{sd_col}500,\"DESERTO\")+COUNTIF('Cotação'!{sd_col}2:{sd_col}500,\"FRACASSADO\")"),
+         f"=COUNTIF('Cotação'!{sd_col}2:{sd_col}{n},\"DESERTO\")+COUNTIF('Cotação'!{sd_col}2:{sd_col}{n},\"FRACASSADO\")"),
         ('Valor Total Final (Vencidos)',
-         f"=SUMPRODUCT(('Cotação'!{sd_col}2:{sd_col}500=\"VENCIDO\")*('Cotação'!{tf_col}2:{tf_col}500))"),
-    ], rd + 2):
-        cl = ws.cell(row=i, column=1, value=lbl)
-        cl.font = _label_font
-        cl.border = _thin
-        cl.fill = _fill_resumo
-        cl.protection = _LOCKED
-        cv = ws.cell(row=i, column=2, value=f)
-        cv.font = Font(name='Arial', bold=True, size=11)
-        cv.number_format = '#,##0.00'
-        cv.border = _thin
-        cv.fill = _fill_formula
-        cv.protection = _LOCKED
+         f"=SUMPRODUCT(('Cotação'!{sd_col}2:{sd_col}{n}=\"VENCIDO\")*('Cotação'!{tf_col}2:{tf_col}{n}))"),
+    ])
 
-    ws.protection.sheet = True
-    ws.protection.password = SENHA_PROTECAO
-    ws.protection.enable()
-    ws.protection.autoFilter = False
-    ws.protection.sort = False
-    ws.protection.formatColumns = False
-    ws.protection.formatRows = False
+    _proteger(ws)
     return ws
 
 
 # ============================================================
 # ABA: COTAÇÃO (principal) — V1.0
 # ============================================================
-def _criar_aba_cotacao(wb, itens, fornecedores=None):
-    ws = wb.create_sheet("Cotação")
-    forns = fornecedores or FORNECEDORES_PADRAO
-
-    # === CABEÇALHOS FIXOS (A..S) ===
-    hdrs = [
-        (1,  'STATUS',              10, _fill_result,   True),
-        (2,  'LOTE/GRUPO',           8, _fill_edital,   False),
-        (3,  'ITEM',                 6, _fill_edital,   False),
-        (4,  'ESPECIFICAÇÃO',       55, _fill_edital,   False),
-        (5,  'CATMAT',              10, _fill_edital,   False),
-        (6,  'QTD',                 10, _fill_edital,   False),
-        (7,  'UNID',                 7, _fill_edital,   False),
-        (8,  'PREÇO UNIT\nMÁXIMO', 12, _fill_edital,   False),
-        (9,  'PREÇO TOTAL\nMÁXIMO', 13, _fill_edital,  True),
-        (10, 'MARCA\nPROPOSTA',    14, _fill_proposta,  True),
-        (11, 'MODELO',              12, _fill_proposta,  False),
-        (12, 'MÍN\nVENDA',         11, _fill_result,    True),
-        (13, 'MÍN TOTAL\nVENDA',   12, _fill_result,    True),
-        (14, 'MENOR\nCUSTO',       11, _fill_calc,      True),
-        (15, 'FORN.\nVENCEDOR',    16, _fill_calc,      True),
-        (16, 'MARCA\nVENCEDORA',   14, PatternFill('solid', fgColor='375623'), True),
-        (17, 'CÓD\nVENCEDOR',     10, PatternFill('solid', fgColor='375623'), True),
-        (18, 'OBS\nVENCEDOR',     16, PatternFill('solid', fgColor='375623'), True),
-        (19, 'MARGEM\n%',           9, _fill_result,    True),
-    ]
-
-    formula_cols = set()
-    for ci, txt, w, fill, is_f in hdrs:
-        c = ws.cell(row=1, column=ci, value=txt)
-        c.font = _hdr_font
-        c.alignment = _ac
-        c.fill = fill
-        c.border = _thin
-        c.protection = _LOCKED
-        ws.column_dimensions[get_column_letter(ci)].width = w
-        if is_f:
-            formula_cols.add(ci)
-
-    # === CABEÇALHOS FORNECEDORES (15 × 4) ===
-    cs = CS
-    for fi, fn in enumerate(forns):
-        color = FORN_COLORS[fi % len(FORN_COLORS)]
-        for di, (lbl, w) in enumerate([
-            (f'{fn}\nPREÇO', 11), ('MARCA', 10), ('CÓD', 8), ('OBS', 14)
-        ]):
-            col = cs + fi * CPF + di
-            c = ws.cell(row=1, column=col, value=lbl)
-            c.font = _hdr_font
-            c.alignment = _ac
-            c.border = _thin
-            c.fill = PatternFill('solid', fgColor=color)
-            c.protection = _UNLOCKED  # editável para renomear fornecedor
-            ws.column_dimensions[get_column_letter(col)].width = w
-
-    # === ESTOQUE ===
-    ce = CE
-    for di, (lbl, w) in enumerate([
-        ('ESTOQUE\nPREÇO', 11), ('ESTOQUE\nMARCA', 10),
-        ('ESTOQUE\nCÓDIGO', 10), ('ESTOQUE\nOBS', 14)
-    ]):
-        col = ce + di
-        c = ws.cell(row=1, column=col, value=lbl)
-        c.font = _hdr_font
-        c.alignment = _ac
-        c.border = _thin
-        c.fill = PatternFill('solid', fgColor='C65911')
-        c.protection = _LOCKED
-        ws.column_dimensions[get_column_letter(col)].width = w
-
-    # === DISPUTA ===
+_HDRS_FIXOS = [
+    (1,  'STATUS',              10, _fill_result,   True),
+    (2,  'LOTE/GRUPO',           8, _fill_edital,   False),
+    (3,  'ITEM',                 6, _fill_edital,   False),
+    (4,  'ESPECIFICAÇÃO',       55, _fill_edital,   False),
+    (5,  'CATMAT',              10, _fill_edital,   False),
+    (6,  'QTD',                 10, _fill_edital,   False),
+    (7,  'UNID',                 7, _fill_edital,   False),
+    (8,  'PREÇO UNIT\nMÁXIMO', 12, _fill_edital,   False),
+    (9,  'PREÇO TOTAL\nMÁXIMO', 13, _fill_edital,  True),
+    (10, 'MARCA\nPROPOSTA',    14, _fill_proposta,  True),
+    (11, 'MODELO',              12, _fill_proposta,  False),
+    (12, 'MÍN\nVENDA',         11, _fill_result,    True),
+    (13, 'MÍN TOTAL\nVENDA',   12, _fill_result,    True),
+    (14, 'MENOR\nCUSTO',       11, _fill_calc,      True),
+    (15, 'FORN.\nVENCEDOR',    16, _fill_calc,      True),
+    (16, 'MARCA\nVENCEDORA',   14, PatternFill('solid', fgColor='375623'), True),
+    (17, 'CÓD\nVENCEDOR',     10, PatternFill('solid', fgColor='375623'), True),
+    (18, 'OBS\nVENCEDOR',     16, PatternFill('solid', fgColor='375623'), True),
+    (19, 'MARGEM\n%',           9, _fill_result,    True),
+]
+_HDRS_FORNECEDOR = [('PREÇO', 11), ('MARCA', 10), ('CÓD', 8), ('OBS', 14)]
+_HDRS_ESTOQUE = [
+    ('ESTOQUE\nPREÇO', 11), ('ESTOQUE\nMARCA', 10),
+    ('ESTOQUE\nCÓDIGO', 10), ('ESTOQUE\nOBS', 14),
+]
+_HDRS_DISPUTA = [
+    ('STATUS\nDISPUTA', 13, False),
+    ('PREÇO\nFINAL', 12, False),
+    ('TOTAL\nFINAL', 12, True),
+    ('DESCONTO\n%', 9, True),
+    ('OBS\nDISPUTA', 18, False),
+]
+# Colunas formatadas nas linhas de itens (inclui uma coluna livre após OBS DISPUTA)
+_ULTIMA_COL_FMT = CD + len(_HDRS_DISPUTA)
+
+# Colunas preenchidas com dados do item: coluna → chave do dict
+_COLS_ITEM = {
+    2: 'grupo_lote', 3: 'numero_item', 4: 'descricao', 5: 'codigo_referencia',
+    6: 'quantidade', 7: 'unidade_compra', 8: 'preco_unitario_maximo',
+}
+
+
+def _build_nested(parts):
+    nested = '""'
+    for p in reversed(parts):
+        nested = f'{p},{nested})'
+    return nested
+
+
+@lru_cache(maxsize=None)
+def _layout_linha_cotacao(num_fornecedores=NUM_FORNECEDORES):
+    """
+    Layout de uma linha de itens: tupla (estilo, template da fórmula) por coluna.
+
+    As fórmulas (IFs aninhados sobre os 15 fornecedores + estoque) são montadas
+    uma única vez com `{r}` no lugar do número da linha; por linha resta um
+    str.format.
+    """
+    r = '{r}'
     cd = CD
-    disputa_hdrs = [
-        ('STATUS\nDISPUTA', 13, False),
-        ('PREÇO\nFINAL', 12, False),
-        ('TOTAL\nFINAL', 12, True),
-        ('DESCONTO\n%', 9, True),
-        ('OBS\nDISPUTA', 18, False),
-    ]
-    disputa_formula_cols = set()
-    for di, (lbl, w, is_f) in enumerate(disputa_hdrs):
-        col = cd + di
-        c = ws.cell(row=1, column=col, value=lbl)
-        c.font = _hdr_font
-        c.alignment = _ac
-        c.border = _thin
-        c.fill = _fill_disputa
-        c.protection = _LOCKED
-        ws.column_dimensions[get_column_letter(col)].width = w
-        if is_f:
-            disputa_formula_cols.add(col)
-
-    # Letras disputa
     pf_letter = get_column_letter(cd + 1)
-    tf_letter = get_column_letter(cd + 2)
-
-    # === LETRAS REFERÊNCIA FORNECEDORES ===
-    fpl, fml, fcl, fol = [], [], [], []
-    for fi in range(len(forns)):
-        base = cs + fi * CPF
-        fpl.append(get_column_letter(base))
-        fml.append(get_column_letter(base + 1))
-        fcl.append(get_column_letter(base + 2))
-        fol.append(get_column_letter(base + 3))
-
-    epl = get_column_letter(ce)
-    eml = get_column_letter(ce + 1)
-    ecl = get_column_letter(ce + 2)
-    eol = get_column_letter(ce + 3)
-
-    all_price = fpl + [epl]
-    all_marca = fml + [eml]
-    all_cod = fcl + [ecl]
-    all_obs = fol + [eol]
-
-    def _build_nested(parts):
-        nested = '""'
-        for p in reversed(parts):
-            nested = f'{p},{nested})'
-        return nested
-
-    # === PREENCHER ITENS + FÓRMULAS ===
-    total_rows = max(len(itens) + 5, 50)
-    total_rows = min(total_rows, 500)
 
-    for row in range(2, total_rows + 2):
-        r = str(row)
-        item_idx = row - 2
-
-        if item_idx < len(itens):
-            item = itens[item_idx]
-            ws.cell(row=row, column=3, value=item.get('numero_item', item_idx + 1))
-            ws.cell(row=row, column=4, value=item.get('descricao', ''))
-            ws.cell(row=row, column=5, value=item.get('codigo_referencia', ''))
-            ws.cell(row=row, column=6, value=item.get('quantidade') or '')
-            ws.cell(row=row, column=7, value=item.get('unidade_compra', ''))
-            preco = item.get('preco_unitario_maximo')
-            if preco:
-                try:
-                    ws.cell(row=row, column=8, value=float(preco))
-                except (ValueError, TypeError):
-                    ws.cell(row=row, column=8, value=preco)
-            ws.cell(row=row, column=2, value=item.get('grupo_lote', ''))
+    all_price, all_marca, all_cod, all_obs = [], [], [], []
+    for base in [CS + fi * CPF for fi in range(num_fornecedores)] + [CE]:
+        all_price.append(get_column_letter(base))
+        all_marca.append(get_column_letter(base + 1))
+        all_cod.append(get_column_letter(base + 2))
+        all_obs.append(get_column_letter(base + 3))
+
+    count_p = '+'.join([f'({c}{r}>0)*1' for c in all_price])
+    min_p = ','.join([f'IF({c}{r}>0,{c}{r},9999999)' for c in all_price])
+    pn = [
+        f'IF({p}{r}=N{r},LEFT({p}$1,FIND(CHAR(10),{p}$1&CHAR(10))-1)'
+        for p in all_price
+    ]
+    pm = [f'IF({p}{r}=N{r},{m}{r}' for p, m in zip(all_price, all_marca)]
+    pc = [f'IF({p}{r}=N{r},{c}{r}' for p, c in zip(all_price, all_cod)]
+    po = [f'IF({p}{r}=N{r},{o}{r}' for p, o in zip(all_price, all_obs)]
 
+    formulas = {
         # A = STATUS
-        ws.cell(row=row, column=1,
-                value=f'=IF(L{r}="","",IF(L{r}<=H{r},"VIÁVEL","INVIÁVEL"))')
-
+        1: f'=IF(L{r}="","",IF(L{r}<=H{r},"VIÁVEL","INVIÁVEL"))',
         # I = PREÇO TOTAL MÁXIMO
-        ws.cell(row=row, column=9,
-                value=f'=IF(H{r}<>"",H{r}*F{r},"")').number_format = '#,##0.00'
-
+        9: f'=IF(H{r}<>"",H{r}*F{r},"")',
+        # J = MARCA PROPOSTA
+        10: f'=IF(P{r}<>"",P{r},"")',
+        # L = MÍN VENDA
+        12: f"=IF(N{r}<>\"\",ROUND(N{r}*(1+'Configuração'!$B$3/100),2),\"\")",
+        # M = MÍN TOTAL VENDA
+        13: f'=IF(L{r}<>"",L{r}*F{r},"")',
         # N = MENOR CUSTO
-        count_p = '+'.join([f'({c}{r}>0)*1' for c in all_price])
-        min_p = ','.join([f'IF({c}{r}>0,{c}{r},9999999)' for c in all_price])
-        ws.cell(row=row, column=14,
-                value=f'=IF(AND(C{r}<>"",({count_p})>0),MIN({min_p}),"")').number_format = '#,##0.00'
-        ws.cell(row=row, column=14).font = _bld_font
+        14: f'=IF(AND(C{r}<>"",({count_p})>0),MIN({min_p}),"")',
+        # O/P/Q/R = FORN./MARCA/CÓD/OBS VENCEDOR
+        15: f'=IF(N{r}<>"",{_build_nested(pn)},"")',
+        16: f'=IF(N{r}<>"",{_build_nested(pm)},"")',
+        17: f'=IF(N{r}<>"",{_build_nested(pc)},"")',
+        18: f'=IF(N{r}<>"",{_build_nested(po)},"")',
+        # S = MARGEM %
+        19: f'=IF(AND(L{r}<>"",H{r}<>"",L{r}>0),ROUND((H{r}/L{r}-1)*100,1),"")',
+        # DISPUTA: TOTAL FINAL / DESCONTO %
+        cd + 2: f'=IF({pf_letter}{r}<>"",{pf_letter}{r}*F{r},"")',
+        cd + 3: f'=IF(AND({pf_letter}{r}<>"",L{r}<>"",L{r}>0),ROUND((1-{pf_letter}{r}/L{r})*100,1),"")',
+    }
+
+    colunas_preco = {8, CE, cd + 1} | {CS + fi * CPF for fi in range(num_fornecedores)}
+    layout = []
+    for col in range(1, _ULTIMA_COL_FMT + 1):
+        if col in (16, 17, 18):
+            estilo = 'sgl_vencedor'
+        elif col == 10:
+            estilo = 'sgl_proposta'
+        elif col in (9, 12, 13, 14, cd + 2):
+            estilo = 'sgl_formula_moeda'
+        elif col in (19, cd + 3):
+            estilo = 'sgl_formula_pct'
+        elif col in formulas:
+            estilo = 'sgl_formula'
+        elif col == 4:
+            estilo = 'sgl_dado_texto'
+        elif col in colunas_preco:
+            estilo = 'sgl_dado_moeda'
+        else:
+            estilo = 'sgl_dado'
+        layout.append((estilo, formulas.get(col)))
+    return tuple(layout)
+
+
+def _valores_item(item, idx):
+    """Valores das colunas de dados do item (B..H)."""
+    valores = {col: item.get(chave, '') for col, chave in _COLS_ITEM.items()}
+    valores[3] = item.get('numero_item', idx + 1)
+    valores[6] = item.get('quantidade') or ''
+    preco = item.get('preco_unitario_maximo')
+    if preco:
+        try:
+            valores[8] = float(preco)
+        except (ValueError, TypeError):
+            valores[8] = preco
+    else:
+        valores[8] = None
+    return valores
+
+
+def _criar_aba_cotacao(wb, itens, fornecedores=None, total_linhas=None):
+    """
+    Aba principal em modo write-only (streaming): as linhas vão direto para o
+    arquivo, sem manter as células em memória. Sem limite de linhas.
+
+    Args:
+        total_linhas: linhas de itens a escrever — default: _total_linhas(len(itens))
+    """
+    ws = wb.create_sheet("Cotação")
+    forns = fornecedores or FORNECEDORES_PADRAO
+    cd = CD
 
-        # L = MÍN VENDA
-        ws.cell(row=row, column=12,
-                value=f"=IF(N{r}<>\"\",ROUND(N{r}*(1+'Configuração'!$B$3/100),2),\"\")").number_format = '#,##0.00'
+    # Larguras e painel congelado precisam ser definidos antes da 1ª linha
+    for ci, _, w, _, _ in _HDRS_FIXOS:
+        ws.column_dimensions[get_column_letter(ci)].width = w
+    for fi in range(len(forns)):
+        for di, (_, w) in enumerate(_HDRS_FORNECEDOR):
+            ws.column_dimensions[get_column_letter(CS + fi * CPF + di)].width = w
+    for di, (_, w) in enumerate(_HDRS_ESTOQUE):
+        ws.column_dimensions[get_column_letter(CE + di)].width = w
+    for di, (_, w, _) in enumerate(_HDRS_DISPUTA):
+        ws.column_dimensions[get_column_letter(cd + di)].width = w
+    ws.freeze_panes = 'E2'
 
-        # M = MÍN TOTAL VENDA
-        ws.cell(row=row, column=13,
-                value=f'=IF(L{r}<>"",L{r}*F{r},"")').number_format = '#,##0.00'
-
-        # O = FORN. VENCEDOR
-        pn = [
-            f'IF({all_price[fi]}{r}=N{r},LEFT({all_price[fi]}$1,FIND(CHAR(10),{all_price[fi]}$1&CHAR(10))-1)'
-            for fi in range(len(all_price))
-        ]
-        ws.cell(row=row, column=15,
-                value=f'=IF(N{r}<>"",{_build_nested(pn)},"")').font = _bld_font
-
-        # P = MARCA VENCEDORA
-        pm = [f'IF({all_price[fi]}{r}=N{r},{all_marca[fi]}{r}'
-              for fi in range(len(all_price))]
-        ws.cell(row=row, column=16,
-                value=f'=IF(N{r}<>"",{_build_nested(pm)},"")').font = _bld_font
-
-        # Q = CÓD VENCEDOR
-        pc = [f'IF({all_price[fi]}{r}=N{r},{all_cod[fi]}{r}'
-              for fi in range(len(all_price))]
-        ws.cell(row=row, column=17,
-                value=f'=IF(N{r}<>"",{_build_nested(pc)},"")').font = _bld_font
-
-        # R = OBS VENCEDOR
-        po = [f'IF({all_price[fi]}{r}=N{r},{all_obs[fi]}{r}'
-              for fi in range(len(all_price))]
-        ws.cell(row=row, column=18,
-                value=f'=IF(N{r}<>"",{_build_nested(po)},"")').font = _bld_font
+    # === CABEÇALHOS ===
+    def _hdr(txt, fill, protection):
+        return _celula(ws, txt, font=_hdr_font, alignment=_ac, fill=fill, border=_thin,
+                       protection=protection)
 
-        # J = MARCA PROPOSTA
-        ws.cell(row=row, column=10,
-                value=f'=IF(P{r}<>"",P{r},"")').font = _bld_font
+    cabecalho = [_hdr(txt, fill, _LOCKED) for _, txt, _, fill, _ in _HDRS_FIXOS]
+    for fi, fn in enumerate(forns):
+        fill = PatternFill('solid', fgColor=FORN_COLORS[fi % len(FORN_COLORS)])
+        for di, (lbl, _) in enumerate(_HDRS_FORNECEDOR):
+            # editável para renomear fornecedor
+            cabecalho.append(_hdr(f'{fn}\n{lbl}' if di == 0 else lbl, fill, _UNLOCKED))
+    fill_estoque = PatternFill('solid', fgColor='C65911')
+    cabecalho += [_hdr(lbl, fill_estoque, _LOCKED) for lbl, _ in _HDRS_ESTOQUE]
+    cabecalho += [_hdr(lbl, _fill_disputa, _LOCKED) for lbl, _, _ in _HDRS_DISPUTA]
+    ws.append(cabecalho)
+
+    # === ITENS + FÓRMULAS ===
+    layout = _layout_linha_cotacao(len(forns))
+    total_rows = total_linhas or _total_linhas(len(itens))
+    vazio = {}
+
+    # Uma célula-modelo por coluna, estilizada uma única vez: no modo write-only
+    # a linha é serializada dentro do append, então basta trocar os valores
+    modelos = []
+    for estilo, _ in layout:
+        c = WriteOnlyCell(ws)
+        c.style = estilo
+        modelos.append(c)
+    colunas = list(zip(range(1, len(layout) + 1), modelos, [f for _, f in layout]))
 
-        # S = MARGEM %
-        ws.cell(row=row, column=19,
-                value=f'=IF(AND(L{r}<>"",H{r}<>"",L{r}>0),ROUND((H{r}/L{r}-1)*100,1),"")').number_format = '0.0'
-
-        # DISPUTA: TOTAL FINAL
-        ws.cell(row=row, column=cd + 2,
-                value=f'=IF({pf_letter}{r}<>"",{pf_letter}{r}*F{r},"")').number_format = '#,##0.00'
-        # DISPUTA: DESCONTO %
-        ws.cell(row=row, column=cd + 3,
-                value=f'=IF(AND({pf_letter}{r}<>"",L{r}<>"",L{r}>0),ROUND((1-{pf_letter}{r}/L{r})*100,1),"")').number_format = '0.0'
-
-        # === FORMATAÇÃO ===
-        last_col_fmt = cd + len(disputa_hdrs)
-        for col in range(1, last_col_fmt + 1):
-            cell = ws.cell(row=row, column=col)
-            cell.border = _thin
-            cell.font = _dat_font
-            cell.alignment = Alignment(vertical='center', wrap_text=(col == 4))
-            if col in (8, 9, 12, 13, 14):
-                cell.number_format = '#,##0.00'
-            if cs <= col < ce and (col - cs) % CPF == 0:
-                cell.number_format = '#,##0.00'
-            if col == ce:
-                cell.number_format = '#,##0.00'
-            if col in (cd + 1, cd + 2):
-                cell.number_format = '#,##0.00'
-            if col in formula_cols or col in disputa_formula_cols:
-                cell.protection = _LOCKED
-                cell.fill = _fill_formula
-            else:
-                cell.protection = _UNLOCKED
+    for row in range(2, total_rows + 2):
+        item_idx = row - 2
+        valores = _valores_item(itens[item_idx], item_idx) if item_idx < len(itens) else vazio
+        for col, c, formula in colunas:
+            c.value = formula.format(r=row) if formula else valores.get(col)
+        ws.append(modelos)
 
-        for c in (16, 17, 18):
-            ws.cell(row=row, column=c).fill = _fill_marca_v
-        ws.cell(row=row, column=10).fill = _fill_prop_auto
+    # === TOTAIS ===
+    rt = total_rows + 2
+    linha_total = [None] * (cd + 3)
+    linha_total[2] = _celula(ws, 'TOTAL', font=Font(name='Arial', bold=True, size=10),
+                             protection=_LOCKED)
+    for ci in (9, 13, cd + 2):
+        L = get_column_letter(ci)
+        linha_total[ci - 1] = _celula(ws, f'=SUM({L}2:{L}{rt - 1})', font=_total_font,
+                                      number_format=_NUM_MOEDA, fill=_fill_formula,
+                                      protection=_LOCKED)
+    ws.append(linha_total)
 
     # === DROPDOWN STATUS DISPUTA ===
     dv = DataValidation(
@@ -437,39 +496,13 @@ def _criar_aba_cotacao(wb, itens, fornecedores=None):
     )
     dv.error = "Selecione: VENCIDO, NÃO VENCIDO, DESERTO ou FRACASSADO"
     dv.errorTitle = "Status Inválido"
-    ws.add_data_validation(dv)
     dv.add(f'{get_column_letter(cd)}2:{get_column_letter(cd)}{total_rows + 1}')
+    ws.data_validations.append(dv)
 
-    # === TOTAIS ===
-    rt = total_rows + 2
-    ws.cell(row=rt, column=3, value='TOTAL').font = Font(name='Arial', bold=True, size=10)
-    ws.cell(row=rt, column=3).protection = _LOCKED
-    for ci in (9, 13):
-        L = get_column_letter(ci)
-        c = ws.cell(row=rt, column=ci, value=f'=SUM({L}2:{L}{rt - 1})')
-        c.number_format = '#,##0.00'
-        c.font = Font(name='Arial', bold=True, size=11)
-        c.protection = _LOCKED
-        c.fill = _fill_formula
-    c = ws.cell(row=rt, column=cd + 2,
-                value=f'=SUM({tf_letter}2:{tf_letter}{rt - 1})')
-    c.number_format = '#,##0.00'
-    c.font = Font(name='Arial', bold=True, size=11)
-    c.protection = _LOCKED
-    c.fill = _fill_formula
-
-    ws.freeze_panes = 'E2'
-    last_letter = get_column_letter(cd + len(disputa_hdrs) - 1)
+    last_letter = get_column_letter(cd + len(_HDRS_DISPUTA) - 1)
     ws.auto_filter.ref = f'A1:{last_letter}{rt - 1}'
 
-    ws.protection.sheet = True
-    ws.protection.password = SENHA_PROTECAO
-    ws.protection.enable()
-    ws.protection.autoFilter = False
-    ws.protection.sort = False
-    ws.protection.formatColumns = False
-    ws.protection.formatRows = False
-    ws.protection.insertRows = False
+    _proteger(ws, insert_rows=False)
     return ws
 
 
@@ -478,39 +511,45 @@ def _criar_aba_cotacao(wb, itens, fornecedores=None):
 # ============================================================
 def _criar_aba_config(wb):
     wc = wb.create_sheet("Configuração")
-    wc['A1'] = 'CONFIGURAÇÕES'
-    wc['A1'].font = _title_font
     wc.column_dimensions['A'].width = 35
     wc.column_dimensions['B'].width = 50
 
-    for i, (lbl, val) in enumerate([
+    wc.append([_celula(wc, 'CONFIGURAÇÕES', font=_title_font)])
+    wc.append([])
+    for lbl, val in [
         ('Margem Padrão (%)', 30),
         ('Empresa', 'DISTRIB BRAZLIMP LTDA'),
         ('CNPJ', ''), ('Responsável', ''), ('Telefone', ''), ('E-mail', ''),
-    ], 3):
-        wc.cell(row=i, column=1, value=lbl).font = _label_font
-        wc.cell(row=i, column=2, value=val).font = Font(name='Arial', size=10, color='0000FF')
-
-    wc.cell(row=10, column=1, value='PROTEÇÃO DA PLANILHA').font = Font(
-        name='Arial', bold=True, size=13, color='1F4E79')
-
-    wc.merge_cells('A12:A13')
-    c = wc.cell(row=12, column=1, value='🔓 DESPROTEGER')
-    c.font = Font(name='Arial', bold=True, size=14, color='FFFFFF')
-    c.fill = PatternFill('solid', fgColor='C00000')
-    c.alignment = Alignment(horizontal='center', vertical='center')
-    wc.cell(row=12, column=2, value='Revisão → Desproteger Planilha → Senha: sgl2026').font = _value_font
-
-    wc.merge_cells('A15:A16')
-    c = wc.cell(row=15, column=1, value='🔒 PROTEGER')
-    c.font = Font(name='Arial', bold=True, size=14, color='FFFFFF')
-    c.fill = PatternFill('solid', fgColor='548235')
-    c.alignment = Alignment(horizontal='center', vertical='center')
-    wc.cell(row=15, column=2, value='Revisão → Proteger Planilha → Senha: sgl2026').font = _value_font
-
-    wc.cell(row=18, column=1, value='Senha: sgl2026').font = Font(
-        name='Arial', bold=True, size=12, color='C00000')
-    wc.cell(row=18, column=1).fill = PatternFill('solid', fgColor='FFF2CC')
+    ]:
+        wc.append([
+            _celula(wc, lbl, font=_label_font),
+            _celula(wc, val, font=Font(name='Arial', size=10, color='0000FF')),
+        ])
+    wc.append([])
+
+    wc.append([_celula(wc, 'PROTEÇÃO DA PLANILHA', font=Font(
+        name='Arial', bold=True, size=13, color='1F4E79'))])
+    wc.append([])
+
+    def _botao(texto, cor, instrucao):
+        wc.append([
+            _celula(wc, texto, font=Font(name='Arial', bold=True, size=14, color='FFFFFF'),
+                    fill=PatternFill('solid', fgColor=cor),
+                    alignment=Alignment(horizontal='center', vertical='center')),
+            _celula(wc, instrucao, font=_value_font),
+        ])
+        wc.append([])
+
+    wc.merged_cells.add('A12:A13')
+    _botao('🔓 DESPROTEGER', 'C00000', 'Revisão → Desproteger Planilha → Senha: sgl2026')
+    wc.append([])
+    wc.merged_cells.add('A15:A16')
+    _botao('🔒 PROTEGER', '548235', 'Revisão → Proteger Planilha → Senha: sgl2026')
+    wc.append([])
+
+    wc.append([_celula(wc, 'Senha: sgl2026', font=Font(name='Arial', bold=True, size=12, color='C00000'),
+                       fill=PatternFill('solid', fgColor='FFF2CC'))])
+    wc.append([])
 
     instrucoes = [
         '1. Itens preenchidos automaticamente pela IA',
@@ -530,62 +569,338 @@ def _criar_aba_config(wb):
         '13. TOTAL FINAL e DESCONTO % são calculados automaticamente',
         '14. Itens VENCIDOS serão usados para gerar planilha reajustada',
     ]
-    wc.cell(row=20, column=1, value='INSTRUÇÕES').font = _title_font
-    for i, t in enumerate(instrucoes, 22):
-        wc.cell(row=i, column=1, value=t).font = Font(name='Arial', size=9, color='333333')
+    wc.append([_celula(wc, 'INSTRUÇÕES', font=_title_font)])
+    wc.append([])
+    fonte_instrucao = Font(name='Arial', size=9, color='333333')
+    for t in instrucoes:
+        wc.append([_celula(wc, t, font=fonte_instrucao)])
     return wc
 
 
+# ============================================================
+# TEMPLATE EM CACHE
+# ============================================================
+# A parte fixa do arquivo (estilos, tema, aba Configuração, cabeçalhos e
+# larguras da aba Cotação, proteção, validação) é gerada uma única vez pelo
+# openpyxl e guardada já serializada. Por edital só as regiões variáveis são
+# escritas: valores da aba Dados do Edital, linhas de itens (format strings
+# pré-montadas a partir do layout), linha de totais e as referências que
+# dependem do número de linhas.
+_ABA_DADOS = 'xl/worksheets/sheet1.xml'
+_ABA_COTACAO = 'xl/worksheets/sheet2.xml'
+_WORKBOOK_XML = 'xl/workbook.xml'
+_CORE_XML = 'docProps/core.xml'
+_SENTINELA_LINHA = 999999
+_SENTINELA_CAMPO = '@@SGL_CAMPO_{}@@'
+_LINHAS_POR_ESCRITA = 200
+
+_RE_CELULA_CAMPO = re.compile(
+    r'<c r="(B\d+)" s="(\d+)" t="inlineStr"><is><t>@@SGL_CAMPO_(\d+)@@</t></is></c>'
+)
+_RE_ESTILO_CELULA = re.compile(r'<c r="([A-Z]+)(\d+)" s="(\d+)"')
+_RE_DATA_CORE = re.compile(r'(<dcterms:(?:created|modified)[^>]*>)[^<]*(</dcterms:)')
+
+
+def _xml_celula(ref, estilo, valor):
+    """<c> equivalente ao gravado pelo openpyxl em modo write-only (strings inline)."""
+    if valor is None or valor == '':
+        return f'<c r="{ref}" s="{estilo}"/>'
+    if isinstance(valor, bool):
+        return f'<c r="{ref}" s="{estilo}" t="b"><v>{int(valor)}</v></c>'
+    if isinstance(valor, (int, float, Decimal)):
+        return f'<c r="{ref}" s="{estilo}" t="n"><v>{valor}</v></c>'
+    texto = ILLEGAL_CHARACTERS_RE.sub('', str(valor))
+    espaco = ' xml:space="preserve"' if texto.strip() != texto else ''
+    return f'<c r="{ref}" s="{estilo}" t="inlineStr"><is><t{espaco}>{escape(texto)}</t></is></c>'
+
+
+def _estilos_da_linha(xml, linha):
+    """{letra_coluna: id_estilo} das células de uma linha do XML gerado pelo openpyxl."""
+    ini = xml.index(f'<row r="{linha}"')
+    fim = xml.index('</row>', ini)
+    return {
+        letra: estilo
+        for letra, num, estilo in _RE_ESTILO_CELULA.findall(xml[ini:fim])
+        if int(num) == linha
+    }
+
+
+@lru_cache(maxsize=8)
+def _template_planilha(fornecedores):
+    """
+    Gera o workbook de referência (1 linha de item) e extrai as partes reaproveitáveis.
+
+    Args:
+        fornecedores: tupla com os nomes dos fornecedores do cabeçalho
+
+    Returns:
+        dict com as partes serializadas e os templates das regiões variáveis
+    """
+    campos = [(lbl, _SENTINELA_CAMPO.format(i))
+              for i, (lbl, _) in enumerate(_campos_dados_edital({}))]
+    amostra = {'numero_item': 1, 'descricao': 'x', 'codigo_referencia': 'x', 'quantidade': 1,
+               'unidade_compra': 'x', 'preco_unitario_maximo': 1, 'grupo_lote': 'x'}
+    wb = Workbook(write_only=True)
+    _registrar_estilos(wb)
+    _criar_aba_dados_edital(wb, {}, ultima_linha=_SENTINELA_LINHA, campos=campos)
+    _criar_aba_cotacao(wb, [amostra], list(fornecedores), total_linhas=1)
+    _criar_aba_config(wb)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+
+    with zipfile.ZipFile(buffer) as zf:
+        partes = {nome: zf.read(nome) for nome in zf.namelist()}
+
+    # --- Dados do Edital: valores dos campos e alcance das fórmulas de resumo ---
+    dados = partes[_ABA_DADOS].decode('utf-8')
+    if '{' in dados or '}' in dados:
+        raise ValueError('Aba Dados do Edital com chaves literais')
+    celulas_campos = {}
+
+    def _marcar_campo(m):
+        celulas_campos[int(m.group(3))] = (m.group(1), m.group(2))
+        return '{campo_%s}' % m.group(3)
+
+    dados = _RE_CELULA_CAMPO.sub(_marcar_campo, dados).replace(str(_SENTINELA_LINHA), '{n}')
+    if len(celulas_campos) != len(campos) or '{n}' not in dados:
+        raise ValueError('Regiões variáveis da aba Dados do Edital não encontradas')
+
+    # --- Cotação: cabeçalho + linha de itens + totais + rodapé ---
+    cotacao = partes[_ABA_COTACAO].decode('utf-8')
+    cabecalho = cotacao[:cotacao.index('<row r="2">')]
+    rodape = cotacao[cotacao.index('</sheetData>'):]
+    if '<dimension' in cabecalho or '{' in rodape:
+        raise ValueError('Estrutura inesperada na aba Cotação')
+
+    estilos = _estilos_da_linha(cotacao, 2)
+    estilos_total = _estilos_da_linha(cotacao, 3)
+    ultima_letra = get_column_letter(CD + len(_HDRS_DISPUTA) - 1)
+    letra_status = get_column_letter(CD)
+    for antigo, novo in ((f'ref="A1:{ultima_letra}2"', f'ref="A1:{ultima_letra}{{ult}}"'),
+                         # intervalo de 1 célula é serializado como "CF2"
+                         (f'sqref="{letra_status}2"',
+                          f'sqref="{letra_status}2:{letra_status}{{ult}}"')):
+        if antigo not in rodape:
+            raise ValueError(f'Referência {antigo} não encontrada no rodapé da aba Cotação')
+        rodape = rodape.replace(antigo, novo)
+
+    partes_linha = []
+    for col, (_, formula) in enumerate(_layout_linha_cotacao(len(fornecedores)), 1):
+        letra = get_column_letter(col)
+        if formula:
+            partes_linha.append(
+                f'<c r="{letra}{{r}}" s="{estilos[letra]}"><f>{escape(formula[1:])}</f><v></v></c>'
+            )
+        elif col in _COLS_ITEM:
+            partes_linha.append(f'{{c{col}}}')
+        else:
+            partes_linha.append(f'<c r="{letra}{{r}}" s="{estilos[letra]}"/>')
+
+    workbook_xml = partes[_WORKBOOK_XML].decode('utf-8')
+    filtro = f'$A$1:${ultima_letra}$2'
+    if filtro not in workbook_xml:
+        raise ValueError('Filtro da aba Cotação não encontrado em workbook.xml')
+
+    return {
+        'ordem': list(partes),
+        'partes': partes,
+        'dados': dados,
+        'campos': celulas_campos,
+        'cabecalho': cabecalho.encode('utf-8'),
+        'linha': '<row r="{r}">' + ''.join(partes_linha) + '</row>',
+        'estilos_item': {col: estilos[get_column_letter(col)] for col in _COLS_ITEM},
+        'estilos_total': estilos_total,
+        'rodape': rodape,
+        'workbook': workbook_xml.replace(filtro, f'$A$1:${ultima_letra}${{ult}}'),
+    }
+
+
+def _renderizar_template(t, edital_dict, itens, buffer):
+    """Escreve o .xlsx em `buffer` preenchendo só as regiões variáveis do template."""
+    total_rows = _total_linhas(len(itens))
+    ult = total_rows + 1
+    rt = ult + 1
+    agora = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    valores_campos = {
+        f'campo_{i}': _xml_celula(*t['campos'][i], val)
+        for i, (_, val) in enumerate(_campos_dados_edital(edital_dict))
+    }
+    letras_item = {col: get_column_letter(col) for col in _COLS_ITEM}
+    linha_tpl = t['linha']
+    estilos_item = t['estilos_item']
+
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for nome in t['ordem']:
+            if nome == _ABA_DADOS:
+                zf.writestr(nome, t['dados'].format(n=max(ult, 500), **valores_campos))
+            elif nome == _WORKBOOK_XML:
+                zf.writestr(nome, t['workbook'].replace('{ult}', str(ult)))
+            elif nome == _CORE_XML:
+                zf.writestr(nome, _RE_DATA_CORE.sub(rf'\g<1>{agora}\g<2>', t['partes'][nome].decode('utf-8')))
+            elif nome == _ABA_COTACAO:
+                with zf.open(nome, 'w') as f:
+                    f.write(t['cabecalho'])
+                    bloco = []
+                    for row in range(2, total_rows + 2):
+                        item_idx = row - 2
+                        valores = _valores_item(itens[item_idx], item_idx) if item_idx < len(itens) else {}
+                        bloco.append(linha_tpl.format(r=row, **{
+                            f'c{col}': _xml_celula(f'{letra}{row}', estilos_item[col], valores.get(col))
+                            for col, letra in letras_item.items()
+                        }))
+                        if len(bloco) >= _LINHAS_POR_ESCRITA:
+                            f.write(''.join(bloco).encode('utf-8'))
+                            bloco = []
+
+                    # === TOTAIS ===
+                    e = t['estilos_total']
+                    bloco.append(f'<row r="{rt}">' + _xml_celula(f'C{rt}', e['C'], 'TOTAL'))
+                    for ci in (9, 13, CD + 2):
+                        L = get_column_letter(ci)
+                        bloco.append(f'<c r="{L}{rt}" s="{e[L]}"><f>SUM({L}2:{L}{ult})</f><v></v></c>')
+                    bloco.append('</row>')
+                    bloco.append(t['rodape'].replace('{ult}', str(ult)))
+                    f.write(''.join(bloco).encode('utf-8'))
+            else:
+                zf.writestr(nome, t['partes'][nome])
+
+
 # ============================================================
 # FUNÇÃO PRINCIPAL: GERAR PLANILHA
 # ============================================================
+def _montar_planilha_openpyxl(edital_dict, itens, fornecedores=None):
+    """Monta o .xlsx inteiro pelo openpyxl (referência do template e fallback)."""
+    wb = Workbook(write_only=True)
+    _registrar_estilos(wb)
+    _criar_aba_dados_edital(wb, edital_dict, ultima_linha=_total_linhas(len(itens)) + 1)
+    _criar_aba_cotacao(wb, itens, fornecedores)
+    _criar_aba_config(wb)
+
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+@metricas.cronometrado('planilha_geracao', tipo='cotacao')
+def montar_planilha_cotacao(edital_dict, itens, fornecedores=None):
+    """
+    Monta o .xlsx de cotação a partir de dicts já carregados, usando o template
+    em cache (fallback: geração completa pelo openpyxl).
+
+    Returns:
+        bytes do arquivo .xlsx
+    """
+    try:
+        template = _template_planilha(tuple(fornecedores or FORNECEDORES_PADRAO))
+    except (ValueError, KeyError) as e:
+        logger.warning("Template da planilha indisponível (%s), gerando pelo openpyxl", e)
+        return _montar_planilha_openpyxl(edital_dict, itens, fornecedores)
+
+    buffer = io.BytesIO()
+    _renderizar_template(template, edital_dict, itens, buffer)
+    return buffer.getvalue()
+
+
+def _carregar_dados_planilhas(edital_ids):
+    """
+    Editais e itens extraídos de vários editais em 2 queries.
+
+    Returns:
+        dict {edital_id: (edital_dict, itens)} — ids inexistentes ficam de fora
+    """
+    from ..models.database import Edital, ItemEditalExtraido
+
+    ids = list(dict.fromkeys(edital_ids))
+    editais = Edital.query.filter(Edital.id.in_(ids)).all()
+    dados = {e.id: (e.to_dict(), []) for e in editais}
+
+    T = ItemEditalExtraido
+    linhas = T.query.with_entities(
+        T.edital_id, T.numero_item, T.descricao, T.codigo_referencia, T.quantidade,
+        T.unidade_compra, T.preco_unitario_maximo, T.grupo_lote,
+    ).filter(T.edital_id.in_(list(dados))).order_by(T.edital_id, T.numero_item.asc())
+
+    for item in linhas:
+        dados[item.edital_id][1].append({
+            'numero_item': item.numero_item,
+            'descricao': item.descricao,
+            'codigo_referencia': item.codigo_referencia,
+            'quantidade': float(item.quantidade) if item.quantidade else None,
+            'unidade_compra': item.unidade_compra or 'UN',
+            'preco_unitario_maximo': float(item.preco_unitario_maximo) if item.preco_unitario_maximo else None,
+            'grupo_lote': item.grupo_lote,
+        })
+    return dados
+
+
 def gerar_planilha_cotacao(edital_id, app=None):
     if app is None:
         from flask import current_app
         app = current_app._get_current_object()
 
     with app.app_context():
-        from ..models.database import db, Edital, ItemEditalExtraido, EditalArquivo
-
-        edital = Edital.query.get(edital_id)
-        if not edital:
+        dados = _carregar_dados_planilhas([edital_id])
+        if edital_id not in dados:
             logger.error("Edital %d não encontrado para gerar planilha", edital_id)
             return None
 
-        edital_dict = edital.to_dict()
-        itens_db = ItemEditalExtraido.query.filter_by(edital_id=edital_id).order_by(
-            ItemEditalExtraido.numero_item.asc()
-        ).all()
-
-        itens = []
-        for item in itens_db:
-            itens.append({
-                'numero_item': item.numero_item,
-                'descricao': item.descricao,
-                'codigo_referencia': item.codigo_referencia,
-                'quantidade': float(item.quantidade) if item.quantidade else None,
-                'unidade_compra': item.unidade_compra or 'UN',
-                'preco_unitario_maximo': float(item.preco_unitario_maximo) if item.preco_unitario_maximo else None,
-                'grupo_lote': item.grupo_lote,
-            })
-
+        edital_dict, itens = dados[edital_id]
         logger.info("Gerando planilha cotação V1.0: edital=%d, %d itens", edital_id, len(itens))
-
-        wb = Workbook()
-        _criar_aba_dados_edital(wb, edital_dict)
-        _criar_aba_cotacao(wb, itens)
-        _criar_aba_config(wb)
-
-        buffer = io.BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
-        xlsx_bytes = buffer.getvalue()
+        xlsx_bytes = montar_planilha_cotacao(edital_dict, itens)
 
         logger.info("Planilha cotação V1.0 gerada: edital=%d, %d bytes, %d itens",
                      edital_id, len(xlsx_bytes), len(itens))
         return xlsx_bytes
 
 
+def gerar_planilhas_cotacao_lote(edital_ids, app=None):
+    """
+    Gera as planilhas de vários editais no mesmo processo: 2 queries para
+    carregar tudo e o template em cache para cada arquivo.
+
+    Returns:
+        dict {edital_id: bytes do .xlsx}
+    """
+    if app is None:
+        from flask import current_app
+        app = current_app._get_current_object()
+
+    with app.app_context():
+        dados = _carregar_dados_planilhas(edital_ids)
+
+    faltando = set(edital_ids) - set(dados)
+    if faltando:
+        logger.error("Editais não encontrados para gerar planilha: %s", sorted(faltando))
+
+    planilhas = {}
+    for edital_id, (edital_dict, itens) in dados.items():
+        planilhas[edital_id] = montar_planilha_cotacao(edital_dict, itens)
+    logger.info("Planilhas cotação V1.0 geradas em lote: %d editais", len(planilhas))
+    return planilhas
+
+
+def _nome_arquivo_cotacao(edital_id, orgao_razao_social):
+    orgao_curto = (orgao_razao_social or 'Edital')[:40].replace('/', '-')
+    return f"COTACAO_{edital_id}_{orgao_curto}.xlsx"
+
+
+def _registrar_arquivo_cotacao(edital_id, nome_arquivo, resultado, existente=None, tipo='cotacao'):
+    """Cria/atualiza o EditalArquivo do `tipo` ('cotacao', 'reajustada') com o resultado do upload (sem commit)."""
+    from ..models.database import db, EditalArquivo
+
+    url = resultado.get('shared_link') or resultado['dropbox_path']
+    if existente:
+        existente.url_cloudinary = url
+        existente.nome_arquivo = nome_arquivo
+        existente.tamanho_bytes = resultado['tamanho']
+    else:
+        db.session.add(EditalArquivo(
+            edital_id=edital_id, tipo=tipo, nome_arquivo=nome_arquivo,
+            url_cloudinary=url, tamanho_bytes=resultado['tamanho'],
+            mime_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'))
+
+
 def gerar_e_enviar_planilha(edital_id, app=None):
     if app is None:
         from flask import current_app
@@ -605,8 +920,7 @@ def gerar_e_enviar_planilha(edital_id, app=None):
             logger.warning("Falha ao gerar planilha para edital %d", edital_id)
             return
 
-        orgao_curto = (edital.orgao_razao_social or 'Edital')[:40].replace('/', '-')
-        nome_arquivo = f"COTACAO_{edital.id}_{orgao_curto}.xlsx"
+        nome_arquivo = _nome_arquivo_cotacao(edital.id, edital.orgao_razao_social)
 
         try:
             pasta = dropbox_service.gerar_pasta_edital(edital)
@@ -617,24 +931,18 @@ def gerar_e_enviar_planilha(edital_id, app=None):
             if resultado:
                 existente = EditalArquivo.query.filter_by(
                     edital_id=edital.id, tipo='cotacao').first()
-                if existente:
-                    existente.url_cloudinary = resultado.get('shared_link') or resultado['dropbox_path']
-                    existente.nome_arquivo = nome_arquivo
-                    existente.tamanho_bytes = resultado['tamanho']
-                else:
-                    arquivo = EditalArquivo(
-                        edital_id=edital.id, tipo='cotacao', nome_arquivo=nome_arquivo,
-                        url_cloudinary=resultado.get('shared_link') or resultado['dropbox_path'],
-                        tamanho_bytes=resultado['tamanho'],
-                        mime_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-                    db.session.add(arquivo)
+                _registrar_arquivo_cotacao(edital.id, nome_arquivo, resultado, existente)
                 db.session.commit()
                 logger.info("Planilha cotação V1.0 enviada: edital=%d, %s", edital_id, nome_arquivo)
+                publicar(canal_edital(edital_id), 'planilha_enviada',
+                         arquivo=nome_arquivo, tamanho=resultado['tamanho'])
             else:
                 logger.warning("Falha upload Dropbox planilha edital %d", edital_id)
+                publicar(canal_edital(edital_id), 'planilha_erro', erro='Falha upload Dropbox')
         except Exception as e:
             db.session.rollback()
             logger.error("Erro enviar planilha Dropbox edital %d: %s", edital_id, e)
+            publicar(canal_edital(edital_id), 'planilha_erro', erro=str(e))
 
 
 def disparar_geracao_planilha_async(edital_id, app):
@@ -642,3 +950,176 @@ def disparar_geracao_planilha_async(edital_id, app):
     thread.start()
     logger.info("Geração planilha V1.0 assíncrona disparada para edital %d", edital_id)
     return thread
+
+
+# ============================================================
+# LOTE: GERAR + ENVIAR (ex.: aprovações da semana)
+# ============================================================
+# Um job limitado para N editais: 2 queries para carregar tudo, geração dos
+# .xlsx em um pool de processos (CPU-bound) e uploads ao Dropbox em um pool
+# de threads (I/O-bound), encadeados conforme cada arquivo fica pronto. O
+# registro no banco (EditalArquivo) é feito no final, com um único commit.
+# _gerar_e_enviar_lote é o mesmo job para a planilha reajustada
+# (planilha_reajustada_service.gerar_e_enviar_reajustadas_lote).
+
+def _montar_planilha_processo(edital_dict, itens):
+    """Entrada do pool de processos (função de módulo, picklável)."""
+    return montar_planilha_cotacao(edital_dict, itens)
+
+
+def _enviar_planilha_dropbox(edital_dict, nome_arquivo, xlsx_bytes):
+    """Upload de uma planilha (roda nas threads de upload, sem acesso ao banco)."""
+    from . import dropbox_service
+
+    pasta = dropbox_service.gerar_pasta_edital(SimpleNamespace(**edital_dict))
+    dropbox_service.criar_pasta(pasta)
+    return dropbox_service.upload_arquivo(
+        xlsx_bytes, f"{pasta}/{nome_arquivo}", nome_arquivo=nome_arquivo)
+
+
+def _pool_geracao(workers, n_editais):
+    """Pool de processos para lotes grandes; lotes pequenos geram numa thread só."""
+    if workers > 1 and n_editais >= PLANILHA_LOTE_MIN_PROCESSOS:
+        return ProcessPoolExecutor(max_workers=min(workers, n_editais),
+                                   mp_context=multiprocessing.get_context('spawn'))
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="planilha-lote")
+
+
+def gerar_e_enviar_planilhas_lote(edital_ids, app=None, workers=PLANILHA_LOTE_WORKERS,
+                                  upload_workers=PLANILHA_UPLOAD_WORKERS):
+    """
+    Gera e envia ao Dropbox as planilhas de cotação de um lote de editais.
+
+    Args:
+        edital_ids: lista de IDs de Edital
+        workers: processos para gerar os .xlsx
+        upload_workers: uploads simultâneos ao Dropbox
+
+    Returns:
+        dict com tipo, total, enviados, falhas e `editais` = {edital_id: {status, ...}}
+        status: enviado | nao_encontrado | erro_geracao | erro_upload | erro_registro
+    """
+    return _gerar_e_enviar_lote(
+        edital_ids, app, workers, upload_workers, tipo='cotacao',
+        carregar=_carregar_dados_planilhas, montar=_montar_planilha_processo,
+        nome_arquivo=_nome_arquivo_cotacao, eventos=True,
+    )
+
+
+def _gerar_e_enviar_lote(edital_ids, app, workers, upload_workers, tipo, carregar, montar,
+                         nome_arquivo, eventos=False, exigir_itens=False):
+    """
+    Job de lote de um tipo de planilha.
+
+    carregar(ids) → {edital_id: (edital_dict, itens)}; com exigir_itens, os
+    editais sem itens ficam com status sem_itens e não geram planilha.
+    montar(edital_dict, itens) → bytes roda no pool de
+    processos (função de módulo, picklável). nome_arquivo(id, orgao) → str.
+    eventos: publica planilha_enviada/planilha_erro no canal do edital.
+    """
+    if app is None:
+        from flask import current_app
+        app = current_app._get_current_object()
+
+    from ..models.database import db, EditalArquivo, LogAtividade
+
+    edital_ids = list(dict.fromkeys(edital_ids))
+    with app.app_context():
+        dados = carregar(edital_ids)
+
+    status = {eid: {'status': 'nao_encontrado'} for eid in edital_ids if eid not in dados}
+    if exigir_itens:
+        status.update({eid: {'status': 'sem_itens'} for eid, (_, itens) in dados.items() if not itens})
+        dados = {eid: d for eid, d in dados.items() if d[1]}
+    uploads_ok = {}
+    logger.info("Planilhas %s em lote: %d editais (%d workers, %d uploads)",
+                tipo, len(dados), workers, upload_workers)
+
+    with _pool_geracao(workers, len(dados)) as pool, \
+            ThreadPoolExecutor(max_workers=upload_workers, thread_name_prefix="planilha-upload") as uploads:
+        geracao = {
+            pool.submit(montar, edital_dict, itens): eid
+            for eid, (edital_dict, itens) in dados.items()
+        }
+        envios = {}
+        for futuro in as_completed(geracao):
+            eid = geracao[futuro]
+            edital_dict, itens = dados[eid]
+            try:
+                xlsx_bytes = futuro.result()
+            except Exception as e:
+                logger.error("Erro gerar planilha %s em lote edital %d: %s", tipo, eid, e)
+                status[eid] = {'status': 'erro_geracao', 'erro': str(e)}
+                continue
+            arquivo = nome_arquivo(eid, edital_dict.get('orgao_razao_social'))
+            status[eid] = {'status': 'gerado', 'arquivo': arquivo,
+                           'itens': len(itens), 'bytes': len(xlsx_bytes)}
+            envios[uploads.submit(_enviar_planilha_dropbox, edital_dict, arquivo, xlsx_bytes)] = eid
+
+        for futuro in as_completed(envios):
+            eid = envios[futuro]
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                resultado = None
+                status[eid]['erro'] = str(e)
+            if resultado:
+                uploads_ok[eid] = resultado
+            else:
+                status[eid]['status'] = 'erro_upload'
+
+    with app.app_context():
+        try:
+            existentes = {
+                a.edital_id: a for a in EditalArquivo.query.filter(
+                    EditalArquivo.edital_id.in_(list(uploads_ok)),
+                    EditalArquivo.tipo == tipo,
+                )
+            } if uploads_ok else {}
+            for eid, resultado in uploads_ok.items():
+                _registrar_arquivo_cotacao(eid, status[eid]['arquivo'], resultado,
+                                           existentes.get(eid), tipo=tipo)
+                status[eid]['status'] = 'enviado'
+
+            enviados = sum(1 for st in status.values() if st['status'] == 'enviado')
+            relatorio = {
+                'tipo': tipo,
+                'total': len(edital_ids),
+                'enviados': enviados,
+                'falhas': len(edital_ids) - enviados,
+                'editais': status,
+            }
+            db.session.add(LogAtividade(
+                acao='planilhas_lote', entidade='edital',
+                detalhes={**relatorio, 'editais': {str(k): v for k, v in status.items()}},
+            ))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error("Erro registrar planilhas %s em lote: %s", tipo, e)
+            for eid in uploads_ok:
+                status[eid]['status'] = 'erro_registro'
+            enviados = 0
+            relatorio = {'tipo': tipo, 'total': len(edital_ids), 'enviados': 0,
+                         'falhas': len(edital_ids), 'editais': status}
+
+    if eventos:
+        for eid, st in status.items():
+            if st['status'] == 'enviado':
+                publicar(canal_edital(eid), 'planilha_enviada', arquivo=st['arquivo'], tamanho=st['bytes'])
+            elif st['status'] != 'nao_encontrado':
+                publicar(canal_edital(eid), 'planilha_erro', erro=st.get('erro') or st['status'])
+    logger.info("Planilhas %s em lote concluídas: %d/%d enviadas", tipo, enviados, len(edital_ids))
+    return relatorio
+
+
+def disparar_planilhas_lote_async(edital_ids, app, tipo='cotacao'):
+    """Dispara o job de planilhas em lote em background (uma thread para o lote todo)."""
+    if tipo == 'reajustada':
+        from .planilha_reajustada_service import gerar_e_enviar_reajustadas_lote as job
+    else:
+        job = gerar_e_enviar_planilhas_lote
+    thread = Thread(target=job, args=(list(edital_ids), app), daemon=True)
+    thread.start()
+    logger.info("Planilhas em lote disparadas para %d editais", len(edital_ids))
+    return thread
@@ -20,6 +20,8 @@ from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, Protecti
 from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.datavalidation import DataValidation
 
+from ..utils import metricas
+
 logger = logging.getLogger(__name__)
 
 # ============================================================
@@ -466,6 +468,62 @@ def _criar_aba_reajustes(wb, itens_vencidos):
 # ============================================================
 # FUNÇÃO PRINCIPAL: GERAR PLANILHA REAJUSTADA
 # ============================================================
+def _item_vencido(item):
+    return {
+        'numero_item': item.numero_item,
+        'descricao': item.descricao,
+        'codigo_referencia': item.codigo_referencia,
+        'quantidade': float(item.quantidade) if item.quantidade else None,
+        'unidade_compra': item.unidade_compra or 'UN',
+        'preco_unitario_maximo': float(item.preco_unitario_maximo) if item.preco_unitario_maximo else None,
+        'preco_final': float(item.preco_final) if item.preco_final else None,
+        'preco_total_final': float(item.preco_total_final) if item.preco_total_final else None,
+        'obs_disputa': item.obs_disputa,
+        'grupo_lote': item.grupo_lote,
+    }
+
+
+def _carregar_dados_reajustadas(edital_ids):
+    """
+    Editais e itens VENCIDOS de vários editais em 2 queries.
+
+    Returns:
+        dict {edital_id: (edital_dict, itens_vencidos)} — ids inexistentes ficam de fora
+    """
+    from ..models.database import Edital, ItemEditalExtraido
+
+    ids = list(dict.fromkeys(edital_ids))
+    editais = Edital.query.filter(Edital.id.in_(ids)).all()
+    dados = {e.id: (e.to_dict(), []) for e in editais}
+
+    T = ItemEditalExtraido
+    itens = T.query.filter(
+        T.edital_id.in_(list(dados)), T.status_disputa == 'VENCIDO',
+    ).order_by(T.edital_id, T.numero_item.asc())
+    for item in itens:
+        dados[item.edital_id][1].append(_item_vencido(item))
+    return dados
+
+
+def montar_planilha_reajustada(edital_dict, itens_vencidos):
+    """Monta o .xlsx da planilha reajustada (sem banco; picklável para o pool de processos)."""
+    wb = Workbook()
+    _criar_aba_contrato(wb, edital_dict, itens_vencidos)
+    _criar_aba_itens_vencidos(wb, itens_vencidos)
+    _criar_aba_entregas(wb, itens_vencidos)
+    _criar_aba_reajustes(wb, itens_vencidos)
+
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def _nome_arquivo_reajustada(edital_id, orgao_razao_social):
+    orgao_curto = (orgao_razao_social or 'Edital')[:40].replace('/', '-')
+    return f"REAJUSTADA_{edital_id}_{orgao_curto}.xlsx"
+
+
+@metricas.cronometrado('planilha_geracao', tipo='reajustada')
 def gerar_planilha_reajustada(edital_id, app=None):
     """
     Gera planilha reajustada com itens VENCIDOS de um edital.
@@ -478,55 +536,22 @@ def gerar_planilha_reajustada(edital_id, app=None):
         app = current_app._get_current_object()
 
     with app.app_context():
-        from ..models.database import db, Edital, ItemEditalExtraido
-
-        edital = Edital.query.get(edital_id)
-        if not edital:
+        dados = _carregar_dados_reajustadas([edital_id])
+        if edital_id not in dados:
             logger.error("Edital %d não encontrado para reajustada", edital_id)
             return None, 'Edital não encontrado'
 
-        edital_dict = edital.to_dict()
-
-        # Buscar apenas itens VENCIDOS
-        itens_db = ItemEditalExtraido.query.filter_by(
-            edital_id=edital_id,
-            status_disputa='VENCIDO',
-        ).order_by(ItemEditalExtraido.numero_item.asc()).all()
-
-        if not itens_db:
+        edital_dict, itens_vencidos = dados[edital_id]
+        if not itens_vencidos:
             logger.warning("Nenhum item VENCIDO para edital %d", edital_id)
             return None, 'Nenhum item com status VENCIDO encontrado'
 
-        itens_vencidos = []
-        for item in itens_db:
-            itens_vencidos.append({
-                'numero_item': item.numero_item,
-                'descricao': item.descricao,
-                'codigo_referencia': item.codigo_referencia,
-                'quantidade': float(item.quantidade) if item.quantidade else None,
-                'unidade_compra': item.unidade_compra or 'UN',
-                'preco_unitario_maximo': float(item.preco_unitario_maximo) if item.preco_unitario_maximo else None,
-                'preco_final': float(item.preco_final) if item.preco_final else None,
-                'preco_total_final': float(item.preco_total_final) if item.preco_total_final else None,
-                'obs_disputa': item.obs_disputa,
-                'grupo_lote': item.grupo_lote,
-            })
-
         logger.info(
             "Gerando planilha reajustada: edital=%d, %d itens vencidos",
             edital_id, len(itens_vencidos),
         )
 
-        wb = Workbook()
-        _criar_aba_contrato(wb, edital_dict, itens_vencidos)
-        _criar_aba_itens_vencidos(wb, itens_vencidos)
-        _criar_aba_entregas(wb, itens_vencidos)
-        _criar_aba_reajustes(wb, itens_vencidos)
-
-        buffer = io.BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
-        xlsx_bytes = buffer.getvalue()
+        xlsx_bytes = montar_planilha_reajustada(edital_dict, itens_vencidos)
 
         stats = {
             'itens_vencidos': len(itens_vencidos),
@@ -562,8 +587,7 @@ def gerar_e_enviar_reajustada(edital_id, app=None):
         if not xlsx_bytes:
             return {'erro': stats}  # stats contém a mensagem de erro
 
-        orgao_curto = (edital.orgao_razao_social or 'Edital')[:40].replace('/', '-')
-        nome_arquivo = f"REAJUSTADA_{edital.id}_{orgao_curto}.xlsx"
+        nome_arquivo = _nome_arquivo_reajustada(edital.id, edital.orgao_razao_social)
 
         try:
             pasta = dropbox_service.gerar_pasta_edital(edital)
@@ -617,3 +641,24 @@ def disparar_geracao_reajustada_async(edital_id, app):
     thread.start()
     logger.info("Geração de reajustada assíncrona disparada para edital %d", edital_id)
     return thread
+
+
+def gerar_e_enviar_reajustadas_lote(edital_ids, app=None, workers=None, upload_workers=None):
+    """
+    Gera e envia ao Dropbox as planilhas reajustadas de um lote de editais,
+    no mesmo job das planilhas de cotação (planilha_cotacao_service): 2
+    queries, geração em pool de processos e uploads simultâneos.
+
+    Returns:
+        dict como gerar_e_enviar_planilhas_lote; editais sem item VENCIDO
+        ficam com status sem_itens
+    """
+    from .planilha_cotacao_service import (
+        _gerar_e_enviar_lote, PLANILHA_LOTE_WORKERS, PLANILHA_UPLOAD_WORKERS,
+    )
+
+    return _gerar_e_enviar_lote(
+        edital_ids, app, workers or PLANILHA_LOTE_WORKERS, upload_workers or PLANILHA_UPLOAD_WORKERS,
+        tipo='reajustada', carregar=_carregar_dados_reajustadas, montar=montar_planilha_reajustada,
+        nome_arquivo=_nome_arquivo_reajustada, exigir_itens=True,
+    )
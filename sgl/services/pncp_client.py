@@ -8,6 +8,7 @@ NOTA: O PNCP possui DUAS bases de API:
   - /pncp-api/v1      → acesso a recursos específicos (itens, arquivos, detalhes)
 """
 import logging
+import re
 import time
 from datetime import datetime, timedelta
 from typing import Optional
@@ -16,6 +17,9 @@ import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from ..utils import metricas
+from ..utils.progresso import notificar
+
 logger = logging.getLogger(__name__)
 
 
@@ -79,10 +83,14 @@ class PNCPClient:
         """
         base = self.RESOURCE_URL if use_resource_api else self.BASE_URL
         url = f"{base}{endpoint}"
+        rota = re.sub(r'/\d+', '/:id', endpoint)  # label sem CNPJ/ano/sequencial
         try:
-            response = self.session.get(url, params=params, timeout=self.timeout)
+            with metricas.cronometro('pncp_http', endpoint=rota):
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            metricas.incrementar('pncp_respostas', endpoint=rota, status=response.status_code)
             response.raise_for_status()
-            return response.json()
+            with metricas.cronometro('pncp_json', endpoint=rota):
+                return response.json()
         except requests.exceptions.HTTPError as e:
             if response.status_code == 422:
                 logger.warning(f"PNCP API 422 (sem dados): {params}")
@@ -340,6 +348,7 @@ class PNCPClient:
                 if not resultado:
                     break
                 todas.extend(resultado)
+                notificar('pagina', registros=len(resultado), uf=uf, modalidade=modalidade)
                 if len(resultado) < self.page_size:
                     break  # Última página
             elif isinstance(resultado, dict):
@@ -347,6 +356,7 @@ class PNCPClient:
                 if not dados:
                     break
                 todas.extend(dados)
+                notificar('pagina', registros=len(dados), uf=uf, modalidade=modalidade)
                 
                 # Verificar se há mais páginas
                 total_paginas = resultado.get('totalPaginas', 1)
@@ -1,21 +1,37 @@
 """
 SGL - Serviço de Scraping
-Orquestra os scrapers BLL, BNC e Licitanet.
+Orquestra os scrapers BLL, BNC e Licitanet (coleta assíncrona, em paralelo).
 Converte editais scrapados para o modelo do banco.
 """
+import asyncio
 import logging
 from datetime import datetime, timezone
 from typing import Optional
 
 from ..models.database import db, Edital, Triagem
-from .scrapers import SCRAPERS, EditalScrapado
+from .scrapers import SCRAPERS, EditalScrapado, ClienteHTTPAsync, executar_sync
+from .identidade_edital import IndiceIdentidades
+from .planejador_scraping import Consulta
+from . import similaridade_edital
+from . import percolador_filtros
+from ..utils import metricas
 
 logger = logging.getLogger(__name__)
 
 
+# Limites por host do cliente compartilhado (ver scrapers/http_async.py).
+# O espaçamento é o mesmo 1.5 s do scraper síncrono: o ganho vem de coletar
+# as plataformas (hosts diferentes) em paralelo, não de apertar cada host.
+LIMITE_POR_HOST = 2          # requests simultâneos no mesmo host (resposta > 1.5 s)
+INTERVALO_POR_HOST = 1.5     # segundos entre inícios de request no mesmo host
+
+
 class ScraperService:
     """
     Serviço que orquestra os scrapers e persiste os resultados.
+    A coleta de todas as plataformas (e de suas páginas) roda em um só
+    event loop, com um cliente HTTP compartilhado; a gravação no banco
+    continua sequencial, na thread do chamador.
     """
 
     def __init__(self, plataformas: list[str] = None):
@@ -32,11 +48,36 @@ class ScraperService:
                 self.scrapers[nome] = SCRAPERS[nome](
                     timeout=30,
                     max_retries=3,
-                    delay_entre_requests=1.5,  # Respeitar rate limits
+                    delay_entre_requests=INTERVALO_POR_HOST,  # Respeitar rate limits (por host)
+                    limite_por_host=LIMITE_POR_HOST,
                 )
             else:
                 logger.warning(f"Scraper '{nome}' não encontrado. Disponíveis: {list(SCRAPERS.keys())}")
 
+    async def _coletar(self, consultas: list[Consulta], **filtros) -> list:
+        """
+        Executa as consultas em paralelo, com um cliente HTTP compartilhado.
+        Retorna, na ordem das consultas, [EditalScrapado] ou a Exception.
+        """
+        async with ClienteHTTPAsync(timeout=30, max_retries=3, limite_por_host=LIMITE_POR_HOST,
+                                    intervalo_por_host=INTERVALO_POR_HOST,
+                                    memorizar_get=True) as cliente:
+            scrapers = [self.scrapers[nome] for nome in {c.plataforma for c in consultas}]
+            for scraper in scrapers:
+                scraper.cliente = cliente
+            try:
+                resultados = await asyncio.gather(
+                    *(self.scrapers[c.plataforma].buscar_todos_async(termo=c.termo, uf=c.uf, **filtros)
+                      for c in consultas),
+                    return_exceptions=True,
+                )
+            finally:
+                for scraper in scrapers:
+                    scraper.cliente = None
+        if cliente.gets_reaproveitados:
+            logger.info(f"Scraping: {cliente.gets_reaproveitados} GETs idênticos reaproveitados")
+        return resultados
+
     def executar_scraping(
         self,
         termo: Optional[str] = None,
@@ -49,6 +90,31 @@ class ScraperService:
         """
         Executa scraping em todas as plataformas configuradas.
 
+        Returns:
+            dict com estatísticas por plataforma
+        """
+        consultas = []
+        for nome in plataformas or list(self.scrapers.keys()):
+            if nome in self.scrapers:
+                consultas.append(Consulta(nome, termo, uf))
+            else:
+                logger.warning(f"Scraper '{nome}' não inicializado")
+        return self.executar_plano(consultas, data_inicial=data_inicial, data_final=data_final,
+                                   max_paginas=max_paginas)
+
+    @metricas.execucao_medida('scraping')
+    def executar_plano(
+        self,
+        consultas: list[Consulta],
+        data_inicial: Optional[str] = None,
+        data_final: Optional[str] = None,
+        max_paginas: int = 3,
+    ) -> dict:
+        """
+        Executa um plano de consultas (services/planejador_scraping.py) em um
+        só event loop e grava os editais de cada plataforma uma vez, sem
+        repetir os que vieram em mais de uma consulta.
+
         Returns:
             dict com estatísticas por plataforma
         """
@@ -60,14 +126,17 @@ class ScraperService:
             'por_plataforma': {},
         }
 
-        scrapers_usar = plataformas or list(self.scrapers.keys())
-
-        for nome in scrapers_usar:
-            scraper = self.scrapers.get(nome)
-            if not scraper:
-                logger.warning(f"Scraper '{nome}' não inicializado")
-                continue
+        consultas = [c for c in consultas if c.plataforma in self.scrapers]
+        plataformas = list(dict.fromkeys(c.plataforma for c in consultas))
+        logger.info(f"=== Scraping {', '.join(n.upper() for n in plataformas)}: {len(consultas)} consultas ===")
+        coletados = executar_sync(self._coletar(
+            consultas,
+            data_inicial=data_inicial,
+            data_final=data_final,
+            max_paginas=max_paginas,
+        ))
 
+        for nome in plataformas:
             plat_stats = {
                 'encontrados': 0,
                 'novos': 0,
@@ -75,32 +144,29 @@ class ScraperService:
                 'erros': 0,
             }
 
-            try:
-                logger.info(f"=== Scraping {nome.upper()} ===")
-
-                editais = scraper.buscar_todos(
-                    termo=termo,
-                    uf=uf,
-                    data_inicial=data_inicial,
-                    data_final=data_final,
-                    max_paginas=max_paginas,
-                )
-
-                plat_stats['encontrados'] = len(editais)
+            editais = {}
+            for consulta, resultado in zip(consultas, coletados):
+                if consulta.plataforma != nome:
+                    continue
+                if isinstance(resultado, Exception):
+                    logger.error(f"Erro no scraper {nome} (termo={consulta.termo} uf={consulta.uf}): {resultado}")
+                    plat_stats['erros'] += 1
+                    continue
+                for edital_scrapado in resultado:
+                    editais.setdefault(edital_scrapado.hash_unico, edital_scrapado)
 
-                for edital_scrapado in editais:
-                    try:
-                        resultado = self._salvar_edital(edital_scrapado)
-                        plat_stats[resultado] += 1
-                    except Exception as e:
-                        logger.error(f"{nome}: Erro ao salvar edital: {e}")
-                        plat_stats['erros'] += 1
+            plat_stats['encontrados'] = len(editais)
+            indice = IndiceIdentidades(map(self._identidade, editais.values()), fonte=nome)
 
-                logger.info(f"{nome.upper()}: {plat_stats}")
+            for edital_scrapado in editais.values():
+                try:
+                    resultado = self._salvar_edital(edital_scrapado, indice)
+                    plat_stats[resultado] += 1
+                except Exception as e:
+                    logger.error(f"{nome}: Erro ao salvar edital: {e}")
+                    plat_stats['erros'] += 1
 
-            except Exception as e:
-                logger.error(f"Erro no scraper {nome}: {e}")
-                plat_stats['erros'] += 1
+            logger.info(f"{nome.upper()}: {plat_stats}")
 
             stats['por_plataforma'][nome] = plat_stats
             stats['total_encontrados'] += plat_stats['encontrados']
@@ -111,7 +177,18 @@ class ScraperService:
         logger.info(f"=== Scraping total: {stats} ===")
         return stats
 
-    def _salvar_edital(self, edital_scrapado: EditalScrapado) -> str:
+    @staticmethod
+    def _identidade(edital_scrapado: EditalScrapado) -> dict:
+        """Campos usados nas chaves de identidade (services/identidade_edital.py)."""
+        return {
+            'hash_scraper': edital_scrapado.hash_unico,
+            'numero_controle_pncp': edital_scrapado.numero_pncp or None,
+            'numero_processo': edital_scrapado.numero_processo,
+            'orgao_razao_social': edital_scrapado.orgao,  # chave org: (processo + órgão)
+            'modalidade_nome': edital_scrapado.modalidade or 'Pregão Eletrônico',
+        }
+
+    def _salvar_edital(self, edital_scrapado: EditalScrapado, indice: IndiceIdentidades = None) -> str:
         """
         Salva um edital scrapado no banco.
 
@@ -119,21 +196,13 @@ class ScraperService:
             'novos', 'duplicados', ou 'erros'
         """
         try:
-            # Verificar duplicata por hash
+            # Verificar duplicata pelas chaves de identidade (hash da fonte, número PNCP, processo + órgão)
             hash_val = edital_scrapado.hash_unico
-            existente = Edital.query.filter_by(hash_scraper=hash_val).first()
-            if existente:
+            identidade = self._identidade(edital_scrapado)
+            indice = indice or IndiceIdentidades(fonte=edital_scrapado.plataforma)
+            if indice.duplicado(identidade):
                 return 'duplicados'
 
-            # Verificar duplicata por número de processo + órgão
-            if edital_scrapado.numero_processo:
-                existente2 = Edital.query.filter(
-                    Edital.numero_processo == edital_scrapado.numero_processo,
-                    Edital.orgao_razao_social == edital_scrapado.orgao,
-                ).first()
-                if existente2:
-                    return 'duplicados'
-
             # Criar edital no banco
             edital = Edital(
                 numero_processo=edital_scrapado.numero_processo or None,
@@ -156,6 +225,11 @@ class ScraperService:
 
             db.session.add(edital)
             db.session.flush()
+            if not indice.registrar_novo(edital.id, identidade):
+                db.session.rollback()  # inserido em paralelo por outra captação
+                return 'duplicados'
+            similaridade_edital.registrar_seguro(edital)  # grupo de quase duplicados
+            percolador_filtros.registrar_matches(edital)  # filtros de prospecção que casaram
 
             # Criar triagem pendente
             triagem = Triagem(
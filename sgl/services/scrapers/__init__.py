@@ -2,7 +2,8 @@
 SGL - Scrapers de Plataformas de Licitação
 Plataformas suportadas: BLL, BNC, Licitanet
 """
-from .base_scraper import BaseScraper, EditalScrapado
+from .base_scraper import BaseScraper, AsyncBaseScraper, EditalScrapado
+from .http_async import ClienteHTTPAsync, executar_sync
 from .bll_scraper import BLLScraper
 from .bnc_scraper import BNCScraper
 from .licitanet_scraper import LicitanetScraper
@@ -15,7 +16,8 @@ SCRAPERS = {
 }
 
 __all__ = [
-    'BaseScraper', 'EditalScrapado',
+    'BaseScraper', 'AsyncBaseScraper', 'EditalScrapado',
+    'ClienteHTTPAsync', 'executar_sync',
     'BLLScraper', 'BNCScraper', 'LicitanetScraper',
     'SCRAPERS',
 ]
@@ -1,7 +1,10 @@
 """
 SGL - Base Scraper
-Classe base para scrapers de plataformas de licitação.
+Classes base para scrapers de plataformas de licitação: BaseScraper
+(requests, síncrona) e AsyncBaseScraper (httpx assíncrono, ver
+http_async.py), com wrappers síncronos para os chamadores existentes.
 """
+import asyncio
 import logging
 import time
 import hashlib
@@ -13,6 +16,9 @@ import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from .http_async import ClienteHTTPAsync, executar_sync
+from .parser_html import obter_backend
+
 logger = logging.getLogger(__name__)
 
 
@@ -178,3 +184,148 @@ class BaseScraper(ABC):
 
         logger.info(f"{self.PLATAFORMA}: Total de {len(todos)} editais encontrados")
         return todos
+
+
+class AsyncBaseScraper(ABC):
+    """
+    Classe base assíncrona: buscar_editais_async/buscar_todos_async sobre um
+    ClienteHTTPAsync (HTTP/2, pool, limites por host). O cliente pode ser
+    compartilhado entre scrapers (ScraperService roda todas as plataformas
+    em um só event loop); sem cliente, cada chamada abre o seu.
+
+    buscar_editais/buscar_todos continuam síncronos para os chamadores
+    existentes.
+    """
+
+    PLATAFORMA = 'base'
+    BASE_URL = ''
+    HEADERS = {}  # headers específicos da plataforma (Referer, Origin...)
+    TAMANHO_PAGINA = 20  # página com menos resultados que isso é a última
+    # Separador de termos alternativos aceito pela busca da plataforma (ex.: ' OR ');
+    # None = um termo por consulta. Usado pelo planejador (services/planejador_scraping.py).
+    SEPARADOR_OR = None
+    # Seletores CSS do fallback HTML, compilados uma vez no backend (parser_html.py)
+    SELETORES = {}
+
+    def __init__(self, timeout=30, max_retries=3, delay_entre_requests=1.0,
+                 limite_por_host=4, cliente: Optional[ClienteHTTPAsync] = None,
+                 parser_html: Optional[str] = None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.delay = delay_entre_requests
+        self.limite_por_host = limite_por_host
+        self.cliente = cliente
+        self.html = obter_backend(parser_html)
+        self.seletores = {nome: self.html.compilar(css) for nome, css in self.SELETORES.items()}
+        self._celula = self.html.compilar('td')
+
+    def _selecionar_linhas(self, doc, nome) -> list:
+        """Nós do seletor `nome`, sem as linhas de cabeçalho de tabela (<tr> sem <td>)."""
+        return [no for no in self.html.selecionar(doc, self.seletores[nome])
+                if self.html.tag(no) != 'tr' or self.html.primeiro(no, self._celula) is not None]
+
+    def _href(self, no) -> str:
+        """URL absoluta do primeiro link dentro do nó ('' se não houver)."""
+        link = self.html.primeiro(no, self.seletores['link'])
+        href = self.html.atributo(link, 'href') if link is not None else None
+        if not href:
+            return ''
+        return href if href.startswith('http') else f"{self.BASE_URL}{href}"
+
+    def _novo_cliente(self) -> ClienteHTTPAsync:
+        return ClienteHTTPAsync(timeout=self.timeout, max_retries=self.max_retries,
+                                limite_por_host=self.limite_por_host,
+                                intervalo_por_host=self.delay)
+
+    def _casa_termo(self, texto, termo) -> bool:
+        """Filtro local do termo (fallback HTML), com termos alternativos se SEPARADOR_OR."""
+        texto = (texto or '').lower()
+        termos = termo.split(self.SEPARADOR_OR) if self.SEPARADOR_OR else [termo]
+        return any(t.strip().lower() in texto for t in termos)
+
+    async def _get(self, url, params=None, **kwargs):
+        """GET pelo cliente compartilhado (rate limit/retry por host)."""
+        return await self.cliente.get(url, params=params, headers=self.HEADERS,
+                                      plataforma=self.PLATAFORMA, **kwargs)
+
+    async def _post(self, url, data=None, json=None, **kwargs):
+        """POST pelo cliente compartilhado (rate limit/retry por host)."""
+        return await self.cliente.post(url, data=data, json=json, headers=self.HEADERS,
+                                       plataforma=self.PLATAFORMA, **kwargs)
+
+    @abstractmethod
+    async def buscar_editais_async(
+        self,
+        termo: Optional[str] = None,
+        uf: Optional[str] = None,
+        data_inicial: Optional[str] = None,
+        data_final: Optional[str] = None,
+        pagina: int = 1,
+        **kwargs
+    ) -> list[EditalScrapado]:
+        """Busca uma página de editais na plataforma. Implementado por cada scraper."""
+
+    async def _pagina(self, pagina, **filtros) -> Optional[list[EditalScrapado]]:
+        try:
+            resultados = await self.buscar_editais_async(pagina=pagina, **filtros)
+            logger.info(f"{self.PLATAFORMA}: Página {pagina} → {len(resultados)} editais")
+            return resultados
+        except Exception as e:
+            logger.error(f"{self.PLATAFORMA}: Erro na página {pagina}: {e}")
+            return None
+
+    async def buscar_todos_async(
+        self,
+        termo: Optional[str] = None,
+        uf: Optional[str] = None,
+        data_inicial: Optional[str] = None,
+        data_final: Optional[str] = None,
+        max_paginas: int = 5,
+        **kwargs
+    ) -> list[EditalScrapado]:
+        """
+        Busca paginada completa. A página 1 vai sozinha (descobre o endpoint
+        e se há mais páginas); as demais, em paralelo. O resultado é o mesmo
+        da busca sequencial: para na primeira página vazia, com erro ou
+        incompleta.
+        """
+        filtros = dict(termo=termo, uf=uf, data_inicial=data_inicial, data_final=data_final, **kwargs)
+        paginas = [await self._pagina(1, **filtros)]
+        if paginas[0] and len(paginas[0]) >= self.TAMANHO_PAGINA and max_paginas > 1:
+            paginas += await asyncio.gather(*(self._pagina(p, **filtros)
+                                              for p in range(2, max_paginas + 1)))
+
+        todos = []
+        for resultados in paginas:
+            if not resultados:
+                break
+            todos.extend(resultados)
+            if len(resultados) < self.TAMANHO_PAGINA:  # Provavelmente última página
+                break
+
+        logger.info(f"{self.PLATAFORMA}: Total de {len(todos)} editais encontrados")
+        return todos
+
+    async def _com_cliente(self, metodo, **kwargs):
+        if self.cliente is not None:
+            return await metodo(**kwargs)
+        async with self._novo_cliente() as cliente:
+            self.cliente = cliente
+            try:
+                return await metodo(**kwargs)
+            finally:
+                self.cliente = None
+
+    def buscar_editais(self, termo=None, uf=None, data_inicial=None, data_final=None,
+                       pagina=1, **kwargs) -> list[EditalScrapado]:
+        """Wrapper síncrono de buscar_editais_async."""
+        return executar_sync(self._com_cliente(
+            self.buscar_editais_async, termo=termo, uf=uf, data_inicial=data_inicial,
+            data_final=data_final, pagina=pagina, **kwargs))
+
+    def buscar_todos(self, termo=None, uf=None, data_inicial=None, data_final=None,
+                     max_paginas=5, **kwargs) -> list[EditalScrapado]:
+        """Wrapper síncrono de buscar_todos_async."""
+        return executar_sync(self._com_cliente(
+            self.buscar_todos_async, termo=termo, uf=uf, data_inicial=data_inicial,
+            data_final=data_final, max_paginas=max_paginas, **kwargs))
@@ -8,14 +8,13 @@ import logging
 import re
 from datetime import datetime
 from typing import Optional
-from bs4 import BeautifulSoup
 
-from .base_scraper import BaseScraper, EditalScrapado
+from .base_scraper import AsyncBaseScraper, EditalScrapado
 
 logger = logging.getLogger(__name__)
 
 
-class BLLScraper(BaseScraper):
+class BLLScraper(AsyncBaseScraper):
     """Scraper para BLL Compras (bllcompras.com)."""
 
     PLATAFORMA = 'bll'
@@ -34,15 +33,19 @@ class BLLScraper(BaseScraper):
         'aguardando': 'aguardando',
     }
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        # Headers específicos para BLL
-        self.session.headers.update({
-            'Referer': 'https://bllcompras.com/',
-            'Origin': 'https://bllcompras.com',
-        })
+    HEADERS = {
+        'Referer': 'https://bllcompras.com/',
+        'Origin': 'https://bllcompras.com',
+    }
+
+    SELETORES = {
+        # Tabela com rows ou cards com dados de processos
+        'linhas': 'table tr, .process-item, .card-process, [class*=process], [class*=Process]',
+        'links': 'a[href*="/Process/"], a[href*="process"]',
+        'link': 'a',
+    }
 
-    def buscar_editais(
+    async def buscar_editais_async(
         self,
         termo: Optional[str] = None,
         uf: Optional[str] = None,
@@ -57,18 +60,18 @@ class BLLScraper(BaseScraper):
         """
         # Tentar API interna (JSON)
         try:
-            return self._buscar_via_api(termo, uf, data_inicial, data_final, pagina)
+            return await self._buscar_via_api(termo, uf, data_inicial, data_final, pagina)
         except Exception as e:
             logger.info(f"BLL API interna falhou ({e}), tentando HTML...")
 
         # Fallback: scraping HTML
         try:
-            return self._buscar_via_html(termo, uf, pagina)
+            return await self._buscar_via_html(termo, uf, pagina)
         except Exception as e:
             logger.error(f"BLL HTML scraping falhou: {e}")
             return []
 
-    def _buscar_via_api(self, termo, uf, data_inicial, data_final, pagina) -> list[EditalScrapado]:
+    async def _buscar_via_api(self, termo, uf, data_inicial, data_final, pagina) -> list[EditalScrapado]:
         """Tenta endpoints de API interna do BLL."""
         # Endpoint comum em plataformas .NET MVC
         endpoints = [
@@ -89,7 +92,7 @@ class BLLScraper(BaseScraper):
         for endpoint in endpoints:
             try:
                 url = f"{self.BASE_URL}{endpoint}"
-                resp = self._get(url, params=params)
+                resp = await self._get(url, params=params)
                 if resp.status_code == 200:
                     data = resp.json()
                     return self._parse_api_response(data)
@@ -98,27 +101,29 @@ class BLLScraper(BaseScraper):
 
         raise Exception("Nenhum endpoint de API encontrado")
 
-    def _buscar_via_html(self, termo, uf, pagina) -> list[EditalScrapado]:
+    async def _buscar_via_html(self, termo, uf, pagina) -> list[EditalScrapado]:
         """Scraping da página pública de busca."""
         # param1=1 = processos em andamento, param1=0 = todos
         url = f"{self.BASE_URL}/Process/ProcessSearchPublic"
         params = {'param1': 1}
 
-        resp = self._get(url, params=params)
-        soup = BeautifulSoup(resp.text, 'html.parser')
+        resp = await self._get(url, params=params)
+        return self._parse_pagina_html(resp.text, termo, uf)
 
+    def _parse_pagina_html(self, html, termo=None, uf=None) -> list[EditalScrapado]:
+        """Editais da página pública de busca (parser em self.html)."""
+        doc = self.html.documento(html)
         editais = []
 
-        # Buscar tabelas ou cards com dados de processos
         # Pattern 1: Tabela com rows
-        rows = soup.select('table tbody tr, .process-item, .card-process, [class*=process], [class*=Process]')
+        rows = self._selecionar_linhas(doc, 'linhas')
 
         for row in rows:
             try:
                 edital = self._parse_html_row(row)
                 if edital:
                     # Aplicar filtros
-                    if termo and termo.lower() not in (edital.objeto or '').lower():
+                    if termo and not self._casa_termo(edital.objeto, termo):
                         continue
                     if uf and uf.upper() != (edital.uf or '').upper():
                         continue
@@ -129,7 +134,7 @@ class BLLScraper(BaseScraper):
 
         # Pattern 2: Se não encontrou via tabela, buscar links de processos
         if not editais:
-            links = soup.select('a[href*="/Process/"], a[href*="process"]')
+            links = self.html.selecionar(doc, self.seletores['links'])
             for link in links[:50]:  # Limitar
                 try:
                     edital = self._parse_link_element(link)
@@ -173,18 +178,13 @@ class BLLScraper(BaseScraper):
 
     def _parse_html_row(self, row) -> Optional[EditalScrapado]:
         """Parse de uma linha HTML de processo."""
-        cells = row.find_all(['td', 'div', 'span'])
-        text = row.get_text(separator='|', strip=True)
+        text = self.html.texto(row, '|')
 
         if not text or len(text) < 20:
             return None
 
         # Tentar extrair dados do texto
-        link = row.find('a')
-        url = ''
-        if link and link.get('href'):
-            href = link['href']
-            url = href if href.startswith('http') else f"{self.BASE_URL}{href}"
+        url = self._href(row)
 
         # Extrair número do processo
         num_match = re.search(r'(?:PE|PP|CC|TP|DL|IN)\s*[Nn]?[ºo°]?\s*\d+[/\-]\d+', text)
@@ -210,8 +210,8 @@ class BLLScraper(BaseScraper):
 
     def _parse_link_element(self, link) -> Optional[EditalScrapado]:
         """Parse de um elemento <a> de processo."""
-        href = link.get('href', '')
-        text = link.get_text(strip=True)
+        href = self.html.atributo(link, 'href') or ''
+        text = self.html.texto(link)
 
         if not text or len(text) < 10:
             return None
@@ -8,27 +8,30 @@ import logging
 import re
 from datetime import datetime
 from typing import Optional
-from bs4 import BeautifulSoup
 
-from .base_scraper import BaseScraper, EditalScrapado
+from .base_scraper import AsyncBaseScraper, EditalScrapado
 
 logger = logging.getLogger(__name__)
 
 
-class BNCScraper(BaseScraper):
+class BNCScraper(AsyncBaseScraper):
     """Scraper para BNC Compras (bnccompras.com)."""
 
     PLATAFORMA = 'bnc'
     BASE_URL = 'https://bnccompras.com'
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.session.headers.update({
-            'Referer': 'https://bnccompras.com/',
-            'Origin': 'https://bnccompras.com',
-        })
+    HEADERS = {
+        'Referer': 'https://bnccompras.com/',
+        'Origin': 'https://bnccompras.com',
+    }
 
-    def buscar_editais(
+    SELETORES = {
+        'linhas': 'table tr, .process-item, .card-process, [class*=process], [class*=Process]',
+        'links': 'a[href*="/Process/"], a[href*="process"]',
+        'link': 'a',
+    }
+
+    async def buscar_editais_async(
         self,
         termo: Optional[str] = None,
         uf: Optional[str] = None,
@@ -41,18 +44,18 @@ class BNCScraper(BaseScraper):
 
         # Tentar API interna primeiro
         try:
-            return self._buscar_via_api(termo, uf, data_inicial, data_final, pagina)
+            return await self._buscar_via_api(termo, uf, data_inicial, data_final, pagina)
         except Exception as e:
             logger.info(f"BNC API interna falhou ({e}), tentando HTML...")
 
         # Fallback: HTML
         try:
-            return self._buscar_via_html(termo, uf, pagina)
+            return await self._buscar_via_html(termo, uf, pagina)
         except Exception as e:
             logger.error(f"BNC HTML scraping falhou: {e}")
             return []
 
-    def _buscar_via_api(self, termo, uf, data_inicial, data_final, pagina) -> list[EditalScrapado]:
+    async def _buscar_via_api(self, termo, uf, data_inicial, data_final, pagina) -> list[EditalScrapado]:
         """Tenta endpoints de API interna do BNC."""
         endpoints = [
             '/Process/GetPublicProcessList',
@@ -72,7 +75,7 @@ class BNCScraper(BaseScraper):
         for endpoint in endpoints:
             try:
                 url = f"{self.BASE_URL}{endpoint}"
-                resp = self._get(url, params=params)
+                resp = await self._get(url, params=params)
                 if resp.status_code == 200:
                     data = resp.json()
                     return self._parse_api_response(data)
@@ -81,24 +84,27 @@ class BNCScraper(BaseScraper):
 
         raise Exception("Nenhum endpoint de API encontrado")
 
-    def _buscar_via_html(self, termo, uf, pagina) -> list[EditalScrapado]:
+    async def _buscar_via_html(self, termo, uf, pagina) -> list[EditalScrapado]:
         """Scraping da página pública de busca."""
         url = f"{self.BASE_URL}/Process/ProcessSearchPublic"
         params = {'param1': 1}
 
-        resp = self._get(url, params=params)
-        soup = BeautifulSoup(resp.text, 'html.parser')
+        resp = await self._get(url, params=params)
+        return self._parse_pagina_html(resp.text, termo, uf)
 
+    def _parse_pagina_html(self, html, termo=None, uf=None) -> list[EditalScrapado]:
+        """Editais da página pública de busca (parser em self.html)."""
+        doc = self.html.documento(html)
         editais = []
 
         # Buscar elementos de processo
-        rows = soup.select('table tbody tr, .process-item, .card-process, [class*=process], [class*=Process]')
+        rows = self._selecionar_linhas(doc, 'linhas')
 
         for row in rows:
             try:
                 edital = self._parse_html_row(row)
                 if edital:
-                    if termo and termo.lower() not in (edital.objeto or '').lower():
+                    if termo and not self._casa_termo(edital.objeto, termo):
                         continue
                     if uf and uf.upper() != (edital.uf or '').upper():
                         continue
@@ -108,11 +114,11 @@ class BNCScraper(BaseScraper):
 
         # Fallback: links
         if not editais:
-            links = soup.select('a[href*="/Process/"], a[href*="process"]')
+            links = self.html.selecionar(doc, self.seletores['links'])
             for link in links[:50]:
                 try:
-                    text = link.get_text(strip=True)
-                    href = link.get('href', '')
+                    text = self.html.texto(link)
+                    href = self.html.atributo(link, 'href') or ''
                     if text and len(text) > 10:
                         url_proc = href if href.startswith('http') else f"{self.BASE_URL}{href}"
                         editais.append(EditalScrapado(
@@ -157,15 +163,11 @@ class BNCScraper(BaseScraper):
 
     def _parse_html_row(self, row) -> Optional[EditalScrapado]:
         """Parse de linha HTML."""
-        text = row.get_text(separator='|', strip=True)
+        text = self.html.texto(row, '|')
         if not text or len(text) < 20:
             return None
 
-        link = row.find('a')
-        url = ''
-        if link and link.get('href'):
-            href = link['href']
-            url = href if href.startswith('http') else f"{self.BASE_URL}{href}"
+        url = self._href(row)
 
         num_match = re.search(r'(?:PE|PP|CC|TP|DL|IN)\s*[Nn]?[ºo°]?\s*\d+[/\-]\d+', text)
         numero = num_match.group(0) if num_match else ''
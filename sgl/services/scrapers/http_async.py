@@ -0,0 +1,150 @@
+"""
+SGL - Cliente HTTP assíncrono dos scrapers
+
+Um httpx.AsyncClient (HTTP/2 quando o pacote h2 está instalado, pool de
+conexões keep-alive) compartilhado por todos os scrapers de uma execução,
+com limites por host:
+  - no máximo `limite_por_host` requests simultâneos no mesmo host;
+  - início de requests no mesmo host espaçado em `intervalo_por_host`
+    segundos (o rate limit do BaseScraper síncrono, sem bloquear os
+    outros hosts).
+Retry como o HTTPAdapter do BaseScraper: 429/5xx e falhas de conexão,
+backoff exponencial, Retry-After respeitado.
+
+Com memorizar_get=True, GETs idênticos (mesma URL e parâmetros) durante a
+vida do cliente são feitos uma vez só — inclusive os simultâneos. É o caso
+do fallback HTML do BLL/BNC, que baixa a mesma página pública para
+qualquer termo.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import httpx
+
+from ...utils import metricas
+
+try:
+    import h2  # noqa: F401 — habilita HTTP/2 no httpx
+    HTTP2_DISPONIVEL = True
+except ImportError:
+    HTTP2_DISPONIVEL = False
+
+logger = logging.getLogger(__name__)
+
+HEADERS_PADRAO = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,application/json,*/*;q=0.8',
+    'Accept-Language': 'pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7',
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+}
+STATUS_RETRY = (429, 500, 502, 503, 504)
+
+
+class ClienteHTTPAsync:
+    """Cliente HTTP assíncrono com pool, HTTP/2, retry e limites por host."""
+
+    def __init__(self, timeout=30, max_retries=3, backoff=2.0,
+                 limite_por_host=4, intervalo_por_host=1.0, max_conexoes=20,
+                 memorizar_get=False):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.limite_por_host = limite_por_host
+        self.intervalo_por_host = intervalo_por_host
+        self.max_conexoes = max_conexoes
+        self._client = None
+        self._semaforos = {}
+        self._proximo_inicio = {}
+        self.memorizar_get = memorizar_get
+        self._gets = {}
+        self.gets_reaproveitados = 0
+
+    async def __aenter__(self):
+        self._client = httpx.AsyncClient(
+            http2=HTTP2_DISPONIVEL,
+            timeout=self.timeout,
+            headers=HEADERS_PADRAO,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.max_conexoes,
+                                max_keepalive_connections=self.max_conexoes),
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._client.aclose()
+        self._client = None
+        return False
+
+    async def _aguardar_vez(self, host):
+        """Reserva o próximo horário de início livre no host e espera até ele."""
+        loop = asyncio.get_running_loop()
+        agora = loop.time()
+        inicio = max(agora, self._proximo_inicio.get(host, 0.0))
+        self._proximo_inicio[host] = inicio + self.intervalo_por_host
+        if inicio > agora:
+            await asyncio.sleep(inicio - agora)
+
+    def _espera_retry(self, tentativa, resp=None):
+        if resp is not None:
+            retry_after = resp.headers.get('retry-after', '')
+            if retry_after.isdigit():
+                return float(retry_after)
+        return self.backoff * 2 ** (tentativa - 1) if tentativa > 1 else 0.0
+
+    async def request(self, metodo, url, plataforma='', **kwargs) -> httpx.Response:
+        """Request com limites do host e retry; levanta em erro HTTP (exceto 422)."""
+        host = urlsplit(url).netloc
+        semaforo = self._semaforos.setdefault(host, asyncio.Semaphore(self.limite_por_host))
+        tentativa = 0
+        while True:
+            tentativa += 1
+            async with semaforo:
+                await self._aguardar_vez(host)
+                try:
+                    with metricas.cronometro('scraper_http', plataforma=plataforma):
+                        resp = await self._client.request(metodo, url, **kwargs)
+                except httpx.TransportError as e:
+                    if tentativa > self.max_retries:
+                        logger.error(f"{plataforma} Error: {e}")
+                        raise
+                    resp = None
+            if resp is not None and (resp.status_code not in STATUS_RETRY or tentativa > self.max_retries):
+                break
+            await asyncio.sleep(self._espera_retry(tentativa, resp))
+
+        if resp.status_code == 422:
+            logger.warning(f"{plataforma}: 422 para {url}")
+            return resp
+        try:
+            resp.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            logger.error(f"{plataforma} HTTP Error: {e}")
+            raise
+        return resp
+
+    async def get(self, url, params=None, **kwargs) -> httpx.Response:
+        if not self.memorizar_get:
+            return await self.request('GET', url, params=params, **kwargs)
+        chave = (url, tuple(sorted((params or {}).items())))
+        tarefa = self._gets.get(chave)
+        if tarefa is None:
+            tarefa = self._gets[chave] = asyncio.ensure_future(
+                self.request('GET', url, params=params, **kwargs))
+        else:
+            self.gets_reaproveitados += 1
+        return await asyncio.shield(tarefa)
+
+    async def post(self, url, data=None, json=None, **kwargs) -> httpx.Response:
+        return await self.request('POST', url, data=data, json=json, **kwargs)
+
+
+def executar_sync(coro):
+    """Roda uma corrotina a partir de código síncrono (Flask, Celery, scripts)."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    # Chamado de dentro de um event loop: roda o outro loop em uma thread
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
@@ -8,27 +8,36 @@ import logging
 import re
 from datetime import datetime
 from typing import Optional
-from bs4 import BeautifulSoup
 
-from .base_scraper import BaseScraper, EditalScrapado
+from .base_scraper import AsyncBaseScraper, EditalScrapado
 
 logger = logging.getLogger(__name__)
 
 
-class LicitanetScraper(BaseScraper):
+class LicitanetScraper(AsyncBaseScraper):
     """Scraper para Licitanet (licitanet.com.br)."""
 
     PLATAFORMA = 'licitanet'
     BASE_URL = 'https://licitanet.com.br'
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.session.headers.update({
-            'Referer': 'https://licitanet.com.br/',
-            'Origin': 'https://licitanet.com.br',
-        })
+    HEADERS = {
+        'Referer': 'https://licitanet.com.br/',
+        'Origin': 'https://licitanet.com.br',
+    }
 
-    def buscar_editais(
+    SELETORES = {
+        # Licitanet usa cards/tabelas para listar processos: padrões comuns
+        'containers': (
+            'table tr, '
+            '.process-card, .processo-card, .card, '
+            '[class*=processo], [class*=licitacao], '
+            '.list-group-item, .resultado-item'
+        ),
+        'links': 'a[href*="processo"], a[href*="edital"], a[href*="pregao"]',
+        'link': 'a',
+    }
+
+    async def buscar_editais_async(
         self,
         termo: Optional[str] = None,
         uf: Optional[str] = None,
@@ -41,18 +50,18 @@ class LicitanetScraper(BaseScraper):
 
         # Tentar API interna
         try:
-            return self._buscar_via_api(termo, uf, data_inicial, data_final, pagina)
+            return await self._buscar_via_api(termo, uf, data_inicial, data_final, pagina)
         except Exception as e:
             logger.info(f"Licitanet API falhou ({e}), tentando HTML...")
 
         # Fallback: HTML
         try:
-            return self._buscar_via_html(termo, uf, pagina)
+            return await self._buscar_via_html(termo, uf, pagina)
         except Exception as e:
             logger.error(f"Licitanet HTML falhou: {e}")
             return []
 
-    def _buscar_via_api(self, termo, uf, data_inicial, data_final, pagina) -> list[EditalScrapado]:
+    async def _buscar_via_api(self, termo, uf, data_inicial, data_final, pagina) -> list[EditalScrapado]:
         """Tenta API interna do Licitanet."""
         endpoints = [
             '/api/processos',
@@ -78,7 +87,7 @@ class LicitanetScraper(BaseScraper):
         for endpoint in endpoints:
             try:
                 url = f"{self.BASE_URL}{endpoint}"
-                resp = self._get(url, params=params)
+                resp = await self._get(url, params=params)
                 if resp.status_code == 200:
                     content_type = resp.headers.get('content-type', '')
                     if 'json' in content_type:
@@ -89,32 +98,28 @@ class LicitanetScraper(BaseScraper):
 
         raise Exception("Nenhum endpoint de API encontrado")
 
-    def _buscar_via_html(self, termo, uf, pagina) -> list[EditalScrapado]:
+    async def _buscar_via_html(self, termo, uf, pagina) -> list[EditalScrapado]:
         """Scraping da página pública de processos."""
         url = f"{self.BASE_URL}/processos"
         params = {}
         if pagina > 1:
             params['page'] = pagina
 
-        resp = self._get(url, params=params)
-        soup = BeautifulSoup(resp.text, 'html.parser')
+        resp = await self._get(url, params=params)
+        return self._parse_pagina_html(resp.text, termo, uf)
 
+    def _parse_pagina_html(self, html, termo=None, uf=None) -> list[EditalScrapado]:
+        """Editais da página pública de processos (parser em self.html)."""
+        doc = self.html.documento(html)
         editais = []
 
-        # Licitanet usa cards/tabelas para listar processos
-        # Buscar por padrões comuns
-        containers = soup.select(
-            'table tbody tr, '
-            '.process-card, .processo-card, .card, '
-            '[class*=processo], [class*=licitacao], '
-            '.list-group-item, .resultado-item'
-        )
+        containers = self._selecionar_linhas(doc, 'containers')
 
         for container in containers:
             try:
                 edital = self._parse_container(container)
                 if edital:
-                    if termo and termo.lower() not in (edital.objeto or '').lower():
+                    if termo and not self._casa_termo(edital.objeto, termo):
                         continue
                     if uf and uf.upper() != (edital.uf or '').upper():
                         continue
@@ -124,7 +129,7 @@ class LicitanetScraper(BaseScraper):
 
         # Fallback: buscar todos os links de processo
         if not editais:
-            links = soup.select('a[href*="processo"], a[href*="edital"], a[href*="pregao"]')
+            links = self.html.selecionar(doc, self.seletores['links'])
             for link in links[:50]:
                 try:
                     edital = self._parse_link(link)
@@ -166,15 +171,11 @@ class LicitanetScraper(BaseScraper):
 
     def _parse_container(self, container) -> Optional[EditalScrapado]:
         """Parse de um container HTML de processo."""
-        text = container.get_text(separator=' | ', strip=True)
+        text = self.html.texto(container, ' | ')
         if not text or len(text) < 20:
             return None
 
-        link = container.find('a')
-        url = ''
-        if link and link.get('href'):
-            href = link['href']
-            url = href if href.startswith('http') else f"{self.BASE_URL}{href}"
+        url = self._href(container)
 
         # Extrair número do processo
         num_match = re.search(
@@ -217,8 +218,8 @@ class LicitanetScraper(BaseScraper):
 
     def _parse_link(self, link) -> Optional[EditalScrapado]:
         """Parse de um link de processo."""
-        text = link.get_text(strip=True)
-        href = link.get('href', '')
+        text = self.html.texto(link)
+        href = self.html.atributo(link, 'href') or ''
         if not text or len(text) < 10:
             return None
 
@@ -0,0 +1,158 @@
+"""
+SGL - Backends de parsing HTML dos scrapers
+
+Os scrapers (fallback HTML do BLL, BNC e Licitanet) usam só cinco
+operações: selecionar nós por CSS, o primeiro nó de um seletor dentro de
+outro, o texto de um nó (como get_text(separator, strip=True) do
+BeautifulSoup), um atributo e o nome da tag. Cada backend implementa
+essas cinco:
+
+  - selectolax (Lexbor): o mais rápido;
+  - lxml: seletores CSS compilados uma vez para XPath (cssselect);
+  - bs4: BeautifulSoup + html.parser, o caminho original — fallback
+    quando os outros não estão instalados.
+
+Escolha: SGL_PARSER_HTML=selectolax|lxml|bs4, ou o primeiro disponível
+nessa ordem. Em todos, <script>, <style> e <template> ficam fora do texto
+(como no get_text do bs4). O selectolax segue o HTML5 e cria o <tbody>
+implícito de tabelas sem ele (bs4 e lxml não): seletores com tbody casariam
+com nós diferentes conforme o backend. Os scrapers usam 'table tr' e
+descartam as linhas de cabeçalho (<tr> sem <td>, ver
+AsyncBaseScraper._selecionar_linhas) — mesmo resultado nos três.
+
+Benchmark: python -m sgl.benchmarks.parser_html
+"""
+import logging
+import os
+from functools import lru_cache
+
+from bs4 import BeautifulSoup
+import soupsieve
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml.html
+    from lxml import etree
+    from lxml.cssselect import CSSSelector
+except ImportError:  # lxml sem cssselect também não serve
+    CSSSelector = None
+
+logger = logging.getLogger(__name__)
+
+_TAGS_SEM_TEXTO = ('script', 'style', 'template')
+_SEP = '\x1f'
+
+
+class BackendBS4:
+    nome = 'bs4'
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def compilar(css):
+        return soupsieve.compile(css)
+
+    def documento(self, html):
+        return BeautifulSoup(html, 'html.parser')
+
+    def selecionar(self, no, seletor):
+        return seletor.select(no)
+
+    def primeiro(self, no, seletor):
+        return seletor.select_one(no)
+
+    def texto(self, no, separador=''):
+        return no.get_text(separator=separador, strip=True)
+
+    def atributo(self, no, nome):
+        return no.get(nome)
+
+    def tag(self, no):
+        return no.name
+
+
+class BackendSelectolax:
+    nome = 'selectolax'
+
+    @staticmethod
+    def compilar(css):
+        return css  # o Lexbor compila o seletor na própria consulta
+
+    def documento(self, html):
+        doc = LexborHTMLParser(html)
+        doc.strip_tags(list(_TAGS_SEM_TEXTO))
+        return doc
+
+    def selecionar(self, no, seletor):
+        # Lexbor repete o nó que casa com mais de um seletor do grupo (ordem do documento)
+        vistos = set()
+        return [n for n in no.css(seletor) if not (n.mem_id in vistos or vistos.add(n.mem_id))]
+
+    def primeiro(self, no, seletor):
+        return no.css_first(seletor)
+
+    def texto(self, no, separador=''):
+        # strip=True apara cada nó de texto mas mantém os vazios: separador próprio e filtro
+        return separador.join(p for p in no.text(separator=_SEP, strip=True).split(_SEP) if p)
+
+    def atributo(self, no, nome):
+        return no.attributes.get(nome)
+
+    def tag(self, no):
+        return no.tag
+
+
+class BackendLxml:
+    nome = 'lxml'
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def compilar(css):
+        return CSSSelector(css, translator='html')
+
+    def documento(self, html):
+        doc = lxml.html.document_fromstring(html)
+        etree.strip_elements(doc, *_TAGS_SEM_TEXTO, with_tail=False)
+        return doc
+
+    def selecionar(self, no, seletor):
+        return seletor(no)
+
+    def primeiro(self, no, seletor):
+        # o XPath do cssselect é descendant-or-self: o próprio nó não conta
+        return next((e for e in seletor(no) if e is not no), None)
+
+    def texto(self, no, separador=''):
+        return separador.join(t for t in (s.strip() for s in no.itertext()) if t)
+
+    def atributo(self, no, nome):
+        return no.get(nome)
+
+    def tag(self, no):
+        return no.tag
+
+
+BACKENDS = {
+    'selectolax': (BackendSelectolax, LexborHTMLParser is not None),
+    'lxml': (BackendLxml, CSSSelector is not None),
+    'bs4': (BackendBS4, True),
+}
+
+
+def disponiveis():
+    return [nome for nome, (_, ok) in BACKENDS.items() if ok]
+
+
+@lru_cache(maxsize=None)
+def obter_backend(nome=None):
+    """Backend pedido (ou SGL_PARSER_HTML, ou o mais rápido instalado); bs4 se indisponível."""
+    nome = nome or os.environ.get('SGL_PARSER_HTML')
+    if nome:
+        classe, ok = BACKENDS.get(nome, (None, False))
+        if ok:
+            return classe()
+        logger.warning(f"Parser HTML '{nome}' indisponível; usando {disponiveis()[0]}")
+    return BACKENDS[disponiveis()[0]][0]()
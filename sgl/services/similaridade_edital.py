@@ -0,0 +1,225 @@
+"""
+SGL - Editais quase duplicados (MinHash + LSH sobre o objeto)
+
+Retificações, republicações e o mesmo objeto licitado por outra unidade
+chegam como editais distintos — as chaves de identidade
+(services/identidade_edital.py) não casam — mas com objeto quase idêntico.
+
+Na captação, cada edital novo recebe:
+  - uma assinatura MinHash (MINHASH_PERMUTACOES valores) do objeto,
+    calculada sobre shingles de MINHASH_SHINGLE palavras normalizadas e
+    gravada em Edital.minhash;
+  - LSH_BANDAS hashes de banda (LSH_LINHAS valores cada, mais o número
+    da banda) na tabela edital_lsh_bandas, indexada por hash.
+
+Os candidatos a quase duplicado são os editais que compartilham alguma
+banda — uma consulta indexada por inserção, independente do tamanho da
+base. A similaridade (Jaccard estimado pelas assinaturas) é conferida e,
+a partir de SIMILARIDADE_LIMIAR, os editais ficam no mesmo grupo
+(Edital.grupo_similar_id = id do primeiro edital do grupo).
+
+Com 16 bandas × 4 linhas, um par com Jaccard 0,75 vira candidato com
+probabilidade ~99,8%; com Jaccard 0,3, ~12%.
+
+Editais anteriores: indexar_similaridade_existentes()
+(script add_edital_minhash.py na raiz).
+"""
+import hashlib
+import logging
+import struct
+
+from sqlalchemy import select, text, or_
+from sqlalchemy.orm.attributes import set_committed_value
+
+from ..models.database import db, Edital, EditalLshBanda
+from ..utils import texto as texto_util
+
+logger = logging.getLogger(__name__)
+
+MINHASH_PERMUTACOES = 64
+MINHASH_SHINGLE = 2          # palavras por shingle
+MINHASH_MIN_PALAVRAS = 5     # objetos mais curtos não são comparados
+LSH_BANDAS = 16
+LSH_LINHAS = MINHASH_PERMUTACOES // LSH_BANDAS
+SIMILARIDADE_LIMIAR = 0.75
+
+# Cada shingle vira MINHASH_PERMUTACOES valores de 32 bits: blake2b de 64 bytes
+# (16 valores) com um salt diferente por bloco — equivale a 64 funções de hash
+# independentes, sem aritmética por permutação em Python.
+_SALTS = [f'sgl-minhash-{i}'.encode() for i in range(MINHASH_PERMUTACOES // 16)]
+_FORMATO = f'<{MINHASH_PERMUTACOES}I'
+
+
+# ============================================================
+# ASSINATURA
+# ============================================================
+
+def _shingles(texto):
+    palavras = texto_util.palavras(texto)
+    if len(palavras) < MINHASH_MIN_PALAVRAS:
+        return set()
+    return {' '.join(palavras[i:i + MINHASH_SHINGLE])
+            for i in range(len(palavras) - MINHASH_SHINGLE + 1)}
+
+
+def assinatura(texto):
+    """Assinatura MinHash do texto (tupla de inteiros), ou None se for curto demais."""
+    shingles = _shingles(texto)
+    if not shingles:
+        return None
+    hashes = (struct.unpack(_FORMATO, b''.join(hashlib.blake2b(s.encode(), digest_size=64, salt=salt).digest()
+                                             for salt in _SALTS))
+              for s in shingles)
+    return tuple(map(min, zip(*hashes)))
+
+
+def similaridade(assinatura_a, assinatura_b):
+    """Jaccard estimado: fração de posições iguais nas duas assinaturas."""
+    iguais = sum(1 for x, y in zip(assinatura_a, assinatura_b) if x == y)
+    return iguais / MINHASH_PERMUTACOES
+
+
+def empacotar(sig):
+    return struct.pack(_FORMATO, *sig)
+
+
+def desempacotar(dados):
+    return struct.unpack(_FORMATO, dados)
+
+
+def bandas(sig):
+    """Hash de 64 bits com sinal (coluna BIGINT) de cada banda: número da banda + suas linhas."""
+    resultado = []
+    for banda in range(LSH_BANDAS):
+        linhas = struct.pack(f'<H{LSH_LINHAS}I', banda, *sig[banda * LSH_LINHAS:(banda + 1) * LSH_LINHAS])
+        resultado.append(int.from_bytes(hashlib.blake2b(linhas, digest_size=8).digest(), 'little', signed=True))
+    return resultado
+
+
+def _texto_objeto(edital):
+    return edital.objeto_completo or edital.objeto_resumo or ''
+
+
+# ============================================================
+# ÍNDICE LSH
+# ============================================================
+
+def _grupo_de(sig, bandas_sig, excluir_id=None):
+    """
+    Consulta os candidatos pelas bandas (uma consulta indexada) e confere a
+    similaridade. Retorna (grupo_id, [ids similares sem grupo]) ou (None, []).
+    """
+    sub = select(EditalLshBanda.edital_id).where(EditalLshBanda.hash.in_(bandas_sig))
+    if excluir_id is not None:
+        sub = sub.where(EditalLshBanda.edital_id != excluir_id)
+    candidatos = db.session.execute(
+        select(Edital.id, Edital.minhash, Edital.grupo_similar_id).where(Edital.id.in_(sub))
+    ).all()
+
+    similares = [(cid, grupo) for cid, dados, grupo in candidatos
+                 if dados and similaridade(sig, desempacotar(dados)) >= SIMILARIDADE_LIMIAR]
+    if not similares:
+        return None, []
+    grupo_id = min(grupo or cid for cid, grupo in similares)
+    return grupo_id, [cid for cid, grupo in similares if grupo is None]
+
+
+# Bandas do edital + assinatura/grupo (dele e dos similares ainda sem grupo) em um statement
+_SQL_GRAVAR = text("""
+    WITH bandas AS (
+        INSERT INTO edital_lsh_bandas (hash, edital_id)
+        SELECT h, :edital_id FROM unnest(CAST(:hashes AS bigint[])) AS h
+        ON CONFLICT DO NOTHING
+    )
+    UPDATE editais SET
+        minhash = CASE WHEN id = :edital_id THEN :minhash ELSE minhash END,
+        grupo_similar_id = CAST(:grupo_id AS integer)
+    WHERE id = :edital_id OR id = ANY(CAST(:sem_grupo AS integer[]))
+""")
+
+
+def registrar(edital):
+    """
+    Calcula a assinatura de um edital já inserido (após o flush), grava as
+    bandas e, se houver quase duplicados, o grupo — na transação corrente,
+    com dois statements: candidatos e gravação.
+
+    Returns:
+        grupo_similar_id atribuído, ou None
+    """
+    sig = assinatura(_texto_objeto(edital))
+    if sig is None:
+        return None
+    bandas_sig = bandas(sig)
+    grupo_id, sem_grupo = _grupo_de(sig, bandas_sig, excluir_id=edital.id)
+
+    minhash = empacotar(sig)
+    db.session.execute(_SQL_GRAVAR, {
+        'edital_id': edital.id,
+        'hashes': bandas_sig,
+        'minhash': minhash,
+        'grupo_id': grupo_id,
+        'sem_grupo': sem_grupo,
+    })
+    # o UPDATE já gravou: atualiza o objeto sem gerar outro UPDATE no próximo flush
+    set_committed_value(edital, 'minhash', minhash)
+    set_committed_value(edital, 'grupo_similar_id', grupo_id)
+    return grupo_id
+
+
+def registrar_seguro(edital):
+    """`registrar` sem derrubar a captação: falha vira warning e o edital segue sem grupo."""
+    try:
+        with db.session.begin_nested():
+            return registrar(edital)
+    except Exception as e:
+        logger.warning("Erro ao calcular similaridade do edital %s: %s", edital.id, e)
+        return None
+
+
+def similares(edital_id):
+    """Editais do mesmo grupo de quase duplicados (sem o próprio)."""
+    grupo = db.session.execute(
+        select(Edital.grupo_similar_id).where(Edital.id == edital_id)
+    ).scalar()
+    if grupo is None:
+        return []
+    return db.session.execute(
+        select(Edital.id, Edital.orgao_razao_social, Edital.unidade_nome, Edital.objeto_resumo,
+               Edital.plataforma_origem, Edital.data_publicacao, Edital.status)
+        .where(or_(Edital.grupo_similar_id == grupo, Edital.id == grupo), Edital.id != edital_id)
+        .order_by(Edital.id)
+    ).mappings().all()
+
+
+# ============================================================
+# EDITAIS EXISTENTES
+# ============================================================
+
+def indexar_similaridade_existentes(lote=1000):
+    """
+    Calcula assinatura, bandas e grupos dos editais ainda sem assinatura,
+    em ordem de id (o mais antigo vira o grupo). Idempotente.
+    """
+    stats = {'editais': 0, 'sem_texto': 0, 'agrupados': 0}
+    ultimo_id = 0
+    while True:
+        editais = (Edital.query
+                   .options(db.undefer(Edital.objeto_completo))
+                   .filter(Edital.id > ultimo_id, Edital.minhash.is_(None))
+                   .order_by(Edital.id).limit(lote).all())
+        if not editais:
+            break
+        ultimo_id = editais[-1].id
+        for edital in editais:
+            if registrar(edital) is not None:
+                stats['agrupados'] += 1
+            if edital.minhash is None:
+                stats['sem_texto'] += 1
+            db.session.flush()  # o próximo do lote enxerga a assinatura deste
+        db.session.commit()
+        stats['editais'] += len(editais)
+
+    logger.info("Similaridade indexada: %d editais, %d agrupados, %d sem texto",
+                stats['editais'], stats['agrupados'], stats['sem_texto'])
+    return stats
@@ -0,0 +1,160 @@
+"""
+SGL - Armazenamento comprimido do texto extraído dos PDFs
+
+Guarda o texto de cada arquivo em blocos por página, comprimidos com zstd
+(fallback zlib quando `zstandard` não estiver instalado), na tabela
+edital_arquivo_textos. Permite:
+  - gravar todas as páginas de um arquivo em um único INSERT em lote
+  - ler as páginas em streaming, sem materializar o documento inteiro
+  - acesso aleatório a um intervalo de páginas (ex.: páginas 10–25)
+  - parar a leitura ao atingir um limite de caracteres (prompt da AI)
+
+Instalação: pip install zstandard
+"""
+import logging
+import zlib
+
+from ..models.database import db, EditalArquivoTexto
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+    CODEC_PADRAO = 'zstd'
+    _ZSTD_LEVEL = 10
+except ImportError:  # pragma: no cover - depende do ambiente
+    zstandard = None
+    CODEC_PADRAO = 'zlib'
+
+SEPARADOR_PAGINAS = '\n\n'
+_STREAM_BATCH = 20  # páginas por fetch no streaming
+
+
+# ============================================================
+# COMPRESSÃO
+# ============================================================
+
+def comprimir(texto, codec=CODEC_PADRAO):
+    """Comprime uma string UTF-8 com o codec informado."""
+    dados = (texto or '').encode('utf-8')
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compress(dados)
+    if codec == 'zlib':
+        return zlib.compress(dados, 6)
+    raise ValueError(f'Codec desconhecido: {codec}')
+
+
+def descomprimir(conteudo, codec):
+    """Descomprime bytes gravados com `comprimir`."""
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError('Texto gravado com zstd, mas o pacote zstandard não está instalado')
+        return zstandard.ZstdDecompressor().decompress(conteudo).decode('utf-8')
+    if codec == 'zlib':
+        return zlib.decompress(conteudo).decode('utf-8')
+    raise ValueError(f'Codec desconhecido: {codec}')
+
+
+# ============================================================
+# ESCRITA
+# ============================================================
+
+def salvar_paginas(arquivo_id, paginas, commit=False):
+    """
+    Substitui o texto armazenado de um arquivo pelas páginas informadas.
+
+    Args:
+        arquivo_id: ID do EditalArquivo
+        paginas: lista de strings (uma por página, na ordem do PDF). Páginas
+                 vazias são puladas, mas a numeração original é preservada.
+        commit: se True, faz commit ao final
+
+    Returns:
+        dict com paginas, bytes_original e bytes_comprimido
+    """
+    EditalArquivoTexto.query.filter_by(arquivo_id=arquivo_id).delete(synchronize_session=False)
+
+    linhas = []
+    total_original = total_comprimido = 0
+    for numero, texto in enumerate(paginas or [], start=1):
+        if not texto or not texto.strip():
+            continue
+        conteudo = comprimir(texto)
+        tamanho = len(texto.encode('utf-8'))
+        total_original += tamanho
+        total_comprimido += len(conteudo)
+        linhas.append({
+            'arquivo_id': arquivo_id,
+            'pagina': numero,
+            'codec': CODEC_PADRAO,
+            'tamanho_original': tamanho,
+            'conteudo': conteudo,
+        })
+
+    if linhas:
+        db.session.execute(db.insert(EditalArquivoTexto), linhas)
+    if commit:
+        db.session.commit()
+
+    logger.info(
+        "Texto armazenado: arquivo=%d, %d paginas, %d -> %d bytes (%s)",
+        arquivo_id, len(linhas), total_original, total_comprimido, CODEC_PADRAO,
+    )
+    return {
+        'paginas': len(linhas),
+        'bytes_original': total_original,
+        'bytes_comprimido': total_comprimido,
+    }
+
+
+# ============================================================
+# LEITURA
+# ============================================================
+
+def iter_paginas(arquivo_id, inicio=None, fim=None):
+    """
+    Itera (numero_pagina, texto) em ordem, buscando do banco em lotes.
+
+    Args:
+        arquivo_id: ID do EditalArquivo
+        inicio: primeira página (inclusive, base 1) — None = desde o início
+        fim: última página (inclusive) — None = até o fim
+    """
+    query = db.session.query(
+        EditalArquivoTexto.pagina, EditalArquivoTexto.codec, EditalArquivoTexto.conteudo,
+    ).filter(EditalArquivoTexto.arquivo_id == arquivo_id)
+    if inicio is not None:
+        query = query.filter(EditalArquivoTexto.pagina >= inicio)
+    if fim is not None:
+        query = query.filter(EditalArquivoTexto.pagina <= fim)
+
+    query = query.order_by(EditalArquivoTexto.pagina.asc()).yield_per(_STREAM_BATCH)
+    for pagina, codec, conteudo in query:
+        yield pagina, descomprimir(conteudo, codec)
+
+
+def carregar_texto(arquivo_id, inicio=None, fim=None, max_chars=None):
+    """
+    Monta o texto de um intervalo de páginas.
+
+    Com `max_chars`, para de ler páginas assim que o limite é atingido —
+    útil para os prompts da AI, que já truncam o texto.
+
+    Returns:
+        str (vazia se o arquivo não tiver texto armazenado)
+    """
+    partes = []
+    total = 0
+    for _, texto in iter_paginas(arquivo_id, inicio=inicio, fim=fim):
+        partes.append(texto)
+        total += len(texto) + len(SEPARADOR_PAGINAS)
+        if max_chars is not None and total >= max_chars:
+            break
+
+    texto = SEPARADOR_PAGINAS.join(partes)
+    return texto[:max_chars] if max_chars is not None else texto
+
+
+def contar_paginas(arquivo_id):
+    """Quantidade de páginas com texto armazenadas para o arquivo."""
+    return EditalArquivoTexto.query.filter_by(arquivo_id=arquivo_id).count()
@@ -0,0 +1,99 @@
+"""
+SGL - Análise de Viabilidade (set-based)
+
+Calcula a viabilidade de todos os itens de um processo em um único
+statement no PostgreSQL:
+  1. DISTINCT ON (item_edital_id) escolhe a cotação mais barata por item
+  2. UPDATE ... FROM grava melhor_custo, preco_venda, margem_real,
+     fornecedor_selecionado_id e status
+  3. O agregado final (contagens e valor total aprovado) é calculado
+     sobre o RETURNING do UPDATE
+
+Regras (mesmas da versão item a item):
+  - sem cotação              → status 'sem_cotacao' (demais campos intocados)
+  - preço máximo ausente/0   → status 'pendente' (margem_real intocada)
+  - preço de venda ≤ máximo  → 'aprovado', senão 'reprovado'
+"""
+import logging
+
+from sqlalchemy import text
+
+from ..models.database import db
+
+logger = logging.getLogger(__name__)
+
+
+_SQL_VIABILIDADE = text("""
+    WITH melhor AS (
+        SELECT DISTINCT ON (c.item_edital_id)
+               c.item_edital_id, c.preco_unitario AS custo, c.fornecedor_id
+          FROM cotacoes_fornecedor c
+          JOIN itens_edital i ON i.id = c.item_edital_id
+         WHERE i.processo_id = :processo_id
+         ORDER BY c.item_edital_id, c.preco_unitario ASC, c.id ASC
+    ),
+    calc AS (
+        SELECT i.id,
+               m.custo,
+               m.fornecedor_id,
+               m.custo * (1 + CAST(:margem AS numeric) / 100) AS preco_venda,
+               COALESCE(i.preco_unitario_maximo, 0) AS preco_max
+          FROM itens_edital i
+          LEFT JOIN melhor m ON m.item_edital_id = i.id
+         WHERE i.processo_id = :processo_id
+    ),
+    atualizados AS (
+        UPDATE itens_edital i
+           SET status = CASE
+                   WHEN calc.custo IS NULL THEN 'sem_cotacao'
+                   WHEN calc.preco_max <= 0 THEN 'pendente'
+                   WHEN calc.preco_venda <= calc.preco_max THEN 'aprovado'
+                   ELSE 'reprovado'
+               END,
+               melhor_custo = COALESCE(calc.custo, i.melhor_custo),
+               preco_venda = COALESCE(calc.preco_venda, i.preco_venda),
+               fornecedor_selecionado_id = COALESCE(calc.fornecedor_id, i.fornecedor_selecionado_id),
+               margem_real = CASE
+                   WHEN calc.custo > 0 AND calc.preco_max > 0
+                   THEN ((calc.preco_max / calc.custo) - 1) * 100
+                   ELSE i.margem_real
+               END
+          FROM calc
+         WHERE i.id = calc.id
+        RETURNING i.status, i.preco_venda, i.quantidade
+    )
+    SELECT count(*) AS total,
+           count(*) FILTER (WHERE status = 'aprovado') AS aprovados,
+           count(*) FILTER (WHERE status = 'reprovado') AS reprovados,
+           count(*) FILTER (WHERE status = 'sem_cotacao') AS sem_cotacao,
+           COALESCE(sum(preco_venda * quantidade) FILTER (WHERE status = 'aprovado'), 0)
+               AS valor_total_estimado
+      FROM atualizados
+""")
+
+
+def analisar_viabilidade_processo(processo_id, margem):
+    """
+    Executa a análise de viabilidade de todos os itens do processo.
+    Não faz commit — o chamador decide (junto com a mudança de status do processo).
+
+    Args:
+        processo_id: ID do Processo
+        margem: margem mínima em % (ex.: 15.0)
+
+    Returns:
+        dict com aprovados, reprovados, sem_cotacao, total e valor_total_estimado
+    """
+    linha = db.session.execute(
+        _SQL_VIABILIDADE, {'processo_id': processo_id, 'margem': margem},
+    ).one()
+
+    resultados = {
+        'aprovados': linha.aprovados,
+        'reprovados': linha.reprovados,
+        'sem_cotacao': linha.sem_cotacao,
+        'total': linha.total,
+        'valor_total_estimado': float(linha.valor_total_estimado or 0),
+    }
+    logger.info("Viabilidade processo %d: %s", processo_id, resultados)
+    return resultados
@@ -11,19 +11,17 @@ Tasks:
 import logging
 from datetime import datetime, timedelta, timezone
 
-from sgl.celery_app import celery
+from sgl.celery_app import celery, obter_app_flask
 
 logger = logging.getLogger(__name__)
 
 
 def _get_app_and_service():
-    """Helper: cria Flask app e CaptacaoService dentro do contexto."""
-    from sgl.app import create_app
+    """Helper: app Flask do worker e CaptacaoService."""
     from sgl.services.captacao_service import CaptacaoService
 
-    app = create_app()
-    with app.app_context():
-        service = CaptacaoService(app.config)
+    app = obter_app_flask()
+    service = CaptacaoService(app.config)
     return app, service
 
 
@@ -47,50 +45,48 @@ def captacao_automatica(self):
     logger.info("=== CAPTAÇÃO AUTOMÁTICA INICIADA ===")
 
     try:
-        from sgl.app import create_app
         from sgl.services.captacao_service import CaptacaoService
         from sgl.models.database import FiltroProspeccao
 
-        app = create_app()
-        with app.app_context():
-            service = CaptacaoService(app.config)
+        app = obter_app_flask()
+        service = CaptacaoService(app.config)
 
-            # Carregar filtros ativos
-            filtros_ativos = FiltroProspeccao.query.filter_by(ativo=True).all()
+        # Carregar filtros ativos
+        filtros_ativos = FiltroProspeccao.query.filter_by(ativo=True).all()
 
-            if not filtros_ativos:
-                logger.info("Nenhum filtro ativo encontrado. Usando padrão (Pregão Eletrônico, todas as UFs).")
-                stats = service.executar_captacao(
-                    modalidades=[8],
-                    ufs=None,
-                )
-                _registrar_log(app, 'captacao_automatica', stats)
-                return stats
+        if not filtros_ativos:
+            logger.info("Nenhum filtro ativo encontrado. Usando padrão (Pregão Eletrônico, todas as UFs).")
+            stats = service.executar_captacao(
+                modalidades=[8],
+                ufs=None,
+            )
+            _registrar_log(app, 'captacao_automatica', stats)
+            return stats
 
-            # Coletar UFs e modalidades de todos os filtros
-            todas_ufs = set()
-            todas_modalidades = set()
+        # Coletar UFs e modalidades de todos os filtros
+        todas_ufs = set()
+        todas_modalidades = set()
 
-            for filtro in filtros_ativos:
-                if filtro.regioes_uf:
-                    todas_ufs.update(filtro.regioes_uf)
-                if filtro.modalidades:
-                    todas_modalidades.update(filtro.modalidades)
+        for filtro in filtros_ativos:
+            if filtro.regioes_uf:
+                todas_ufs.update(filtro.regioes_uf)
+            if filtro.modalidades:
+                todas_modalidades.update(filtro.modalidades)
 
-            ufs = list(todas_ufs) if todas_ufs else None
-            modalidades = list(todas_modalidades) if todas_modalidades else [8]
+        ufs = list(todas_ufs) if todas_ufs else None
+        modalidades = list(todas_modalidades) if todas_modalidades else [8]
 
-            logger.info(f"Filtros ativos: {len(filtros_ativos)} | UFs: {ufs} | Modalidades: {modalidades}")
+        logger.info(f"Filtros ativos: {len(filtros_ativos)} | UFs: {ufs} | Modalidades: {modalidades}")
 
-            stats = service.executar_captacao(
-                modalidades=modalidades,
-                ufs=ufs,
-                filtros_ids=[f.id for f in filtros_ativos],
-            )
+        stats = service.executar_captacao(
+            modalidades=modalidades,
+            ufs=ufs,
+            filtros_ids=[f.id for f in filtros_ativos],
+        )
 
-            _registrar_log(app, 'captacao_automatica', stats)
-            logger.info(f"=== CAPTAÇÃO AUTOMÁTICA CONCLUÍDA: {stats} ===")
-            return stats
+        _registrar_log(app, 'captacao_automatica', stats)
+        logger.info(f"=== CAPTAÇÃO AUTOMÁTICA CONCLUÍDA: {stats} ===")
+        return stats
 
     except Exception as exc:
         logger.error(f"Erro na captação automática: {exc}")
@@ -112,44 +108,42 @@ def captacao_diaria_completa(self):
     logger.info("=== CAPTAÇÃO DIÁRIA COMPLETA INICIADA ===")
 
     try:
-        from sgl.app import create_app
         from sgl.services.captacao_service import CaptacaoService
         from sgl.services.pncp_client import formatar_data_pncp
         from sgl.models.database import FiltroProspeccao
 
-        app = create_app()
-        with app.app_context():
-            service = CaptacaoService(app.config)
+        app = obter_app_flask()
+        service = CaptacaoService(app.config)
 
-            ontem = datetime.now() - timedelta(days=1)
-            data_ontem = formatar_data_pncp(ontem)
+        ontem = datetime.now() - timedelta(days=1)
+        data_ontem = formatar_data_pncp(ontem)
 
-            # Carregar filtros ativos
-            filtros_ativos = FiltroProspeccao.query.filter_by(ativo=True).all()
+        # Carregar filtros ativos
+        filtros_ativos = FiltroProspeccao.query.filter_by(ativo=True).all()
 
-            todas_ufs = set()
-            todas_modalidades = set()
+        todas_ufs = set()
+        todas_modalidades = set()
 
-            for filtro in filtros_ativos:
-                if filtro.regioes_uf:
-                    todas_ufs.update(filtro.regioes_uf)
-                if filtro.modalidades:
-                    todas_modalidades.update(filtro.modalidades)
+        for filtro in filtros_ativos:
+            if filtro.regioes_uf:
+                todas_ufs.update(filtro.regioes_uf)
+            if filtro.modalidades:
+                todas_modalidades.update(filtro.modalidades)
 
-            ufs = list(todas_ufs) if todas_ufs else None
-            modalidades = list(todas_modalidades) if todas_modalidades else [8]
+        ufs = list(todas_ufs) if todas_ufs else None
+        modalidades = list(todas_modalidades) if todas_modalidades else [8]
 
-            stats = service.executar_captacao(
-                data_inicial=data_ontem,
-                data_final=data_ontem,
-                modalidades=modalidades,
-                ufs=ufs,
-                filtros_ids=[f.id for f in filtros_ativos] if filtros_ativos else None,
-            )
+        stats = service.executar_captacao(
+            data_inicial=data_ontem,
+            data_final=data_ontem,
+            modalidades=modalidades,
+            ufs=ufs,
+            filtros_ids=[f.id for f in filtros_ativos] if filtros_ativos else None,
+        )
 
-            _registrar_log(app, 'captacao_diaria_completa', stats)
-            logger.info(f"=== CAPTAÇÃO DIÁRIA COMPLETA: {stats} ===")
-            return stats
+        _registrar_log(app, 'captacao_diaria_completa', stats)
+        logger.info(f"=== CAPTAÇÃO DIÁRIA COMPLETA: {stats} ===")
+        return stats
 
     except Exception as exc:
         logger.error(f"Erro na captação diária: {exc}")
@@ -174,23 +168,21 @@ def captacao_manual(self, modalidades=None, ufs=None, data_inicial=None, data_fi
     logger.info(f"=== CAPTAÇÃO MANUAL: UFs={ufs}, Mod={modalidades} ===")
 
     try:
-        from sgl.app import create_app
         from sgl.services.captacao_service import CaptacaoService
 
-        app = create_app()
-        with app.app_context():
-            service = CaptacaoService(app.config)
+        app = obter_app_flask()
+        service = CaptacaoService(app.config)
 
-            stats = service.executar_captacao(
-                data_inicial=data_inicial,
-                data_final=data_final,
-                modalidades=modalidades or [8],
-                ufs=ufs,
-            )
+        stats = service.executar_captacao(
+            data_inicial=data_inicial,
+            data_final=data_final,
+            modalidades=modalidades or [8],
+            ufs=ufs,
+        )
 
-            _registrar_log(app, 'captacao_manual', stats)
-            logger.info(f"=== CAPTAÇÃO MANUAL CONCLUÍDA: {stats} ===")
-            return stats
+        _registrar_log(app, 'captacao_manual', stats)
+        logger.info(f"=== CAPTAÇÃO MANUAL CONCLUÍDA: {stats} ===")
+        return stats
 
     except Exception as exc:
         logger.error(f"Erro na captação manual: {exc}")
@@ -214,58 +206,56 @@ def extrair_itens_pendentes(self, limite=10):
     logger.info("=== EXTRAÇÃO AI PENDENTES INICIADA ===")
 
     try:
-        from sgl.app import create_app
         from sgl.services.captacao_service import CaptacaoService
         from sgl.models.database import db, Edital, ItemEditalExtraido
         from sqlalchemy import and_, not_, exists
 
-        app = create_app()
-        with app.app_context():
-            service = CaptacaoService(app.config)
-
-            if not service.interpreter:
-                logger.warning("Claude API não configurada — pulando extração AI")
-                return {'msg': 'Claude API não configurada'}
-
-            # Editais aprovados sem itens extraídos
-            subquery = db.session.query(ItemEditalExtraido.edital_id).distinct()
-
-            editais_pendentes = Edital.query.filter(
-                and_(
-                    Edital.status.in_(['aprovado', 'em_processo']),
-                    ~Edital.id.in_(subquery)
-                )
-            ).order_by(Edital.created_at.desc()).limit(limite).all()
-
-            logger.info(f"Encontrados {len(editais_pendentes)} editais sem extração AI")
-
-            resultados = []
-            for edital in editais_pendentes:
-                try:
-                    resultado = service.extrair_itens_edital(edital.id)
-                    resultados.append({
-                        'edital_id': edital.id,
-                        'itens': resultado.get('itens_salvos', 0),
-                        'ok': True
-                    })
-                    logger.info(f"Edital {edital.id}: {resultado.get('itens_salvos', 0)} itens extraídos")
-                except Exception as e:
-                    resultados.append({
-                        'edital_id': edital.id,
-                        'erro': str(e),
-                        'ok': False
-                    })
-                    logger.error(f"Erro ao extrair itens do edital {edital.id}: {e}")
-
-            stats = {
-                'total_processados': len(resultados),
-                'sucesso': sum(1 for r in resultados if r['ok']),
-                'erros': sum(1 for r in resultados if not r['ok']),
-                'itens_total': sum(r.get('itens', 0) for r in resultados),
-            }
-
-            logger.info(f"=== EXTRAÇÃO AI CONCLUÍDA: {stats} ===")
-            return stats
+        app = obter_app_flask()
+        service = CaptacaoService(app.config)
+
+        if not service.interpreter:
+            logger.warning("Claude API não configurada — pulando extração AI")
+            return {'msg': 'Claude API não configurada'}
+
+        # Editais aprovados sem itens extraídos
+        subquery = db.session.query(ItemEditalExtraido.edital_id).distinct()
+
+        editais_pendentes = Edital.query.filter(
+            and_(
+                Edital.status.in_(['aprovado', 'em_processo']),
+                ~Edital.id.in_(subquery)
+            )
+        ).order_by(Edital.created_at.desc()).limit(limite).all()
+
+        logger.info(f"Encontrados {len(editais_pendentes)} editais sem extração AI")
+
+        resultados = []
+        for edital in editais_pendentes:
+            try:
+                resultado = service.extrair_itens_edital(edital.id)
+                resultados.append({
+                    'edital_id': edital.id,
+                    'itens': resultado.get('itens_salvos', 0),
+                    'ok': True
+                })
+                logger.info(f"Edital {edital.id}: {resultado.get('itens_salvos', 0)} itens extraídos")
+            except Exception as e:
+                resultados.append({
+                    'edital_id': edital.id,
+                    'erro': str(e),
+                    'ok': False
+                })
+                logger.error(f"Erro ao extrair itens do edital {edital.id}: {e}")
+
+        stats = {
+            'total_processados': len(resultados),
+            'sucesso': sum(1 for r in resultados if r['ok']),
+            'erros': sum(1 for r in resultados if not r['ok']),
+            'itens_total': sum(r.get('itens', 0) for r in resultados),
+        }
+
+        logger.info(f"=== EXTRAÇÃO AI CONCLUÍDA: {stats} ===")
+        return stats
 
     except Exception as exc:
         logger.error(f"Erro na extração AI pendentes: {exc}")
@@ -283,15 +273,13 @@ def extrair_itens_edital(self, edital_id):
     logger.info(f"Extraindo itens do edital {edital_id} via AI...")
 
     try:
-        from sgl.app import create_app
         from sgl.services.captacao_service import CaptacaoService
 
-        app = create_app()
-        with app.app_context():
-            service = CaptacaoService(app.config)
-            resultado = service.extrair_itens_edital(edital_id)
-            logger.info(f"Edital {edital_id}: {resultado}")
-            return resultado
+        app = obter_app_flask()
+        service = CaptacaoService(app.config)
+        resultado = service.extrair_itens_edital(edital_id)
+        logger.info(f"Edital {edital_id}: {resultado}")
+        return resultado
 
     except Exception as exc:
         logger.error(f"Erro ao extrair itens do edital {edital_id}: {exc}")
@@ -304,23 +292,22 @@ def extrair_itens_edital(self, edital_id):
 
 @celery.task(name='sgl.tasks.captacao_tasks.limpeza_logs_antigos')
 def limpeza_logs_antigos(dias=90):
-    """Remove logs de atividade mais antigos que X dias."""
+    """Remove logs de atividade e relatórios de perfilamento mais antigos que X dias."""
     logger.info(f"=== LIMPEZA: removendo logs > {dias} dias ===")
 
     try:
-        from sgl.app import create_app
-        from sgl.models.database import db, LogAtividade
-
-        app = create_app()
-        with app.app_context():
-            limite = datetime.now(timezone.utc) - timedelta(days=dias)
-            deletados = LogAtividade.query.filter(
-                LogAtividade.created_at < limite
-            ).delete()
-            db.session.commit()
-
-            logger.info(f"Limpeza concluída: {deletados} logs removidos")
-            return {'deletados': deletados}
+        from sgl.models.database import db, LogAtividade, RelatorioPerfil
+        limite = datetime.now(timezone.utc) - timedelta(days=dias)
+        deletados = LogAtividade.query.filter(
+            LogAtividade.created_at < limite
+        ).delete()
+        perfis = RelatorioPerfil.query.filter(
+            RelatorioPerfil.created_at < limite
+        ).delete()
+        db.session.commit()
+
+        logger.info(f"Limpeza concluída: {deletados} logs e {perfis} relatórios de perfil removidos")
+        return {'deletados': deletados, 'relatorios_perfil': perfis}
 
     except Exception as e:
         logger.error(f"Erro na limpeza: {e}")
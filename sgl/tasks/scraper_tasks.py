@@ -6,7 +6,7 @@ Tasks:
   - scraping_manual: disparado pelo frontend
 """
 import logging
-from sgl.celery_app import celery
+from sgl.celery_app import celery, obter_app_flask
 
 logger = logging.getLogger(__name__)
 
@@ -25,59 +25,42 @@ def scraping_automatico(self, plataformas=None):
     logger.info("=== SCRAPING AUTOMÁTICO INICIADO ===")
 
     try:
-        from sgl.app import create_app
         from sgl.services.scraper_service import ScraperService
+        from sgl.services.planejador_scraping import planejar
         from sgl.models.database import FiltroProspeccao
 
-        app = create_app()
-        with app.app_context():
-            # Carregar filtros ativos para pegar termos de busca
-            filtros = FiltroProspeccao.query.filter_by(ativo=True).all()
-
-            service = ScraperService(plataformas=plataformas)
-
-            stats_total = {
-                'total_encontrados': 0,
-                'novos_salvos': 0,
-                'duplicados': 0,
-                'erros': 0,
-                'por_filtro': [],
-            }
-
-            if filtros:
-                # Executar scraping para cada filtro (termos de busca)
-                for filtro in filtros:
-                    termos = filtro.palavras_chave or []
-                    ufs = filtro.regioes_uf or [None]
-
-                    for termo in (termos or [None]):
-                        for uf in ufs[:3]:  # Limitar UFs por filtro
-                            try:
-                                stats = service.executar_scraping(
-                                    termo=termo,
-                                    uf=uf,
-                                    max_paginas=2,
-                                )
-                                stats_total['total_encontrados'] += stats['total_encontrados']
-                                stats_total['novos_salvos'] += stats['novos_salvos']
-                                stats_total['duplicados'] += stats['duplicados']
-                                stats_total['erros'] += stats['erros']
-                            except Exception as e:
-                                logger.error(f"Erro scraping termo={termo} uf={uf}: {e}")
-                                stats_total['erros'] += 1
-            else:
-                # Sem filtros: busca geral
-                stats = service.executar_scraping(max_paginas=3)
-                stats_total['total_encontrados'] = stats['total_encontrados']
-                stats_total['novos_salvos'] = stats['novos_salvos']
-                stats_total['duplicados'] = stats['duplicados']
-                stats_total['erros'] = stats['erros']
-
-            # Registrar log
-            _registrar_log(app, 'scraping_automatico', stats_total)
-
-            logger.info(f"=== SCRAPING AUTOMÁTICO CONCLUÍDO: {stats_total} ===")
-            return stats_total
+        app = obter_app_flask()
+        # Carregar filtros ativos para pegar termos de busca
+        filtros = FiltroProspeccao.query.filter_by(ativo=True).all()
+
+        service = ScraperService(plataformas=plataformas)
+
+        stats_total = {
+            'total_encontrados': 0,
+            'novos_salvos': 0,
+            'duplicados': 0,
+            'erros': 0,
+            'por_filtro': [],
+        }
+
+        if filtros:
+            # Um plano só (plataforma, termo, uf) para todos os filtros, sem consultas repetidas
+            plano, stats_plano = planejar(filtros, list(service.scrapers))
+            stats = service.executar_plano(plano, max_paginas=2)
+            stats_total['plano'] = stats_plano
+        else:
+            # Sem filtros: busca geral
+            stats = service.executar_scraping(max_paginas=3)
+        stats_total['total_encontrados'] = stats['total_encontrados']
+        stats_total['novos_salvos'] = stats['novos_salvos']
+        stats_total['duplicados'] = stats['duplicados']
+        stats_total['erros'] = stats['erros']
+
+        # Registrar log
+        _registrar_log(app, 'scraping_automatico', stats_total)
+
+        logger.info(f"=== SCRAPING AUTOMÁTICO CONCLUÍDO: {stats_total} ===")
+        return stats_total
 
     except Exception as exc:
         logger.error(f"Erro no scraping automático: {exc}")
@@ -95,19 +78,16 @@ def scraping_plataforma(self, plataforma, termo=None, uf=None, max_paginas=3):
     logger.info(f"=== SCRAPING {plataforma.upper()} ===")
 
     try:
-        from sgl.app import create_app
         from sgl.services.scraper_service import ScraperService
 
-        app = create_app()
-        with app.app_context():
-            service = ScraperService(plataformas=[plataforma])
-            stats = service.executar_scraping(
-                termo=termo,
-                uf=uf,
-                max_paginas=max_paginas,
-            )
-            logger.info(f"=== {plataforma.upper()} CONCLUÍDO: {stats} ===")
-            return stats
+        service = ScraperService(plataformas=[plataforma])
+        stats = service.executar_scraping(
+            termo=termo,
+            uf=uf,
+            max_paginas=max_paginas,
+        )
+        logger.info(f"=== {plataforma.upper()} CONCLUÍDO: {stats} ===")
+        return stats
 
     except Exception as exc:
         logger.error(f"Erro scraping {plataforma}: {exc}")
@@ -126,20 +106,18 @@ def scraping_manual(self, plataformas=None, termo=None, uf=None, max_paginas=3):
     logger.info(f"=== SCRAPING MANUAL: {plats} | termo={termo} | uf={uf} ===")
 
     try:
-        from sgl.app import create_app
         from sgl.services.scraper_service import ScraperService
 
-        app = create_app()
-        with app.app_context():
-            service = ScraperService(plataformas=plats)
-            stats = service.executar_scraping(
-                termo=termo,
-                uf=uf,
-                max_paginas=max_paginas,
-            )
-            _registrar_log(app, 'scraping_manual', stats)
-            logger.info(f"=== SCRAPING MANUAL CONCLUÍDO: {stats} ===")
-            return stats
+        app = obter_app_flask()
+        service = ScraperService(plataformas=plats)
+        stats = service.executar_scraping(
+            termo=termo,
+            uf=uf,
+            max_paginas=max_paginas,
+        )
+        _registrar_log(app, 'scraping_manual', stats)
+        logger.info(f"=== SCRAPING MANUAL CONCLUÍDO: {stats} ===")
+        return stats
 
     except Exception as exc:
         logger.error(f"Erro scraping manual: {exc}")
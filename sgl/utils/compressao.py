@@ -0,0 +1,74 @@
+"""
+SGL - Compressão das respostas HTTP (gzip / Brotli)
+
+Middleware `after_request` que comprime respostas textuais (JSON, HTML, CSV)
+acima de um tamanho mínimo, conforme o Accept-Encoding do cliente.
+Brotli é usado quando o pacote `brotli` estiver instalado e o cliente aceitar;
+caso contrário, gzip (stdlib).
+
+Configuração (settings.py):
+    COMPRESS_MIN_SIZE   - bytes mínimos para comprimir (default 1024)
+    COMPRESS_LEVEL      - nível gzip 1-9 (default 6)
+    COMPRESS_BR_QUALITY - qualidade Brotli 0-11 (default 5)
+    COMPRESS_MIMETYPES  - mimetypes elegíveis
+"""
+import gzip
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende do ambiente
+    brotli = None
+
+MIMETYPES_PADRAO = ('application/json', 'text/html', 'text/plain', 'text/csv', 'text/css',
+                    'application/javascript', 'text/event-stream')
+
+
+def _escolher_encoding(accept_encoding):
+    """Retorna 'br', 'gzip' ou None conforme o Accept-Encoding."""
+    if brotli is not None and accept_encoding['br']:
+        return 'br'
+    if accept_encoding['gzip']:
+        return 'gzip'
+    return None
+
+
+def init_compressao(app):
+    """Registra o middleware de compressão no app Flask."""
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    nivel = app.config.get('COMPRESS_LEVEL', 6)
+    qualidade_br = app.config.get('COMPRESS_BR_QUALITY', 5)
+    mimetypes = set(app.config.get('COMPRESS_MIMETYPES', MIMETYPES_PADRAO))
+    # SSE é streaming — nunca bufferizar para comprimir
+    mimetypes.discard('text/event-stream')
+
+    @app.after_request
+    def comprimir_resposta(response):
+        from flask import request
+
+        if (
+            response.direct_passthrough
+            or response.is_streamed
+            or not 200 <= response.status_code < 300
+            or response.mimetype not in mimetypes
+            or 'Content-Encoding' in response.headers
+        ):
+            return response
+
+        encoding = _escolher_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        corpo = response.get_data()
+        if len(corpo) < min_size:
+            return response
+
+        if encoding == 'br':
+            comprimido = brotli.compress(corpo, quality=qualidade_br)
+        else:
+            comprimido = gzip.compress(corpo, compresslevel=nivel)
+
+        response.set_data(comprimido)
+        response.headers['Content-Encoding'] = encoding
+        response.headers['Content-Length'] = str(len(comprimido))
+        response.vary.add('Accept-Encoding')
+        return response
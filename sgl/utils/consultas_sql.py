@@ -0,0 +1,220 @@
+"""
+SGL - Contagem de statements SQL e log de consultas lentas
+
+Listeners before/after_cursor_execute em todos os engines, ligados uma
+vez por processo, que dão visibilidade de banco em produção sem o
+SQLALCHEMY_ECHO (tudo ou nada):
+
+  - requests: statements e tempo de banco em cada resposta (headers
+    X-DB-Queries e X-DB-Time, em ms) e no contador
+    sgl_sql_statements_total{rota};
+  - jobs (FlaskTask do Celery, jobs do APScheduler com @job_contabilizado):
+    uma linha de log no fim com statements e tempo de banco, e o mesmo
+    contador com o label job;
+  - request ou job com mais de SQL_ALERTA_STATEMENTS statements gera um
+    WARNING com os statements mais repetidos (o padrão N+1);
+  - cada statement entra no histograma sgl_sql_segundos e, portanto, no
+    detalhamento stats['tempos']['sql'] das captações e do scraping;
+  - statement acima de SQL_LENTA_MS vai para o log em WARNING com os
+    parâmetros reduzidos a uma impressão (tipos + hash curto dos valores):
+    CNPJs, e-mails e tokens não aparecem no log.
+
+Orçamento de statements (no lugar de testes, que o repositório não tem):
+
+    with orcamento_sql(5, 'GET /api/editais'):
+        ...                              # OrcamentoSQLExcedido se passar de 5
+
+benchmarks/orcamento_sql.py aplica um orçamento por endpoint da API.
+"""
+import contextvars
+import functools
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from . import metricas
+
+logger = logging.getLogger(__name__)
+
+SQL_LENTA_MS = float(os.environ.get('SQL_LENTA_MS', 500))
+SQL_ALERTA_STATEMENTS = int(os.environ.get('SQL_ALERTA_STATEMENTS', 100))
+TAMANHO_SQL_LOG = 500
+
+# Contagens em andamento neste contexto (request, job, orçamento)
+_contagens = contextvars.ContextVar('sgl_sql_contagens', default=())
+_instalado = False
+_instalar_lock = threading.Lock()
+
+
+class OrcamentoSQLExcedido(AssertionError):
+    """O bloco executou mais statements do que o orçamento."""
+
+
+class ContagemSQL:
+    """Statements e tempo de banco de uma rotina; textos guardados só se `guardar`."""
+
+    def __init__(self, alvo, guardar=False):
+        self.alvo = alvo
+        self.statements = 0
+        self.segundos = 0.0
+        self.textos = Counter() if guardar else None
+
+    @property
+    def ms(self):
+        return self.segundos * 1000
+
+    def mais_repetidos(self, n=3):
+        return [(_resumir_sql(sql, 200), vezes) for sql, vezes in (self.textos or Counter()).most_common(n)]
+
+
+def _resumir_sql(statement, tamanho=TAMANHO_SQL_LOG):
+    return re.sub(r'\s+', ' ', statement).strip()[:tamanho]
+
+
+def impressao_parametros(parameters, executemany=False):
+    """Tipos dos parâmetros + hash curto dos valores — agrupa execuções sem expor dados."""
+    amostra = (parameters[0] if parameters else ()) if executemany else parameters
+    if isinstance(amostra, dict):
+        tipos = ', '.join(f'{k}:{type(v).__name__}' for k, v in amostra.items())
+    else:
+        tipos = ', '.join(type(v).__name__ for v in amostra or ())
+    digest = hashlib.sha1(repr(parameters).encode('utf-8', 'replace')).hexdigest()[:12]
+    linhas = f' x{len(parameters)} linhas' if executemany else ''
+    return f'({tipos}) #{digest}{linhas}'
+
+
+# ============================================================
+# LISTENERS
+# ============================================================
+
+def _antes_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._sgl_sql_inicio = time.perf_counter()
+
+
+def _depois_execute(conn, cursor, statement, parameters, context, executemany):
+    inicio = getattr(context, '_sgl_sql_inicio', None)
+    if inicio is None:
+        return
+    segundos = time.perf_counter() - inicio
+    for contagem in _contagens.get():
+        contagem.statements += 1
+        contagem.segundos += segundos
+        if contagem.textos is not None:
+            contagem.textos[statement] += 1
+    metricas.observar('sql', segundos)
+    if segundos * 1000 >= SQL_LENTA_MS:
+        logger.warning("SQL lento (%.0f ms): %s | parâmetros %s", segundos * 1000,
+                       _resumir_sql(statement), impressao_parametros(parameters, executemany))
+
+
+def instalar():
+    """Liga os listeners em todos os engines (idempotente)."""
+    global _instalado
+    with _instalar_lock:
+        if not _instalado:
+            event.listen(Engine, 'before_cursor_execute', _antes_execute)
+            event.listen(Engine, 'after_cursor_execute', _depois_execute)
+            _instalado = True
+
+
+# ============================================================
+# CONTAGEM POR ROTINA
+# ============================================================
+
+@contextmanager
+def contagem_sql(alvo, guardar=False):
+    """Conta os statements executados neste contexto até o fim do bloco."""
+    instalar()
+    contagem = ContagemSQL(alvo, guardar)
+    token = _contagens.set(_contagens.get() + (contagem,))
+    try:
+        yield contagem
+    finally:
+        _contagens.reset(token)
+
+
+def _alertar_excesso(contagem, origem):
+    if contagem.statements > SQL_ALERTA_STATEMENTS:
+        logger.warning("%s %s executou %d statements (%.0f ms de banco); mais repetidos: %s",
+                       origem, contagem.alvo, contagem.statements, contagem.ms,
+                       contagem.mais_repetidos())
+
+
+@contextmanager
+def contagem_job(alvo):
+    """Contagem de um job: log no fim, contador por job e alerta acima do limite."""
+    with contagem_sql(alvo, guardar=True) as contagem:
+        try:
+            yield contagem
+        finally:
+            metricas.incrementar('sql_statements', contagem.statements, job=alvo)
+            logger.info("Job %s: %d statements, %.0f ms de banco", alvo, contagem.statements, contagem.ms)
+            _alertar_excesso(contagem, 'Job')
+
+
+def job_contabilizado(funcao):
+    """Decorator dos jobs do APScheduler: contagem_job com o nome da função."""
+    @functools.wraps(funcao)
+    def wrapper(*args, **kwargs):
+        with contagem_job(funcao.__name__.lstrip('_')):
+            return funcao(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def orcamento_sql(maximo, descricao=''):
+    """Levanta OrcamentoSQLExcedido se o bloco executar mais de `maximo` statements."""
+    with contagem_sql(descricao, guardar=True) as contagem:
+        yield contagem
+    if contagem.statements > maximo:
+        raise OrcamentoSQLExcedido(
+            f"{descricao or 'bloco'}: {contagem.statements} statements (orçamento {maximo}); "
+            f"mais repetidos: {contagem.mais_repetidos()}")
+
+
+# ============================================================
+# REQUESTS
+# ============================================================
+
+def init_consultas_sql(app):
+    """Liga os listeners e registra a contagem por request (headers X-DB-*)."""
+    from flask import g, request
+
+    instalar()
+
+    @app.before_request
+    def iniciar_contagem_sql():
+        contagem = ContagemSQL(f'{request.method} {request.path}', guardar=True)
+        g.sgl_sql = contagem
+        g.sgl_sql_token = _contagens.set(_contagens.get() + (contagem,))
+
+    @app.after_request
+    def headers_contagem_sql(response):
+        contagem = g.get('sgl_sql')
+        if contagem is None:
+            return response
+        response.headers['X-DB-Queries'] = str(contagem.statements)
+        response.headers['X-DB-Time'] = f'{contagem.ms:.1f}'
+        rota = request.url_rule.rule if request.url_rule else 'sem_rota'
+        metricas.incrementar('sql_statements', contagem.statements, rota=rota)
+        _alertar_excesso(contagem, 'Request')
+        return response
+
+    @app.teardown_request
+    def encerrar_contagem_sql(exc):
+        token = g.pop('sgl_sql_token', None)
+        if token is None:
+            return
+        try:
+            _contagens.reset(token)
+        except ValueError:  # encerrado em outro contexto (resposta em streaming)
+            _contagens.set(())
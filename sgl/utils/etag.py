@@ -0,0 +1,78 @@
+"""
+SGL - ETags fracas por carimbo de versão
+
+Em vez de serializar a resposta para calcular o hash do corpo, o ETag é
+derivado de um carimbo barato do banco (max(updated_at) + count das tabelas
+envolvidas) combinado com os parâmetros da requisição (filtros, página,
+fields...). Polls sem mudança recebem 304 Not Modified sem executar a
+consulta da listagem nem transferir o corpo.
+"""
+import hashlib
+from functools import wraps
+
+from flask import request, make_response
+from sqlalchemy import text
+
+from ..models.database import db
+
+# Carimbos por recurso: 1 SELECT com subqueries escalares. max() lê a ponta dos
+# índices em updated_at/data_triagem/id (add_indices_etag.py); count(*) usa
+# index-only scan nos mesmos índices.
+_CARIMBOS = {
+    'editais': """
+        SELECT (SELECT max(updated_at) FROM editais),
+               (SELECT count(*) FROM editais)
+    """,
+    'triagem': """
+        SELECT (SELECT max(updated_at) FROM editais),
+               (SELECT count(*) FROM editais),
+               (SELECT max(data_triagem) FROM triagens),
+               (SELECT count(*) FROM triagens),
+               (SELECT max(id) FROM edital_filtro_match),
+               (SELECT count(*) FROM edital_filtro_match)
+    """,
+    'dashboard': """
+        SELECT (SELECT max(updated_at) FROM editais),
+               (SELECT count(*) FROM editais),
+               (SELECT max(updated_at) FROM processos),
+               (SELECT count(*) FROM processos),
+               (SELECT max(updated_at) FROM fornecedores),
+               (SELECT count(*) FROM fornecedores)
+    """,
+}
+
+
+def carimbo_versao(recurso):
+    """Retorna a tupla-carimbo do recurso (muda sempre que os dados mudam)."""
+    return tuple(db.session.execute(text(_CARIMBOS[recurso])).one())
+
+
+def calcular_etag(recurso, carimbo, args):
+    """Hash curto de recurso + carimbo + parâmetros ordenados da query string."""
+    filtros = '&'.join(f'{k}={v}' for k, v in sorted(args.items(multi=True)))
+    base = f'{recurso}|{carimbo!r}|{filtros}'
+    return hashlib.sha1(base.encode('utf-8')).hexdigest()[:20]
+
+
+def etag_versionado(recurso):
+    """
+    Decorator para endpoints GET: responde 304 se o If-None-Match bater com
+    o ETag fraco calculado a partir do carimbo de versão do recurso.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = calcular_etag(recurso, carimbo_versao(recurso), request.args)
+
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+                response.set_etag(etag, weak=True)
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag, weak=True)
+                response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,291 @@
+"""
+SGL - Barramento de eventos de progresso (SSE)
+
+Rotinas longas publicam eventos em canais:
+  - captacao:<execucao_id>  página buscada, edital inserido, fonte concluída...
+  - edital:<edital_id>      arquivo baixado, itens extraídos, planilha enviada...
+
+e os endpoints SSE (`text/event-stream`) repassam esses eventos ao
+frontend em tempo real, sem polling no banco.
+
+Backends:
+  - Redis pub/sub (EVENTOS_REDIS_URL ou REDIS_URL): funciona entre workers
+    do gunicorn — quem publica e quem assina podem estar em processos
+    diferentes. Histórico curto por canal em uma lista (LTRIM + EXPIRE).
+  - Em memória (fallback): filas por assinante, válido só dentro do
+    processo (dev / worker único).
+
+Cada evento recebe um id sequencial por canal; o cliente que reconecta
+com Last-Event-ID recebe o que perdeu (dentro do histórico).
+
+Autenticação: EventSource não envia headers, e o access token de sessão
+não vai para a URL (logs de proxy, histórico). O cliente troca o access
+token por um token curto (EVENTOS_TOKEN_TTL_SEG), assinado com outro salt
+e aceito só pelas rotas SSE (?token=), em POST /auth/token-eventos.
+
+Instalação (opcional): pip install redis
+"""
+import functools
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+
+from flask import Response, current_app, jsonify, request, stream_with_context
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
+from .serializacao import dumps
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - depende do ambiente
+    redis = None
+
+EVENTOS_HISTORICO = 200          # eventos guardados por canal (replay no reconnect)
+EVENTOS_TTL_SEG = 6 * 3600       # canal sem eventos expira (Redis e memória)
+EVENTOS_LIMPEZA_SEG = 60         # intervalo mínimo entre varreduras de canais ociosos (memória)
+EVENTOS_KEEPALIVE_SEG = 15       # comentário SSE para manter proxies com a conexão aberta
+EVENTOS_SSE_MAX_SEG = int(os.environ.get('EVENTOS_SSE_MAX_SEG', 600))  # cliente reconecta depois
+EVENTOS_TOKEN_TTL_SEG = 60       # validade do token de eventos para abrir/reabrir o stream
+
+
+# ============================================================
+# BACKENDS
+# ============================================================
+
+class _BarramentoMemoria:
+    """
+    Pub/sub em memória (um processo). Canais sem eventos há mais de
+    EVENTOS_TTL_SEG e sem assinantes são descartados, como o EXPIRE do Redis.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._assinantes = defaultdict(set)
+        self._historico = {}
+        self._seq = {}
+        self._ultimo_evento = {}   # canal → time.monotonic() do último publicar()
+        self._limpo_em = time.monotonic()
+
+    def publicar(self, canal, evento):
+        with self._lock:
+            agora = time.monotonic()
+            self._seq[canal] = self._seq.get(canal, 0) + 1
+            evento['id'] = self._seq[canal]
+            if canal not in self._historico:
+                self._historico[canal] = deque(maxlen=EVENTOS_HISTORICO)
+            self._historico[canal].append(evento)
+            self._ultimo_evento[canal] = agora
+            assinantes = list(self._assinantes.get(canal, ()))
+            if agora - self._limpo_em > EVENTOS_LIMPEZA_SEG:
+                self._expirar(agora)
+        for fila in assinantes:
+            try:
+                fila.put_nowait(evento)
+            except queue.Full:
+                pass  # assinante lento perde eventos intermediários
+        return evento
+
+    def assinar(self, canal, desde=0, timeout=EVENTOS_KEEPALIVE_SEG):
+        fila = queue.Queue(maxsize=1000)
+        with self._lock:
+            self._assinantes[canal].add(fila)
+            pendentes = [e for e in self._historico.get(canal, ()) if e['id'] > desde]
+        try:
+            yield from pendentes
+            while True:
+                try:
+                    yield fila.get(timeout=timeout)
+                except queue.Empty:
+                    yield None
+        finally:
+            with self._lock:
+                assinantes = self._assinantes.get(canal)
+                if assinantes is not None:
+                    assinantes.discard(fila)
+                    if not assinantes:
+                        del self._assinantes[canal]
+
+    def _expirar(self, agora):
+        """Descarta histórico e sequência dos canais ociosos (chamado com o lock)."""
+        self._limpo_em = agora
+        ociosos = [canal for canal, ts in self._ultimo_evento.items()
+                   if agora - ts > EVENTOS_TTL_SEG and canal not in self._assinantes]
+        for canal in ociosos:
+            del self._ultimo_evento[canal]
+            self._historico.pop(canal, None)
+            self._seq.pop(canal, None)
+
+
+class _BarramentoRedis:
+    """Pub/sub no Redis (entre processos)."""
+
+    def __init__(self, url):
+        self._redis = redis.Redis.from_url(url)
+
+    @staticmethod
+    def _chave(canal, sufixo):
+        return f'sgl:eventos:{canal}:{sufixo}'
+
+    def publicar(self, canal, evento):
+        evento['id'] = self._redis.incr(self._chave(canal, 'seq'))
+        payload = dumps(evento)
+        historico = self._chave(canal, 'hist')
+        pipe = self._redis.pipeline()
+        pipe.rpush(historico, payload)
+        pipe.ltrim(historico, -EVENTOS_HISTORICO, -1)
+        pipe.expire(historico, EVENTOS_TTL_SEG)
+        pipe.expire(self._chave(canal, 'seq'), EVENTOS_TTL_SEG)
+        pipe.publish(self._chave(canal, 'pub'), payload)
+        pipe.execute()
+        return evento
+
+    def assinar(self, canal, desde=0, timeout=EVENTOS_KEEPALIVE_SEG):
+        import json
+
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self._chave(canal, 'pub'))  # antes do histórico: nada se perde no meio
+        try:
+            ultimo = desde
+            for payload in self._redis.lrange(self._chave(canal, 'hist'), 0, -1):
+                evento = json.loads(payload)
+                if evento['id'] > ultimo:
+                    ultimo = evento['id']
+                    yield evento
+            while True:
+                mensagem = pubsub.get_message(timeout=timeout)
+                if mensagem is None:
+                    yield None
+                    continue
+                evento = json.loads(mensagem['data'])
+                if evento['id'] > ultimo:
+                    ultimo = evento['id']
+                    yield evento
+        finally:
+            pubsub.close()
+
+
+def _criar_barramento():
+    url = os.environ.get('EVENTOS_REDIS_URL') or os.environ.get('REDIS_URL')
+    if url and redis is not None:
+        try:
+            barramento = _BarramentoRedis(url)
+            barramento._redis.ping()
+            logger.info("Barramento de eventos: Redis (%s)", url.rsplit('@', 1)[-1])
+            return barramento
+        except Exception as e:
+            logger.warning("Barramento de eventos: Redis indisponível (%s), usando memória", e)
+    return _BarramentoMemoria()
+
+
+_barramento = None
+_barramento_lock = threading.Lock()
+
+
+def obter_barramento():
+    global _barramento
+    if _barramento is None:
+        with _barramento_lock:
+            if _barramento is None:
+                _barramento = _criar_barramento()
+    return _barramento
+
+
+# ============================================================
+# API
+# ============================================================
+
+def publicar(canal, tipo, **dados):
+    """
+    Publica um evento no canal. Nunca levanta exceção: progresso é
+    acessório e não pode derrubar a rotina que o publica.
+    """
+    try:
+        return obter_barramento().publicar(canal, {'tipo': tipo, 'ts': time.time(), 'dados': dados})
+    except Exception as e:
+        logger.warning("Erro ao publicar evento %s em %s: %s", tipo, canal, e)
+        return None
+
+
+def canal_captacao(execucao_id):
+    return f'captacao:{execucao_id}'
+
+
+def canal_edital(edital_id):
+    return f'edital:{edital_id}'
+
+
+def formatar_sse(evento):
+    """Serializa um evento no formato de mensagem SSE."""
+    return f"id: {evento.get('id', 0)}\nevent: {evento['tipo']}\ndata: {dumps(evento).decode()}\n\n"
+
+
+def resposta_sse(canal, ultimo_id=0, tipos_finais=(), eventos=None):
+    """
+    Response `text/event-stream` com os eventos do canal.
+
+    Args:
+        ultimo_id: Last-Event-ID do cliente (replay do que ele perdeu)
+        tipos_finais: tipos de evento que encerram o stream (ex.: 'concluida')
+        eventos: iterável de eventos a enviar no lugar da assinatura do canal
+                 (ex.: execução já concluída em outro worker)
+    """
+    def gerar():
+        yield 'retry: 3000\n\n'
+        limite = time.monotonic() + EVENTOS_SSE_MAX_SEG
+        fonte = eventos if eventos is not None else obter_barramento().assinar(canal, desde=ultimo_id)
+        for evento in fonte:
+            if evento is None:
+                yield ': keepalive\n\n'
+            else:
+                yield formatar_sse(evento)
+                if evento['tipo'] in tipos_finais:
+                    return
+            if time.monotonic() > limite:
+                return
+
+    return Response(
+        stream_with_context(gerar()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+# ============================================================
+# AUTENTICAÇÃO DOS STREAMS
+# ============================================================
+
+def _serializador_token():
+    return URLSafeTimedSerializer(current_app.config['JWT_SECRET_KEY'], salt='sgl-eventos')
+
+
+def criar_token_eventos(usuario_id):
+    """Token curto, só para abrir streams SSE (não serve como access token)."""
+    return _serializador_token().dumps({'usuario': str(usuario_id)})
+
+
+def token_eventos_requerido(view):
+    """
+    Decorator das rotas SSE: aceita ?token= de criar_token_eventos() ou,
+    para clientes que enviam headers, o JWT normal no Authorization.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        from flask_jwt_extended import verify_jwt_in_request
+
+        token = request.args.get('token')
+        if not token:
+            verify_jwt_in_request(locations=['headers'])
+            return view(*args, **kwargs)
+        try:
+            _serializador_token().loads(token, max_age=EVENTOS_TOKEN_TTL_SEG)
+        except SignatureExpired:
+            return jsonify({'error': 'Token de eventos expirado'}), 401
+        except BadSignature:
+            return jsonify({'error': 'Token de eventos inválido'}), 401
+        return view(*args, **kwargs)
+    return wrapper
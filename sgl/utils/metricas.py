@@ -0,0 +1,294 @@
+"""
+SGL - Métricas de tempo dos caminhos quentes (formato Prometheus)
+
+Instrumentação leve para saber onde uma captação gasta o tempo (HTTP,
+decodificação JSON, filtros, deduplicação, commits, PDF, AI, Dropbox,
+planilhas):
+
+    with metricas.cronometro('pncp_http', endpoint='/contratacoes/publicacao'):
+        ...
+
+    @metricas.cronometrado('dropbox_upload')
+    def upload_arquivo(...): ...
+
+    metricas.incrementar('captacao_contratacoes', resultado='novos_salvos')
+
+cronometro/cronometrado alimentam um histograma sgl_<nome>_segundos;
+incrementar, um contador sgl_<nome>_total. GET /metrics expõe tudo no
+formato texto do Prometheus.
+
+Detalhamento por execução: rotinas decoradas com @execucao_medida (as
+captações de cada fonte e o scraping) devolvem stats['tempos'] com
+chamadas e segundos por métrica durante aquela execução — e os stats já
+vão para LogAtividade.detalhes. Os tempos são inclusivos (o de
+captacao_contratacao contém o de captacao_filtros).
+
+Agregação entre processos: com METRICAS_REDIS_URL (ou REDIS_URL), cada
+processo (workers do gunicorn, Celery) soma seus incrementos em um hash
+do Redis a cada METRICAS_FLUSH_SEG segundos e ao fim de cada execução, e
+/metrics lê o total de lá. Sem Redis, /metrics mostra só o processo que
+atendeu o request.
+"""
+import bisect
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - depende do ambiente
+    redis = None
+
+PREFIXO = 'sgl_'
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+METRICAS_FLUSH_SEG = int(os.environ.get('METRICAS_FLUSH_SEG', 10))
+_CHAVE_REDIS = 'sgl:metricas'
+
+# Detalhamentos das execuções em andamento neste contexto (thread / task asyncio)
+_execucoes = contextvars.ContextVar('sgl_metricas_execucoes', default=())
+
+
+# ============================================================
+# REGISTRO
+# ============================================================
+# Cada série é (família, labels, campo) → float. Contador: campo 'total'.
+# Histograma: campo = índice do bucket (contagem não cumulativa; +Inf é
+# len(BUCKETS)), 'sum' e 'count'.
+
+class _Registro:
+    """Séries deste processo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._valores = defaultdict(float)
+
+    def somar(self, itens):
+        with self._lock:
+            for chave, valor in itens:
+                self._valores[chave] += valor
+
+    def descarregar(self):
+        pass
+
+    def valores(self):
+        with self._lock:
+            return dict(self._valores)
+
+
+class _RegistroRedis(_Registro):
+    """Séries deste processo + incrementos pendentes somados no Redis (HINCRBYFLOAT)."""
+
+    def __init__(self, url):
+        super().__init__()
+        self._redis = redis.Redis.from_url(url)
+        self._pendentes = defaultdict(float)
+        self._ultimo_flush = time.monotonic()
+
+    def somar(self, itens):
+        with self._lock:
+            for chave, valor in itens:
+                self._valores[chave] += valor
+                self._pendentes[chave] += valor
+            vencido = time.monotonic() - self._ultimo_flush >= METRICAS_FLUSH_SEG
+        if vencido:
+            self.descarregar()
+
+    def descarregar(self):
+        with self._lock:
+            pendentes, self._pendentes = self._pendentes, defaultdict(float)
+            self._ultimo_flush = time.monotonic()
+        if not pendentes:
+            return
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            for (familia, labels, campo), valor in pendentes.items():
+                pipe.hincrbyfloat(_CHAVE_REDIS, json.dumps([familia, labels, campo]), valor)
+            pipe.execute()
+        except Exception as e:
+            logger.warning("Métricas: erro ao enviar ao Redis (%s); mantidas para o próximo envio", e)
+            with self._lock:
+                for chave, valor in pendentes.items():
+                    self._pendentes[chave] += valor
+
+    def valores(self):
+        self.descarregar()
+        try:
+            brutos = self._redis.hgetall(_CHAVE_REDIS)
+        except Exception as e:
+            logger.warning("Métricas: Redis indisponível (%s), exibindo só este processo", e)
+            return super().valores()
+        valores = {}
+        for campo, valor in brutos.items():
+            familia, labels, serie = json.loads(campo)
+            valores[(familia, tuple(map(tuple, labels)), serie)] = float(valor)
+        return valores
+
+
+def _criar_registro():
+    url = os.environ.get('METRICAS_REDIS_URL') or os.environ.get('REDIS_URL')
+    if url and redis is not None:
+        try:
+            registro = _RegistroRedis(url)
+            registro._redis.ping()
+            logger.info("Métricas: agregadas no Redis (%s)", url.rsplit('@', 1)[-1])
+            return registro
+        except Exception as e:
+            logger.warning("Métricas: Redis indisponível (%s), usando memória do processo", e)
+    return _Registro()
+
+
+_registro = None
+_registro_lock = threading.Lock()
+
+
+def obter_registro():
+    global _registro
+    if _registro is None:
+        with _registro_lock:
+            if _registro is None:
+                _registro = _criar_registro()
+    return _registro
+
+
+# ============================================================
+# API
+# ============================================================
+
+def _labels(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def incrementar(nome, valor=1, **labels):
+    """Soma `valor` ao contador sgl_<nome>_total."""
+    obter_registro().somar([((f'{PREFIXO}{nome}_total', _labels(labels), 'total'), valor)])
+
+
+def observar(nome, segundos, **labels):
+    """Registra uma duração no histograma sgl_<nome>_segundos (e nas execuções em andamento)."""
+    chave = (f'{PREFIXO}{nome}_segundos', _labels(labels))
+    obter_registro().somar([
+        (chave + (bisect.bisect_left(BUCKETS, segundos),), 1),
+        (chave + ('sum',), segundos),
+        (chave + ('count',), 1),
+    ])
+    for tempos in _execucoes.get():
+        item = tempos.setdefault(nome, [0, 0.0])
+        item[0] += 1
+        item[1] += segundos
+
+
+@contextmanager
+def cronometro(nome, **labels):
+    """Mede o bloco (inclusive quando levanta exceção) em sgl_<nome>_segundos."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        observar(nome, time.perf_counter() - inicio, **labels)
+
+
+def cronometrado(nome, **labels):
+    """Decorator: mede cada chamada da função em sgl_<nome>_segundos."""
+    def decorator(funcao):
+        @functools.wraps(funcao)
+        def wrapper(*args, **kwargs):
+            with cronometro(nome, **labels):
+                return funcao(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def execucao():
+    """
+    Detalhamento da rotina em andamento: dict {métrica: [chamadas, segundos]}
+    preenchido por tudo que for medido neste contexto até o fim do bloco.
+    """
+    tempos = {}
+    token = _execucoes.set(_execucoes.get() + (tempos,))
+    try:
+        yield tempos
+    finally:
+        _execucoes.reset(token)
+        obter_registro().descarregar()
+
+
+def resumir(tempos):
+    """Detalhamento ordenado pelo tempo: {métrica: {chamadas, segundos}}."""
+    return {
+        nome: {'chamadas': chamadas, 'segundos': round(segundos, 3)}
+        for nome, (chamadas, segundos) in sorted(tempos.items(), key=lambda i: -i[1][1])
+    }
+
+
+def execucao_medida(nome, **labels):
+    """
+    Decorator para rotinas que devolvem um dict de stats (captações, scraping):
+    mede a execução inteira em sgl_<nome>_segundos e inclui stats['tempos'].
+    """
+    def decorator(funcao):
+        @functools.wraps(funcao)
+        def wrapper(*args, **kwargs):
+            with execucao() as tempos, cronometro(nome, **labels):
+                stats = funcao(*args, **kwargs)
+            if isinstance(stats, dict):
+                stats['tempos'] = resumir(tempos)
+            return stats
+        return wrapper
+    return decorator
+
+
+# ============================================================
+# EXPOSIÇÃO (formato texto do Prometheus 0.0.4)
+# ============================================================
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escapar(valor):
+    return valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _fmt_labels(labels, extra=()):
+    pares = list(labels) + list(extra)
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{k}="{_escapar(v)}"' for k, v in pares) + '}'
+
+
+def _fmt_valor(valor):
+    return str(int(valor)) if float(valor).is_integer() else repr(valor)
+
+
+def exposicao():
+    """Texto do GET /metrics."""
+    familias = defaultdict(lambda: defaultdict(dict))
+    for (familia, labels, campo), valor in obter_registro().valores().items():
+        familias[familia][labels][campo] = valor
+
+    linhas = []
+    for familia in sorted(familias):
+        series = familias[familia]
+        histograma = familia.endswith('_segundos')
+        linhas.append(f'# TYPE {familia} {"histogram" if histograma else "counter"}')
+        for labels in sorted(series):
+            campos = series[labels]
+            if not histograma:
+                linhas.append(f'{familia}{_fmt_labels(labels)} {_fmt_valor(campos.get("total", 0))}')
+                continue
+            acumulado = 0
+            for i, limite in enumerate(BUCKETS + (float('inf'),)):
+                acumulado += campos.get(i, 0)
+                le = '+Inf' if limite == float('inf') else repr(float(limite))
+                linhas.append(f'{familia}_bucket{_fmt_labels(labels, [("le", le)])} {_fmt_valor(acumulado)}')
+            linhas.append(f'{familia}_sum{_fmt_labels(labels)} {_fmt_valor(campos.get("sum", 0))}')
+            linhas.append(f'{familia}_count{_fmt_labels(labels)} {_fmt_valor(campos.get("count", 0))}')
+    return '\n'.join(linhas) + '\n'
@@ -0,0 +1,315 @@
+"""
+SGL - Perfilamento sob demanda de requests e jobs
+
+Quando um endpoint (ex.: /api/editais) ou um job agendado fica lento em
+produção, um admin perfila só aquela execução, sem redeploy:
+
+  - request: header `X-SGL-Perfil: 1` ou query `?_perfil=1`, com o JWT de
+    um usuário admin (os demais recebem 403). A resposta traz o header
+    X-SGL-Perfil-Id com o id do relatório.
+  - job do APScheduler: POST /api/admin/perfis/jobs/<job_id> roda o job
+    uma vez com perfilar=<job_id> (funções decoradas com @perfilavel).
+  - task Celery: kwarg perfilar=True, consumido pela FlaskTask:
+        captacao_manual.apply_async(kwargs={'perfilar': True})
+
+Cada execução perfilada grava um RelatorioPerfil com:
+  - o perfil de CPU: pyinstrument (HTML) quando instalado, senão cProfile
+    (texto do pstats ordenado por tempo acumulado);
+  - os statements SQL (eventos before/after_cursor_execute do SQLAlchemy)
+    agrupados pelo texto, com chamadas e tempo total/máximo.
+Lista em GET /api/admin/perfis; download em /api/admin/perfis/<id>/download.
+
+Custo desligado: os listeners do SQLAlchemy só ficam registrados enquanto
+houver uma sessão de perfilamento ativa no processo; sem o header/kwarg o
+request paga a leitura de um header e o job, um kwargs.pop. O perfil de
+CPU cobre a thread que iniciou a sessão (e as tasks asyncio dela, no
+pyinstrument); o SQL, o contexto dela (contextvars) — threads de pools
+criadas pela rotina ficam de fora. Respostas em streaming (SSE) são
+perfiladas até a montagem da resposta.
+"""
+import contextvars
+import cProfile
+import functools
+import io
+import logging
+import pstats
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+
+from sqlalchemy import event, insert
+from sqlalchemy.engine import Engine
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # pragma: no cover - depende do ambiente
+    Profiler = None
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'X-SGL-Perfil'
+PARAMETRO = '_perfil'
+MAX_GRUPOS_SQL = 200       # grupos de statements guardados (os de maior tempo total)
+MAX_TAMANHO_SQL = 2000     # caracteres do texto de cada statement
+LINHAS_PSTATS = 80
+
+_sessao_atual = contextvars.ContextVar('sgl_perfil_sessao', default=None)
+_ouvintes_lock = threading.Lock()
+_sessoes_ativas = 0
+
+
+# ============================================================
+# SQL (listeners ligados só com sessão ativa)
+# ============================================================
+
+def _antes_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _sessao_atual.get() is not None:
+        context._sgl_perfil_inicio = time.perf_counter()
+
+
+def _depois_execute(conn, cursor, statement, parameters, context, executemany):
+    sessao = _sessao_atual.get()
+    inicio = getattr(context, '_sgl_perfil_inicio', None)
+    if sessao is not None and inicio is not None:
+        sessao.registrar_sql(statement, time.perf_counter() - inicio)
+
+
+def _ligar_ouvintes():
+    global _sessoes_ativas
+    with _ouvintes_lock:
+        _sessoes_ativas += 1
+        if _sessoes_ativas == 1:
+            event.listen(Engine, 'before_cursor_execute', _antes_execute)
+            event.listen(Engine, 'after_cursor_execute', _depois_execute)
+
+
+def _desligar_ouvintes():
+    global _sessoes_ativas
+    with _ouvintes_lock:
+        _sessoes_ativas -= 1
+        if _sessoes_ativas == 0:
+            event.remove(Engine, 'before_cursor_execute', _antes_execute)
+            event.remove(Engine, 'after_cursor_execute', _depois_execute)
+
+
+# ============================================================
+# SESSÃO
+# ============================================================
+
+class SessaoPerfil:
+    """Uma execução perfilada: CPU da thread atual + SQL do contexto atual."""
+
+    def __init__(self, origem, alvo, usuario_id=None):
+        self.origem = origem          # request, job
+        self.alvo = alvo              # 'GET /api/editais', id do job, nome da task
+        self.usuario_id = usuario_id
+        self.id = None                # RelatorioPerfil gravado
+        self.perfilador = None
+        self.duracao = 0.0
+        self.sql = {}                 # statement → [chamadas, segundos, máximo]
+        self.sql_total = 0
+        self.sql_segundos = 0.0
+        self._lock = threading.Lock()
+        self._cpu = None
+        self._token = None
+        self._inicio = None
+        self._ativa = False
+
+    def iniciar(self):
+        try:
+            if Profiler is not None:
+                self._cpu = Profiler()
+                self._cpu.start()
+                self.perfilador = 'pyinstrument'
+            else:
+                self._cpu = cProfile.Profile()
+                self._cpu.enable()
+                self.perfilador = 'cprofile'
+        except (RuntimeError, ValueError) as e:  # outro profiler já ativo nesta thread
+            logger.warning("Perfilamento de %s sem perfil de CPU: %s", self.alvo, e)
+            self._cpu = None
+            self.perfilador = None
+        self._token = _sessao_atual.set(self)
+        _ligar_ouvintes()
+        self._ativa = True
+        self._inicio = time.perf_counter()
+        return self
+
+    def parar(self):
+        """Encerra a coleta (idempotente)."""
+        if not self._ativa:
+            return
+        self._ativa = False
+        self.duracao = time.perf_counter() - self._inicio
+        _desligar_ouvintes()
+        try:
+            _sessao_atual.reset(self._token)
+        except ValueError:  # encerrada em outro contexto
+            _sessao_atual.set(None)
+        if self.perfilador == 'pyinstrument':
+            self._cpu.stop()
+        elif self.perfilador == 'cprofile':
+            self._cpu.disable()
+
+    def registrar_sql(self, statement, segundos):
+        with self._lock:
+            grupo = self.sql.get(statement)
+            if grupo is None:
+                grupo = self.sql[statement] = [0, 0.0, 0.0]
+            grupo[0] += 1
+            grupo[1] += segundos
+            grupo[2] = max(grupo[2], segundos)
+            self.sql_total += 1
+            self.sql_segundos += segundos
+
+    @property
+    def formato(self):
+        return 'html' if self.perfilador == 'pyinstrument' else 'text'
+
+    def relatorio(self):
+        """Perfil de CPU: HTML do pyinstrument ou texto do pstats."""
+        if self.perfilador == 'pyinstrument':
+            return self._cpu.output_html()
+        saida = io.StringIO()
+        saida.write(f'{self.origem} {self.alvo} — {self.duracao * 1000:.0f} ms, '
+                    f'{self.sql_total} statements SQL ({self.sql_segundos * 1000:.0f} ms)\n\n')
+        if self.perfilador == 'cprofile':
+            pstats.Stats(self._cpu, stream=saida).sort_stats('cumulative').print_stats(LINHAS_PSTATS)
+        return saida.getvalue()
+
+    def grupos_sql(self):
+        grupos = sorted(self.sql.items(), key=lambda i: -i[1][1])[:MAX_GRUPOS_SQL]
+        return [{
+            'sql': statement[:MAX_TAMANHO_SQL],
+            'chamadas': chamadas,
+            'ms_total': round(segundos * 1000, 2),
+            'ms_max': round(maximo * 1000, 2),
+        } for statement, (chamadas, segundos, maximo) in grupos]
+
+    def gravar(self):
+        """Grava o RelatorioPerfil (conexão própria, fora da sessão da rotina). Retorna o id."""
+        from ..models.database import db, RelatorioPerfil
+
+        self.parar()
+        try:
+            with db.engine.begin() as conexao:
+                resultado = conexao.execute(insert(RelatorioPerfil).values(
+                    origem=self.origem,
+                    alvo=self.alvo[:300],
+                    usuario_id=self.usuario_id,
+                    perfilador=self.perfilador,
+                    formato=self.formato,
+                    duracao_ms=round(self.duracao * 1000, 1),
+                    sql_total=self.sql_total,
+                    sql_ms=round(self.sql_segundos * 1000, 1),
+                    sql=self.grupos_sql(),
+                    relatorio=self.relatorio(),
+                    created_at=datetime.now(timezone.utc),
+                ))
+            relatorio_id = resultado.inserted_primary_key[0]
+        except Exception as e:
+            logger.warning("Perfilamento: erro ao gravar relatório de %s: %s", self.alvo, e)
+            return None
+        logger.info("Perfilamento %s %s: %.0f ms, %d statements → relatório %s",
+                    self.origem, self.alvo, self.duracao * 1000, self.sql_total, relatorio_id)
+        return relatorio_id
+
+
+@contextmanager
+def perfilar(origem, alvo, usuario_id=None):
+    """Perfila o bloco e grava o relatório ao sair (inclusive quando levanta exceção)."""
+    sessao = SessaoPerfil(origem, alvo, usuario_id).iniciar()
+    try:
+        yield sessao
+    finally:
+        sessao.id = sessao.gravar()
+
+
+# ============================================================
+# JOBS
+# ============================================================
+
+def perfilavel(funcao):
+    """
+    Decorator de jobs: com perfilar=True (ou um rótulo) nos kwargs, roda a
+    execução perfilada. Sem app context ativo, usa o kwarg `app` do job.
+    """
+    @functools.wraps(funcao)
+    def wrapper(*args, **kwargs):
+        rotulo = kwargs.pop('perfilar', None)
+        if not rotulo:
+            return funcao(*args, **kwargs)
+        from flask import has_app_context
+
+        app = kwargs.get('app')
+        contexto = app.app_context() if app is not None and not has_app_context() else nullcontext()
+        alvo = rotulo if isinstance(rotulo, str) else funcao.__name__
+        with contexto, perfilar('job', alvo):
+            return funcao(*args, **kwargs)
+    return wrapper
+
+
+# ============================================================
+# REQUESTS
+# ============================================================
+
+def usuario_admin():
+    """Usuário do JWT do request atual, se for admin ativo; None caso contrário."""
+    from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+    from ..models.database import db, Usuario
+
+    try:
+        verify_jwt_in_request(optional=True)
+        identidade = get_jwt_identity()
+    except Exception:
+        return None
+    if identidade is None:
+        return None
+    usuario = db.session.get(Usuario, int(identidade))
+    if usuario is None or not usuario.ativo or usuario.perfil != 'admin':
+        return None
+    return usuario
+
+
+def admin_requerido(view):
+    """Decorator de rotas: 403 para quem não é admin (usar abaixo de @jwt_required)."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        from flask import jsonify
+
+        if usuario_admin() is None:
+            return jsonify({'error': 'Restrito a administradores'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def init_perfilamento(app):
+    """Registra os hooks de perfilamento sob demanda dos requests."""
+    from flask import g, jsonify, request
+
+    @app.before_request
+    def iniciar_perfil_request():
+        if request.method == 'OPTIONS' or not (
+                request.headers.get(HEADER) or request.args.get(PARAMETRO)):
+            return None
+        usuario = usuario_admin()
+        if usuario is None:
+            return jsonify({'error': 'Perfilamento restrito a administradores'}), 403
+        g.sgl_perfil = SessaoPerfil('request', f'{request.method} {request.path}', usuario.id).iniciar()
+        return None
+
+    @app.after_request
+    def gravar_perfil_request(response):
+        sessao = g.pop('sgl_perfil', None)
+        if sessao is not None:
+            relatorio_id = sessao.gravar()
+            if relatorio_id is not None:
+                response.headers['X-SGL-Perfil-Id'] = str(relatorio_id)
+        return response
+
+    @app.teardown_request
+    def encerrar_perfil_request(exc):
+        sessao = g.pop('sgl_perfil', None)
+        if sessao is not None:
+            sessao.parar()
@@ -0,0 +1,46 @@
+"""
+SGL - Progresso de execuções longas (captação, pipelines de documentos)
+
+Os clientes e integrações chamam `notificar(evento, **dados)` em pontos de
+progresso (página buscada, registro salvo). Quem executa a rotina — ex.: o
+orquestrador de captação — instala um callback para a thread atual com
+`acompanhar(callback)`. Sem callback instalado, `notificar` não faz nada:
+as chamadas diretas (rotas por plataforma, scheduler) não mudam.
+"""
+import threading
+from contextlib import contextmanager
+
+_local = threading.local()
+
+# Contadores de stats repassados no evento 'registros'
+CONTADORES_REGISTRO = ('novos_salvos', 'duplicados', 'filtrados', 'erros')
+
+
+@contextmanager
+def acompanhar(callback):
+    """Instala `callback(evento, dados)` para as notificações desta thread."""
+    anterior = getattr(_local, 'callback', None)
+    _local.callback = callback
+    try:
+        yield
+    finally:
+        _local.callback = anterior
+
+
+def notificar(evento, **dados):
+    """Repassa um evento de progresso ao callback da thread (se houver)."""
+    callback = getattr(_local, 'callback', None)
+    if callback is not None:
+        callback(evento, dados)
+
+
+def iterar_registros(registros, stats):
+    """
+    Itera `registros` notificando, após cada um, os contadores atuais de
+    `stats` (evento 'registros'). Funciona com `continue` no corpo do loop.
+    """
+    total = len(registros)
+    for processados, registro in enumerate(registros, start=1):
+        yield registro
+        notificar('registros', processados=processados, total=total,
+                  **{k: stats.get(k, 0) for k in CONTADORES_REGISTRO})
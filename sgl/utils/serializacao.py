@@ -0,0 +1,119 @@
+"""
+SGL - Serialização rápida para endpoints de listagem
+
+As listagens selecionam apenas as colunas necessárias (tuplas/Row, sem
+instanciar objetos ORM) e serializam com orjson. Decimal vira float via
+hook `default`; datetime é tratado nativamente pelo orjson (ISO 8601,
+mesmo formato de `isoformat()`).
+
+Suporta sparse fieldsets: `?fields=id,objeto_resumo,uf` restringe as
+colunas selecionadas no banco e as chaves do JSON.
+"""
+import json
+from decimal import Decimal
+
+from flask import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+
+def _default(obj):
+    """Hook para tipos que o orjson não serializa nativamente."""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    raise TypeError(f'Tipo não serializável: {type(obj).__name__}')
+
+
+if orjson is not None:
+    def dumps(payload) -> bytes:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_NON_STR_KEYS)
+else:
+    def dumps(payload) -> bytes:
+        return json.dumps(payload, default=_default, ensure_ascii=False).encode('utf-8')
+
+
+def json_response(payload, status=200):
+    """Equivalente a jsonify(), serializado com orjson."""
+    return Response(dumps(payload), status=status, mimetype='application/json')
+
+
+# ============================================================
+# SPARSE FIELDSETS
+# ============================================================
+
+def resolver_campos(colunas: dict, fields_param=None, obrigatorios=('id',)) -> list:
+    """
+    Resolve o parâmetro `fields=` contra o mapa de colunas disponíveis.
+
+    Args:
+        colunas: dict ordenado {nome_campo: coluna SQLAlchemy}
+        fields_param: string "a,b,c" (None/vazio = todos os campos)
+        obrigatorios: campos sempre incluídos
+
+    Returns:
+        lista de nomes de campos, na ordem do mapa (campos desconhecidos são ignorados)
+    """
+    if not fields_param:
+        return list(colunas)
+    pedidos = {f.strip() for f in fields_param.split(',') if f.strip()}
+    pedidos.update(obrigatorios)
+    return [nome for nome in colunas if nome in pedidos]
+
+
+def linhas_para_dicts(linhas, campos: list) -> list:
+    """Converte tuplas/Row (na ordem de `campos`) em dicts prontos para o dumps."""
+    return [dict(zip(campos, linha)) for linha in linhas]
+
+
+# ============================================================
+# MAPAS DE COLUNAS
+# ============================================================
+
+def colunas_edital() -> dict:
+    """Colunas do Edital expostas nas listagens (mesmas chaves de Edital.to_dict())."""
+    from ..models.database import Edital
+    return {
+        'id': Edital.id,
+        'numero_controle_pncp': Edital.numero_controle_pncp,
+        'numero_pregao': Edital.numero_pregao,
+        'numero_processo': Edital.numero_processo,
+        'orgao_razao_social': Edital.orgao_razao_social,
+        'orgao_cnpj': Edital.orgao_cnpj,
+        'unidade_nome': Edital.unidade_nome,
+        'uf': Edital.uf,
+        'municipio': Edital.municipio,
+        'objeto_resumo': Edital.objeto_resumo,
+        'modalidade_nome': Edital.modalidade_nome,
+        'srp': Edital.srp,
+        'data_publicacao': Edital.data_publicacao,
+        'data_abertura_proposta': Edital.data_abertura_proposta,
+        'data_certame': Edital.data_certame,
+        'data_encerramento_proposta': Edital.data_encerramento_proposta,
+        'valor_estimado': Edital.valor_estimado,
+        'plataforma_origem': Edital.plataforma_origem,
+        'url_original': Edital.url_original,
+        'link_sistema_origem': Edital.link_sistema_origem,
+        'status': Edital.status,
+        'grupo_similar_id': Edital.grupo_similar_id,
+        'created_at': Edital.created_at,
+    }
+
+
+def colunas_triagem() -> dict:
+    """Colunas da Triagem (mesmas chaves de Triagem.to_dict()). Requer outer join com Usuario."""
+    from ..models.database import Triagem, Usuario
+    return {
+        'id': Triagem.id,
+        'edital_id': Triagem.edital_id,
+        'decisao': Triagem.decisao,
+        'motivo_rejeicao': Triagem.motivo_rejeicao,
+        'observacoes': Triagem.observacoes,
+        'prioridade': Triagem.prioridade,
+        'data_triagem': Triagem.data_triagem,
+        'triador': Usuario.nome,
+    }
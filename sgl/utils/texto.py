@@ -0,0 +1,27 @@
+"""
+SGL - Normalização de texto para comparação (objeto de editais, palavras-chave)
+
+Sem acentos, minúsculo, separado em palavras alfanuméricas e sem as
+palavras frequentes que não distinguem um objeto do outro. Usado pelo
+MinHash dos quase duplicados e pelo percolador de filtros — os dois lados
+de uma comparação precisam passar pela mesma normalização.
+"""
+import re
+import unicodedata
+
+STOPWORDS = frozenset(
+    'a o as os de da do das dos e em no na nos nas para por com ao aos um uma '
+    'que ou se sua seu suas seus conforme'.split()
+)
+
+_SEPARADOR = re.compile(r'[^a-z0-9]+')
+
+
+def normalizar(texto):
+    """Sem acentos e em minúsculas."""
+    return unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode().lower()
+
+
+def palavras(texto):
+    """Palavras normalizadas do texto, na ordem, sem stopwords."""
+    return [p for p in _SEPARADOR.split(normalizar(texto)) if p and p not in STOPWORDS]